@@ -16,15 +16,16 @@ import (
 )
 
 // LogEntry 日志条目结构
+// ID 为 ObjectID（服务端生成）或字符串（客户端生成的 ULID）
 type LogEntry struct {
-	ID          primitive.ObjectID `json:"id" bson:"_id,omitempty"`
-	ServiceName string             `json:"service_name" bson:"service_name"`
-	Level       interface{}        `json:"level" bson:"level"`
-	Message     string             `json:"message" bson:"message"`
-	Timestamp   time.Time          `json:"timestamp" bson:"timestamp"`
-	Metadata    map[string]string  `json:"metadata" bson:"metadata"`
-	TraceID     string             `json:"trace_id" bson:"trace_id"`
-	SpanID      string             `json:"span_id" bson:"span_id"`
+	ID          interface{}       `json:"id" bson:"_id,omitempty"`
+	ServiceName string            `json:"service_name" bson:"service_name"`
+	Level       interface{}       `json:"level" bson:"level"`
+	Message     string            `json:"message" bson:"message"`
+	Timestamp   time.Time         `json:"timestamp" bson:"timestamp"`
+	Metadata    map[string]string `json:"metadata" bson:"metadata"`
+	TraceID     string            `json:"trace_id" bson:"trace_id"`
+	SpanID      string            `json:"span_id" bson:"span_id"`
 }
 
 // IndexInfo 索引信息结构
@@ -58,14 +59,25 @@ type IndexStats struct {
 
 // LogEntryResponse 日志条目响应结构（用于API返回，level转换为字符串）
 type LogEntryResponse struct {
-	ID          primitive.ObjectID `json:"id"`
-	ServiceName string             `json:"service_name"`
-	Level       string             `json:"level"`
-	Message     string             `json:"message"`
-	Timestamp   time.Time          `json:"timestamp"`
-	Metadata    map[string]string  `json:"metadata"`
-	TraceID     string             `json:"trace_id"`
-	SpanID      string             `json:"span_id"`
+	ID          interface{}       `json:"id"`
+	ServiceName string            `json:"service_name"`
+	Level       string            `json:"level"`
+	Message     string            `json:"message"`
+	Timestamp   time.Time         `json:"timestamp"`
+	Metadata    map[string]string `json:"metadata"`
+	TraceID     string            `json:"trace_id"`
+	SpanID      string            `json:"span_id"`
+}
+
+// parseLogID 解析路径中的日志ID：24 位十六进制为 ObjectID，否则按客户端生成的字符串ID处理
+func parseLogID(id string) (interface{}, bool) {
+	if objID, err := primitive.ObjectIDFromHex(id); err == nil {
+		return objID, true
+	}
+	if id == "" || len(id) > 128 {
+		return nil, false
+	}
+	return id, true
 }
 
 // convertLevelToString 将level转换为字符串
@@ -168,7 +180,7 @@ func (s *Server) createLog(c *gin.Context) {
 		return
 	}
 
-	logEntry.ID = result.InsertedID.(primitive.ObjectID)
+	logEntry.ID = result.InsertedID
 	c.JSON(http.StatusCreated, logEntry)
 }
 
@@ -288,16 +300,15 @@ func (s *Server) queryLogs(c *gin.Context) {
 
 // getLogById 根据ID获取日志
 func (s *Server) getLogById(c *gin.Context) {
-	id := c.Param("id")
-	objID, err := primitive.ObjectIDFromHex(id)
-	if err != nil {
+	logID, ok := parseLogID(c.Param("id"))
+	if !ok {
 		c.JSON(http.StatusBadRequest, gin.H{"error": "Invalid log ID"})
 		return
 	}
 
 	collection := s.db.Collection("logs")
 	var log LogEntry
-	err = collection.FindOne(context.Background(), bson.M{"_id": objID}).Decode(&log)
+	err := collection.FindOne(context.Background(), bson.M{"_id": logID}).Decode(&log)
 	if err != nil {
 		if err == mongo.ErrNoDocuments {
 			c.JSON(http.StatusNotFound, gin.H{"error": "Log not found"})
@@ -312,15 +323,14 @@ func (s *Server) getLogById(c *gin.Context) {
 
 // deleteLog 删除日志
 func (s *Server) deleteLog(c *gin.Context) {
-	id := c.Param("id")
-	objID, err := primitive.ObjectIDFromHex(id)
-	if err != nil {
+	logID, ok := parseLogID(c.Param("id"))
+	if !ok {
 		c.JSON(http.StatusBadRequest, gin.H{"error": "Invalid log ID"})
 		return
 	}
 
 	collection := s.db.Collection("logs")
-	result, err := collection.DeleteOne(context.Background(), bson.M{"_id": objID})
+	result, err := collection.DeleteOne(context.Background(), bson.M{"_id": logID})
 	if err != nil {
 		c.JSON(http.StatusInternalServerError, gin.H{"error": "Failed to delete log"})
 		return
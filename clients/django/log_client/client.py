@@ -7,16 +7,98 @@ Django Log Service Client
 """
 
 import grpc
+import os
 import time
+import random
+import asyncio
 import threading
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 from django.conf import settings
 
 # 导入生成的 protobuf 类
 import log_service_pb2
 import log_service_pb2_grpc
 
+# 可重试的 gRPC 状态码：请求可能没有到达服务端，或服务端暂时过载
+RETRYABLE_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+)
+
+# ULID 使用的 Crockford base32 字母表
+_CROCKFORD32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last = [0, 0]  # [上次的毫秒时间戳, 上次的随机部分]
+
+
+def new_ulid() -> str:
+    """
+    生成单调递增的 ULID（48 位毫秒时间戳 + 80 位随机数，Crockford base32 编码，26 个字符）
+    
+    同一毫秒内（或时钟回拨时）沿用上次的时间戳并把随机部分加一，保证同一进程内生成的 ID 严格递增
+    """
+    with _ulid_lock:
+        now_ms = int(time.time() * 1000)
+        last_ms, last_random = _ulid_last
+        if now_ms <= last_ms:
+            now_ms = last_ms
+            random_part = last_random + 1
+            if random_part >> 80:
+                now_ms += 1
+                random_part = int.from_bytes(os.urandom(10), "big")
+        else:
+            random_part = int.from_bytes(os.urandom(10), "big")
+        _ulid_last[0], _ulid_last[1] = now_ms, random_part
+    
+    value = (now_ms << 80) | random_part
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD32[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def factor_common_metadata(request) -> Dict[str, str]:
+    """
+    把批次内所有日志都相同的 metadata 键值对提取到 request.common_metadata，并从各条日志中删除
+    
+    服务端入队时再合并回每条日志（日志自身的值优先），主机名、版本号等每条都重复的键只在批次上传输一次；
+    请求中的日志是副本，调用方的 LogEntry 不受影响；与请求已有的 common_metadata 同名的键取日志中的值，与服务端合并结果一致
+    
+    Returns:
+        Dict[str, str]: 提取出的共享键值对
+    """
+    entries = request.log_entries
+    count = len(entries)
+    if count < 2:
+        return {}
+    # 候选键先与最后一条比较：多数键每条不同的批次在这里就返回，不逐条访问日志
+    last = entries[count - 1].metadata
+    items = [(key, value) for key, value in entries[0].metadata.items() if last.get(key) == value]
+    if not items:
+        return {}
+    for index in range(1, count - 1):
+        metadata = entries[index].metadata
+        # 常见情况是所有候选键都仍然相同，逐个比较到第一个不同为止
+        for key, value in items:
+            if metadata.get(key) != value:
+                break
+        else:
+            continue
+        items = [(key, value) for key, value in items if metadata.get(key) == value]
+        if not items:
+            return {}
+    common = dict(items)
+    for entry in entries:
+        metadata = entry.metadata
+        for key in common:
+            del metadata[key]
+    request.common_metadata.update(common)
+    return common
+
 
 class DjangoLogServiceClient:
     """Django 日志服务客户端 - 线程安全的单例"""
@@ -35,6 +117,13 @@ class DjangoLogServiceClient:
     def __init__(self):
         if not self._initialized:
             self.server_address = getattr(settings, 'LOG_SERVICE_GRPC_SERVER', 'localhost:50051')
+            # 单次调用超时（秒）和可重试错误的重试次数
+            self.timeout = getattr(settings, 'LOG_SERVICE_GRPC_TIMEOUT', 10.0)
+            self.max_retries = getattr(settings, 'LOG_SERVICE_GRPC_MAX_RETRIES', 3)
+            self.initial_backoff = getattr(settings, 'LOG_SERVICE_GRPC_RETRY_BACKOFF', 0.1)
+            self.max_backoff = getattr(settings, 'LOG_SERVICE_GRPC_RETRY_MAX_BACKOFF', 2.0)
+            # 批量写入时把所有日志相同的 metadata 提取到 common_metadata
+            self.factor_metadata = getattr(settings, 'LOG_SERVICE_FACTOR_METADATA', True)
             self.channel = None
             self.stub = None
             self._connect()
@@ -45,6 +134,12 @@ class DjangoLogServiceClient:
         try:
             self.channel = grpc.insecure_channel(self.server_address)
             self.stub = log_service_pb2_grpc.LogServiceStub(self.channel)
+            # 发送已编码请求（bytes）的 BatchWriteLog，不再经过请求对象的序列化
+            self._batch_write_serialized = self.channel.unary_unary(
+                '/logservice.LogService/BatchWriteLog',
+                request_serializer=None,
+                response_deserializer=log_service_pb2.BatchWriteLogResponse.FromString,
+            )
             print(f"Connected to log service at {self.server_address}")
         except Exception as e:
             print(f"Failed to connect to log service: {e}")
@@ -56,21 +151,36 @@ class DjangoLogServiceClient:
             self.channel.close()
             print("Disconnected from log service")
     
-    def write_log(self, message: str, **kwargs) -> Dict[str, Any]:
+    def _call(self, method, request):
         """
-        写入日志的封装函数
+        调用 gRPC 方法，对可重试的错误按带抖动的指数退避重试
+        
+        method 为方法名或 gRPC 可调用对象；重试复用同一个请求对象，日志 ID 保持不变，
+        服务端以 ID 作为主键去重，重试不会产生重复日志
+        """
+        rpc = getattr(self.stub, method) if isinstance(method, str) else method
+        backoff = self.initial_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                return rpc(request, timeout=self.timeout)
+            except grpc.RpcError as e:
+                if attempt >= self.max_retries or e.code() not in RETRYABLE_CODES:
+                    raise
+            time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, self.max_backoff)
+    
+    @staticmethod
+    def build_log_entry(message: str, **kwargs) -> log_service_pb2.LogEntry:
+        """
+        构造 LogEntry
         
         Args:
             message (str): 日志消息
-            **kwargs: 其他参数，其中：
-                - service_name, level, trace_id, span_id 会作为 gRPC 参数
-                - 其他所有参数会放入 metadata
-        
-        Returns:
-            Dict[str, Any]: 写入结果
+            **kwargs: log_id, service_name, level, trace_id, span_id 作为 LogEntry 字段，其余参数放入 metadata；
+                未提供 log_id 时生成 ULID
         """
-        
         # 提取特定的 gRPC 参数
+        log_id = kwargs.pop('log_id', '') or new_ulid()
         service_name = kwargs.pop('service_name', 'django-service')
         level = kwargs.pop('level', log_service_pb2.LogLevel.INFO)
         trace_id = kwargs.pop('trace_id', '')
@@ -90,20 +200,37 @@ class DjangoLogServiceClient:
             }
             level = level_map.get(level.upper(), log_service_pb2.LogLevel.INFO)
         
-        log_entry = log_service_pb2.LogEntry(
+        return log_service_pb2.LogEntry(
+            id=log_id,
             service_name=service_name,
             level=level,
             message=message,
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp_unix_nano=time.time_ns(),
             metadata=metadata,
             trace_id=trace_id,
             span_id=span_id
         )
+    
+    def write_log(self, message: str, **kwargs) -> Dict[str, Any]:
+        """
+        写入日志的封装函数
+        
+        Args:
+            message (str): 日志消息
+            **kwargs: 其他参数，其中：
+                - log_id, service_name, level, trace_id, span_id 会作为 gRPC 参数，未提供 log_id 时生成 ULID
+                - 其他所有参数会放入 metadata
+        
+        Returns:
+            Dict[str, Any]: 写入结果
+        """
+        
+        log_entry = self.build_log_entry(message, **kwargs)
         
         request = log_service_pb2.WriteLogRequest(log_entry=log_entry)
         
         try:
-            response = self.stub.WriteLog(request)
+            response = self._call("WriteLog", request)
             return {
                 "success": response.success,
                 "log_id": response.log_id,
@@ -121,6 +248,227 @@ class DjangoLogServiceClient:
                 "log_id": "",
                 "error_message": f"Error: {str(e)}"
             }
+    
+    def batch_write_entries(self, log_entries: List[log_service_pb2.LogEntry],
+                            common_metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        通过一次 BatchWriteLog 调用写入已构造好的 LogEntry 列表
+        
+        Returns:
+            Dict[str, Any]: 写入结果（success, log_ids, error_message）
+        """
+        request = log_service_pb2.BatchWriteLogRequest(log_entries=log_entries, common_metadata=common_metadata)
+        if self.factor_metadata:
+            factor_common_metadata(request)
+        try:
+            response = self._call("BatchWriteLog", request)
+            return {
+                "success": response.success,
+                "log_ids": list(response.log_ids),
+                "error_message": response.error_message
+            }
+        except grpc.RpcError as e:
+            return {
+                "success": False,
+                "log_ids": [],
+                "error_message": f"gRPC error: {e.details()}"
+            }
+
+    
+    def batch_write_serialized(self, payload: bytes) -> log_service_pb2.BatchWriteLogResponse:
+        """
+        发送已编码的 BatchWriteLogRequest（如在工作进程中编码好的请求），gRPC 错误重试后以 grpc.RpcError 抛出
+        """
+        return self._call(self._batch_write_serialized, payload)
+
+class AioLogServiceClient:
+    """
+    基于 grpc.aio 的日志服务客户端 - 线程安全的单例
+    
+    进程内只有一个后台线程运行 asyncio 事件循环，gRPC 通道和所有调用都在这个循环上执行：
+    同步代码通过 submit() 提交写入并拿到 Future，异步视图通过 awrite_log() 等待结果，
+    等待中的写入不占用线程，同时在途的写入数由 LOG_SERVICE_GRPC_MAX_IN_FLIGHT 限制
+    """
+    
+    _instance = None
+    _lock = threading.Lock()
+    
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(AioLogServiceClient, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+    
+    def __init__(self):
+        if not self._initialized:
+            self.server_address = getattr(settings, 'LOG_SERVICE_GRPC_SERVER', 'localhost:50051')
+            self.timeout = getattr(settings, 'LOG_SERVICE_GRPC_TIMEOUT', 10.0)
+            self.max_retries = getattr(settings, 'LOG_SERVICE_GRPC_MAX_RETRIES', 3)
+            self.initial_backoff = getattr(settings, 'LOG_SERVICE_GRPC_RETRY_BACKOFF', 0.1)
+            self.max_backoff = getattr(settings, 'LOG_SERVICE_GRPC_RETRY_MAX_BACKOFF', 2.0)
+            self.max_in_flight = getattr(settings, 'LOG_SERVICE_GRPC_MAX_IN_FLIGHT', 1000)
+            self.factor_metadata = getattr(settings, 'LOG_SERVICE_FACTOR_METADATA', True)
+            self.channel = None
+            self.stub = None
+            self.loop = asyncio.new_event_loop()
+            self._ready = threading.Event()
+            self._connect_error: Optional[BaseException] = None
+            self._thread = threading.Thread(target=self._run_loop, name="log-service-aio", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+            if self._connect_error is not None:
+                # 后台线程已退出，下次构造时重新创建事件循环和线程
+                raise self._connect_error
+            self._initialized = True
+    
+    def _run_loop(self):
+        """后台线程：在事件循环上创建 gRPC 通道，然后一直运行循环；创建通道失败时把异常交给构造方"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._connect())
+        except BaseException as e:
+            self._connect_error = e
+            self.loop.close()
+            return
+        finally:
+            self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+    
+    async def _connect(self):
+        """连接到 gRPC 服务器（grpc.aio 通道必须在它所属的事件循环上创建）"""
+        self.channel = grpc.aio.insecure_channel(self.server_address)
+        self.stub = log_service_pb2_grpc.LogServiceStub(self.channel)
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        print(f"Connected to log service at {self.server_address} (grpc.aio)")
+    
+    def disconnect(self):
+        """关闭通道并停止后台事件循环"""
+        if self.channel and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.channel.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            # 关闭后的 grpc.aio 通道留到解释器退出时才回收会报错，这里释放引用
+            self.channel = None
+            self.stub = None
+            print("Disconnected from log service")
+    
+    async def _call(self, method: str, request):
+        """在后台事件循环上调用 gRPC 方法，重试策略与 DjangoLogServiceClient._call 相同"""
+        backoff = self.initial_backoff
+        async with self._in_flight:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await getattr(self.stub, method)(request, timeout=self.timeout)
+                except grpc.aio.AioRpcError as e:
+                    if attempt >= self.max_retries or e.code() not in RETRYABLE_CODES:
+                        raise
+                await asyncio.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, self.max_backoff)
+    
+    async def _write(self, log_entry: log_service_pb2.LogEntry) -> Dict[str, Any]:
+        request = log_service_pb2.WriteLogRequest(log_entry=log_entry)
+        try:
+            response = await self._call("WriteLog", request)
+            return {
+                "success": response.success,
+                "log_id": response.log_id,
+                "error_message": response.error_message
+            }
+        except grpc.aio.AioRpcError as e:
+            return {
+                "success": False,
+                "log_id": "",
+                "error_message": f"gRPC error: {e.details()}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "log_id": "",
+                "error_message": f"Error: {str(e)}"
+            }
+    
+    def submit(self, message: str, **kwargs) -> Future:
+        """
+        提交一条写入，立即返回 concurrent.futures.Future（结果同 write_log）
+        
+        LogEntry 在调用方线程构造，时间戳为调用时刻；参数同 DjangoLogServiceClient.write_log
+        """
+        log_entry = DjangoLogServiceClient.build_log_entry(message, **kwargs)
+        return asyncio.run_coroutine_threadsafe(self._write(log_entry), self.loop)
+    
+    async def _batch_write(self, log_entries: List[log_service_pb2.LogEntry],
+                           common_metadata: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        request = log_service_pb2.BatchWriteLogRequest(log_entries=log_entries, common_metadata=common_metadata)
+        if self.factor_metadata:
+            factor_common_metadata(request)
+        try:
+            response = await self._call("BatchWriteLog", request)
+            return {
+                "success": response.success,
+                "log_ids": list(response.log_ids),
+                "error_message": response.error_message
+            }
+        except grpc.aio.AioRpcError as e:
+            return {
+                "success": False,
+                "log_ids": [],
+                "error_message": f"gRPC error: {e.details()}"
+            }
+    
+    def submit_batch(self, log_entries: List[log_service_pb2.LogEntry],
+                     common_metadata: Optional[Dict[str, str]] = None) -> Future:
+        """提交一次 BatchWriteLog，立即返回 Future（结果含 success, log_ids, error_message）"""
+        return asyncio.run_coroutine_threadsafe(self._batch_write(log_entries, common_metadata), self.loop)
+    
+    def write_log(self, message: str, **kwargs) -> Dict[str, Any]:
+        """同步写入：提交到后台事件循环并等待结果"""
+        return self.submit(message, **kwargs).result()
+    
+    async def awrite_log(self, message: str, **kwargs) -> Dict[str, Any]:
+        """异步写入：可在任意事件循环（如 ASGI 服务器的循环）中 await"""
+        return await asyncio.wrap_future(self.submit(message, **kwargs))
+
+
+class RequestLogBuffer:
+    """
+    一个请求内写入的日志，由 TailSamplingMiddleware 创建（尾部采样）
+    
+    缓冲区存放在 ContextVar 中，同步视图（线程）和异步视图（任务）各自隔离；
+    超过 max_entries 后只保留不低于 min_level 的日志
+    """
+    
+    def __init__(self, trace_id: str, max_entries: int, min_level: int):
+        self.trace_id = trace_id
+        self.max_entries = max_entries
+        self.min_level = min_level
+        self.entries: List[log_service_pb2.LogEntry] = []
+        self.dropped = 0
+    
+    def add(self, message: str, **kwargs) -> Dict[str, Any]:
+        """缓冲一条日志，没有 trace_id 时使用请求的 trace_id，返回值与 write_log 相同"""
+        log_entry = DjangoLogServiceClient.build_log_entry(message, **kwargs)
+        if not log_entry.trace_id:
+            log_entry.trace_id = self.trace_id
+        if len(self.entries) >= self.max_entries and log_entry.level < self.min_level:
+            self.dropped += 1
+        else:
+            self.entries.append(log_entry)
+        return {
+            "success": True,
+            "log_id": log_entry.id,
+            "error_message": "",
+            "buffered": True
+        }
+
+
+# 当前请求的日志缓冲区，不在 TailSamplingMiddleware 处理的请求中时为 None
+request_log_buffer: ContextVar[Optional[RequestLogBuffer]] = ContextVar("log_service_request_buffer", default=None)
 
 
 # 全局客户端实例
@@ -138,10 +486,26 @@ def get_log_client() -> DjangoLogServiceClient:
     return _log_client
 
 
+_aio_log_client = None
+
+
+def get_aio_log_client() -> AioLogServiceClient:
+    """获取 grpc.aio 日志客户端实例（线程安全），首次调用时启动后台事件循环线程"""
+    global _aio_log_client
+    if _aio_log_client is None:
+        with _client_lock:
+            if _aio_log_client is None:
+                _aio_log_client = AioLogServiceClient()
+    return _aio_log_client
+
+
 def write_log(message: str, **kwargs) -> Dict[str, Any]:
     """
     便捷的日志写入函数
     
+    LOG_SERVICE_GRPC_AIO 为 True 时写入提交到 grpc.aio 后台事件循环执行，调用方线程只等待结果
+    在 TailSamplingMiddleware 处理的请求中，日志先进入请求缓冲区，请求结束时由中间件决定是否发送
+    
     Args:
         message (str): 日志消息
         **kwargs: 其他参数，包括：
@@ -154,5 +518,204 @@ def write_log(message: str, **kwargs) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: 写入结果
     """
+    buffer = request_log_buffer.get()
+    if buffer is not None:
+        return buffer.add(message, **kwargs)
+    if getattr(settings, 'LOG_SERVICE_GRPC_AIO', False):
+        return get_aio_log_client().write_log(message, **kwargs)
     client = get_log_client()
     return client.write_log(message, **kwargs)
+
+
+def submit_log(message: str, **kwargs) -> Future:
+    """
+    提交日志写入，不等待结果（参数同 write_log）
+    
+    写入在后台事件循环上执行，不占用调用方线程；需要结果时调用返回值的 result()
+    
+    Returns:
+        concurrent.futures.Future: 结果为 write_log 的返回值
+    """
+    buffer = request_log_buffer.get()
+    if buffer is not None:
+        future = Future()
+        future.set_result(buffer.add(message, **kwargs))
+        return future
+    return get_aio_log_client().submit(message, **kwargs)
+
+
+async def awrite_log(message: str, **kwargs) -> Dict[str, Any]:
+    """
+    异步视图使用的日志写入函数（参数同 write_log）
+    
+    Returns:
+        Dict[str, Any]: 写入结果
+    """
+    buffer = request_log_buffer.get()
+    if buffer is not None:
+        return buffer.add(message, **kwargs)
+    return await get_aio_log_client().awrite_log(message, **kwargs)
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩百分位数（sorted_values 已升序）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class _PipelineStats:
+    """批量写入流水线的结果统计，同步和异步流水线共用"""
+    
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.log_ids: List[str] = []
+        self.errors: List[str] = []
+        self.total = 0
+        self.success = 0
+        self.batches = 0
+    
+    def submitted(self, size: int):
+        self.total += size
+        self.batches += 1
+    
+    def record(self, latency: float, size: int, result: Dict[str, Any]):
+        """记录一个批次的结果"""
+        self.latencies.append(latency)
+        if result["success"]:
+            self.success += size
+        else:
+            # 部分入队失败时 log_ids 为已入队的日志
+            self.success += len(result["log_ids"])
+            self.errors.append(result["error_message"])
+        if len(self.log_ids) < 10:
+            self.log_ids.extend(result["log_ids"][:10 - len(self.log_ids)])
+    
+    def summary(self, batch_size: int, max_in_flight: int, duration: float, cpu: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "total_count": self.total,
+            "success_count": self.success,
+            "failed_count": self.total - self.success,
+            "batch_size": batch_size,
+            "batches": self.batches,
+            "max_in_flight": max_in_flight,
+            "duration_seconds": round(duration, 3),
+            "logs_per_second": round(self.success / duration, 2) if duration > 0 else 0,
+            "batch_latency_ms": {
+                "p50": round(_percentile(latencies, 50) * 1000, 2),
+                "p90": round(_percentile(latencies, 90) * 1000, 2),
+                "p99": round(_percentile(latencies, 99) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            },
+            "cpu_us_per_log": round(cpu / self.total * 1e6, 2) if self.total else 0.0,
+            "sample_log_ids": self.log_ids,
+            "sample_errors": self.errors[:5],
+        }
+
+
+def _batches(log_entries: Iterable[log_service_pb2.LogEntry], batch_size: int) -> Iterator[List[log_service_pb2.LogEntry]]:
+    """按需从 log_entries 取出日志，每 batch_size 条产出一个批次"""
+    batch = []
+    for log_entry in log_entries:
+        batch.append(log_entry)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_batch_pipeline(log_entries: Iterable[log_service_pb2.LogEntry], batch_size: int = 500,
+                       max_in_flight: int = 4) -> Dict[str, Any]:
+    """
+    把日志合并为 BatchWriteLog 调用批量写入，最多 max_in_flight 个批次同时在途
+    
+    log_entries 可以是生成器，按需取出，内存中最多有 (max_in_flight + 1) 个批次；
+    LOG_SERVICE_GRPC_AIO 为 True 时批次提交到 grpc.aio 后台事件循环，否则由 max_in_flight 个线程发送
+    
+    Returns:
+        Dict[str, Any]: 写入条数、成功 / 失败条数、耗时、吞吐、批次延迟百分位数（毫秒）、
+            每条日志的进程 CPU 时间（微秒）、前 10 个日志 ID 和前 5 条错误
+    """
+    executor = None
+    if getattr(settings, 'LOG_SERVICE_GRPC_AIO', False):
+        submit = get_aio_log_client().submit_batch
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="log-batch")
+        submit = lambda batch: executor.submit(get_log_client().batch_write_entries, batch)
+    
+    in_flight = {}  # Future -> (提交时间, 条数)
+    completed_at = {}  # Future -> 完成时间
+    stats = _PipelineStats()
+    
+    def on_done(future):
+        # 完成回调中记录完成时间，延迟不受主线程取结果时机影响
+        completed_at[future] = time.perf_counter()
+    
+    def collect(done):
+        for future in done:
+            started, size = in_flight.pop(future)
+            # 主线程可能先于完成回调被唤醒，此时以当前时间为完成时间
+            latency = (completed_at.pop(future, None) or time.perf_counter()) - started
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "log_ids": [], "error_message": str(e)}
+            stats.record(latency, size, result)
+    
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        for batch in _batches(log_entries, batch_size):
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                collect(done)
+            started = time.perf_counter()
+            future = submit(batch)
+            in_flight[future] = (started, len(batch))
+            future.add_done_callback(on_done)
+            stats.submitted(len(batch))
+        done, _ = wait(list(in_flight))
+        collect(done)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return stats.summary(batch_size, max_in_flight, time.perf_counter() - start_time, time.process_time() - start_cpu)
+
+
+async def arun_batch_pipeline(log_entries: Iterable[log_service_pb2.LogEntry], batch_size: int = 500,
+                              max_in_flight: int = 4) -> Dict[str, Any]:
+    """
+    run_batch_pipeline 的异步版本，供异步视图使用
+    
+    批次通过 grpc.aio 后台事件循环的 submit_batch 发送，最多 max_in_flight 个批次同时在途，
+    前面的批次完成前不会取出新的日志；等待期间不占用线程
+    
+    Returns:
+        Dict[str, Any]: 同 run_batch_pipeline
+    """
+    submit_batch = get_aio_log_client().submit_batch
+    slots = asyncio.Semaphore(max_in_flight)
+    stats = _PipelineStats()
+    
+    async def send(batch):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wrap_future(submit_batch(batch))
+        except Exception as e:
+            result = {"success": False, "log_ids": [], "error_message": str(e)}
+        finally:
+            slots.release()
+        stats.record(time.perf_counter() - started, len(batch), result)
+    
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    tasks = []
+    for batch in _batches(log_entries, batch_size):
+        await slots.acquire()
+        tasks.append(asyncio.create_task(send(batch)))
+        stats.submitted(len(batch))
+    await asyncio.gather(*tasks)
+    return stats.summary(batch_size, max_in_flight, time.perf_counter() - start_time, time.process_time() - start_cpu)
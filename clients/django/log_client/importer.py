@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志文件解析（manage.py import_logs 使用）
+不依赖 Django，在 multiprocessing 工作进程中执行：按字节范围读取文件，解析为 LogEntry，
+直接编码为 BatchWriteLogRequest 字节串，主进程只负责发送
+
+支持的格式：
+- jsonl: 每行一个 JSON 对象，message / level / service_name / timestamp / trace_id / span_id / id / metadata 为日志字段，
+  其余键放入 metadata
+- text: 带时间戳和级别的文本日志（如 "2024-01-01 12:00:00,123 - app.module - ERROR - msg"、
+  "2024-01-01T12:00:00Z [WARN] msg"）和 syslog 格式；不匹配的行并入上一条日志（堆栈等多行日志），
+  文件中没有可识别的行头时每行一条日志
+
+日志 ID 由文件标识和记录起始字节偏移量确定，重复导入同一段文件时服务端按 ID 去重，不会产生重复日志
+"""
+
+import os
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+# 单条日志 message 的最大长度（多行日志超出部分截断）
+MAX_MESSAGE_BYTES = 64 * 1024
+
+# 文件内容指纹取开头的字节数
+FINGERPRINT_BYTES = 4096
+
+LEVEL_ALIASES = {
+    "TRACE": log_service_pb2.LogLevel.DEBUG,
+    "DEBUG": log_service_pb2.LogLevel.DEBUG,
+    "INFO": log_service_pb2.LogLevel.INFO,
+    "NOTICE": log_service_pb2.LogLevel.INFO,
+    "WARN": log_service_pb2.LogLevel.WARN,
+    "WARNING": log_service_pb2.LogLevel.WARN,
+    "ERROR": log_service_pb2.LogLevel.ERROR,
+    "ERR": log_service_pb2.LogLevel.ERROR,
+    "FATAL": log_service_pb2.LogLevel.FATAL,
+    "CRITICAL": log_service_pb2.LogLevel.FATAL,
+    "CRIT": log_service_pb2.LogLevel.FATAL,
+}
+
+_LEVELS = "|".join(sorted(LEVEL_ALIASES, key=len, reverse=True))
+_ISO = (r"(?P<date>\d{4}-\d{2}-\d{2})[T ](?P<time>\d{2}:\d{2}:\d{2})(?:[.,](?P<frac>\d+))?"
+        r"\s?(?P<tz>Z|[+-]\d{2}:?\d{2})?")
+
+# 文本日志行头，按顺序匹配
+TEXT_PATTERNS = [
+    # Python logging 默认格式：时间 - logger - 级别 - 消息
+    re.compile(rf"^{_ISO}\s+-\s+(?P<logger>\S+)\s+-\s+(?P<level>{_LEVELS})\s+-\s+(?P<message>.*)$", re.I),
+    # 时间 [级别] 消息 / 时间 级别 消息，级别后可带 [logger] 或 logger:
+    re.compile(rf"^{_ISO}\s+\[?(?P<level>{_LEVELS})\]?\s+(?:\[(?P<logger>[^\]]+)\]\s+|(?P<logger2>[\w.]+):\s+)?"
+               rf"(?P<message>.*)$", re.I),
+    # syslog：Jan  2 15:04:05 host program[pid]: 消息
+    re.compile(r"^(?P<syslog_ts>[A-Z][a-z]{2}\s+\d{1,2} \d{2}:\d{2}:\d{2}) (?P<host>\S+) "
+               r"(?P<program>[^:\[\s]+)(?:\[(?P<pid>\d+)\])?: (?P<message>.*)$"),
+]
+
+# JSON 中的字符串时间
+_ISO_VALUE = re.compile(rf"^\s*{_ISO}\s*$")
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+
+
+def detect_format(path: str) -> str:
+    """按扩展名推断格式"""
+    name = path.lower()
+    if name.endswith(".gz"):
+        raise ValueError(f"compressed files are not supported: {path}")
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "text"
+
+
+def file_key(path: str, fingerprint_bytes: Optional[int] = None) -> Tuple[str, int]:
+    """
+    文件标识：绝对路径 + 设备号 + inode + 开头 fingerprint_bytes 字节的内容指纹
+
+    同一路径被轮转替换后 inode 不同；copytruncate 轮转（截断后原地重写）时 inode 不变，由内容指纹区分，
+    新内容的日志 ID 不会与旧内容的 ID 相同而被服务端当作重复日志丢弃。
+    fingerprint_bytes 默认取 min(文件大小, FINGERPRINT_BYTES)，从检查点继续时传入首次导入时的值，追加写入不改变标识
+
+    Returns:
+        Tuple[str, int]: (标识, 指纹字节数)
+    """
+    stat = os.stat(path)
+    if fingerprint_bytes is None:
+        fingerprint_bytes = min(stat.st_size, FINGERPRINT_BYTES)
+    with open(path, "rb") as f:
+        head = f.read(fingerprint_bytes)
+    raw = f"{os.path.abspath(path)}:{stat.st_dev}:{stat.st_ino}:{len(head)}:".encode("utf-8") + head
+    return hashlib.sha1(raw).hexdigest()[:16], fingerprint_bytes
+
+
+def plan_chunks(path: str, start: int, size: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """把文件 [start, size) 切分为约 chunk_bytes 的字节范围"""
+    return [(offset, min(offset + chunk_bytes, size)) for offset in range(start, size, chunk_bytes)]
+
+
+def _to_unix_nano(match, utc_offset: timedelta) -> int:
+    """行头时间转为纪元纳秒，不带时区的时间按 utc_offset 解释"""
+    if match.groupdict().get("syslog_ts"):
+        month, day, clock = match.group("syslog_ts").split()
+        hour, minute, second = (int(x) for x in clock.split(":"))
+        now = datetime.now(timezone.utc)
+        parsed = datetime(now.year, _MONTHS.get(month, 1), int(day), hour, minute, second,
+                          tzinfo=timezone(utc_offset))
+        # syslog 不带年份，晚于当前时间的视为去年的日志
+        if parsed > now + timedelta(days=1):
+            parsed = parsed.replace(year=now.year - 1)
+        return int(parsed.timestamp()) * 1_000_000_000
+    year, month, day = (int(x) for x in match.group("date").split("-"))
+    hour, minute, second = (int(x) for x in match.group("time").split(":"))
+    tz = match.group("tz")
+    if tz is None:
+        tzinfo = timezone(utc_offset)
+    elif tz.upper() == "Z":
+        tzinfo = timezone.utc
+    else:
+        sign = -1 if tz[0] == "-" else 1
+        digits = tz[1:].replace(":", "")
+        tzinfo = timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
+    parsed = datetime(year, month, day, hour, minute, second, tzinfo=tzinfo)
+    frac = (match.group("frac") or "")[:9].ljust(9, "0")
+    return int(parsed.timestamp()) * 1_000_000_000 + int(frac)
+
+
+def _json_timestamp(value: Any, entry: log_service_pb2.LogEntry, utc_offset: timedelta) -> bool:
+    """
+    JSON 中的时间写入 timestamp_unix_nano，无法解析时返回 False
+
+    字符串按行头的时间格式解析（服务端只接受 RFC3339，其他格式会被当作导入时间），不带时区的按 utc_offset 解释；
+    数字（及数字字符串）按量级识别为秒 / 毫秒 / 微秒 / 纳秒
+    """
+    if isinstance(value, str):
+        match = _ISO_VALUE.match(value)
+        if match:
+            entry.timestamp_unix_nano = _to_unix_nano(match, utc_offset)
+            return True
+        try:
+            value = float(value)
+        except ValueError:
+            return False
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < 1e20:
+        return False
+    # 取放大后达到纳秒量级（1973 年以后）的最小倍数
+    for scale in (1, 1_000, 1_000_000, 1_000_000_000):
+        if value * scale >= 1e17 or scale == 1_000_000_000:
+            entry.timestamp_unix_nano = int(value * scale)
+            break
+    return True
+
+
+def _level(value: Any) -> int:
+    if isinstance(value, int) and value in log_service_pb2.LogLevel.values():
+        return value
+    return LEVEL_ALIASES.get(str(value).upper(), log_service_pb2.LogLevel.INFO)
+
+
+def parse_json_line(line: bytes, entry: log_service_pb2.LogEntry, utc_offset: timedelta = timedelta(0),
+                    stats: Optional[Dict[str, int]] = None) -> bool:
+    """解析一行 JSON 到 entry，不是 JSON 对象时返回 False；时间无法解析时计入 stats["parse_errors"]，时间留空"""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return False
+    if not isinstance(data, dict):
+        return False
+    metadata = data.pop("metadata", None)
+    for key, value in data.items():
+        if key in ("message", "msg"):
+            entry.message = str(value)
+        elif key in ("level", "levelname", "severity"):
+            entry.level = _level(value)
+        elif key in ("service_name", "service"):
+            entry.service_name = str(value)
+        elif key in ("timestamp", "time", "ts", "@timestamp", "timestamp_unix_nano"):
+            if not _json_timestamp(value, entry, utc_offset) and stats is not None:
+                stats["parse_errors"] += 1
+        elif key in ("trace_id", "span_id", "id"):
+            setattr(entry, key, str(value))
+        else:
+            entry.metadata[str(key)] = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    if isinstance(metadata, dict):
+        for key, value in metadata.items():
+            entry.metadata[str(key)] = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return True
+
+
+def match_header(line: str):
+    for pattern in TEXT_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            return match
+    return None
+
+
+def record_boundary(f, offset: int, fmt: str) -> int:
+    """
+    offset 处或之后第一条记录的起始偏移量，相邻分块以此为界，保证每条记录只属于一个分块
+
+    jsonl 为第一个行首；text 还跳过其后不是行头的行（上一条多行日志的后续行），
+    MAX_MESSAGE_BYTES 内没有行头时以第一个行首为界（没有行头的文件每行一条日志）
+    """
+    if offset <= 0:
+        return 0
+    f.seek(offset - 1)
+    if f.read(1) != b"\n":
+        f.readline()
+    first = position = f.tell()
+    if fmt != "text":
+        return first
+    while position - first < MAX_MESSAGE_BYTES:
+        line = f.readline()
+        if not line or match_header(line.decode("utf-8", "replace").rstrip("\r\n")):
+            return position
+        position += len(line)
+    return first
+
+
+def iter_lines(f, begin: int, stop: int) -> Iterator[Tuple[int, bytes]]:
+    """逐行读取 [begin, stop)，返回 (行起始偏移量, 行内容)"""
+    f.seek(begin)
+    offset = begin
+    while offset < stop:
+        line = f.readline()
+        if not line:
+            return
+        yield offset, line
+        offset += len(line)
+
+
+def iter_records(f, begin: int, stop: int, fmt: str, defaults: Dict[str, Any],
+                 stats: Dict[str, int]) -> Iterator[Tuple[int, log_service_pb2.LogEntry]]:
+    """解析 [begin, stop) 范围内的日志（两端均为记录边界），返回 (下一条记录的起始偏移量, LogEntry)"""
+    key = defaults["file_key"]
+    utc_offset = defaults["utc_offset"]
+    service_name = defaults["service_name"]
+    current = None
+    current_structured = False
+    message_parts: List[str] = []
+    message_bytes = 0
+
+    def finish(next_offset):
+        entry = current
+        if message_parts:
+            entry.message = "".join(message_parts).rstrip("\r\n")
+        return next_offset, entry
+
+    last_offset = begin
+    for offset, line in iter_lines(f, begin, stop):
+        last_offset = offset + len(line)
+        if fmt == "jsonl":
+            if not line.strip():
+                continue
+            entry = log_service_pb2.LogEntry(service_name=service_name)
+            if not parse_json_line(line, entry, utc_offset, stats):
+                stats["parse_errors"] += 1
+                continue
+            if not entry.id:
+                entry.id = f"imp-{key}-{offset:x}"
+            if not entry.timestamp_unix_nano:
+                entry.timestamp_unix_nano = defaults["fallback_time_ns"]
+            yield last_offset, entry
+            continue
+
+        text = line.decode("utf-8", "replace")
+        match = match_header(text.rstrip("\r\n"))
+        if match is None and current is not None and current_structured:
+            # 多行日志：并入上一条，超出上限的部分丢弃
+            if message_bytes < MAX_MESSAGE_BYTES:
+                message_parts.append(text)
+                message_bytes += len(line)
+            continue
+        if current is not None:
+            yield finish(offset)
+        current = log_service_pb2.LogEntry(id=f"imp-{key}-{offset:x}", service_name=service_name)
+        message_parts = []
+        message_bytes = 0
+        if match is None:
+            current_structured = False
+            current.message = text.rstrip("\r\n")
+            current.timestamp_unix_nano = defaults["fallback_time_ns"]
+            continue
+        current_structured = True
+        groups = match.groupdict()
+        current.timestamp_unix_nano = _to_unix_nano(match, utc_offset)
+        if groups.get("level"):
+            current.level = LEVEL_ALIASES[groups["level"].upper()]
+        for field in ("logger", "logger2", "host", "program", "pid"):
+            if groups.get(field):
+                current.metadata["logger" if field == "logger2" else field] = groups[field]
+        message_parts.append(groups["message"] + "\n")
+        message_bytes = len(groups["message"])
+    if current is not None:
+        yield finish(last_offset)
+
+
+def parse_chunk(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    工作进程入口：解析一个字节范围，按 batch_size 编码为 BatchWriteLogRequest
+
+    范围两端按 record_boundary 对齐到记录边界；exact_start 为 True 时 start 本身就是记录边界（从检查点继续）
+
+    Returns:
+        Dict[str, Any]: path、start、end（对齐后的结束位置）、batches（[(请求字节串, 条数, 起始偏移量, 结束偏移量)]）、
+            records、parse_errors、bytes
+    """
+    path, start, end = task["path"], task["start"], task["end"]
+    batch_size = task["batch_size"]
+    common_metadata = {"source_file": os.path.basename(path)}
+    defaults = {
+        "file_key": task["file_key"],
+        "service_name": task["service_name"],
+        "utc_offset": timedelta(minutes=task["utc_offset_minutes"]),
+        "fallback_time_ns": task["fallback_time_ns"],
+    }
+    stats = {"parse_errors": 0}
+    batches = []
+    entries = []
+    batch_start = start
+    position = start
+    records = 0
+
+    def flush():
+        request = log_service_pb2.BatchWriteLogRequest(log_entries=entries, common_metadata=common_metadata)
+        batches.append((request.SerializeToString(), len(entries), batch_start, position))
+
+    with open(path, "rb") as f:
+        begin = start if task.get("exact_start") else record_boundary(f, start, task["format"])
+        stop = record_boundary(f, end, task["format"])
+        for next_offset, entry in iter_records(f, begin, stop, task["format"], defaults, stats):
+            entries.append(entry)
+            position = next_offset
+            records += 1
+            if len(entries) >= batch_size:
+                flush()
+                entries = []
+                batch_start = position
+    # 最后一个批次覆盖到范围末尾（末尾的空行、无法解析的行），没有日志的范围返回一个空批次，
+    # 主进程据此连续推进检查点
+    position = max(position, stop)
+    if entries or not batches:
+        flush()
+    else:
+        payload, count, batch_begin, _ = batches[-1]
+        batches[-1] = (payload, count, batch_begin, position)
+    return {
+        "path": path,
+        "start": start,
+        "end": position,
+        "batches": batches,
+        "records": records,
+        "parse_errors": stats["parse_errors"],
+        "bytes": position - start,
+    }
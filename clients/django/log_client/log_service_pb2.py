@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11log_service.proto\x12\nlogservice\"\xff\x01\n\x08LogEntry\x12\n\n\x02id\x18\x01 \x01(\t\x12\x14\n\x0cservice_name\x18\x02 \x01(\t\x12#\n\x05level\x18\x03 \x01(\x0e\x32\x14.logservice.LogLevel\x12\x0f\n\x07message\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\x34\n\x08metadata\x18\x06 \x03(\x0b\x32\".logservice.LogEntry.MetadataEntry\x12\x10\n\x08trace_id\x18\x07 \x01(\t\x12\x0f\n\x07span_id\x18\x08 \x01(\t\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\":\n\x0fWriteLogRequest\x12\'\n\tlog_entry\x18\x01 \x01(\x0b\x32\x14.logservice.LogEntry\"J\n\x10WriteLogResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x0e\n\x06log_id\x18\x03 \x01(\t\"\xa7\x02\n\x0fQueryLogRequest\x12\x14\n\x0cservice_name\x18\x01 \x01(\t\x12#\n\x05level\x18\x02 \x01(\x0e\x32\x14.logservice.LogLevel\x12\x12\n\nstart_time\x18\x03 \x01(\t\x12\x10\n\x08\x65nd_time\x18\x04 \x01(\t\x12J\n\x10metadata_filters\x18\x05 \x03(\x0b\x32\x30.logservice.QueryLogRequest.MetadataFiltersEntry\x12\x10\n\x08trace_id\x18\x06 \x01(\t\x12\r\n\x05limit\x18\x07 \x01(\x05\x12\x0e\n\x06offset\x18\x08 \x01(\x05\x1a\x36\n\x14MetadataFiltersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"s\n\x10QueryLogResponse\x12\"\n\x04logs\x18\x01 \x03(\x0b\x32\x14.logservice.LogEntry\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x15\n\rerror_message\x18\x04 \x01(\t\"A\n\x14\x42\x61tchWriteLogRequest\x12)\n\x0blog_entries\x18\x01 \x03(\x0b\x32\x14.logservice.LogEntry\"P\n\x15\x42\x61tchWriteLogResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x0f\n\x07log_ids\x18\x03 \x03(\t*?\n\x08LogLevel\x12\t\n\x05\x44\x45\x42UG\x10\x00\x12\x08\n\x04INFO\x10\x01\x12\x08\n\x04WARN\x10\x02\x12\t\n\x05\x45RROR\x10\x03\x12\t\n\x05\x46\x41TAL\x10\x04\x32\xf0\x01\n\nLogService\x12\x45\n\x08WriteLog\x12\x1b.logservice.WriteLogRequest\x1a\x1c.logservice.WriteLogResponse\x12T\n\rBatchWriteLog\x12 .logservice.BatchWriteLogRequest\x1a!.logservice.BatchWriteLogResponse\x12\x45\n\x08QueryLog\x12\x1b.logservice.QueryLogRequest\x1a\x1c.logservice.QueryLogResponseB\tZ\x07./protob\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11log_service.proto\x12\nlogservice\"\x9c\x02\n\x08LogEntry\x12\n\n\x02id\x18\x01 \x01(\t\x12\x14\n\x0cservice_name\x18\x02 \x01(\t\x12#\n\x05level\x18\x03 \x01(\x0e\x32\x14.logservice.LogLevel\x12\x0f\n\x07message\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\x34\n\x08metadata\x18\x06 \x03(\x0b\x32\".logservice.LogEntry.MetadataEntry\x12\x10\n\x08trace_id\x18\x07 \x01(\t\x12\x0f\n\x07span_id\x18\x08 \x01(\t\x12\x1b\n\x13timestamp_unix_nano\x18\t \x01(\x03\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\":\n\x0fWriteLogRequest\x12\'\n\tlog_entry\x18\x01 \x01(\x0b\x32\x14.logservice.LogEntry\"J\n\x10WriteLogResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x0e\n\x06log_id\x18\x03 \x01(\t\"\x9c\x03\n\x0fQueryLogRequest\x12\x14\n\x0cservice_name\x18\x01 \x01(\t\x12#\n\x05level\x18\x02 \x01(\x0e\x32\x14.logservice.LogLevel\x12\x12\n\nstart_time\x18\x03 \x01(\t\x12\x10\n\x08\x65nd_time\x18\x04 \x01(\t\x12J\n\x10metadata_filters\x18\x05 \x03(\x0b\x32\x30.logservice.QueryLogRequest.MetadataFiltersEntry\x12\x10\n\x08trace_id\x18\x06 \x01(\t\x12\r\n\x05limit\x18\x07 \x01(\x05\x12\x0e\n\x06offset\x18\x08 \x01(\x05\x12\x1c\n\x14start_time_unix_nano\x18\t \x01(\x03\x12\x1a\n\x12\x65nd_time_unix_nano\x18\n \x01(\x03\x12\x0e\n\x06\x66ields\x18\x0b \x03(\t\x12)\n\ncount_mode\x18\x0c \x01(\x0e\x32\x15.logservice.CountMode\x1a\x36\n\x14MetadataFiltersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x97\x01\n\x10QueryLogResponse\x12\"\n\x04logs\x18\x01 \x03(\x0b\x32\x14.logservice.LogEntry\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x15\n\rerror_message\x18\x04 \x01(\t\x12\"\n\x1atotal_count_is_lower_bound\x18\x05 \x01(\x08\"W\n\x15StreamQueryLogRequest\x12*\n\x05query\x18\x01 \x01(\x0b\x32\x1b.logservice.QueryLogRequest\x12\x12\n\nchunk_size\x18\x02 \x01(\x05\"3\n\rQueryLogChunk\x12\"\n\x04logs\x18\x01 \x03(\x0b\x32\x14.logservice.LogEntry\"\xc7\x01\n\x14\x42\x61tchWriteLogRequest\x12)\n\x0blog_entries\x18\x01 \x03(\x0b\x32\x14.logservice.LogEntry\x12M\n\x0f\x63ommon_metadata\x18\x02 \x03(\x0b\x32\x34.logservice.BatchWriteLogRequest.CommonMetadataEntry\x1a\x35\n\x13\x43ommonMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"P\n\x15\x42\x61tchWriteLogResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x0f\n\x07log_ids\x18\x03 \x03(\t\"\xdb\x01\n\x15StreamWriteLogRequest\x12\x10\n\x08sequence\x18\x01 \x01(\x03\x12)\n\x0blog_entries\x18\x02 \x03(\x0b\x32\x14.logservice.LogEntry\x12N\n\x0f\x63ommon_metadata\x18\x03 \x03(\x0b\x32\x35.logservice.StreamWriteLogRequest.CommonMetadataEntry\x1a\x35\n\x13\x43ommonMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"v\n\x11StreamWriteLogAck\x12\x10\n\x08sequence\x18\x01 \x01(\x03\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x15\n\rerror_message\x18\x03 \x01(\t\x12\x16\n\x0e\x61\x63\x63\x65pted_count\x18\x04 \x01(\x05\x12\x0f\n\x07log_ids\x18\x05 \x03(\t\"\xa4\x03\n\x14\x41ggregateLogsRequest\x12\x14\n\x0cservice_name\x18\x01 \x01(\t\x12$\n\x06levels\x18\x02 \x03(\x0e\x32\x14.logservice.LogLevel\x12\x1c\n\x14start_time_unix_nano\x18\x03 \x01(\x03\x12\x1a\n\x12\x65nd_time_unix_nano\x18\x04 \x01(\x03\x12O\n\x10metadata_filters\x18\x05 \x03(\x0b\x32\x35.logservice.AggregateLogsRequest.MetadataFiltersEntry\x12\x10\n\x08trace_id\x18\x06 \x01(\t\x12\x18\n\x10group_by_service\x18\x07 \x01(\x08\x12\x16\n\x0egroup_by_level\x18\x08 \x01(\x08\x12\x16\n\x0e\x62ucket_seconds\x18\t \x01(\x03\x12\x1d\n\x15group_by_metadata_key\x18\n \x01(\t\x12\x12\n\nmax_groups\x18\x0b \x01(\x05\x1a\x36\n\x14MetadataFiltersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x93\x01\n\x0f\x41ggregateBucket\x12\x14\n\x0cservice_name\x18\x01 \x01(\t\x12#\n\x05level\x18\x02 \x01(\x0e\x32\x14.logservice.LogLevel\x12\x1e\n\x16\x62ucket_start_unix_nano\x18\x03 \x01(\x03\x12\x16\n\x0emetadata_value\x18\x04 \x01(\t\x12\r\n\x05\x63ount\x18\x05 \x01(\x03\"\x80\x01\n\x15\x41ggregateLogsResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12,\n\x07\x62uckets\x18\x03 \x03(\x0b\x32\x1b.logservice.AggregateBucket\x12\x11\n\ttruncated\x18\x04 \x01(\x08*?\n\x08LogLevel\x12\t\n\x05\x44\x45\x42UG\x10\x00\x12\x08\n\x04INFO\x10\x01\x12\x08\n\x04WARN\x10\x02\x12\t\n\x05\x45RROR\x10\x03\x12\t\n\x05\x46\x41TAL\x10\x04*A\n\tCountMode\x12\x0f\n\x0b\x43OUNT_EXACT\x10\x00\x12\x13\n\x0f\x43OUNT_ESTIMATED\x10\x01\x12\x0e\n\nCOUNT_NONE\x10\x02\x32\xf0\x03\n\nLogService\x12\x45\n\x08WriteLog\x12\x1b.logservice.WriteLogRequest\x1a\x1c.logservice.WriteLogResponse\x12T\n\rBatchWriteLog\x12 .logservice.BatchWriteLogRequest\x1a!.logservice.BatchWriteLogResponse\x12\x45\n\x08QueryLog\x12\x1b.logservice.QueryLogRequest\x1a\x1c.logservice.QueryLogResponse\x12P\n\x0eStreamQueryLog\x12!.logservice.StreamQueryLogRequest\x1a\x19.logservice.QueryLogChunk0\x01\x12V\n\x0eStreamWriteLog\x12!.logservice.StreamWriteLogRequest\x1a\x1d.logservice.StreamWriteLogAck(\x01\x30\x01\x12T\n\rAggregateLogs\x12 .logservice.AggregateLogsRequest\x1a!.logservice.AggregateLogsResponseB\tZ\x07./protob\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -36,26 +36,54 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_LOGENTRY_METADATAENTRY']._serialized_options = b'8\001'
   _globals['_QUERYLOGREQUEST_METADATAFILTERSENTRY']._loaded_options = None
   _globals['_QUERYLOGREQUEST_METADATAFILTERSENTRY']._serialized_options = b'8\001'
-  _globals['_LOGLEVEL']._serialized_start=991
-  _globals['_LOGLEVEL']._serialized_end=1054
+  _globals['_BATCHWRITELOGREQUEST_COMMONMETADATAENTRY']._loaded_options = None
+  _globals['_BATCHWRITELOGREQUEST_COMMONMETADATAENTRY']._serialized_options = b'8\001'
+  _globals['_STREAMWRITELOGREQUEST_COMMONMETADATAENTRY']._loaded_options = None
+  _globals['_STREAMWRITELOGREQUEST_COMMONMETADATAENTRY']._serialized_options = b'8\001'
+  _globals['_AGGREGATELOGSREQUEST_METADATAFILTERSENTRY']._loaded_options = None
+  _globals['_AGGREGATELOGSREQUEST_METADATAFILTERSENTRY']._serialized_options = b'8\001'
+  _globals['_LOGLEVEL']._serialized_start=2497
+  _globals['_LOGLEVEL']._serialized_end=2560
+  _globals['_COUNTMODE']._serialized_start=2562
+  _globals['_COUNTMODE']._serialized_end=2627
   _globals['_LOGENTRY']._serialized_start=34
-  _globals['_LOGENTRY']._serialized_end=289
-  _globals['_LOGENTRY_METADATAENTRY']._serialized_start=242
-  _globals['_LOGENTRY_METADATAENTRY']._serialized_end=289
-  _globals['_WRITELOGREQUEST']._serialized_start=291
-  _globals['_WRITELOGREQUEST']._serialized_end=349
-  _globals['_WRITELOGRESPONSE']._serialized_start=351
-  _globals['_WRITELOGRESPONSE']._serialized_end=425
-  _globals['_QUERYLOGREQUEST']._serialized_start=428
-  _globals['_QUERYLOGREQUEST']._serialized_end=723
-  _globals['_QUERYLOGREQUEST_METADATAFILTERSENTRY']._serialized_start=669
-  _globals['_QUERYLOGREQUEST_METADATAFILTERSENTRY']._serialized_end=723
-  _globals['_QUERYLOGRESPONSE']._serialized_start=725
-  _globals['_QUERYLOGRESPONSE']._serialized_end=840
-  _globals['_BATCHWRITELOGREQUEST']._serialized_start=842
-  _globals['_BATCHWRITELOGREQUEST']._serialized_end=907
-  _globals['_BATCHWRITELOGRESPONSE']._serialized_start=909
-  _globals['_BATCHWRITELOGRESPONSE']._serialized_end=989
-  _globals['_LOGSERVICE']._serialized_start=1057
-  _globals['_LOGSERVICE']._serialized_end=1297
+  _globals['_LOGENTRY']._serialized_end=318
+  _globals['_LOGENTRY_METADATAENTRY']._serialized_start=271
+  _globals['_LOGENTRY_METADATAENTRY']._serialized_end=318
+  _globals['_WRITELOGREQUEST']._serialized_start=320
+  _globals['_WRITELOGREQUEST']._serialized_end=378
+  _globals['_WRITELOGRESPONSE']._serialized_start=380
+  _globals['_WRITELOGRESPONSE']._serialized_end=454
+  _globals['_QUERYLOGREQUEST']._serialized_start=457
+  _globals['_QUERYLOGREQUEST']._serialized_end=869
+  _globals['_QUERYLOGREQUEST_METADATAFILTERSENTRY']._serialized_start=815
+  _globals['_QUERYLOGREQUEST_METADATAFILTERSENTRY']._serialized_end=869
+  _globals['_QUERYLOGRESPONSE']._serialized_start=872
+  _globals['_QUERYLOGRESPONSE']._serialized_end=1023
+  _globals['_STREAMQUERYLOGREQUEST']._serialized_start=1025
+  _globals['_STREAMQUERYLOGREQUEST']._serialized_end=1112
+  _globals['_QUERYLOGCHUNK']._serialized_start=1114
+  _globals['_QUERYLOGCHUNK']._serialized_end=1165
+  _globals['_BATCHWRITELOGREQUEST']._serialized_start=1168
+  _globals['_BATCHWRITELOGREQUEST']._serialized_end=1367
+  _globals['_BATCHWRITELOGREQUEST_COMMONMETADATAENTRY']._serialized_start=1314
+  _globals['_BATCHWRITELOGREQUEST_COMMONMETADATAENTRY']._serialized_end=1367
+  _globals['_BATCHWRITELOGRESPONSE']._serialized_start=1369
+  _globals['_BATCHWRITELOGRESPONSE']._serialized_end=1449
+  _globals['_STREAMWRITELOGREQUEST']._serialized_start=1452
+  _globals['_STREAMWRITELOGREQUEST']._serialized_end=1671
+  _globals['_STREAMWRITELOGREQUEST_COMMONMETADATAENTRY']._serialized_start=1314
+  _globals['_STREAMWRITELOGREQUEST_COMMONMETADATAENTRY']._serialized_end=1367
+  _globals['_STREAMWRITELOGACK']._serialized_start=1673
+  _globals['_STREAMWRITELOGACK']._serialized_end=1791
+  _globals['_AGGREGATELOGSREQUEST']._serialized_start=1794
+  _globals['_AGGREGATELOGSREQUEST']._serialized_end=2214
+  _globals['_AGGREGATELOGSREQUEST_METADATAFILTERSENTRY']._serialized_start=815
+  _globals['_AGGREGATELOGSREQUEST_METADATAFILTERSENTRY']._serialized_end=869
+  _globals['_AGGREGATEBUCKET']._serialized_start=2217
+  _globals['_AGGREGATEBUCKET']._serialized_end=2364
+  _globals['_AGGREGATELOGSRESPONSE']._serialized_start=2367
+  _globals['_AGGREGATELOGSRESPONSE']._serialized_end=2495
+  _globals['_LOGSERVICE']._serialized_start=2630
+  _globals['_LOGSERVICE']._serialized_end=3126
 # @@protoc_insertion_point(module_scope)
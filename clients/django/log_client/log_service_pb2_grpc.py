@@ -50,6 +50,21 @@ class LogServiceStub(object):
                 request_serializer=log__service__pb2.QueryLogRequest.SerializeToString,
                 response_deserializer=log__service__pb2.QueryLogResponse.FromString,
                 _registered_method=True)
+        self.StreamQueryLog = channel.unary_stream(
+                '/logservice.LogService/StreamQueryLog',
+                request_serializer=log__service__pb2.StreamQueryLogRequest.SerializeToString,
+                response_deserializer=log__service__pb2.QueryLogChunk.FromString,
+                _registered_method=True)
+        self.StreamWriteLog = channel.stream_stream(
+                '/logservice.LogService/StreamWriteLog',
+                request_serializer=log__service__pb2.StreamWriteLogRequest.SerializeToString,
+                response_deserializer=log__service__pb2.StreamWriteLogAck.FromString,
+                _registered_method=True)
+        self.AggregateLogs = channel.unary_unary(
+                '/logservice.LogService/AggregateLogs',
+                request_serializer=log__service__pb2.AggregateLogsRequest.SerializeToString,
+                response_deserializer=log__service__pb2.AggregateLogsResponse.FromString,
+                _registered_method=True)
 
 
 class LogServiceServicer(object):
@@ -77,6 +92,27 @@ class LogServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamQueryLog(self, request, context):
+        """StreamQueryLog 流式查询：单个游标遍历结果，分块推送
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamWriteLog(self, request_iterator, context):
+        """StreamWriteLog 流式写入：长连接上连续发送批次，每个批次入队后返回一条确认
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AggregateLogs(self, request, context):
+        """AggregateLogs 按服务/级别/时间桶/metadata 键分组计数
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_LogServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -95,6 +131,21 @@ def add_LogServiceServicer_to_server(servicer, server):
                     request_deserializer=log__service__pb2.QueryLogRequest.FromString,
                     response_serializer=log__service__pb2.QueryLogResponse.SerializeToString,
             ),
+            'StreamQueryLog': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamQueryLog,
+                    request_deserializer=log__service__pb2.StreamQueryLogRequest.FromString,
+                    response_serializer=log__service__pb2.QueryLogChunk.SerializeToString,
+            ),
+            'StreamWriteLog': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamWriteLog,
+                    request_deserializer=log__service__pb2.StreamWriteLogRequest.FromString,
+                    response_serializer=log__service__pb2.StreamWriteLogAck.SerializeToString,
+            ),
+            'AggregateLogs': grpc.unary_unary_rpc_method_handler(
+                    servicer.AggregateLogs,
+                    request_deserializer=log__service__pb2.AggregateLogsRequest.FromString,
+                    response_serializer=log__service__pb2.AggregateLogsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'logservice.LogService', rpc_method_handlers)
@@ -187,3 +238,84 @@ class LogService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamQueryLog(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/logservice.LogService/StreamQueryLog',
+            log__service__pb2.StreamQueryLogRequest.SerializeToString,
+            log__service__pb2.QueryLogChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamWriteLog(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/logservice.LogService/StreamWriteLog',
+            log__service__pb2.StreamWriteLogRequest.SerializeToString,
+            log__service__pb2.StreamWriteLogAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AggregateLogs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/logservice.LogService/AggregateLogs',
+            log__service__pb2.AggregateLogsRequest.SerializeToString,
+            log__service__pb2.AggregateLogsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
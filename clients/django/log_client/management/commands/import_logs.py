@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量导入日志文件
+    python manage.py import_logs "/var/log/app/*.log" "/data/export/*.jsonl" --workers 8 --senders 4
+
+文件按字节范围切分后由进程池并行解析，工作进程直接产出编码好的 BatchWriteLogRequest，
+主进程的发送线程只负责 gRPC 调用；在途的分块和批次数量有上限，内存占用与文件大小无关。
+每个文件已确认写入的字节偏移量记录在检查点文件中，中断后重新执行同一命令从检查点继续
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import heapq
+import queue
+import random
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+import grpc
+from django.core.management.base import BaseCommand, CommandError
+
+from log_client.client import get_log_client
+from log_client.importer import detect_format, file_key, parse_chunk, plan_chunks
+
+
+class FileProgress:
+    """单个文件的导入进度：批次可能乱序完成，只有连续确认的范围才推进检查点偏移量"""
+
+    def __init__(self, path: str, key: str, fingerprint_bytes: int, size: int, mtime: float, offset: int):
+        self.path = path
+        self.key = key
+        self.fingerprint_bytes = fingerprint_bytes
+        self.size = size
+        self.mtime = mtime
+        self.offset = offset
+        self._acked = []  # 已确认但尚未连续的 (起始偏移量, 结束偏移量)
+
+    def ack(self, start: int, end: int):
+        heapq.heappush(self._acked, (start, end))
+        # 分块末尾的记录可能越过分块边界，因此按 start <= offset 合并
+        while self._acked and self._acked[0][0] <= self.offset:
+            self.offset = max(self.offset, heapq.heappop(self._acked)[1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"file_key": self.key, "fingerprint_bytes": self.fingerprint_bytes, "size": self.size,
+                "mtime": self.mtime, "offset": self.offset}
+
+
+class Checkpoint:
+    """
+    检查点文件：{"files": {绝对路径: {file_key, fingerprint_bytes, size, mtime, offset}}}，通过临时文件 + rename 原子写入
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.files = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Invalid checkpoint file {path}: {e}")
+
+    def save(self, progress: List[FileProgress]):
+        for item in progress:
+            self.files[item.path] = item.to_dict()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 2, "files": self.files}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def parse_utc_offset(value: str) -> int:
+    """"+08:00" / "-0530" / "Z" 转为分钟数"""
+    if value.upper() == "Z":
+        return 0
+    match = re.fullmatch(r"([+-])(\d{2}):?(\d{2})", value)
+    if not match:
+        raise CommandError(f"Invalid --utc-offset: {value}")
+    minutes = int(match.group(2)) * 60 + int(match.group(3))
+    return -minutes if match.group(1) == "-" else minutes
+
+
+def send_batch(client, payload: bytes) -> Optional[str]:
+    """
+    发送一个编码好的批次，返回错误信息，成功时返回 None
+
+    gRPC 错误由客户端按重试策略处理；服务端返回 success=false（如缓冲区已满）时整批重发，
+    日志 ID 固定，已入队的日志由服务端按 ID 去重
+    """
+    backoff = client.initial_backoff
+    for attempt in range(client.max_retries + 1):
+        try:
+            response = client.batch_write_serialized(payload)
+        except grpc.RpcError as e:
+            return f"gRPC error: {e.details()}"
+        if response.success:
+            return None
+        if attempt < client.max_retries:
+            time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, client.max_backoff)
+    return response.error_message or "batch write failed"
+
+
+class Command(BaseCommand):
+    help = "并行导入 JSON Lines / 文本日志文件，支持断点续传"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='日志文件路径或 glob 模式（支持 **）')
+        parser.add_argument('--format', choices=['auto', 'jsonl', 'text'], default='auto',
+                            help='文件格式，auto 按扩展名判断（.jsonl/.ndjson/.json 为 jsonl）')
+        parser.add_argument('--service', default='imported', help='日志中没有服务名时使用的 service_name')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='解析进程数')
+        parser.add_argument('--senders', type=int, default=4, help='并发发送的批次数')
+        parser.add_argument('--batch-size', type=int, default=500, help='每个 BatchWriteLog 请求的日志条数')
+        parser.add_argument('--chunk-mb', type=float, default=16, help='每个解析任务的字节范围（MB）')
+        parser.add_argument('--checkpoint', default='import_logs.checkpoint.json', help='检查点文件路径')
+        parser.add_argument('--restart', action='store_true', help='忽略检查点，从文件开头重新导入')
+        parser.add_argument('--utc-offset', default='+00:00', help='不带时区的时间的 UTC 偏移，如 +08:00')
+        parser.add_argument('--progress-interval', type=float, default=5.0, help='进度输出和保存检查点的间隔（秒）')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['senders'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers, --senders and --batch-size must be positive")
+        chunk_bytes = max(1, int(options['chunk_mb'] * 1024 * 1024))
+        utc_offset_minutes = parse_utc_offset(options['utc_offset'])
+
+        paths = self.expand_paths(options['paths'])
+        checkpoint = Checkpoint(options['checkpoint'])
+        progress: Dict[str, FileProgress] = {}
+        tasks = []
+        for path in paths:
+            try:
+                fmt = options['format'] if options['format'] != 'auto' else detect_format(path)
+            except ValueError as e:
+                raise CommandError(str(e))
+            stat = os.stat(path)
+            state = None if options['restart'] else checkpoint.files.get(path)
+            start = 0
+            key, fingerprint_bytes = file_key(path)
+            if state and self.same_file(path, stat, state):
+                key, fingerprint_bytes = state["file_key"], state["fingerprint_bytes"]
+                start = state["offset"]
+            elif state:
+                self.stdout.write(f"{path}: file was truncated or replaced, importing from the beginning")
+            progress[path] = FileProgress(path, key, fingerprint_bytes, stat.st_size, stat.st_mtime, start)
+            if start >= stat.st_size:
+                self.stdout.write(f"{path}: up to date")
+                continue
+            if start:
+                self.stdout.write(f"{path}: resuming at byte {start}")
+            for chunk_start, chunk_end in plan_chunks(path, start, stat.st_size, chunk_bytes):
+                tasks.append({
+                    "path": path,
+                    "start": chunk_start,
+                    "end": chunk_end,
+                    # 检查点偏移量是已确认批次的结束位置，即记录边界，不需要再对齐
+                    "exact_start": chunk_start == start,
+                    "format": fmt,
+                    "batch_size": options['batch_size'],
+                    "file_key": key,
+                    "service_name": options['service'],
+                    "utc_offset_minutes": utc_offset_minutes,
+                    "fallback_time_ns": stat.st_mtime_ns,
+                })
+        if not tasks:
+            checkpoint.save(list(progress.values()))
+            self.stdout.write("Nothing to import")
+            return
+
+        stats = self.run(tasks, progress, checkpoint, options)
+        duration = stats['duration']
+        summary = (f"Imported {stats['sent']} of {stats['records']} logs from {len(paths)} files "
+                   f"({stats['bytes'] / 1048576:.1f} MB) in {duration:.1f}s: "
+                   f"{stats['sent'] / duration:.0f} logs/s, {stats['bytes'] / 1048576 / duration:.1f} MB/s")
+        self.stdout.write(self.style.SUCCESS(summary) if not stats['errors'] else summary)
+        if stats['parse_errors']:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['parse_errors']} unparseable lines or timestamps "
+                f"(lines skipped, timestamps replaced by the file mtime)"))
+        if stats['errors']:
+            for error in stats['errors'][:5]:
+                self.stderr.write(f"  {error}")
+            raise CommandError(
+                f"{stats['failed_batches']} batches failed; re-run the same command to resume from the checkpoint")
+
+    @staticmethod
+    def same_file(path: str, stat: os.stat_result, state: Dict[str, Any]) -> bool:
+        """
+        检查点记录的是否仍是同一个文件：变小或修改时间倒退视为新文件（copytruncate 轮转），
+        否则按首次导入时的指纹长度重新计算标识比较
+        """
+        if "fingerprint_bytes" not in state or stat.st_size < state["size"] or stat.st_mtime < state["mtime"]:
+            return False
+        if state["offset"] > stat.st_size or stat.st_size < state["fingerprint_bytes"]:
+            return False
+        return file_key(path, state["fingerprint_bytes"])[0] == state["file_key"]
+
+    def expand_paths(self, patterns: List[str]) -> List[str]:
+        paths = []
+        for pattern in patterns:
+            matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+            paths.extend(os.path.abspath(path) for path in matches if os.path.isfile(path))
+        paths = sorted(set(paths))
+        if not paths:
+            raise CommandError(f"No files matched: {' '.join(patterns)}")
+        return paths
+
+    def run(self, tasks: List[Dict[str, Any]], progress: Dict[str, FileProgress], checkpoint: Checkpoint,
+            options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        解析与发送流水线：最多 workers * 2 个分块在解析或等待发送，最多 senders * 2 个批次在途
+        """
+        stats = {"sent": 0, "records": 0, "bytes": 0, "parse_errors": 0, "failed_batches": 0, "errors": []}
+        results = queue.Queue()
+        max_chunks = options['workers'] * 2
+        max_batches = options['senders'] * 2
+        interval = options['progress_interval']
+        # 进程池先于 gRPC 连接创建，fork 出的工作进程不继承 gRPC 的线程和连接
+        pool = multiprocessing.Pool(options['workers'])
+        client = get_log_client()
+        senders = ThreadPoolExecutor(max_workers=options['senders'], thread_name_prefix="import-send")
+        in_flight = {}  # Future -> (文件进度, 起始偏移量, 结束偏移量, 条数)
+        pending_chunks = 0
+        next_task = 0
+        start_time = last_report = time.monotonic()
+
+        def collect(done):
+            for future in done:
+                item, batch_start, batch_end, count = in_flight.pop(future)
+                error = future.exception() or future.result()
+                if error:
+                    stats["failed_batches"] += 1
+                    stats["errors"].append(f"{item.path} [{batch_start}, {batch_end}): {error}")
+                else:
+                    stats["sent"] += count
+                    item.ack(batch_start, batch_end)
+
+        def report():
+            elapsed = time.monotonic() - start_time
+            self.stdout.write(
+                f"{stats['sent']} logs sent, {stats['bytes'] / 1048576:.1f} MB parsed, "
+                f"{stats['sent'] / elapsed:.0f} logs/s, {stats['bytes'] / 1048576 / elapsed:.1f} MB/s")
+            checkpoint.save(list(progress.values()))
+
+        try:
+            while next_task < len(tasks) or pending_chunks or in_flight:
+                while next_task < len(tasks) and pending_chunks < max_chunks:
+                    task = tasks[next_task]
+                    pool.apply_async(parse_chunk, (task,), callback=results.put,
+                                     error_callback=lambda e, task=task: results.put((task, e)))
+                    next_task += 1
+                    pending_chunks += 1
+
+                if pending_chunks:
+                    try:
+                        chunk = results.get(timeout=0.5)
+                    except queue.Empty:
+                        chunk = None
+                elif in_flight:
+                    collect(wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)[0])
+                    chunk = None
+
+                if isinstance(chunk, tuple):
+                    task, error = chunk
+                    pending_chunks -= 1
+                    stats["failed_batches"] += 1
+                    stats["errors"].append(f"{task['path']} [{task['start']}, {task['end']}): {error}")
+                elif chunk is not None:
+                    pending_chunks -= 1
+                    item = progress[chunk["path"]]
+                    stats["records"] += chunk["records"]
+                    stats["bytes"] += chunk["bytes"]
+                    stats["parse_errors"] += chunk["parse_errors"]
+                    for payload, count, batch_start, batch_end in chunk["batches"]:
+                        if not count:
+                            item.ack(batch_start, batch_end)
+                            continue
+                        if len(in_flight) >= max_batches:
+                            collect(wait(list(in_flight), return_when=FIRST_COMPLETED)[0])
+                        future = senders.submit(send_batch, client, payload)
+                        in_flight[future] = (item, batch_start, batch_end, count)
+
+                collect([future for future in in_flight if future.done()])
+                if time.monotonic() - last_report >= interval:
+                    last_report = time.monotonic()
+                    report()
+        finally:
+            # 中断时停止解析，等待已在发送的批次完成，把已确认的进度写入检查点
+            pool.terminate()
+            pool.join()
+            senders.shutdown(wait=True, cancel_futures=True)
+            collect([future for future in list(in_flight) if future.done() and not future.cancelled()])
+            checkpoint.save(list(progress.values()))
+
+        stats["duration"] = max(time.monotonic() - start_time, 1e-9)
+        return stats
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求级尾部采样中间件
+请求处理期间通过 write_log / awrite_log / submit_log 写入的日志先进入请求缓冲区，请求结束后：
+- 出错（状态码 >= 500 或抛出异常）、慢请求、或命中采样率的请求：整个缓冲区作为一次 BatchWriteLog 发送
+- 其他请求：只发送 WARN 及以上级别的日志
+发送通过 grpc.aio 后台事件循环异步执行，不增加响应延迟
+"""
+
+import time
+import zlib
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from .client import RequestLogBuffer, get_aio_log_client, new_ulid, request_log_buffer
+
+
+class TailSamplingMiddleware:
+    """
+    尾部采样中间件，同时支持 WSGI 和 ASGI
+
+    设置（均可选）:
+        LOG_SERVICE_TAIL_SAMPLE_RATE: 完整发送的请求比例，按 trace_id 哈希决定，同一 trace 在各服务的决定一致
+        LOG_SERVICE_TAIL_SLOW_SECONDS: 处理时间不低于该值的请求完整发送
+        LOG_SERVICE_TAIL_MIN_LEVEL: 未被采样的请求只发送不低于该级别的日志
+        LOG_SERVICE_TAIL_MAX_BUFFER: 每个请求缓冲的日志条数上限，超出后只保留不低于 MIN_LEVEL 的日志
+        LOG_SERVICE_TAIL_EXCLUDE_PATHS: 不缓冲的路径前缀（如日志写入接口本身）
+        LOG_SERVICE_TAIL_TRACE_HEADER: 请求 trace_id 的来源请求头，没有时生成 ULID
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'LOG_SERVICE_TAIL_SAMPLE_RATE', 0.01)
+        self.slow_seconds = getattr(settings, 'LOG_SERVICE_TAIL_SLOW_SECONDS', 1.0)
+        self.min_level = log_service_pb2.LogLevel.Value(getattr(settings, 'LOG_SERVICE_TAIL_MIN_LEVEL', 'WARN'))
+        self.max_buffer = getattr(settings, 'LOG_SERVICE_TAIL_MAX_BUFFER', 1000)
+        self.exclude_paths = tuple(getattr(settings, 'LOG_SERVICE_TAIL_EXCLUDE_PATHS', ()))
+        self.trace_header = getattr(settings, 'LOG_SERVICE_TAIL_TRACE_HEADER', 'X-Request-ID')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path.startswith(self.exclude_paths):
+            return self.get_response(request)
+        buffer = self._new_buffer(request)
+        token = request_log_buffer.set(buffer)
+        start = time.monotonic()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            request_log_buffer.reset(token)
+            self._ship(request, buffer, status, time.monotonic() - start)
+
+    async def __acall__(self, request):
+        if request.path.startswith(self.exclude_paths):
+            return await self.get_response(request)
+        buffer = self._new_buffer(request)
+        token = request_log_buffer.set(buffer)
+        start = time.monotonic()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            request_log_buffer.reset(token)
+            self._ship(request, buffer, status, time.monotonic() - start)
+
+    def _new_buffer(self, request) -> RequestLogBuffer:
+        trace_id = request.headers.get(self.trace_header) or new_ulid()
+        return RequestLogBuffer(trace_id, self.max_buffer, self.min_level)
+
+    def sample_reason(self, trace_id: str, status: int, duration: float) -> Optional[str]:
+        """完整发送的原因：error / slow / sampled，不完整发送时返回 None"""
+        if status >= 500:
+            return "error"
+        if duration >= self.slow_seconds:
+            return "slow"
+        if zlib.crc32(trace_id.encode("utf-8")) % 10000 < self.sample_rate * 10000:
+            return "sampled"
+        return None
+
+    def _ship(self, request, buffer: RequestLogBuffer, status: int, duration: float):
+        """按采样决定发送缓冲区，请求的公共信息放在 common_metadata 中只传输一次"""
+        if not buffer.entries:
+            return
+        reason = self.sample_reason(buffer.trace_id, status, duration)
+        if reason:
+            entries = buffer.entries
+        else:
+            entries = [entry for entry in buffer.entries if entry.level >= self.min_level]
+            if not entries:
+                return
+        common_metadata = {
+            "http_method": request.method,
+            "http_path": request.path,
+            "http_status": str(status),
+            "duration_ms": str(int(duration * 1000)),
+            "tail_sample": reason or "level",
+        }
+        if buffer.dropped:
+            common_metadata["tail_dropped"] = str(buffer.dropped)
+        future = get_aio_log_client().submit_batch(entries, common_metadata)
+        future.add_done_callback(_report_failure)
+
+
+def _report_failure(future):
+    """发送失败时输出错误信息（在后台事件循环线程中调用）"""
+    try:
+        result = future.result()
+    except Exception as e:
+        print(f"Failed to ship request logs: {e}")
+        return
+    if not result["success"]:
+        print(f"Failed to ship request logs: {result['error_message']}")
@@ -5,4 +5,8 @@ urlpatterns = [
     path('write_log/', views.write_log_view, name='write_log'),
     path('batch_write_test/', views.batch_write_test_view, name='batch_write_test'),
     path('concurrent_test/', views.concurrent_test_view, name='concurrent_test'),
+    # 异步视图（ASGI 部署时不占用线程），通过 grpc.aio 后台事件循环写入
+    path('async/write_log/', views.async_write_log_view, name='async_write_log'),
+    path('async/batch_write_test/', views.async_batch_write_test_view, name='async_batch_write_test'),
+    path('async/concurrent_test/', views.async_concurrent_test_view, name='async_concurrent_test'),
 ]
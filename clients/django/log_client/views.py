@@ -1,12 +1,69 @@
 import json
 import time
 import random
-import concurrent.futures
+import asyncio
 from datetime import datetime
-from django.http import JsonResponse
+from functools import wraps
+from django.http import HttpResponseNotAllowed, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from .client import write_log
+from .client import DjangoLogServiceClient, arun_batch_pipeline, awrite_log, run_batch_pipeline, write_log
+
+
+def async_api_view(request_method_list):
+    """
+    异步视图装饰器：免 CSRF 校验并限制请求方法
+    
+    Django 4.2 的 csrf_exempt / require_http_methods 返回同步函数，用在 async def 视图上会使其被当作同步视图
+    """
+    def decorator(func):
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                return HttpResponseNotAllowed(request_method_list)
+            return await func(request, *args, **kwargs)
+        inner.csrf_exempt = True
+        return inner
+    return decorator
+
+
+def batch_test_log(i: int, count: int):
+    """批量写入测试的第 i 条日志，返回 (message, 其余参数)"""
+    test_data = {
+        'service_name': 'django-batch-test',
+        'level': random.choice(['DEBUG', 'INFO', 'WARN', 'ERROR']),
+        'trace_id': f'batch-trace-{i+1:06d}',
+        'span_id': f'batch-span-{i+1:06d}',
+        'adv_id': random.randint(1000000, 9999999),
+        'aweme_id': random.randint(100000000, 999999999),
+        'plan_id': random.randint(10000, 99999),
+        'monitor_type': random.choice(['impression', 'click', 'conversion', 'view']),
+        'co_id': random.randint(1000, 9999),
+        'batch_id': f'batch-{int(time.time())}-{i+1}',
+        'timestamp': datetime.now().isoformat(),
+    }
+    message = f"批量测试日志 {i+1}/{count} - {test_data['monitor_type']} event"
+    return message, test_data
+
+
+def concurrent_test_log(index: int, total_count: int, max_workers: int):
+    """并发写入测试的第 index 条日志，返回 (message, 其余参数)"""
+    test_data = {
+        'service_name': 'django-concurrent-test',
+        'level': random.choice(['DEBUG', 'INFO', 'WARN', 'ERROR']),
+        'trace_id': f'concurrent-trace-{index:06d}',
+        'span_id': f'concurrent-span-{index:06d}',
+        'adv_id': random.randint(1000000, 9999999),
+        'aweme_id': random.randint(100000000, 999999999),
+        'plan_id': random.randint(10000, 99999),
+        'monitor_type': random.choice(['impression', 'click', 'conversion', 'view']),
+        'co_id': random.randint(1000, 9999),
+        'request_id': f'req-{int(time.time())}-{index}',
+        'thread_id': f'thread-{index % max_workers}',
+        'timestamp': datetime.now().isoformat(),
+    }
+    message = f"并发测试日志 {index}/{total_count} - {test_data['monitor_type']} event from {test_data['service_name']}"
+    return message, test_data
 
 
 @csrf_exempt
@@ -43,13 +100,21 @@ def write_log_view(request):
         }, status=500)
 
 
+def test_log_entries(count: int, make_log):
+    """按需生成测试日志的 LogEntry，make_log(i) 返回 (message, 其余参数)"""
+    for i in range(count):
+        message, test_data = make_log(i)
+        yield DjangoLogServiceClient.build_log_entry(message, **test_data)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def batch_write_test_view(request):
-    """批量写入测试接口"""
+    """批量写入测试接口：测试日志按 batch_size 合并为 BatchWriteLog，逐批发送"""
     try:
         data = json.loads(request.body)
         count = data.get('count', 100)
+        batch_size = data.get('batch_size', 500)
         
         if count > 10000:
             return JsonResponse({
@@ -57,44 +122,76 @@ def batch_write_test_view(request):
                 'error': 'Count cannot exceed 10000'
             }, status=400)
         
-        results = []
-        start_time = time.time()
+        entries = test_log_entries(count, lambda i: batch_test_log(i, count))
+        stats = run_batch_pipeline(entries, batch_size=batch_size, max_in_flight=1)
         
-        for i in range(count):
-            # 生成测试数据
-            test_data = {
-                'service_name': 'django-batch-test',
-                'level': random.choice(['DEBUG', 'INFO', 'WARN', 'ERROR']),
-                'trace_id': f'batch-trace-{i+1:06d}',
-                'span_id': f'batch-span-{i+1:06d}',
-                'adv_id': random.randint(1000000, 9999999),
-                'aweme_id': random.randint(100000000, 999999999),
-                'plan_id': random.randint(10000, 99999),
-                'monitor_type': random.choice(['impression', 'click', 'conversion', 'view']),
-                'co_id': random.randint(1000, 9999),
-                'batch_id': f'batch-{int(time.time())}-{i+1}',
-                'timestamp': datetime.now().isoformat(),
-            }
-            
-            message = f"批量测试日志 {i+1}/{count} - {test_data['monitor_type']} event"
-            
-            result = write_log(message, **test_data)
-            results.append(result)
+        return JsonResponse({'success': True, **stats})
+    
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON'
+        }, status=400)
+    
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def concurrent_test_view(request):
+    """并发写入测试接口：测试日志按 batch_size 合并为 BatchWriteLog，最多 max_workers 个批次同时在途"""
+    try:
+        data = json.loads(request.body)
+        total_count = data.get('count', 10000)
+        max_workers = data.get('max_workers', 8)  # 同时在途的批次数
+        batch_size = data.get('batch_size', 500)
         
-        end_time = time.time()
-        duration = end_time - start_time
+        if total_count > 10000:
+            return JsonResponse({
+                'success': False,
+                'error': 'Count cannot exceed 10000'
+            }, status=400)
         
-        success_count = sum(1 for r in results if r.get('success'))
+        entries = test_log_entries(total_count, lambda i: concurrent_test_log(i + 1, total_count, max_workers))
+        stats = run_batch_pipeline(entries, batch_size=batch_size, max_in_flight=max_workers)
         
+        return JsonResponse({'success': True, 'test_type': 'concurrent', **stats})
+    
+    except json.JSONDecodeError:
         return JsonResponse({
-            'success': True,
-            'total_count': count,
-            'success_count': success_count,
-            'failed_count': count - success_count,
-            'duration_seconds': round(duration, 3),
-            'logs_per_second': round(success_count / duration, 2) if duration > 0 else 0,
-            'results': results[:10]  # 只返回前10条结果作为示例
-        })
+            'success': False,
+            'error': 'Invalid JSON'
+        }, status=400)
+    
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@async_api_view(["POST"])
+async def async_write_log_view(request):
+    """单条日志写入接口（异步视图，通过 grpc.aio 后台事件循环写入）"""
+    try:
+        data = json.loads(request.body)
+        message = data.get('message', '')
+        
+        if not message:
+            return JsonResponse({
+                'success': False,
+                'error': 'Message is required'
+            }, status=400)
+        
+        kwargs = {k: v for k, v in data.items() if k != 'message'}
+        
+        result = await awrite_log(message, **kwargs)
+        
+        return JsonResponse(result)
     
     except json.JSONDecodeError:
         return JsonResponse({
@@ -109,14 +206,45 @@ def batch_write_test_view(request):
         }, status=500)
 
 
-@csrf_exempt
-@require_http_methods(["POST"])
-def concurrent_test_view(request):
-    """并发写入测试接口 - 1万次并发调用"""
+@async_api_view(["POST"])
+async def async_batch_write_test_view(request):
+    """批量写入测试接口（异步视图）：与 batch_write_test_view 相同，批次通过 grpc.aio 后台事件循环逐批发送"""
+    try:
+        data = json.loads(request.body)
+        count = data.get('count', 100)
+        batch_size = data.get('batch_size', 500)
+        
+        if count > 10000:
+            return JsonResponse({
+                'success': False,
+                'error': 'Count cannot exceed 10000'
+            }, status=400)
+        
+        entries = test_log_entries(count, lambda i: batch_test_log(i, count))
+        stats = await arun_batch_pipeline(entries, batch_size=batch_size, max_in_flight=1)
+        
+        return JsonResponse({'success': True, **stats})
+    
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON'
+        }, status=400)
+    
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@async_api_view(["POST"])
+async def async_concurrent_test_view(request):
+    """并发写入测试接口（异步视图），max_workers 为同时在途的写入数"""
     try:
         data = json.loads(request.body)
         total_count = data.get('count', 10000)
-        max_workers = data.get('max_workers', 50)  # 控制并发数
+        max_workers = data.get('max_workers', 50)
         
         if total_count > 10000:
             return JsonResponse({
@@ -124,76 +252,30 @@ def concurrent_test_view(request):
                 'error': 'Count cannot exceed 10000'
             }, status=400)
         
-        def write_single_log(index):
-            """写入单条日志的函数"""
-            try:
-                # 生成测试数据
-                test_data = {
-                    'service_name': 'django-concurrent-test',
-                    'level': random.choice(['DEBUG', 'INFO', 'WARN', 'ERROR']),
-                    'trace_id': f'concurrent-trace-{index:06d}',
-                    'span_id': f'concurrent-span-{index:06d}',
-                    'adv_id': random.randint(1000000, 9999999),
-                    'aweme_id': random.randint(100000000, 999999999),
-                    'plan_id': random.randint(10000, 99999),
-                    'monitor_type': random.choice(['impression', 'click', 'conversion', 'view']),
-                    'co_id': random.randint(1000, 9999),
-                    'request_id': f'req-{int(time.time())}-{index}',
-                    'thread_id': f'thread-{index % max_workers}',
-                    'timestamp': datetime.now().isoformat(),
-                }
-                
-                message = f"并发测试日志 {index}/{total_count} - {test_data['monitor_type']} event from {test_data['service_name']}"
-                
-                return write_log(message, **test_data)
-            
-            except Exception as e:
-                return {
-                    'success': False,
-                    'log_id': '',
-                    'error_message': str(e)
-                }
+        semaphore = asyncio.Semaphore(max_workers)
+        
+        async def write_single_log(index):
+            async with semaphore:
+                message, test_data = concurrent_test_log(index, total_count, max_workers)
+                return await awrite_log(message, **test_data)
         
         start_time = time.time()
-        results = []
-        
-        # 使用线程池并发执行
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_index = {
-                executor.submit(write_single_log, i): i 
-                for i in range(1, total_count + 1)
-            }
-            
-            # 收集结果
-            for future in concurrent.futures.as_completed(future_to_index):
-                index = future_to_index[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    results.append({
-                        'success': False,
-                        'log_id': '',
-                        'error_message': f'Future exception: {str(e)}'
-                    })
-        
-        end_time = time.time()
-        duration = end_time - start_time
+        results = await asyncio.gather(*[write_single_log(i) for i in range(1, total_count + 1)])
+        duration = time.time() - start_time
         
         success_count = sum(1 for r in results if r.get('success'))
         failed_count = total_count - success_count
         
         return JsonResponse({
             'success': True,
-            'test_type': 'concurrent',
+            'test_type': 'async_concurrent',
             'total_count': total_count,
             'success_count': success_count,
             'failed_count': failed_count,
             'max_workers': max_workers,
             'duration_seconds': round(duration, 3),
             'logs_per_second': round(success_count / duration, 2) if duration > 0 else 0,
-            'sample_results': results[:10],  # 前10条结果作为示例
+            'sample_results': results[:10],
             'error_summary': {
                 'total_errors': failed_count,
                 'sample_errors': [r.get('error_message', '') for r in results if not r.get('success')][:5]
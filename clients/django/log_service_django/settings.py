@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -125,3 +126,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Log Service gRPC Configuration
 LOG_SERVICE_GRPC_SERVER = "localhost:50051"
+# 为 True 时同步的 write_log() 也通过 grpc.aio 后台事件循环写入，等待中的写入不占用线程池线程
+LOG_SERVICE_GRPC_AIO = os.getenv("LOG_SERVICE_GRPC_AIO", "0") == "1"
+# grpc.aio 后台事件循环上同时在途的写入数上限
+LOG_SERVICE_GRPC_MAX_IN_FLIGHT = int(os.getenv("LOG_SERVICE_GRPC_MAX_IN_FLIGHT", "1000"))
+# 批量写入时把批次内所有日志都相同的 metadata 提取到 common_metadata
+LOG_SERVICE_FACTOR_METADATA = os.getenv("LOG_SERVICE_FACTOR_METADATA", "1") == "1"
+
+# 请求级尾部采样（环境变量 LOG_SERVICE_TAIL_SAMPLING=1 启用）：请求内的日志先缓冲，
+# 出错 / 慢请求 / 命中采样率时整批发送，否则只发送 WARN 及以上级别
+if os.getenv("LOG_SERVICE_TAIL_SAMPLING", "0") == "1":
+    MIDDLEWARE.insert(0, 'log_client.middleware.TailSamplingMiddleware')
+LOG_SERVICE_TAIL_SAMPLE_RATE = float(os.getenv("LOG_SERVICE_TAIL_SAMPLE_RATE", "0.01"))
+LOG_SERVICE_TAIL_SLOW_SECONDS = float(os.getenv("LOG_SERVICE_TAIL_SLOW_SECONDS", "1.0"))
+LOG_SERVICE_TAIL_MIN_LEVEL = "WARN"
+LOG_SERVICE_TAIL_MAX_BUFFER = 1000
+# 日志写入接口转发调用方的日志，不参与采样
+LOG_SERVICE_TAIL_EXCLUDE_PATHS = ['/api/write_log/', '/api/async/write_log/', '/admin/']
@@ -71,6 +71,7 @@ class DjangoLogServiceTester:
             print(f"总耗时: {end_time - start_time:.3f} 秒")
             print(f"成功写入: {result.get('success_count', 0)}/{result.get('total_count', 0)}")
             print(f"写入速度: {result.get('logs_per_second', 0)} logs/second")
+            self._print_pipeline_stats(result)
             
             return result.get('success', False)
         
@@ -78,9 +79,17 @@ class DjangoLogServiceTester:
             print(f"请求失败: {e}")
             return False
     
-    def test_concurrent_write(self, count: int = 10000, max_workers: int = 50):
+    @staticmethod
+    def _print_pipeline_stats(result: dict):
+        """输出批量流水线的批次延迟和 CPU 开销"""
+        latency = result.get('batch_latency_ms', {})
+        print(f"批次: {result.get('batches', 0)} × {result.get('batch_size', 0)} 条")
+        print(f"批次延迟: p50 {latency.get('p50', 0)} ms / p90 {latency.get('p90', 0)} ms / p99 {latency.get('p99', 0)} ms")
+        print(f"CPU: {result.get('cpu_us_per_log', 0)} µs/条")
+    
+    def test_concurrent_write(self, count: int = 10000, max_workers: int = 8):
         """测试并发写入"""
-        print(f"\n=== 测试3: 并发写入 {count} 条日志 (最大 {max_workers} 个线程) ===")
+        print(f"\n=== 测试3: 并发写入 {count} 条日志 (最多 {max_workers} 个批次在途) ===")
         
         url = f"{self.base_url}/api/concurrent_test/"
         data = {
@@ -102,16 +111,14 @@ class DjangoLogServiceTester:
             print(f"成功写入: {result.get('success_count', 0)}/{result.get('total_count', 0)}")
             print(f"失败数量: {result.get('failed_count', 0)}")
             print(f"写入速度: {result.get('logs_per_second', 0)} logs/second")
-            print(f"并发线程数: {result.get('max_workers', 0)}")
+            print(f"在途批次数: {result.get('max_in_flight', 0)}")
+            self._print_pipeline_stats(result)
             
             # 显示错误示例（如果有）
-            error_summary = result.get('error_summary', {})
-            if error_summary.get('total_errors', 0) > 0:
-                print(f"错误总数: {error_summary['total_errors']}")
+            if result.get('sample_errors'):
                 print("错误示例:")
-                for i, error in enumerate(error_summary.get('sample_errors', [])[:3], 1):
-                    if error:
-                        print(f"  {i}. {error}")
+                for i, error in enumerate(result['sample_errors'][:3], 1):
+                    print(f"  {i}. {error}")
             
             return result.get('success', False)
         
@@ -233,7 +240,7 @@ def main():
         tests_passed += 1
     
     # 测试3: 并发写入测试 (较小规模)
-    if tester.test_concurrent_write(count=1000, max_workers=20):
+    if tester.test_concurrent_write(count=1000, max_workers=4):
         tests_passed += 1
     
     # 测试4: 手动并发请求
@@ -250,7 +257,7 @@ def main():
         choice = input("\n是否运行大规模并发测试 (1万次)? [y/N]: ").lower()
         if choice == 'y':
             print("\n开始大规模并发测试...")
-            tester.test_concurrent_write(count=10000, max_workers=50)
+            tester.test_concurrent_write(count=10000, max_workers=8)
     else:
         print("❌ 部分测试失败，请检查服务器状态")
 
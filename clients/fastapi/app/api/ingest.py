@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WebSocket 流式写入路由
+生产者保持一条长连接发送分帧的批次，服务端通过 BatchWriteLog 转发后按序号确认
+
+帧格式：
+- 文本帧（JSON）: {"seq": 1, "logs": [{"message": "...", "service_name": "...", "level": "INFO", "metadata": {...}}, ...]}
+- 二进制帧: 8 字节大端无符号序号 + 序列化的 BatchWriteLogRequest（common_metadata 合并到每条日志）
+
+服务端消息（文本帧 JSON）：
+- {"type": "hello", "window": 8, "max_batch": 1000}            连接建立后发送一次
+- {"type": "ack", "seq": 1, "count": 100}                     批次写入成功
+- {"type": "nack", "seq": 1, "error": "...", "retry_after": 0.5} 批次写入失败或被准入控制拒绝
+
+流量控制：每个连接最多 window 个未确认批次，达到上限后服务端暂停读取该连接，
+由 TCP 背压让生产者放慢发送；确认可能乱序到达
+"""
+
+import asyncio
+import json
+import struct
+from typing import List, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from ..services.log_client import AsyncLogServiceClient, get_log_client
+from ..services.admission import AdmissionRejected, get_admission_controller
+from ..core.config import settings
+
+router = APIRouter()
+
+# 二进制帧头：8 字节大端无符号序号
+FRAME_HEADER = struct.Struct(">Q")
+
+
+class FrameError(Exception):
+    """帧格式错误"""
+
+    def __init__(self, message: str, seq: Optional[int] = None):
+        self.seq = seq
+        super().__init__(message)
+
+
+def decode_frame(message: dict) -> tuple:
+    """
+    解析一帧数据
+
+    Args:
+        message: websocket.receive() 返回的 ASGI 消息
+
+    Returns:
+        tuple: (seq, LogEntry 列表)
+
+    Raises:
+        FrameError: 帧格式错误
+    """
+    data = message.get("bytes")
+    if data is not None:
+        if len(data) < FRAME_HEADER.size:
+            raise FrameError("二进制帧长度不足")
+        (seq,) = FRAME_HEADER.unpack_from(data)
+        try:
+            request = log_service_pb2.BatchWriteLogRequest.FromString(data[FRAME_HEADER.size:])
+        except Exception as e:
+            raise FrameError(f"protobuf 解析失败: {e}", seq)
+        entries = list(request.log_entries)
+        common = dict(request.common_metadata)
+        if common:
+            # 与服务端 mergeMetadata 一致：日志自身的同名键优先；转发时再按批次重新提取共享键
+            for entry in entries:
+                metadata = entry.metadata
+                for key, value in common.items():
+                    if key not in metadata:
+                        metadata[key] = value
+        return seq, entries
+
+    try:
+        frame = json.loads(message.get("text") or "")
+    except ValueError as e:
+        raise FrameError(f"JSON 解析失败: {e}")
+    if not isinstance(frame, dict) or not isinstance(frame.get("seq"), int):
+        raise FrameError("JSON 帧缺少整数 seq 字段")
+    seq = frame["seq"]
+    logs = frame.get("logs")
+    if not isinstance(logs, list):
+        raise FrameError("JSON 帧缺少 logs 列表", seq)
+
+    entries = []
+    for item in logs:
+        if not isinstance(item, dict):
+            raise FrameError("logs 中的条目必须是对象", seq)
+        item = dict(item)
+        # 合并 metadata，与 /batch 接口一致
+        metadata = item.pop("metadata", None)
+        if isinstance(metadata, dict):
+            item.update(metadata)
+        message_text = str(item.pop("message", ""))
+        entries.append(AsyncLogServiceClient.build_log_entry(message_text, **item))
+    return seq, entries
+
+
+class IngestConnection:
+    """单个 WebSocket 连接的写入会话"""
+
+    def __init__(self, websocket: WebSocket, window: int, max_batch: int):
+        self.websocket = websocket
+        self.window = window
+        self.max_batch = max_batch
+        self.client = get_log_client(settings.GRPC_SERVER_ADDRESS)
+        self.controller = get_admission_controller()
+        self._credits = asyncio.Semaphore(window)
+        self._send_lock = asyncio.Lock()
+        self._tasks = set()
+        self._closed = False
+
+    async def send(self, payload: dict):
+        """发送一条服务端消息（多个批次任务并发确认，需串行发送）"""
+        if self._closed:
+            return
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(json.dumps(payload, ensure_ascii=False))
+            except Exception:
+                # 连接已断开，后续确认全部丢弃
+                self._closed = True
+
+    async def run(self):
+        """读取循环：每读取一帧消耗一个窗口额度，批次确认后归还"""
+        await self.send({"type": "hello", "window": self.window, "max_batch": self.max_batch})
+        try:
+            while True:
+                await self._credits.acquire()
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    self._credits.release()
+                    break
+
+                try:
+                    seq, entries = decode_frame(message)
+                except FrameError as e:
+                    self._credits.release()
+                    await self.send({"type": "nack", "seq": e.seq, "error": str(e)})
+                    continue
+
+                if not entries or len(entries) > self.max_batch:
+                    self._credits.release()
+                    await self.send({
+                        "type": "nack", "seq": seq,
+                        "error": f"批次大小必须在 1 到 {self.max_batch} 之间: {len(entries)}",
+                    })
+                    continue
+
+                task = asyncio.create_task(self._forward(seq, entries))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._closed = True
+            # 已读取的批次继续写入，只是不再发送确认
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _forward(self, seq: int, entries: List[log_service_pb2.LogEntry]):
+        """通过 BatchWriteLog 转发一个批次并确认"""
+        try:
+            async with self.controller.admit("stream"):
+                result = await self.client.batch_write_entries(entries)
+        except AdmissionRejected as e:
+            await self.send({"type": "nack", "seq": seq, "error": str(e), "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            result = {"success": False, "error_message": f"Error: {str(e)}"}
+        finally:
+            self._credits.release()
+
+        if result["success"]:
+            await self.send({"type": "ack", "seq": seq, "count": len(entries)})
+        else:
+            await self.send({"type": "nack", "seq": seq, "error": result["error_message"]})
+
+
+@router.websocket("/stream")
+async def stream_ingest(websocket: WebSocket):
+    """
+    WebSocket 流式写入
+
+    一条连接上持续发送分帧批次（JSON 或 protobuf），每个批次通过一次 BatchWriteLog 转发，
+    按序号返回 ack/nack；每个连接最多 WS_WINDOW 个未确认批次
+    """
+    await websocket.accept()
+    connection = IngestConnection(websocket, settings.WS_WINDOW, settings.MAX_BATCH_SIZE)
+    await connection.run()
@@ -6,22 +6,40 @@
 """
 
 import asyncio
+import grpc
+import json
 import time
 import random
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 导入生成的 protobuf 类
+import log_service_pb2
 
 from ..models.schemas import (
     LogWriteRequest, LogWriteResponse,
     BatchLogWriteRequest, BatchLogWriteResponse, 
     ConcurrentTestRequest, ConcurrentTestResponse,
-    HealthResponse
+    HealthResponse, LogQueryResponse, LogAggregateResponse
+)
+from ..services.log_client import (
+    write_log, batch_write_logs, get_log_client, log_entry_to_dict, aggregate_columns, LOG_FIELD_GETTERS,
 )
-from ..services.log_client import write_log, batch_write_logs, get_log_client
+from ..services.health import get_health_monitor
+from ..services.admission import AdmissionRejected, get_admission_controller
+from ..services.tail import get_tail_hub, format_sse
+from ..services.recent import get_recent_writes, merge_recent, normalize_timestamp, to_unix_nano
 from ..core.config import settings
 
+# count 参数到 CountMode 的映射
+COUNT_MODES = {
+    "exact": log_service_pb2.CountMode.COUNT_EXACT,
+    "estimated": log_service_pb2.CountMode.COUNT_ESTIMATED,
+    "none": log_service_pb2.CountMode.COUNT_NONE,
+}
+
 router = APIRouter()
 
 
@@ -46,11 +64,14 @@ async def write_single_log(request: LogWriteRequest) -> LogWriteResponse:
         if request.metadata:
             kwargs.update(request.metadata)
         
-        # 异步写入日志
-        result = await write_log(request.message, **kwargs)
+        # 异步写入日志（受准入控制）
+        async with get_admission_controller().admit("write"):
+            result = await write_log(request.message, **kwargs)
         
         return LogWriteResponse(**result)
     
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"日志写入失败: {str(e)}")
 
@@ -61,7 +82,7 @@ async def write_batch_logs(request: BatchLogWriteRequest) -> BatchLogWriteRespon
     批量异步写入日志
     
     - **log_entries**: 日志条目列表（最多1000条）
-    - 支持并发写入，提升性能
+    - 整批通过一次 BatchWriteLog 调用写入
     """
     try:
         if len(request.log_entries) > settings.MAX_BATCH_SIZE:
@@ -81,12 +102,13 @@ async def write_batch_logs(request: BatchLogWriteRequest) -> BatchLogWriteRespon
             
             log_entries.append(entry_dict)
         
-        # 异步批量写入
-        result = await batch_write_logs(log_entries)
+        # 异步批量写入（一次 BatchWriteLog 调用，占用一个许可）
+        async with get_admission_controller().admit("batch"):
+            result = await batch_write_logs(log_entries)
         
         return BatchLogWriteResponse(**result)
     
-    except HTTPException:
+    except (HTTPException, AdmissionRejected):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"批量日志写入失败: {str(e)}")
@@ -140,9 +162,16 @@ async def concurrent_write_test(request: ConcurrentTestRequest) -> ConcurrentTes
         batch_size = max(1, request.count // request.max_workers)
         batches = [test_entries[i:i + batch_size] for i in range(0, len(test_entries), batch_size)]
         
-        # 并发执行所有批次
-        tasks = [batch_write_logs(batch) for batch in batches]
-        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 每个批次一次 BatchWriteLog 调用，同时在途的批次数不超过获得的许可数
+        async with get_admission_controller().admit("concurrent-test", weight=len(batches)) as granted:
+            slots = asyncio.Semaphore(granted)
+            
+            async def run_batch(batch):
+                async with slots:
+                    return await batch_write_logs(batch)
+            
+            tasks = [run_batch(batch) for batch in batches]
+            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 汇总结果
         total_success = 0
@@ -178,7 +207,7 @@ async def concurrent_write_test(request: ConcurrentTestRequest) -> ConcurrentTes
             }
         )
     
-    except HTTPException:
+    except (HTTPException, AdmissionRejected):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"并发测试失败: {str(e)}")
@@ -189,42 +218,375 @@ async def health_check() -> HealthResponse:
     """
     检查服务健康状态
     
-    - 检查 gRPC 连接状态
+    - 读取后台探测缓存的 gRPC 状态，不发起 gRPC 调用
     - 返回服务基本信息
     """
+    ready, detail = get_health_monitor().readiness()
+    
+    return HealthResponse(
+        status="healthy" if ready else "unhealthy",
+        timestamp=datetime.now().isoformat(),
+        grpc_connection=detail["probe"]["ok"],
+        service_info={
+            "name": settings.APP_NAME,
+            "version": settings.APP_VERSION,
+            "grpc_server": settings.GRPC_SERVER_ADDRESS,
+            "max_workers": settings.MAX_CONCURRENT_WORKERS,
+            "max_batch_size": settings.MAX_BATCH_SIZE,
+            "readiness": detail
+        }
+    )
+
+
+@router.get("/health/live", summary="存活探针")
+async def liveness_probe() -> JSONResponse:
+    """
+    存活探针（k8s livenessProbe）
+    
+    - 事件循环能够响应即返回 200
+    """
+    return JSONResponse(get_health_monitor().liveness())
+
+
+@router.get("/health/ready", summary="就绪探针")
+async def readiness_probe() -> JSONResponse:
+    """
+    就绪探针（k8s readinessProbe）
+    
+    - 通道连接状态、后台探测结果、线程池排队深度、缓冲区占用（准入等待队列、实时跟踪订阅者队列）均正常时返回 200，否则返回 503
+    - 只读取缓存状态，不产生 gRPC 调用
+    """
+    ready, detail = get_health_monitor().readiness()
+    return JSONResponse(detail, status_code=200 if ready else 503)
+
+
+def _parse_metadata_filters(metadata: List[str]) -> dict:
+    """解析 key=value 形式的 metadata 过滤条件"""
+    metadata_filters = {}
+    for item in metadata:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            raise HTTPException(status_code=400, detail=f"metadata 过滤条件格式应为 key=value: {item}")
+        metadata_filters[key] = value
+    return metadata_filters
+
+
+@router.get("/query", response_model=LogQueryResponse, response_model_exclude_unset=True, summary="查询日志")
+async def query_logs(
+    service_name: str = Query("", description="服务名称"),
+    level: Optional[str] = Query(None, description="日志级别（与 QueryLog 语义一致：带服务名时按级别精确匹配，默认 DEBUG）"),
+    trace_id: str = Query("", description="追踪ID"),
+    start_time: str = Query("", description="开始时间（RFC3339）"),
+    end_time: str = Query("", description="结束时间（RFC3339）"),
+    start_time_unix_nano: int = Query(0, ge=0, description="开始时间（纪元纳秒），非零时优先于 start_time"),
+    end_time_unix_nano: int = Query(0, ge=0, description="结束时间（纪元纳秒），非零时优先于 end_time"),
+    metadata: List[str] = Query([], description="metadata 过滤条件，格式 key=value，可重复"),
+    limit: int = Query(100, ge=1, description="返回条数"),
+    offset: int = Query(0, ge=0, description="偏移量"),
+    fields: List[str] = Query([], description="字段掩码，只返回列出的字段，可重复（如 fields=timestamp&fields=message）"),
+    count: str = Query("exact", description="总数统计方式：exact 精确 / estimated 估算（达到上限时只是下界）/ none 不统计"),
+    include_recent: bool = Query(True, description="合并网关最近写入窗口中尚未落库的日志"),
+) -> LogQueryResponse:
+    """
+    查询日志
+    
+    服务端按 flushPeriod 批量落库，刚写入的日志短时间内查不到；第一页（offset=0）会合并网关
+    最近写入窗口中匹配的日志，并按内容哈希去重，读己之写无需等待落库
+    """
+    if limit > settings.MAX_QUERY_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit 超过限制: {limit} > {settings.MAX_QUERY_LIMIT}")
+    
+    level_value = log_service_pb2.LogLevel.DEBUG
+    if level is not None:
+        try:
+            level_value = log_service_pb2.LogLevel.Value(level.upper())
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"无效的日志级别: {level}")
+    
+    count_mode = COUNT_MODES.get(count)
+    if count_mode is None:
+        raise HTTPException(status_code=400, detail=f"无效的统计方式: {count}")
+    unknown = [field for field in fields if field not in LOG_FIELD_GETTERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"无效的字段: {', '.join(unknown)}")
+    merge = include_recent and offset == 0
+    server_fields = list(dict.fromkeys(fields))
+    if server_fields and merge:
+        # 与最近写入合并时需要 ID 去重、纳秒时间戳排序
+        server_fields = list(dict.fromkeys(server_fields + ["id", "timestamp_unix_nano"]))
+    
+    metadata_filters = _parse_metadata_filters(metadata)
+    request = log_service_pb2.QueryLogRequest(
+        service_name=service_name,
+        level=level_value,
+        trace_id=trace_id,
+        start_time=start_time,
+        end_time=end_time,
+        start_time_unix_nano=start_time_unix_nano,
+        end_time_unix_nano=end_time_unix_nano,
+        metadata_filters=metadata_filters,
+        limit=limit,
+        offset=offset,
+        fields=server_fields,
+        count_mode=count_mode,
+    )
+    
     try:
-        client = get_log_client(settings.GRPC_SERVER_ADDRESS)
-        
-        # 尝试写入一条测试日志来检查连接
-        test_result = await client.write_log(
-            "健康检查测试日志",
-            service_name="fastapi-health-check",
-            level="INFO"
-        )
-        
-        grpc_connected = test_result.get('success', False)
-        
-        return HealthResponse(
-            status="healthy" if grpc_connected else "unhealthy",
-            timestamp=datetime.now().isoformat(),
-            grpc_connection=grpc_connected,
-            service_info={
-                "name": settings.APP_NAME,
-                "version": settings.APP_VERSION,
-                "grpc_server": settings.GRPC_SERVER_ADDRESS,
-                "max_workers": settings.MAX_CONCURRENT_WORKERS,
-                "max_batch_size": settings.MAX_BATCH_SIZE
-            }
+        async with get_admission_controller().admit("query"):
+            response = await get_log_client(settings.GRPC_SERVER_ADDRESS).query_log(request)
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"日志查询失败: {str(e)}")
+    if not response.success:
+        return LogQueryResponse(success=False, total_count=0, recent_count=0, logs=[],
+                                error_message=response.error_message)
+    
+    logs = list(response.logs)
+    recent_count = 0
+    if merge:
+        # 与服务端一致：级别为 DEBUG 且不带服务名时不过滤级别
+        effective_level = level_value if (level_value != log_service_pb2.LogLevel.DEBUG or service_name) else None
+        if not start_time_unix_nano and start_time:
+            start_time_unix_nano = to_unix_nano(normalize_timestamp(start_time))
+        if not end_time_unix_nano and end_time:
+            end_time_unix_nano = to_unix_nano(normalize_timestamp(end_time))
+        recent = get_recent_writes().query(
+            service_name=service_name,
+            level=effective_level,
+            trace_id=trace_id,
+            start_ns=start_time_unix_nano,
+            end_ns=end_time_unix_nano,
+            metadata_filters=metadata_filters,
         )
+        logs, recent_count = merge_recent(logs, recent, limit)
     
+    return LogQueryResponse(
+        success=True,
+        total_count=None if count_mode == log_service_pb2.CountMode.COUNT_NONE else response.total_count + recent_count,
+        total_count_is_lower_bound=response.total_count_is_lower_bound,
+        recent_count=recent_count,
+        logs=[log_entry_to_dict(log, fields) for log in logs],
+        error_message="",
+    )
+
+
+@router.get("/aggregate", response_model=LogAggregateResponse, summary="聚合统计")
+async def aggregate_logs(
+    group_by: List[str] = Query([], description="分组维度，可重复：service_name / level"),
+    bucket_seconds: int = Query(0, ge=0, description="时间桶宽度（秒），0 表示不按时间分组"),
+    metadata_key: str = Query("", description="按该 metadata 键的取值分组"),
+    service_name: str = Query("", description="服务名称"),
+    levels: List[str] = Query([], description="只统计这些级别，可重复，为空表示所有级别"),
+    trace_id: str = Query("", description="追踪ID"),
+    start_time: str = Query("", description="开始时间（RFC3339）"),
+    end_time: str = Query("", description="结束时间（RFC3339）"),
+    start_time_unix_nano: int = Query(0, ge=0, description="开始时间（纪元纳秒），非零时优先于 start_time"),
+    end_time_unix_nano: int = Query(0, ge=0, description="结束时间（纪元纳秒），非零时优先于 end_time"),
+    metadata: List[str] = Query([], description="metadata 过滤条件，格式 key=value，可重复"),
+    max_groups: int = Query(0, ge=0, description="最多返回的分组数，0 使用服务端默认值"),
+) -> LogAggregateResponse:
+    """
+    聚合统计
+    
+    在服务端用 MongoDB 聚合管道分组计数，例如每分钟各级别的日志数：
+    `group_by=level&bucket_seconds=60&start_time=...`，一天的统计只有几 KB，不需要拉取原始日志
+    """
+    unknown = [g for g in group_by if g not in ("service_name", "level")]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"无效的分组维度: {', '.join(unknown)}")
+    try:
+        level_values = [log_service_pb2.LogLevel.Value(level.upper()) for level in levels]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的日志级别: {levels}")
+    if not start_time_unix_nano and start_time:
+        start_time_unix_nano = to_unix_nano(normalize_timestamp(start_time))
+    if not end_time_unix_nano and end_time:
+        end_time_unix_nano = to_unix_nano(normalize_timestamp(end_time))
+    
+    request = log_service_pb2.AggregateLogsRequest(
+        service_name=service_name,
+        levels=level_values,
+        start_time_unix_nano=start_time_unix_nano,
+        end_time_unix_nano=end_time_unix_nano,
+        metadata_filters=_parse_metadata_filters(metadata),
+        trace_id=trace_id,
+        group_by_service="service_name" in group_by,
+        group_by_level="level" in group_by,
+        bucket_seconds=bucket_seconds,
+        group_by_metadata_key=metadata_key,
+        max_groups=max_groups,
+    )
+    try:
+        async with get_admission_controller().admit("aggregate"):
+            response = await get_log_client(settings.GRPC_SERVER_ADDRESS).aggregate_logs(request)
+    except AdmissionRejected:
+        raise
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=500, detail=f"聚合统计失败: {e.details()}")
     except Exception as e:
-        return HealthResponse(
-            status="unhealthy",
-            timestamp=datetime.now().isoformat(),
-            grpc_connection=False,
-            service_info={
-                "name": settings.APP_NAME,
-                "version": settings.APP_VERSION,
-                "error": str(e)
-            }
-        )
+        raise HTTPException(status_code=500, detail=f"聚合统计失败: {str(e)}")
+    if not response.success:
+        return LogAggregateResponse(success=False, error_message=response.error_message)
+    
+    return LogAggregateResponse(
+        success=True,
+        truncated=response.truncated,
+        columns=aggregate_columns(request, response),
+    )
+
+
+@router.get("/export", summary="流式导出日志（NDJSON）")
+async def export_logs(
+    service_name: str = Query("", description="服务名称"),
+    level: Optional[str] = Query(None, description="日志级别（与 /query 语义一致）"),
+    trace_id: str = Query("", description="追踪ID"),
+    start_time: str = Query("", description="开始时间（RFC3339）"),
+    end_time: str = Query("", description="结束时间（RFC3339）"),
+    start_time_unix_nano: int = Query(0, ge=0, description="开始时间（纪元纳秒），非零时优先于 start_time"),
+    end_time_unix_nano: int = Query(0, ge=0, description="结束时间（纪元纳秒），非零时优先于 end_time"),
+    metadata: List[str] = Query([], description="metadata 过滤条件，格式 key=value，可重复"),
+    limit: int = Query(0, ge=0, description="最多导出条数，0 表示不限"),
+    fields: List[str] = Query([], description="字段掩码，只导出列出的字段，可重复"),
+):
+    """
+    以 NDJSON（每行一条日志）流式导出匹配的日志，按时间倒序
+    
+    通过 StreamQueryLog 从服务端的单个游标分块拉取，边拉边写，不受 MAX_QUERY_LIMIT 限制，
+    网关内存中只保留一个块；不合并最近写入窗口。
+    每拉取一块申请一次准入许可，流不会长时间占用许可；第一块被拒绝时返回 429，
+    响应开始后出错（包括被拒绝）时，最后一行为 {"error": "..."}
+    """
+    level_value = log_service_pb2.LogLevel.DEBUG
+    if level is not None:
+        try:
+            level_value = log_service_pb2.LogLevel.Value(level.upper())
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"无效的日志级别: {level}")
+    unknown = [field for field in fields if field not in LOG_FIELD_GETTERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"无效的字段: {', '.join(unknown)}")
+    fields = list(dict.fromkeys(fields))
+    
+    request = log_service_pb2.StreamQueryLogRequest(
+        query=log_service_pb2.QueryLogRequest(
+            service_name=service_name,
+            level=level_value,
+            trace_id=trace_id,
+            start_time=start_time,
+            end_time=end_time,
+            start_time_unix_nano=start_time_unix_nano,
+            end_time_unix_nano=end_time_unix_nano,
+            metadata_filters=_parse_metadata_filters(metadata),
+            limit=limit,
+            fields=fields,
+            count_mode=log_service_pb2.CountMode.COUNT_NONE,
+        ),
+        chunk_size=settings.EXPORT_CHUNK_SIZE,
+    )
+    
+    chunks = get_log_client(settings.GRPC_SERVER_ADDRESS).stream_query_log(request, timeout=settings.EXPORT_TIMEOUT)
+    controller = get_admission_controller()
+    
+    async def next_chunk() -> Optional[log_service_pb2.QueryLogChunk]:
+        async with controller.admit("export"):
+            try:
+                return await chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+    
+    # 先取第一块：参数错误、服务不可用、过载等在发送响应头之前就能以正确的状态码返回
+    try:
+        first = await next_chunk()
+    except AdmissionRejected:
+        await chunks.aclose()
+        raise
+    except grpc.RpcError as e:
+        await chunks.aclose()
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=500, detail=f"日志导出失败: {e.details()}")
+    
+    def encode(chunk: log_service_pb2.QueryLogChunk) -> str:
+        return "".join(json.dumps(log_entry_to_dict(log, fields), ensure_ascii=False) + "\n" for log in chunk.logs)
+    
+    async def ndjson_stream():
+        try:
+            if first is None:
+                return
+            yield encode(first)
+            while True:
+                chunk = await next_chunk()
+                if chunk is None:
+                    break
+                yield encode(chunk)
+        except grpc.RpcError as e:
+            yield json.dumps({"error": e.details() or e.code().name}, ensure_ascii=False) + "\n"
+        except AdmissionRejected as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/tail", summary="实时跟踪日志（SSE）")
+async def tail_logs(
+    request: Request,
+    service_name: str = Query("", description="服务名称"),
+    level: Optional[str] = Query(None, description="日志级别，不指定则跟踪所有级别"),
+    metadata: List[str] = Query([], description="metadata 过滤条件，格式 key=value，可重复"),
+):
+    """
+    以 Server-Sent Events 推送匹配过滤条件的新日志
+    
+    相同过滤条件的所有订阅共享一个后台 QueryLog 轮询器；消费过慢的订阅者会丢弃最旧的事件，
+    并收到 dropped 事件
+    
+    事件类型：log（日志）、gap（单次轮询达到上限，可能遗漏日志）、dropped、error
+    """
+    level_value = None
+    if level is not None:
+        try:
+            level_value = log_service_pb2.LogLevel.Value(level.upper())
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"无效的日志级别: {level}")
+    
+    metadata_filters = _parse_metadata_filters(metadata)
+    
+    hub = get_tail_hub()
+    subscriber = hub.subscribe(service_name, level_value, metadata_filters)
+    
+    async def event_stream():
+        reported_dropped = 0
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(), settings.TAIL_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if subscriber.dropped != reported_dropped:
+                    yield format_sse("dropped", {"count": subscriber.dropped - reported_dropped})
+                    reported_dropped = subscriber.dropped
+                if event == "log":
+                    yield format_sse("log", log_entry_to_dict(data), data.id)
+                else:
+                    yield format_sse(event, data)
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -25,6 +25,13 @@ class Settings:
     # gRPC 服务器配置
     GRPC_SERVER_HOST: str = os.getenv("GRPC_SERVER_HOST", "localhost")
     GRPC_SERVER_PORT: int = int(os.getenv("GRPC_SERVER_PORT", 50051))
+    # 单次调用超时（秒）和可重试错误的重试次数；重试复用同一个请求，日志 ID 不变
+    GRPC_TIMEOUT: float = float(os.getenv("GRPC_TIMEOUT", 10))
+    GRPC_MAX_RETRIES: int = int(os.getenv("GRPC_MAX_RETRIES", 3))
+    GRPC_RETRY_BACKOFF: float = float(os.getenv("GRPC_RETRY_BACKOFF", 0.1))
+    GRPC_RETRY_MAX_BACKOFF: float = float(os.getenv("GRPC_RETRY_MAX_BACKOFF", 2.0))
+    # 批量写入时把批次内相同的 metadata 提取到 common_metadata（服务端不支持该字段时需关闭）
+    GRPC_FACTOR_COMMON_METADATA: bool = os.getenv("GRPC_FACTOR_COMMON_METADATA", "1") == "1"
     
     @property
     def GRPC_SERVER_ADDRESS(self) -> str:
@@ -43,6 +50,53 @@ class Settings:
     MAX_BATCH_SIZE: int = int(os.getenv("MAX_BATCH_SIZE", 1000))
     MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", 10000))
     
+    # 健康检查配置
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", 5))
+    HEALTH_PROBE_TIMEOUT: float = float(os.getenv("HEALTH_PROBE_TIMEOUT", 2))
+    HEALTH_MAX_STALENESS: float = float(os.getenv("HEALTH_MAX_STALENESS", 15))
+    HEALTH_MAX_QUEUE_DEPTH: int = int(os.getenv("HEALTH_MAX_QUEUE_DEPTH", 1000))
+    HEALTH_MAX_ADMISSION_QUEUE_FILL: float = float(os.getenv("HEALTH_MAX_ADMISSION_QUEUE_FILL", 0.8))  # 准入等待队列占用比例上限
+    HEALTH_MAX_TAIL_QUEUE_FILL: float = float(os.getenv("HEALTH_MAX_TAIL_QUEUE_FILL", 0.9))  # 实时跟踪订阅者队列平均占用比例上限
+    
+    # 准入控制配置（ADMISSION_MODE: fixed 固定上限 / gradient 梯度自适应上限）
+    ADMISSION_MODE: str = os.getenv("ADMISSION_MODE", "gradient")
+    ADMISSION_INITIAL_LIMIT: int = int(os.getenv("ADMISSION_INITIAL_LIMIT", 20))
+    ADMISSION_MIN_LIMIT: int = int(os.getenv("ADMISSION_MIN_LIMIT", 4))
+    ADMISSION_MAX_LIMIT: int = int(os.getenv("ADMISSION_MAX_LIMIT", 200))
+    # 各路由的排队延迟预算（秒）
+    ADMISSION_QUEUE_BUDGETS: dict = {
+        "write": float(os.getenv("ADMISSION_BUDGET_WRITE", 0.05)),
+        "batch": float(os.getenv("ADMISSION_BUDGET_BATCH", 0.2)),
+        "concurrent-test": float(os.getenv("ADMISSION_BUDGET_CONCURRENT_TEST", 1.0)),
+        "stream": float(os.getenv("ADMISSION_BUDGET_STREAM", 0.2)),
+        "query": float(os.getenv("ADMISSION_BUDGET_QUERY", 0.2)),
+        "aggregate": float(os.getenv("ADMISSION_BUDGET_AGGREGATE", 0.5)),
+        "export": float(os.getenv("ADMISSION_BUDGET_EXPORT", 0.5)),
+        "tail": float(os.getenv("ADMISSION_BUDGET_TAIL", 1.0)),  # 后台轮询，被拒绝时顺延到下一轮
+        "visibility": float(os.getenv("ADMISSION_BUDGET_VISIBILITY", 1.0)),  # 可见性轮询，被拒绝时按未可见重试
+        "default": float(os.getenv("ADMISSION_BUDGET_DEFAULT", 0.1)),
+    }
+    
+    # WebSocket 流式写入配置
+    WS_WINDOW: int = int(os.getenv("WS_WINDOW", 8))  # 每个连接允许的未确认批次数
+    
+    # 实时跟踪（SSE）配置
+    TAIL_POLL_INTERVAL: float = float(os.getenv("TAIL_POLL_INTERVAL", 1.0))  # 每个过滤条件的轮询间隔（秒）
+    TAIL_PAGE_LIMIT: int = int(os.getenv("TAIL_PAGE_LIMIT", 500))  # 每次轮询最多返回条数
+    TAIL_QUEUE_SIZE: int = int(os.getenv("TAIL_QUEUE_SIZE", 1000))  # 每个订阅者的队列长度
+    TAIL_HEARTBEAT: float = float(os.getenv("TAIL_HEARTBEAT", 15.0))  # 心跳间隔（秒）
+    TAIL_GRACE: float = float(os.getenv("TAIL_GRACE", 10.0))  # 查询窗口回溯时间，需不小于服务端 flushPeriod + 时钟偏差（秒）
+    TAIL_SEEN_LIMIT: int = int(os.getenv("TAIL_SEEN_LIMIT", 50000))  # 每个轮询器去重 id 集合的上限
+    
+    # 最近写入窗口配置（容量为 0 时关闭）
+    RECENT_WRITES_CAPACITY: int = int(os.getenv("RECENT_WRITES_CAPACITY", 10000))
+    RECENT_WRITES_TTL: float = float(os.getenv("RECENT_WRITES_TTL", 60.0))  # 需大于服务端 flushPeriod（秒）
+    MAX_QUERY_LIMIT: int = int(os.getenv("MAX_QUERY_LIMIT", 1000))
+    
+    # 流式导出（NDJSON）配置
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", 500))  # StreamQueryLog 每个消息的条数
+    EXPORT_TIMEOUT: float = float(os.getenv("EXPORT_TIMEOUT", 600))  # 单次导出的最长时间（秒）
+    
     # CORS 配置
     ALLOW_ORIGINS: list = ["*"]
     ALLOW_CREDENTIALS: bool = True
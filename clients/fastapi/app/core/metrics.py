@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+轻量级 Prometheus 指标
+热路径上每个线程只写自己的分片，不加锁；只有首次创建分片和抓取 /metrics 时才加锁汇总
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+
+# 默认的延迟分桶（秒）
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# 写入到可查询的延迟分桶（秒）
+VISIBILITY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 批量大小分桶
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _format_value(value: float) -> str:
+    """格式化为 Prometheus 文本格式的数值"""
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """格式化标签"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _ShardedValues:
+    """按线程分片的数值数组，写入无锁，读取时汇总"""
+
+    __slots__ = ("size", "local", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def new_shard(self) -> List[float]:
+        """为当前线程创建分片（每个线程只发生一次）"""
+        values = [0.0] * self.size
+        with self._lock:
+            self._shards.append(values)
+        self.local.values = values
+        return values
+
+    def collect(self) -> List[float]:
+        """汇总所有分片"""
+        total = [0.0] * self.size
+        with self._lock:
+            shards = list(self._shards)
+        for values in shards:
+            for i, v in enumerate(values):
+                total[i] += v
+        return total
+
+
+class _CounterChild:
+    """带标签的计数器（也用作可增减的 Gauge）"""
+
+    __slots__ = ("_values", "_local")
+
+    def __init__(self):
+        self._values = _ShardedValues(1)
+        self._local = self._values.local
+
+    def inc(self, amount: float = 1.0):
+        try:
+            self._local.values[0] += amount
+        except AttributeError:
+            self._values.new_shard()[0] += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def value(self) -> float:
+        return self._values.collect()[0]
+
+
+class _HistogramChild:
+    """带标签的直方图"""
+
+    __slots__ = ("_buckets", "_values", "_local")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # 每个分桶一个计数（含 +Inf 桶），最后一个位置是 sum
+        self._values = _ShardedValues(len(buckets) + 2)
+        self._local = self._values.local
+
+    def observe(self, value: float):
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._values.new_shard()
+        values[bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    def collect(self) -> List[float]:
+        return self._values.collect()
+
+
+class _Metric:
+    """指标基类，管理标签子实例"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """获取指定标签值的子实例（已创建的子实例查找无锁）"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    if len(values) != len(self.labelnames):
+                        raise ValueError(f"{self.name} 需要标签 {self.labelnames}")
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def expose(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """计数器"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value())}")
+        return lines
+
+
+class Gauge(Counter):
+    """可增减的仪表"""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+
+class CallbackGauge(_Metric):
+    """抓取时才读取数值的仪表，热路径上零开销"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], float] = None):
+        super().__init__(name, documentation)
+        self._func = func
+
+    def set_function(self, func: Callable[[], float]):
+        """设置取值函数"""
+        self._func = func
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        if self._func is not None:
+            lines.append(f"{self.name} {_format_value(float(self._func()))}")
+        return lines
+
+
+class Histogram(_Metric):
+    """直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        names = self.labelnames + ("le",)
+        for values, child in self._items():
+            data = child.collect()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                labels = _format_labels(names, values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            cumulative += data[-2]
+            labels = _format_labels(names, values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(data[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def expose(self) -> str:
+        """生成 Prometheus 文本格式（0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+# 全局注册表
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "fastapi_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+))
+
+HTTP_REQUESTS_IN_FLIGHT = registry.register(CallbackGauge(
+    "fastapi_http_requests_in_flight",
+    "HTTP requests currently being served",
+))
+
+EXECUTOR_QUEUE_SECONDS = registry.register(Histogram(
+    "fastapi_executor_queue_seconds",
+    "Time a gRPC call waited in the ThreadPoolExecutor queue before starting",
+))
+
+EXECUTOR_IN_FLIGHT = registry.register(CallbackGauge(
+    "fastapi_executor_calls_in_flight",
+    "gRPC calls submitted to the ThreadPoolExecutor and not yet finished",
+))
+
+GRPC_CALL_DURATION = registry.register(Histogram(
+    "fastapi_grpc_call_duration_seconds",
+    "gRPC call latency by method",
+    ("method",),
+))
+
+GRPC_FAILURES = registry.register(Counter(
+    "fastapi_grpc_failures_total",
+    "Failed gRPC calls by method and status code",
+    ("method", "code"),
+))
+
+BATCH_SIZE = registry.register(Histogram(
+    "fastapi_batch_size",
+    "Number of log entries per batch write",
+    buckets=BATCH_SIZE_BUCKETS,
+))
+
+ADMISSION_REJECTED = registry.register(Counter(
+    "fastapi_admission_rejected_total",
+    "Requests shed by admission control by route",
+    ("route",),
+))
+
+ADMISSION_LIMIT = registry.register(CallbackGauge(
+    "fastapi_admission_concurrency_limit",
+    "Current admission control concurrency limit",
+))
+
+TAIL_POLLERS = registry.register(CallbackGauge(
+    "fastapi_tail_pollers",
+    "Active live-tail pollers (one per distinct filter)",
+))
+
+TAIL_SUBSCRIBERS = registry.register(CallbackGauge(
+    "fastapi_tail_subscribers",
+    "Connected live-tail subscribers",
+))
+
+TAIL_DROPPED = registry.register(Counter(
+    "fastapi_tail_dropped_events_total",
+    "Live-tail events dropped because a subscriber queue was full",
+))
+
+RECENT_WRITES_SIZE = registry.register(CallbackGauge(
+    "fastapi_recent_writes_entries",
+    "Entries held in the recent-writes window",
+))
+
+RECENT_WRITES_MERGED = registry.register(Counter(
+    "fastapi_recent_writes_merged_total",
+    "Query results served from the recent-writes window before they were queryable",
+))
+
+WRITE_VISIBILITY_SECONDS = registry.register(Histogram(
+    "fastapi_write_visibility_seconds",
+    "Time from write acknowledgement until the entry is returned by QueryLog",
+    buckets=VISIBILITY_BUCKETS,
+))
+
+
+class PrometheusMiddleware:
+    """ASGI 中间件：记录每个路由的请求延迟和在途请求数"""
+
+    def __init__(self, app):
+        self.app = app
+        # 在途请求数只在事件循环线程中修改，抓取时通过回调读取
+        self.in_flight = 0
+        HTTP_REQUESTS_IN_FLIGHT.set_function(lambda: self.in_flight)
+        # (method, route, status) -> 直方图子实例，热路径上只做一次字典查找
+        self._durations: Dict[Tuple[str, str, int], _HistogramChild] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            # 使用路由模板而不是原始路径，避免标签基数膨胀
+            route = scope.get("route")
+            if route is not None:
+                route_name = getattr(route, "path", "unmatched")
+            else:
+                endpoint = scope.get("endpoint")
+                route_name = endpoint.__name__ if endpoint is not None else "unmatched"
+            key = (scope["method"], route_name, status_code)
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = HTTP_REQUEST_DURATION.labels(key[0], key[1], str(key[2]))
+            duration.observe(time.perf_counter() - start)
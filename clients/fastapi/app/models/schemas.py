@@ -197,3 +197,34 @@ class HealthResponse(BaseModel):
                 }
             }
         }
+
+
+class LogEntryModel(BaseModel):
+    """查询返回的日志条目"""
+    id: str = Field("", description="日志ID")
+    service_name: str = Field("", description="服务名称")
+    level: LogLevel = Field(LogLevel.DEBUG, description="日志级别")
+    message: str = Field("", description="日志消息内容")
+    timestamp: str = Field("", description="日志时间（RFC3339）")
+    timestamp_unix_nano: int = Field(0, description="日志时间（纪元纳秒，服务端存储精度为毫秒）")
+    metadata: Dict[str, str] = Field({}, description="元数据")
+    trace_id: str = Field("", description="追踪ID")
+    span_id: str = Field("", description="跨度ID")
+
+
+class LogQueryResponse(BaseModel):
+    """日志查询响应模型"""
+    success: bool = Field(..., description="是否成功")
+    total_count: Optional[int] = Field(0, description="匹配的总条数（含尚未落库的最近写入），count=none 时为 null")
+    total_count_is_lower_bound: bool = Field(False, description="估算统计达到上限，total_count 只是下界")
+    recent_count: int = Field(0, description="结果中来自网关最近写入窗口的条数")
+    logs: List[LogEntryModel] = Field([], description="日志列表（按时间倒序）")
+    error_message: str = Field("", description="错误消息")
+
+
+class LogAggregateResponse(BaseModel):
+    """聚合统计响应模型（列式）"""
+    success: bool = Field(..., description="是否成功")
+    truncated: bool = Field(False, description="分组数超过 max_groups 被截断")
+    columns: Dict[str, List[Any]] = Field({}, description="列名 -> 取值列表，按时间桶升序；只包含参与分组的列和 count")
+    error_message: str = Field("", description="错误消息")
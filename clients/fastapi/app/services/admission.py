@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+准入控制与过载保护
+并发限制器包裹 gRPC 调用，按路由设置排队延迟预算，超出预算的请求直接拒绝（429 + Retry-After），
+避免过载时延迟无限增长
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..core.metrics import ADMISSION_REJECTED, ADMISSION_LIMIT
+
+
+class AdmissionRejected(Exception):
+    """请求被准入控制拒绝"""
+
+    def __init__(self, route: str, retry_after: float):
+        self.route = route
+        self.retry_after = retry_after
+        super().__init__(f"{route} 请求排队延迟超出预算，请 {retry_after:.2f} 秒后重试")
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After 头（整数秒，至少 1 秒）"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class GradientLimit:
+    """
+    梯度自适应并发上限（类似 Netflix Gradient2 / TCP Vegas）
+
+    以窗口内最小 RTT 作为无排队基线，梯度 = tolerance * 基线 / 当前 RTT：
+    延迟上升时按梯度收缩上限，延迟接近基线时每次加 queue_size 探测扩张。
+    稳定时 gradient = 1 - queue_size / limit，上限约为 后端容量 × tolerance + queue_size；
+    tolerance 取 1.0，后端排队只有 queue_size 个调用，过载时被接受请求的延迟与固定上限相当。
+    基线每 probe_interval 个样本重置一次，以适应后端本身变慢的情况
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int,
+                 smoothing: float = 0.2, tolerance: float = 1.0,
+                 queue_size: float = 1.0, probe_interval: int = 1000):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.queue_size = queue_size
+        self.probe_interval = probe_interval
+        self.min_rtt = 0.0
+        self._samples = 0
+
+    def update(self, rtt: float, in_flight: int):
+        """根据一次调用的耗时调整上限"""
+        self._samples += 1
+        if self.min_rtt == 0.0 or rtt < self.min_rtt or self._samples >= self.probe_interval:
+            self.min_rtt = rtt
+            self._samples = 0
+
+        # 上限没有被用满时，延迟样本不能说明容量，不扩张
+        if in_flight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.min_rtt / rtt))
+        new_limit = self.limit * gradient + self.queue_size
+        new_limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, new_limit))
+
+
+class AdmissionController:
+    """
+    并发限制器
+
+    - 在途 gRPC 调用数未达上限时立即放行
+    - 达到上限时按 FIFO 排队，预计排队时间超出路由预算则立即拒绝，
+      排队超时同样拒绝
+    - 只在事件循环线程中使用，不需要加锁
+    """
+
+    def __init__(self, initial_limit: int = 20, mode: str = "gradient",
+                 min_limit: int = 4, max_limit: int = 200,
+                 budgets: Optional[Dict[str, float]] = None,
+                 max_queue: int = 10000):
+        self.mode = mode
+        self.fixed_limit = initial_limit
+        self.gradient = GradientLimit(initial_limit, min_limit, max_limit)
+        self.budgets = budgets or {}
+        self.default_budget = self.budgets.get("default", 0.1)
+        self.max_queue = max_queue
+
+        self.in_flight = 0
+        self._waiters = deque()  # (weight, future)
+        self._queued_weight = 0
+        # 单次调用耗时的短期均值，用于估算排队时间
+        self.avg_latency = 0.01
+
+        ADMISSION_LIMIT.set_function(lambda: self.limit)
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        if self.mode == "fixed":
+            return self.fixed_limit
+        return int(self.gradient.limit)
+
+    def budget_for(self, route: str) -> float:
+        """获取路由的排队延迟预算（秒）"""
+        return self.budgets.get(route, self.default_budget)
+
+    def queue_state(self) -> Dict[str, float]:
+        """等待队列状态：排队请求数、排队权重，以及排队请求数相对上限 max_queue 的占用比例"""
+        waiting = len(self._waiters)
+        return {
+            "waiting": waiting,
+            "queued_weight": self._queued_weight,
+            "max_queue": self.max_queue,
+            "fill": round(waiting / max(self.max_queue, 1), 3),
+        }
+
+    def estimated_wait(self, weight: int) -> float:
+        """估算新请求需要的排队时间"""
+        excess = self.in_flight + self._queued_weight + weight - self.limit
+        if excess <= 0:
+            return 0.0
+        return excess / max(self.limit, 1) * self.avg_latency
+
+    def _wake_waiters(self):
+        """按 FIFO 放行排队中的请求"""
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_flight + weight > self.limit and self.in_flight > 0:
+                break
+            self._waiters.popleft()
+            self._queued_weight -= weight
+            self.in_flight += weight
+            future.set_result(True)
+
+    async def acquire(self, route: str, weight: int = 1):
+        """
+        申请执行许可
+
+        Args:
+            route: 路由名称，决定排队延迟预算
+            weight: 本次请求将发起的并发 gRPC 调用数
+
+        Raises:
+            AdmissionRejected: 预计或实际排队时间超出预算
+        """
+        weight = max(1, min(weight, self.limit))
+        if not self._waiters and self.in_flight + weight <= self.limit:
+            self.in_flight += weight
+            return weight
+
+        budget = self.budget_for(route)
+        wait = self.estimated_wait(weight)
+        if wait > budget or len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTED.labels(route).inc()
+            raise AdmissionRejected(route, wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((weight, future))
+        self._queued_weight += weight
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=budget)
+        except asyncio.TimeoutError:
+            if future.done():
+                # 超时与放行同时发生，视为已放行
+                return weight
+            self._abandon(weight, future)
+            ADMISSION_REJECTED.labels(route).inc()
+            raise AdmissionRejected(route, self.estimated_wait(weight))
+        except asyncio.CancelledError:
+            # 客户端断开或轮询被停止：已放行的许可要归还，否则永久占用并发上限
+            if future.done() and not future.cancelled():
+                # 没有发起调用，不反馈耗时
+                self.in_flight -= weight
+                self._wake_waiters()
+            else:
+                self._abandon(weight, future)
+            raise
+        return weight
+
+    def _abandon(self, weight: int, future: asyncio.Future):
+        """放弃排队：移出等待队列并扣除排队权重，之后的请求可能因此可以放行"""
+        future.cancel()
+        try:
+            self._waiters.remove((weight, future))
+        except ValueError:
+            pass
+        self._queued_weight -= weight
+        self._wake_waiters()
+
+    def release(self, weight: int, latency: float):
+        """释放许可并反馈本次调用耗时"""
+        self.in_flight -= weight
+        self.avg_latency += (latency - self.avg_latency) * 0.1
+        if self.mode != "fixed":
+            self.gradient.update(latency, self.in_flight + weight)
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def admit(self, route: str, weight: int = 1):
+        """
+        准入上下文，产出实际获得的许可数（weight 超过当前上限时被截断为上限，
+        调用方发起的并发 gRPC 调用数不应超过该值）
+
+        Example:
+            async with controller.admit("write"):
+                await client.write_log(...)
+        """
+        granted = await self.acquire(route, weight)
+        start = time.perf_counter()
+        try:
+            yield granted
+        finally:
+            self.release(granted, time.perf_counter() - start)
+
+
+# 全局准入控制器实例
+_admission_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """获取准入控制器实例（线程安全）"""
+    global _admission_controller
+    if _admission_controller is None:
+        with _controller_lock:
+            if _admission_controller is None:
+                _admission_controller = AdmissionController(
+                    initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+                    mode=settings.ADMISSION_MODE,
+                    min_limit=settings.ADMISSION_MIN_LIMIT,
+                    max_limit=settings.ADMISSION_MAX_LIMIT,
+                    budgets=settings.ADMISSION_QUEUE_BUDGETS,
+                    max_queue=settings.MAX_CONCURRENT_REQUESTS,
+                )
+    return _admission_controller
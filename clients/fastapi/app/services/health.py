@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+健康检查子系统
+结合 gRPC 通道连接状态、后台周期探测（结果缓存）、线程池饱和度以及网关缓冲区
+（准入等待队列、实时跟踪订阅者队列）的占用，探针请求只读取缓存状态，不产生任何 gRPC 调用或日志写入
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+import grpc
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from .admission import AdmissionController, get_admission_controller
+from .log_client import AsyncLogServiceClient, get_log_client
+from .tail import TailHub, get_tail_hub
+from ..core.config import settings
+
+
+# 探测使用的服务名，不会匹配任何真实日志
+PROBE_SERVICE_NAME = "__fastapi_health_probe__"
+
+
+class HealthMonitor:
+    """健康状态监控器 - 后台维护缓存状态，探针请求只做内存读取"""
+
+    def __init__(self, client: AsyncLogServiceClient,
+                 probe_interval: float = 5.0,
+                 probe_timeout: float = 2.0,
+                 max_staleness: float = 15.0,
+                 max_queue_depth: int = 1000,
+                 admission: Optional[AdmissionController] = None,
+                 tail_hub: Optional[TailHub] = None,
+                 max_admission_queue_fill: float = 0.8,
+                 max_tail_queue_fill: float = 0.9):
+        self.client = client
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.max_staleness = max_staleness
+        self.max_queue_depth = max_queue_depth
+        self.admission = admission
+        self.tail_hub = tail_hub
+        self.max_admission_queue_fill = max_admission_queue_fill
+        self.max_tail_queue_fill = max_tail_queue_fill
+
+        # 通道连接状态由 gRPC 回调线程更新
+        self.channel_state = grpc.ChannelConnectivity.IDLE
+
+        # 最近一次探测结果
+        self.last_probe_ok = False
+        self.last_probe_at = 0.0
+        self.last_probe_latency_ms = 0.0
+        self.last_probe_error = ""
+
+        self._task: Optional[asyncio.Task] = None
+        self._subscribed = False
+
+    def _on_connectivity_change(self, state: grpc.ChannelConnectivity):
+        """gRPC 连接状态回调（在 gRPC 内部线程中执行）"""
+        self.channel_state = state
+
+    async def start(self):
+        """订阅通道状态并启动后台探测任务"""
+        if not self._subscribed:
+            self.client.channel.subscribe(self._on_connectivity_change, try_to_connect=True)
+            self._subscribed = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        """停止后台探测任务并取消订阅"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._subscribed:
+            self.client.channel.unsubscribe(self._on_connectivity_change)
+            self._subscribed = False
+
+    async def _probe_loop(self):
+        """周期性执行探测"""
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.probe_interval)
+
+    async def probe_once(self):
+        """
+        执行一次只读探测
+
+        直接使用 gRPC future 接口发起一次空结果的 QueryLog，不占用线程池，
+        因此线程池饱和时探测结果仍能反映后端本身的可用性
+        """
+        request = log_service_pb2.QueryLogRequest(
+            service_name=PROBE_SERVICE_NAME, limit=1, count_mode=log_service_pb2.CountMode.COUNT_NONE)
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def _on_done(call_future):
+            loop.call_soon_threadsafe(_resolve, call_future)
+
+        def _resolve(call_future):
+            if not done.done():
+                done.set_result(call_future)
+
+        start = time.perf_counter()
+        try:
+            call = self.client.stub.QueryLog.future(request, timeout=self.probe_timeout)
+            call.add_done_callback(_on_done)
+            response = (await done).result()
+            self.last_probe_ok = response.success
+            self.last_probe_error = response.error_message
+        except grpc.RpcError as e:
+            self.last_probe_ok = False
+            self.last_probe_error = f"gRPC error: {e.code().name}"
+        except Exception as e:
+            self.last_probe_ok = False
+            self.last_probe_error = f"Error: {str(e)}"
+        self.last_probe_latency_ms = (time.perf_counter() - start) * 1000
+        self.last_probe_at = time.monotonic()
+
+    def liveness(self) -> Dict[str, Any]:
+        """存活检查：进程和事件循环能够响应即为存活"""
+        return {
+            "status": "alive",
+            "probe_loop_running": self._task is not None and not self._task.done(),
+        }
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        就绪检查：只读取缓存状态
+
+        Returns:
+            Tuple[bool, Dict[str, Any]]: (是否就绪, 状态详情)
+        """
+        probe_age = time.monotonic() - self.last_probe_at if self.last_probe_at else None
+        queue_depth = self.client.executor_queue_depth()
+        channel_state = self.channel_state
+
+        reasons = []
+        if channel_state in (grpc.ChannelConnectivity.TRANSIENT_FAILURE,
+                             grpc.ChannelConnectivity.SHUTDOWN):
+            reasons.append(f"channel {channel_state.name}")
+        if probe_age is None:
+            reasons.append("no probe result yet")
+        elif probe_age > self.max_staleness:
+            reasons.append(f"probe result stale ({probe_age:.1f}s)")
+        elif not self.last_probe_ok:
+            reasons.append(f"probe failed: {self.last_probe_error}")
+        if queue_depth > self.max_queue_depth:
+            reasons.append(f"executor queue saturated ({queue_depth})")
+        buffers = {}
+        if self.admission is not None:
+            buffers["admission_queue"] = admission_queue = self.admission.queue_state()
+            if admission_queue["fill"] > self.max_admission_queue_fill:
+                reasons.append(f"admission queue saturated ({admission_queue['waiting']}/{admission_queue['max_queue']})")
+        if self.tail_hub is not None:
+            buffers["tail_queues"] = tail_queues = self.tail_hub.queue_state()
+            if tail_queues["mean_fill"] > self.max_tail_queue_fill:
+                reasons.append(f"tail subscriber queues saturated (mean fill {tail_queues['mean_fill']})")
+
+        return not reasons, {
+            "status": "ready" if not reasons else "not_ready",
+            "reasons": reasons,
+            "channel_state": channel_state.name,
+            "probe": {
+                "ok": self.last_probe_ok,
+                "age_seconds": round(probe_age, 3) if probe_age is not None else None,
+                "latency_ms": round(self.last_probe_latency_ms, 3),
+                "error": self.last_probe_error,
+            },
+            "executor": {
+                "max_workers": self.client.max_workers,
+                "in_flight": self.client.in_flight,
+                "queue_depth": queue_depth,
+                "saturation": round(min(self.client.in_flight / self.client.max_workers, 1.0), 3),
+            },
+            "buffers": buffers,
+        }
+
+
+# 全局监控器实例
+_health_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """获取健康监控器实例（线程安全）"""
+    global _health_monitor
+    if _health_monitor is None:
+        with _monitor_lock:
+            if _health_monitor is None:
+                _health_monitor = HealthMonitor(
+                    get_log_client(settings.GRPC_SERVER_ADDRESS),
+                    probe_interval=settings.HEALTH_PROBE_INTERVAL,
+                    probe_timeout=settings.HEALTH_PROBE_TIMEOUT,
+                    max_staleness=settings.HEALTH_MAX_STALENESS,
+                    max_queue_depth=settings.HEALTH_MAX_QUEUE_DEPTH,
+                    admission=get_admission_controller(),
+                    tail_hub=get_tail_hub(),
+                    max_admission_queue_fill=settings.HEALTH_MAX_ADMISSION_QUEUE_FILL,
+                    max_tail_queue_fill=settings.HEALTH_MAX_TAIL_QUEUE_FILL,
+                )
+    return _health_monitor
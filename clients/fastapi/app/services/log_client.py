@@ -8,16 +8,107 @@ FastAPI 异步 gRPC 日志服务客户端
 
 import asyncio
 import grpc
+import os
 import time
+import random
 import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional
 from concurrent.futures import ThreadPoolExecutor
 
 # 导入生成的 protobuf 类
 import log_service_pb2
 import log_service_pb2_grpc
 
+from .admission import AdmissionRejected, get_admission_controller
+from .recent import get_recent_writes
+from ..core.config import settings
+from ..core.metrics import (
+    EXECUTOR_QUEUE_SECONDS, EXECUTOR_IN_FLIGHT,
+    GRPC_CALL_DURATION, GRPC_FAILURES, BATCH_SIZE, WRITE_VISIBILITY_SECONDS,
+)
+
+# 无标签指标的子实例，避免热路径上重复查找
+_executor_queue_seconds = EXECUTOR_QUEUE_SECONDS.labels()
+_batch_size = BATCH_SIZE.labels()
+_write_visibility = WRITE_VISIBILITY_SECONDS.labels()
+_perf_counter = time.perf_counter
+
+# 可重试的 gRPC 状态码：请求可能没有到达服务端，或服务端暂时过载
+RETRYABLE_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+)
+
+# ULID 使用的 Crockford base32 字母表
+_CROCKFORD32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last = [0, 0]  # [上次的毫秒时间戳, 上次的随机部分]
+
+
+def new_ulid() -> str:
+    """
+    生成单调递增的 ULID（48 位毫秒时间戳 + 80 位随机数，Crockford base32 编码，26 个字符）
+    
+    同一毫秒内（或时钟回拨时）沿用上次的时间戳并把随机部分加一，保证同一进程内生成的 ID 严格递增
+    """
+    with _ulid_lock:
+        now_ms = int(time.time() * 1000)
+        last_ms, last_random = _ulid_last
+        if now_ms <= last_ms:
+            now_ms = last_ms
+            random_part = last_random + 1
+            if random_part >> 80:
+                now_ms += 1
+                random_part = int.from_bytes(os.urandom(10), "big")
+        else:
+            random_part = int.from_bytes(os.urandom(10), "big")
+        _ulid_last[0], _ulid_last[1] = now_ms, random_part
+    
+    value = (now_ms << 80) | random_part
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD32[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def factor_common_metadata(request) -> Dict[str, str]:
+    """
+    把批次内所有日志都相同的 metadata 键值对提取到 request.common_metadata，并从各条日志中删除
+    
+    服务端入队时再合并回每条日志；请求中的日志是副本，调用方的 LogEntry 不受影响
+    """
+    entries = request.log_entries
+    count = len(entries)
+    if count < 2:
+        return {}
+    # 候选键先与最后一条比较：多数键每条不同的批次在这里就返回，不逐条访问日志
+    last = entries[count - 1].metadata
+    items = [(key, value) for key, value in entries[0].metadata.items() if last.get(key) == value]
+    if not items:
+        return {}
+    for index in range(1, count - 1):
+        metadata = entries[index].metadata
+        # 常见情况是所有候选键都仍然相同，逐个比较到第一个不同为止
+        for key, value in items:
+            if metadata.get(key) != value:
+                break
+        else:
+            continue
+        items = [(key, value) for key, value in items if metadata.get(key) == value]
+        if not items:
+            return {}
+    common = dict(items)
+    for entry in entries:
+        metadata = entry.metadata
+        for key in common:
+            del metadata[key]
+    request.common_metadata.update(common)
+    return common
+
 
 class AsyncLogServiceClient:
     """异步日志服务客户端 - 线程安全的单例"""
@@ -25,6 +116,9 @@ class AsyncLogServiceClient:
     _instance = None
     _lock = threading.Lock()
     
+    # 记录写入时间的 trace_id 数量上限
+    MAX_TRACKED_WRITES = 10000
+    
     def __new__(cls, server_address: str = "localhost:50051"):
         if cls._instance is None:
             with cls._lock:
@@ -33,12 +127,20 @@ class AsyncLogServiceClient:
                     cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self, server_address: str = "localhost:50051"):
+    def __init__(self, server_address: str = "localhost:50051", max_workers: int = 20):
         if not self._initialized:
             self.server_address = server_address
             self.channel = None
             self.stub = None
-            self.executor = ThreadPoolExecutor(max_workers=20)
+            self.max_workers = max_workers
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+            # 已提交到线程池但尚未完成的调用数（只在事件循环线程中读写）
+            self.in_flight = 0
+            EXECUTOR_IN_FLIGHT.set_function(lambda: self.in_flight)
+            self._grpc_call_duration = {}
+            # trace_id -> 写入时间，用于计算写入到可查询的延迟
+            self._written_at: "OrderedDict[str, float]" = OrderedDict()
+            self._written_lock = threading.Lock()
             self._connect()
             self._initialized = True
     
@@ -60,9 +162,71 @@ class AsyncLogServiceClient:
         if self.executor:
             self.executor.shutdown(wait=True)
     
-    def _sync_write_log(self, message: str, **kwargs) -> Dict[str, Any]:
-        """同步写入日志的内部方法"""
+    def executor_queue_depth(self) -> int:
+        """线程池中排队等待执行的任务数"""
+        return self.executor._work_queue.qsize()
+    
+    @staticmethod
+    def _timed_call(submitted: float, func, args: tuple, kwargs: dict):
+        """在线程池线程中执行，记录排队耗时（提交时刻作为参数传入，不为每次调用创建闭包）"""
+        _executor_queue_seconds.observe(_perf_counter() - submitted)
+        return func(*args, **kwargs)
+    
+    async def _run_in_executor(self, func, *args, **kwargs):
+        """在线程池中执行同步的 gRPC 调用，并统计在途调用数和排队耗时"""
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._timed_call, _perf_counter(), func, args, kwargs)
+        finally:
+            self.in_flight -= 1
+    
+    def _invoke(self, method: str, request):
+        """
+        调用 gRPC 方法，记录调用延迟和按状态码分类的失败数
+        
+        可重试的错误按带抖动的指数退避重试；重试复用同一个请求对象，日志 ID 保持不变，
+        服务端以 ID 作为主键去重，重试不会产生重复日志
+        """
+        latency = self._grpc_call_duration.get(method)
+        if latency is None:
+            latency = self._grpc_call_duration[method] = GRPC_CALL_DURATION.labels(method)
+        backoff = settings.GRPC_RETRY_BACKOFF
+        for attempt in range(settings.GRPC_MAX_RETRIES + 1):
+            start = _perf_counter()
+            try:
+                return getattr(self.stub, method)(request, timeout=settings.GRPC_TIMEOUT)
+            except grpc.RpcError as e:
+                GRPC_FAILURES.labels(method, e.code().name).inc()
+                if attempt >= settings.GRPC_MAX_RETRIES or e.code() not in RETRYABLE_CODES:
+                    raise
+            finally:
+                latency.observe(_perf_counter() - start)
+            time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, settings.GRPC_RETRY_MAX_BACKOFF)
+    
+    def _track_writes(self, trace_ids: Iterable[str]):
+        """记录 trace_id 的首次写入时间（在线程池中调用，需加锁）"""
+        now = time.monotonic()
+        with self._written_lock:
+            for trace_id in trace_ids:
+                if trace_id and trace_id not in self._written_at:
+                    self._written_at[trace_id] = now
+            while len(self._written_at) > self.MAX_TRACKED_WRITES:
+                self._written_at.popitem(last=False)
+    
+    @staticmethod
+    def build_log_entry(message: str, **kwargs) -> log_service_pb2.LogEntry:
+        """
+        构造 LogEntry
+        
+        Args:
+            message (str): 日志消息
+            **kwargs: log_id, service_name, level, trace_id, span_id 作为 LogEntry 字段，其余参数放入 metadata；
+                未提供 log_id 时生成 ULID
+        """
         # 提取特定的 gRPC 参数
+        log_id = kwargs.pop('log_id', '') or new_ulid()
         service_name = kwargs.pop('service_name', 'fastapi-service')
         level = kwargs.pop('level', log_service_pb2.LogLevel.INFO)
         trace_id = kwargs.pop('trace_id', '')
@@ -82,20 +246,29 @@ class AsyncLogServiceClient:
             }
             level = level_map.get(level.upper(), log_service_pb2.LogLevel.INFO)
         
-        log_entry = log_service_pb2.LogEntry(
+        return log_service_pb2.LogEntry(
+            id=log_id,
             service_name=service_name,
             level=level,
             message=message,
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp_unix_nano=time.time_ns(),
             metadata=metadata,
             trace_id=trace_id,
             span_id=span_id
         )
+    
+    def _sync_write_log(self, message: str, **kwargs) -> Dict[str, Any]:
+        """同步写入日志的内部方法"""
+        log_entry = self.build_log_entry(message, **kwargs)
         
         request = log_service_pb2.WriteLogRequest(log_entry=log_entry)
         
         try:
-            response = self.stub.WriteLog(request)
+            response = self._invoke("WriteLog", request)
+            if response.success:
+                log_entry.id = response.log_id
+                get_recent_writes().add([log_entry])
+                self._track_writes([log_entry.trace_id])
             return {
                 "success": response.success,
                 "log_id": response.log_id,
@@ -127,60 +300,262 @@ class AsyncLogServiceClient:
         Returns:
             Dict[str, Any]: 写入结果
         """
-        loop = asyncio.get_event_loop()
-        
         # 在线程池中执行同步的 gRPC 调用
-        # 使用 functools.partial 来传递 kwargs
-        import functools
-        func = functools.partial(self._sync_write_log, message, **kwargs)
-        return await loop.run_in_executor(self.executor, func)
+        return await self._run_in_executor(self._sync_write_log, message, **kwargs)
+    
+    def _sync_batch_write_entries(self, log_entries: List[log_service_pb2.LogEntry]) -> Dict[str, Any]:
+        """同步调用 BatchWriteLog 的内部方法"""
+        # 二进制帧中的条目可能没有 ID，补齐后重试才能去重
+        for log_entry in log_entries:
+            if not log_entry.id:
+                log_entry.id = new_ulid()
+        request = log_service_pb2.BatchWriteLogRequest(log_entries=log_entries)
+        if settings.GRPC_FACTOR_COMMON_METADATA:
+            factor_common_metadata(request)
+        
+        try:
+            response = self._invoke("BatchWriteLog", request)
+            if response.success:
+                for log_entry, log_id in zip(log_entries, response.log_ids):
+                    log_entry.id = log_id
+                get_recent_writes().add(log_entries)
+                self._track_writes(entry.trace_id for entry in log_entries)
+            return {
+                "success": response.success,
+                "log_ids": list(response.log_ids),
+                "error_message": response.error_message
+            }
+        except grpc.RpcError as e:
+            return {
+                "success": False,
+                "log_ids": [],
+                "error_message": f"gRPC error: {e.details()}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "log_ids": [],
+                "error_message": f"Error: {str(e)}"
+            }
+    
+    async def batch_write_entries(self, log_entries: List[log_service_pb2.LogEntry]) -> Dict[str, Any]:
+        """
+        通过一次 BatchWriteLog 调用写入已构造好的 LogEntry 列表
+        
+        Args:
+            log_entries: LogEntry 列表
+        
+        Returns:
+            Dict[str, Any]: 写入结果（success, log_ids, error_message）
+        """
+        _batch_size.observe(len(log_entries))
+        return await self._run_in_executor(self._sync_batch_write_entries, log_entries)
+    
+    async def query_log(self, request: log_service_pb2.QueryLogRequest) -> log_service_pb2.QueryLogResponse:
+        """
+        异步执行 QueryLog
+        
+        Args:
+            request: QueryLogRequest
+        
+        Returns:
+            QueryLogResponse（gRPC 错误以 grpc.RpcError 抛出）
+        """
+        return await self._run_in_executor(self._invoke, "QueryLog", request)
+    
+    async def aggregate_logs(self, request: log_service_pb2.AggregateLogsRequest) -> log_service_pb2.AggregateLogsResponse:
+        """
+        异步执行 AggregateLogs
+        
+        Args:
+            request: AggregateLogsRequest
+        
+        Returns:
+            AggregateLogsResponse（gRPC 错误以 grpc.RpcError 抛出）
+        """
+        return await self._run_in_executor(self._invoke, "AggregateLogs", request)
+    
+    async def stream_query_log(self, request: log_service_pb2.StreamQueryLogRequest,
+                               timeout: Optional[float] = None) -> AsyncIterator[log_service_pb2.QueryLogChunk]:
+        """
+        异步执行 StreamQueryLog，逐块产出
+        
+        同步的流迭代器每次只在线程池中拉取一块，消费方（HTTP 响应）写得慢时不会继续拉取，
+        由 gRPC 流控让服务端暂停读游标；流不重试，消费方提前退出时取消调用，服务端随之关闭游标
+        
+        Args:
+            request: StreamQueryLogRequest
+            timeout: 整个流的超时时间（秒）
+        
+        Yields:
+            QueryLogChunk（gRPC 错误以 grpc.RpcError 抛出）
+        """
+        call = self.stub.StreamQueryLog(request, timeout=timeout)
+        try:
+            while True:
+                chunk = await self._run_in_executor(next, call, None)
+                if chunk is None:
+                    return
+                yield chunk
+        except grpc.RpcError as e:
+            GRPC_FAILURES.labels("StreamQueryLog", e.code().name).inc()
+            raise
+        finally:
+            call.cancel()
+    
+    async def wait_until_visible(self, trace_ids: Iterable[str], timeout: float = 30.0,
+                                 initial_backoff: float = 0.05, max_backoff: float = 2.0,
+                                 concurrency: int = 8) -> Dict[str, Any]:
+        """
+        等待标记日志可被 QueryLog 查到（替代写入后的固定 sleep）
+        
+        按 trace_id 轮询 QueryLog，每轮按写入顺序（最早的标记优先）最多 concurrency 个查询同时在途，
+        不会一次向与实时流量共用的线程池提交大量查询（受准入控制，被拒绝的标记视为未可见），指数退避并带随机抖动，所有标记可见或到达截止时间即返回；
+        每个标记从写入到可见的延迟记录到 fastapi_write_visibility_seconds 直方图。
+        直接查询服务端，不合并网关的最近写入窗口
+        
+        Args:
+            trace_ids: 标记日志的 trace_id
+            timeout: 最长等待时间（秒）
+            initial_backoff: 首次退避时间（秒）
+            max_backoff: 最大退避时间（秒）
+            concurrency: 同时在途的 QueryLog 调用数上限
+        
+        Returns:
+            Dict[str, Any]: visible（是否全部可见）、elapsed、latencies（trace_id -> 可见延迟）、pending（未可见的 trace_id）
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        pending = list(dict.fromkeys(t for t in trace_ids if t))
+        latencies = {}
+        attempt = 0
+        controller = get_admission_controller()
+        slots = asyncio.Semaphore(max(1, concurrency))
+        
+        async def is_visible(trace_id: str) -> bool:
+            request = log_service_pb2.QueryLogRequest(
+                trace_id=trace_id, limit=1, fields=["id"], count_mode=log_service_pb2.CountMode.COUNT_NONE)
+            try:
+                async with slots, controller.admit("visibility"):
+                    response = await self.query_log(request)
+            except (grpc.RpcError, AdmissionRejected):
+                return False
+            return response.success and len(response.logs) > 0
+        
+        while True:
+            visible = await asyncio.gather(*(is_visible(t) for t in pending))
+            now = time.monotonic()
+            still_pending = []
+            for trace_id, ok in zip(pending, visible):
+                if not ok:
+                    still_pending.append(trace_id)
+                    continue
+                with self._written_lock:
+                    written = self._written_at.pop(trace_id, start)
+                latencies[trace_id] = now - written
+                _write_visibility.observe(now - written)
+            pending = still_pending
+            
+            if not pending or now >= deadline:
+                break
+            
+            # 指数退避 + 抖动（在 [backoff/2, backoff] 之间随机），不超过剩余时间
+            backoff = min(max_backoff, initial_backoff * (2 ** attempt))
+            await asyncio.sleep(min(random.uniform(backoff / 2, backoff), deadline - now))
+            attempt += 1
+        
+        return {
+            "visible": not pending,
+            "elapsed": time.monotonic() - start,
+            "latencies": latencies,
+            "pending": pending,
+        }
     
     async def batch_write_logs(self, log_entries: list) -> Dict[str, Any]:
         """
         异步批量写入日志
         
+        整批通过一次 BatchWriteLog 调用写入，只占用一个线程池线程和一个准入许可；
+        服务端按批次整体成功或失败
+        
         Args:
             log_entries: 日志条目列表，每个条目包含 message 和其他参数
         
         Returns:
             Dict[str, Any]: 批量写入结果
         """
-        results = []
-        
-        # 创建异步任务列表
-        tasks = []
+        entries = []
         for entry in log_entries:
             message = entry.pop('message', '')
-            task = self.write_log(message, **entry)
-            tasks.append(task)
-        
-        # 并发执行所有任务
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # 统计结果
-        success_count = 0
-        error_count = 0
-        errors = []
-        
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                error_count += 1
-                errors.append(f"Entry {i}: {str(result)}")
-            elif isinstance(result, dict) and result.get('success'):
-                success_count += 1
-            else:
-                error_count += 1
-                errors.append(f"Entry {i}: {result.get('error_message', 'Unknown error')}")
+            entries.append(self.build_log_entry(message, **entry))
+        
+        result = await self.batch_write_entries(entries)
         
+        if result['success']:
+            return {
+                "total_count": len(entries),
+                "success_count": len(entries),
+                "error_count": 0,
+                "errors": [],
+                "results": [  # 前10个成功结果
+                    {"success": True, "log_id": log_id, "error_message": ""} for log_id in result['log_ids'][:10]
+                ]
+            }
         return {
-            "total_count": len(log_entries),
-            "success_count": success_count,
-            "error_count": error_count,
-            "errors": errors[:5],  # 只返回前5个错误
-            "results": [r for r in results if not isinstance(r, Exception)][:10]  # 前10个成功结果
+            "total_count": len(entries),
+            "success_count": 0,
+            "error_count": len(entries),
+            "errors": [result['error_message'] or 'Unknown error'],
+            "results": []
         }
 
 
+def _timestamp_string(entry: log_service_pb2.LogEntry) -> str:
+    """RFC3339 时间字符串，只带纳秒时间戳的条目（网关最近写入）按秒精度补齐"""
+    if entry.timestamp or not entry.timestamp_unix_nano:
+        return entry.timestamp
+    timestamp = datetime.fromtimestamp(entry.timestamp_unix_nano // 1_000_000_000, timezone.utc)
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# LogEntry 字段到字典取值函数的映射，也是查询字段掩码允许的字段名
+LOG_FIELD_GETTERS = {
+    "id": lambda e: e.id,
+    "service_name": lambda e: e.service_name,
+    "level": lambda e: log_service_pb2.LogLevel.Name(e.level),
+    "message": lambda e: e.message,
+    "timestamp": _timestamp_string,
+    "timestamp_unix_nano": lambda e: e.timestamp_unix_nano,
+    "metadata": lambda e: dict(e.metadata),
+    "trace_id": lambda e: e.trace_id,
+    "span_id": lambda e: e.span_id,
+}
+
+
+def log_entry_to_dict(entry: log_service_pb2.LogEntry, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """LogEntry 转为可 JSON 序列化的字典，fields 为字段掩码，为空时转换全部字段"""
+    if not fields:
+        return {field: getter(entry) for field, getter in LOG_FIELD_GETTERS.items()}
+    return {field: LOG_FIELD_GETTERS[field](entry) for field in fields}
+
+
+def aggregate_columns(request: log_service_pb2.AggregateLogsRequest,
+                      response: log_service_pb2.AggregateLogsResponse) -> Dict[str, list]:
+    """把聚合分组转为列式结构，只包含参与分组的列和 count，比逐行对象小得多"""
+    buckets = response.buckets
+    columns = {}
+    if request.bucket_seconds > 0:
+        columns["bucket_start_unix_nano"] = [b.bucket_start_unix_nano for b in buckets]
+    if request.group_by_service:
+        columns["service_name"] = [b.service_name for b in buckets]
+    if request.group_by_level:
+        columns["level"] = [log_service_pb2.LogLevel.Name(b.level) for b in buckets]
+    if request.group_by_metadata_key:
+        columns["metadata_value"] = [b.metadata_value for b in buckets]
+    columns["count"] = [b.count for b in buckets]
+    return columns
+
+
 # 全局客户端实例
 _log_client = None
 _client_lock = threading.Lock()
@@ -228,3 +603,18 @@ async def batch_write_logs(log_entries: list) -> Dict[str, Any]:
     """
     client = get_log_client()
     return await client.batch_write_logs(log_entries)
+
+
+async def wait_until_visible(trace_ids: Iterable[str], timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    便捷的等待日志可见函数
+    
+    Args:
+        trace_ids: 标记日志的 trace_id
+        timeout: 最长等待时间（秒）
+    
+    Returns:
+        Dict[str, Any]: 等待结果
+    """
+    client = get_log_client()
+    return await client.wait_until_visible(trace_ids, timeout=timeout)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+最近写入窗口
+Go 服务端的 LogQueue 按 flushPeriod 批量落库，刚写入的日志要等几秒才能查到。
+网关在内存中保留一个有界的最近写入环，按服务、trace_id、级别建立索引，
+查询时与 QueryLog 的结果合并并按内容哈希去重，实现读己之写
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from ..core.config import settings
+from ..core.metrics import RECENT_WRITES_SIZE, RECENT_WRITES_MERGED
+
+_merged = RECENT_WRITES_MERGED.labels()
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def normalize_timestamp(value: str) -> datetime:
+    """
+    解析时间戳并截断到秒
+
+    服务端按 RFC3339 解析写入的时间戳，查询返回时只保留到秒，两边按秒对齐后内容哈希才能一致；
+    无法解析时与服务端一致，视为当前时间
+    """
+    try:
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        parsed = parsed.astimezone(timezone.utc)
+    except (ValueError, TypeError):
+        parsed = datetime.now(timezone.utc)
+    return parsed.replace(microsecond=0)
+
+
+def to_unix_nano(value: datetime) -> int:
+    """datetime 转为纪元纳秒"""
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+
+def entry_time_ns(entry: log_service_pb2.LogEntry) -> int:
+    """
+    日志时间（纪元纳秒）
+
+    优先使用 timestamp_unix_nano；只带 RFC3339 字符串的条目（旧服务端或旧客户端）按秒精度换算
+    """
+    if entry.timestamp_unix_nano:
+        return entry.timestamp_unix_nano
+    return to_unix_nano(normalize_timestamp(entry.timestamp))
+
+
+def entry_timestamp(entry: log_service_pb2.LogEntry) -> datetime:
+    """日志时间截断到秒，与服务端返回的 RFC3339 字符串精度一致"""
+    return datetime.fromtimestamp(entry_time_ns(entry) // 1_000_000_000, timezone.utc)
+
+
+def content_hash(entry: log_service_pb2.LogEntry, timestamp: Optional[datetime] = None) -> bytes:
+    """
+    日志内容哈希（不含 id）
+
+    未携带客户端 ID 的条目写入后由服务端生成 id，只能按内容判断是否为同一条日志；
+    时间按秒对齐，服务端落库后只保留毫秒精度，秒级对齐后两边的哈希才一致
+    """
+    if timestamp is None:
+        timestamp = entry_timestamp(entry)
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (entry.service_name, str(entry.level), entry.message,
+                 str(int((timestamp - _EPOCH).total_seconds())), entry.trace_id, entry.span_id):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    for key, value in sorted(entry.metadata.items()):
+        digest.update(key.encode("utf-8"))
+        digest.update(b"\x1e")
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.digest()
+
+
+class _Record:
+    """环中的一条记录"""
+
+    __slots__ = ("entry", "time_ns", "timestamp", "hash", "accepted_at")
+
+    def __init__(self, entry: log_service_pb2.LogEntry, accepted_at: float):
+        self.entry = entry
+        self.time_ns = entry_time_ns(entry)
+        self.timestamp = entry_timestamp(entry)
+        self.hash = content_hash(entry, self.timestamp)
+        self.accepted_at = accepted_at
+
+
+class RecentWrites:
+    """
+    有界的最近写入环
+
+    写入在线程池中完成，add/query 都加锁；索引保存记录序号，淘汰时同步删除
+    """
+
+    def __init__(self, capacity: int = 10000, ttl: float = 60.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._records: "OrderedDict[int, _Record]" = OrderedDict()
+        self._by_service: Dict[str, Dict[int, None]] = {}
+        self._by_trace: Dict[str, Dict[int, None]] = {}
+        self._by_level: Dict[int, Dict[int, None]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+        RECENT_WRITES_SIZE.set_function(lambda: len(self._records))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _indexes(self, record: _Record) -> Iterable[Tuple[dict, object]]:
+        yield self._by_service, record.entry.service_name
+        yield self._by_level, record.entry.level
+        if record.entry.trace_id:
+            yield self._by_trace, record.entry.trace_id
+
+    def _evict_locked(self, now: float):
+        """淘汰超出容量或过期的记录（调用方持有锁）"""
+        while self._records:
+            seq, record = next(iter(self._records.items()))
+            if len(self._records) <= self.capacity and now - record.accepted_at <= self.ttl:
+                break
+            del self._records[seq]
+            for index, key in self._indexes(record):
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.pop(seq, None)
+                    if not bucket:
+                        del index[key]
+
+    def add(self, entries: Iterable[log_service_pb2.LogEntry]):
+        """记录服务端已接受的日志"""
+        if self.capacity <= 0:
+            return
+        now = time.monotonic()
+        records = [_Record(entry, now) for entry in entries]
+        with self._lock:
+            for record in records:
+                seq = next(self._seq)
+                self._records[seq] = record
+                for index, key in self._indexes(record):
+                    index.setdefault(key, {})[seq] = None
+            self._evict_locked(now)
+
+    def query(self, service_name: str = "", level: Optional[int] = None, trace_id: str = "",
+              start_ns: int = 0, end_ns: int = 0,
+              metadata_filters: Optional[Dict[str, str]] = None) -> List[_Record]:
+        """
+        按与 QueryLog 相同的条件筛选最近写入，按时间倒序返回（start_ns / end_ns 为 0 表示不限）
+
+        先用最具选择性的索引缩小候选集，再逐条检查其余条件
+        """
+        metadata_filters = metadata_filters or {}
+        with self._lock:
+            self._evict_locked(time.monotonic())
+            if trace_id:
+                candidates = list(self._by_trace.get(trace_id, ()))
+            elif service_name:
+                candidates = list(self._by_service.get(service_name, ()))
+            elif level is not None:
+                candidates = list(self._by_level.get(level, ()))
+            else:
+                candidates = list(self._records)
+            records = [self._records[seq] for seq in candidates]
+
+        matched = []
+        for record in records:
+            entry = record.entry
+            if service_name and entry.service_name != service_name:
+                continue
+            if level is not None and entry.level != level:
+                continue
+            if trace_id and entry.trace_id != trace_id:
+                continue
+            if start_ns and record.time_ns < start_ns:
+                continue
+            if end_ns and record.time_ns > end_ns:
+                continue
+            if any(entry.metadata.get(k) != v for k, v in metadata_filters.items()):
+                continue
+            matched.append(record)
+        matched.sort(key=lambda r: r.time_ns, reverse=True)
+        return matched
+
+
+def merge_recent(server_logs: List[log_service_pb2.LogEntry], recent: List[_Record],
+                 limit: int) -> Tuple[List[log_service_pb2.LogEntry], int]:
+    """
+    合并 QueryLog 结果与最近写入并去重：先按日志 ID（客户端生成的 ULID 即服务端 _id），
+    再按内容哈希（按出现次数抵扣，内容相同的多条日志不会被合并成一条）；带字段掩码的查询只能按 ID 去重
+
+    QueryLog 结果被 limit 截断时，比当页最旧一条更早（或同一秒）的最近写入无法判断是否已落库，不参与合并
+
+    Returns:
+        Tuple[List[LogEntry], int]: (合并后按时间倒序的日志, 来自最近写入的条数)
+    """
+    if not recent:
+        return server_logs, 0
+
+    persisted_ids = {log.id for log in server_logs if log.id}
+    persisted = Counter(content_hash(log) for log in server_logs)
+    oldest = None
+    if limit > 0 and len(server_logs) >= limit:
+        oldest = min(entry_timestamp(log) for log in server_logs)
+
+    extras = []
+    for record in recent:
+        if oldest is not None and record.timestamp <= oldest:
+            continue
+        if record.entry.id and record.entry.id in persisted_ids:
+            continue
+        if persisted[record.hash] > 0:
+            persisted[record.hash] -= 1
+            continue
+        extras.append(record.entry)
+
+    if not extras:
+        return server_logs, 0
+
+    merged = extras + list(server_logs)
+    merged.sort(key=entry_time_ns, reverse=True)
+    if limit > 0:
+        merged = merged[:limit]
+    extra_ids = {id(entry) for entry in extras}
+    added = sum(1 for log in merged if id(log) in extra_ids)
+    _merged.inc(added)
+    return merged, added
+
+
+# 全局实例
+_recent_writes = None
+_recent_lock = threading.Lock()
+
+
+def get_recent_writes() -> RecentWrites:
+    """获取最近写入窗口实例（线程安全）"""
+    global _recent_writes
+    if _recent_writes is None:
+        with _recent_lock:
+            if _recent_writes is None:
+                _recent_writes = RecentWrites(
+                    capacity=settings.RECENT_WRITES_CAPACITY,
+                    ttl=settings.RECENT_WRITES_TTL,
+                )
+    return _recent_writes
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志实时跟踪（live tail）
+每个不同的过滤条件（服务/级别/metadata）只有一个后台轮询器，从水位线之前一个宽限期开始轮询 QueryLog，
+按日志 id 去重后广播给所有订阅者；每个订阅者一个有界队列，消费过慢时丢弃最旧的事件
+"""
+
+import asyncio
+import heapq
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from .admission import AdmissionRejected, get_admission_controller
+from .log_client import AsyncLogServiceClient, get_log_client
+from .recent import entry_time_ns
+from ..core.config import settings
+from ..core.metrics import TAIL_POLLERS, TAIL_SUBSCRIBERS, TAIL_DROPPED
+
+# 过滤条件键：(service_name, level, metadata 键值对)
+TailKey = Tuple[str, Optional[int], Tuple[Tuple[str, str], ...]]
+
+_dropped = TAIL_DROPPED.labels()
+
+
+def format_timestamp(value_ns: int) -> str:
+    """纪元纳秒格式化为服务端可解析的 RFC3339（秒精度）"""
+    return datetime.fromtimestamp(value_ns // 1_000_000_000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def format_sse(event: str, data: Any, event_id: str = "") -> str:
+    """格式化一条 Server-Sent Event"""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class TailSubscriber:
+    """单个订阅者，持有一个有界事件队列"""
+
+    def __init__(self, key: TailKey, max_queue: int):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, event: Tuple[str, Any]):
+        """投递事件，队列已满时丢弃最旧的事件，不阻塞轮询器"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            _dropped.inc()
+        self.queue.put_nowait(event)
+
+
+class TailPoller:
+    """
+    单个过滤条件的轮询器
+
+    水位线为已发出日志的最新时间（纪元纳秒，不超过当前时间）。日志时间来自生产者的时钟，且要等服务端
+    flushPeriod 落库后才能查到，比水位线旧的日志可能之后才出现（后一批落库、重试写入、时钟偏差、
+    WebSocket 攒批的生产者），因此每轮从 水位线 - grace 开始查询（start_time_unix_nano，同时带上秒精度的
+    start_time 兼容旧服务端），grace 需不小于服务端 flushPeriod 加上允许的时钟偏差。
+    窗口内的日志每轮都会被重复返回，用覆盖整个窗口的 id 集合去重；窗口之外的 id 按时间淘汰，
+    集合大小另有 max_seen 上限（超出时淘汰最旧的，只会造成重复推送，不会遗漏）
+    """
+
+    def __init__(self, key: TailKey, client: AsyncLogServiceClient,
+                 interval: float = 1.0, page_limit: int = 500,
+                 grace: float = 10.0, max_seen: int = 50000):
+        self.key = key
+        self.client = client
+        self.interval = interval
+        self.page_limit = page_limit
+        self.grace_ns = int(grace * 1_000_000_000)
+        self.max_seen = max_seen
+        self.subscribers = set()
+        self.watermark = time.time_ns()
+        # 已发出的 id，及按 (时间, id) 排列的小顶堆用于按时间淘汰
+        self._seen = set()
+        self._seen_heap: List[Tuple[int, str]] = []
+        self.last_error = ""
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """启动后台轮询任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+
+    def stop(self):
+        """停止后台轮询任务"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _requests(self) -> List[log_service_pb2.QueryLogRequest]:
+        """
+        构造本轮的查询请求
+
+        服务端带 service_name 时总是按 level 精确匹配，未指定级别时需要按每个级别各查询一次；
+        不带 service_name 且级别为 DEBUG 时服务端不过滤级别，一次查询即可
+        """
+        service_name, level, metadata = self.key
+        if level is not None:
+            levels = [level]
+        elif service_name:
+            levels = list(log_service_pb2.LogLevel.values())
+        else:
+            levels = [log_service_pb2.LogLevel.DEBUG]
+        start_ns = self.window_start()
+        start_time = format_timestamp(start_ns)
+        return [
+            log_service_pb2.QueryLogRequest(
+                service_name=service_name,
+                level=lv,
+                start_time=start_time,
+                start_time_unix_nano=start_ns,
+                count_mode=log_service_pb2.CountMode.COUNT_NONE,
+                metadata_filters=dict(metadata),
+                limit=self.page_limit,
+            )
+            for lv in levels
+        ]
+
+    def window_start(self) -> int:
+        """本轮查询的起始时间（纪元纳秒）"""
+        return max(0, self.watermark - self.grace_ns)
+
+    def _remember(self, ts: int, entry_id: str):
+        self._seen.add(entry_id)
+        heapq.heappush(self._seen_heap, (ts, entry_id))
+
+    def _expire_seen(self):
+        """淘汰窗口之外（之后的查询不会再返回）的 id，并限制集合大小"""
+        start_ns = self.window_start()
+        heap = self._seen_heap
+        while heap and (heap[0][0] < start_ns or len(heap) > self.max_seen):
+            self._seen.discard(heapq.heappop(heap)[1])
+
+    async def poll_once(self) -> int:
+        """
+        执行一轮轮询并广播新日志
+
+        Returns:
+            int: 本轮新日志条数
+        """
+        level = self.key[1]
+        logs = []
+        gap = False
+        controller = get_admission_controller()
+        for request in self._requests():
+            async with controller.admit("tail"):
+                response = await self.client.query_log(request)
+            if not response.success:
+                raise RuntimeError(response.error_message)
+            logs.extend(response.logs)
+            # 返回结果按时间倒序截断：页满且最旧的一条此前没有发出过，说明截断处之前可能还有未发出的日志
+            gap = gap or (len(response.logs) >= self.page_limit and response.logs[-1].id not in self._seen)
+
+        entries = []
+        for entry in logs:
+            if level is not None and entry.level != level:
+                continue
+            entries.append((entry_time_ns(entry), entry))
+        entries.sort(key=lambda item: item[0])
+
+        fresh = []
+        for ts, entry in entries:
+            if entry.id in self._seen:
+                continue
+            self._remember(ts, entry.id)
+            fresh.append(entry)
+
+        # 推进水位线；生产者时钟超前的日志不能把水位线推到当前时间之后
+        if entries:
+            self.watermark = max(self.watermark, min(entries[-1][0], time.time_ns()))
+        self._expire_seen()
+
+        if gap:
+            self._publish(("gap", {"watermark": format_timestamp(self.window_start()), "page_limit": self.page_limit}))
+        for entry in fresh:
+            self._publish(("log", entry))
+        return len(fresh)
+
+    def _publish(self, event: Tuple[str, Any]):
+        for subscriber in list(self.subscribers):
+            subscriber.offer(event)
+
+    async def _poll_loop(self):
+        """周期性轮询，出错时保留错误信息并继续；被准入控制拒绝时水位线不变，顺延到下一轮"""
+        while True:
+            try:
+                await self.poll_once()
+                self.last_error = ""
+            except asyncio.CancelledError:
+                raise
+            except AdmissionRejected:
+                pass
+            except Exception as e:
+                if not self.last_error:
+                    self._publish(("error", {"error": str(e)}))
+                self.last_error = str(e)
+            await asyncio.sleep(self.interval)
+
+
+class TailHub:
+    """
+    轮询器注册表：相同过滤条件的订阅共享同一个轮询器，最后一个订阅者离开时停止轮询
+    只在事件循环线程中使用，不需要加锁
+    """
+
+    def __init__(self, client: AsyncLogServiceClient, interval: float = 1.0,
+                 page_limit: int = 500, max_queue: int = 1000,
+                 grace: float = 10.0, max_seen: int = 50000):
+        self.client = client
+        self.interval = interval
+        self.page_limit = page_limit
+        self.max_queue = max_queue
+        self.grace = grace
+        self.max_seen = max_seen
+        self.pollers: Dict[TailKey, TailPoller] = {}
+
+        TAIL_POLLERS.set_function(lambda: len(self.pollers))
+        TAIL_SUBSCRIBERS.set_function(lambda: sum(len(p.subscribers) for p in self.pollers.values()))
+
+    @staticmethod
+    def make_key(service_name: str = "", level: Optional[int] = None,
+                 metadata: Optional[Dict[str, str]] = None) -> TailKey:
+        """规范化过滤条件，使等价的过滤条件得到相同的键"""
+        return service_name, level, tuple(sorted((metadata or {}).items()))
+
+    def subscribe(self, service_name: str = "", level: Optional[int] = None,
+                  metadata: Optional[Dict[str, str]] = None) -> TailSubscriber:
+        """订阅过滤条件，必要时创建并启动轮询器"""
+        key = self.make_key(service_name, level, metadata)
+        poller = self.pollers.get(key)
+        if poller is None:
+            poller = TailPoller(key, self.client, self.interval, self.page_limit, self.grace, self.max_seen)
+            self.pollers[key] = poller
+            poller.start()
+        subscriber = TailSubscriber(key, self.max_queue)
+        poller.subscribers.add(subscriber)
+        return subscriber
+
+    def queue_state(self) -> Dict[str, float]:
+        """
+        订阅者事件队列的填充情况：平均和最大占用比例、累计丢弃事件数
+
+        单个消费慢的订阅者只会填满自己的队列（丢弃最旧事件）；平均占用高说明事件循环整体推送不过来
+        """
+        subscribers = [s for poller in self.pollers.values() for s in poller.subscribers]
+        fills = [s.queue.qsize() / max(s.queue.maxsize, 1) for s in subscribers]
+        return {
+            "subscribers": len(subscribers),
+            "mean_fill": round(sum(fills) / len(fills), 3) if fills else 0.0,
+            "max_fill": round(max(fills), 3) if fills else 0.0,
+            "dropped": sum(s.dropped for s in subscribers),
+        }
+
+    def unsubscribe(self, subscriber: TailSubscriber):
+        """取消订阅，没有订阅者的轮询器随即停止"""
+        poller = self.pollers.get(subscriber.key)
+        if poller is None:
+            return
+        poller.subscribers.discard(subscriber)
+        if not poller.subscribers:
+            poller.stop()
+            del self.pollers[subscriber.key]
+
+
+# 全局实例
+_tail_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_tail_hub() -> TailHub:
+    """获取实时跟踪注册表实例（线程安全）"""
+    global _tail_hub
+    if _tail_hub is None:
+        with _hub_lock:
+            if _tail_hub is None:
+                _tail_hub = TailHub(
+                    get_log_client(settings.GRPC_SERVER_ADDRESS),
+                    interval=settings.TAIL_POLL_INTERVAL,
+                    page_limit=settings.TAIL_PAGE_LIMIT,
+                    max_queue=settings.TAIL_QUEUE_SIZE,
+                    grace=settings.TAIL_GRACE,
+                    max_seen=settings.TAIL_SEEN_LIMIT,
+                )
+    return _tail_hub
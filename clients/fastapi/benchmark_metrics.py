@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+指标埋点微基准测试
+测量一次写入请求完整路径上的指标开销（不依赖 gRPC 服务器）：
+- PrometheusMiddleware：请求计时、按 (method, route, status) 缓存的直方图子实例
+- _run_in_executor / _timed_call：在途调用数、线程池排队耗时
+- _invoke：gRPC 调用延迟（含重试循环本身）
+各部分都运行实际代码，用同样调用但不带埋点的路径作为基线相减
+
+预算：批量写入（100 条/批）每条日志 1µs；单条写入（一次请求一条日志）每请求 6µs。
+纯 Python 的直方图 observe 单次约 0.3~0.6µs，单条写入路径上有 3 次 observe 和 4 次 perf_counter，
+加上中间件包裹 send 的协程，实测约 4~5µs，做不到每条日志 1µs；这仍不到一次 gRPC 往返（数百 µs）的 2%
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+
+# 添加当前目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from app.core.metrics import GRPC_CALL_DURATION, PrometheusMiddleware, registry
+from app.services.log_client import AsyncLogServiceClient, _batch_size
+
+# 单条写入每个请求的预算（纳秒）
+REQUEST_BUDGET_NS = 6000
+# 批量写入每条日志的预算（纳秒）
+BATCH_LOG_BUDGET_NS = 1000
+BATCH_SIZE = 100
+
+_RESPONSE = log_service_pb2.WriteLogResponse(success=True, log_id="bench")
+
+
+class _StubMethods:
+    """不发网络请求的 stub，WriteLog / BatchWriteLog 直接返回"""
+
+    def WriteLog(self, request, timeout=None):
+        return _RESPONSE
+
+    BatchWriteLog = WriteLog
+
+
+def _per_call_ns(func, iterations: int, repeat: int = 5) -> float:
+    """多次运行取最小值，减少调度噪声"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(iterations)
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e9
+
+
+def bench_executor(client: AsyncLogServiceClient, iterations: int) -> float:
+    """_run_in_executor 的埋点：在途计数 + 提交时刻 + 线程池线程中的 _timed_call"""
+    perf_counter = time.perf_counter
+    timed_call = client._timed_call
+    args, kwargs = ("message",), {}
+
+    def work(message):
+        return message
+
+    def instrumented(n):
+        for _ in range(n):
+            client.in_flight += 1
+            timed_call(perf_counter(), work, args, kwargs)
+            client.in_flight -= 1
+
+    def baseline(n):
+        for _ in range(n):
+            work(*args, **kwargs)
+
+    return _per_call_ns(instrumented, iterations) - _per_call_ns(baseline, iterations)
+
+
+def bench_invoke(client: AsyncLogServiceClient, method: str, iterations: int) -> float:
+    """_invoke 的埋点（gRPC 延迟直方图 + 重试循环）相对直接调用 stub 的开销"""
+    stub = client.stub
+    request = log_service_pb2.WriteLogRequest()
+    invoke = client._invoke
+    call = getattr(stub, method)
+
+    def instrumented(n):
+        for _ in range(n):
+            invoke(method, request)
+
+    def baseline(n):
+        for _ in range(n):
+            call(request, timeout=10)
+
+    return _per_call_ns(instrumented, iterations) - _per_call_ns(baseline, iterations)
+
+
+def bench_middleware(iterations: int) -> float:
+    """PrometheusMiddleware 包裹一个最简 ASGI 应用的开销（协程直接驱动，不经过事件循环）"""
+    start_message = {"type": "http.response.start", "status": 200, "headers": []}
+    body_message = {"type": "http.response.body", "body": b""}
+
+    async def app(scope, receive, send):
+        await send(start_message)
+        await send(body_message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    middleware = PrometheusMiddleware(app)
+    route = type("Route", (), {"path": "/api/v1/logs/write"})()
+    scope = {"type": "http", "method": "POST", "route": route}
+
+    def drive(coro):
+        try:
+            coro.send(None)
+        except StopIteration:
+            pass
+
+    def instrumented(n):
+        for _ in range(n):
+            drive(middleware(scope, receive, send))
+
+    def baseline(n):
+        for _ in range(n):
+            drive(app(scope, receive, send))
+
+    return _per_call_ns(instrumented, iterations) - _per_call_ns(baseline, iterations)
+
+
+def bench_threads(iterations: int, thread_count: int) -> float:
+    """多线程并发更新同一指标（验证分片写入无锁竞争）"""
+    histogram = GRPC_CALL_DURATION.labels("WriteLog")
+    barrier = threading.Barrier(thread_count + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(iterations):
+            histogram.observe(0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(thread_count)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return (time.perf_counter() - start) / (iterations * thread_count) * 1e9
+
+
+def main():
+    """运行微基准测试"""
+    iterations = 100000
+
+    print("=" * 60)
+    print("📏 FastAPI 指标埋点微基准测试（完整请求路径）")
+    print("=" * 60)
+
+    # 通道延迟建立连接，不需要服务端
+    client = AsyncLogServiceClient("127.0.0.1:1")
+    client.stub = _StubMethods()
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    # 预热，创建所有分片和标签子实例
+    bench_executor(client, 1000)
+    bench_invoke(client, "WriteLog", 1000)
+    bench_invoke(client, "BatchWriteLog", 1000)
+    bench_middleware(1000)
+
+    middleware_ns = bench_middleware(iterations)
+    executor_ns = bench_executor(client, iterations)
+    invoke_ns = bench_invoke(client, "WriteLog", iterations)
+    request_ns = middleware_ns + executor_ns + invoke_ns
+    batch_observe_ns = _per_call_ns(lambda n: [_batch_size.observe(BATCH_SIZE) for _ in range(n)], iterations)
+    batch_request_ns = (middleware_ns + executor_ns + bench_invoke(client, "BatchWriteLog", iterations)
+                        + batch_observe_ns)
+    batch_log_ns = batch_request_ns / BATCH_SIZE
+    threaded_ns = bench_threads(iterations // 4, 8)
+
+    print(f"HTTP 中间件:                {middleware_ns:8.1f} ns/请求")
+    print(f"线程池提交与排队计时:       {executor_ns:8.1f} ns/请求")
+    print(f"gRPC 调用计时:              {invoke_ns:8.1f} ns/请求")
+    print(f"单条写入合计:               {request_ns:8.1f} ns/请求（1 条日志）")
+    print(f"批量写入合计 ({BATCH_SIZE}/批):      {batch_request_ns:8.1f} ns/请求, {batch_log_ns:6.1f} ns/log")
+    print(f"8 线程并发 observe:         {threaded_ns:8.1f} ns/次")
+    print(f"/metrics 输出大小:          {len(registry.expose())} 字节")
+    print("-" * 60)
+
+    failed = False
+    for name, value, budget, unit in (("单条写入", request_ns, REQUEST_BUDGET_NS, "ns/请求"),
+                                      ("批量写入", batch_log_ns, BATCH_LOG_BUDGET_NS, "ns/log")):
+        ok = value < budget
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {name}埋点开销 {value:.1f} {unit}，预算 {budget} {unit}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
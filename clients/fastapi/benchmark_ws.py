@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WebSocket 流式写入基准测试
+在相同的消息速率下对比 /write（每条一个请求）、/batch（每批一个请求）和
+WebSocket /stream（一条长连接上发送分帧批次）的吞吐、确认延迟和客户端 CPU 开销
+
+需要先启动 gRPC 日志服务和 FastAPI 服务
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import struct
+import time
+from typing import Dict, List
+
+import aiohttp
+
+# 添加当前目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+
+def percentile(values: List[float], p: float) -> float:
+    """计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def make_log(i: int) -> Dict:
+    """生成一条测试日志"""
+    return {
+        "message": f"ws benchmark log {i}",
+        "service_name": "ws-benchmark",
+        "level": "INFO",
+        "trace_id": f"trace-{i // 100}",
+        "metadata": {"seq": str(i), "monitor_type": "impression"},
+    }
+
+
+class LoadResult:
+    """单个模式的压测结果"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.sent = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.cpu = 0.0
+
+    def summary(self) -> str:
+        acked = len(self.latencies)
+        rate = acked / self.elapsed if self.elapsed else 0.0
+        cpu_us = self.cpu / max(self.sent, 1) * 1e6
+        return (f"{self.name:<10} 发送 {self.sent:6d}  确认 {acked:6d}  错误 {self.errors:5d}  "
+                f"吞吐 {rate:8.1f} logs/s  p50 {percentile(self.latencies, 0.5) * 1000:7.1f} ms  "
+                f"p99 {percentile(self.latencies, 0.99) * 1000:8.1f} ms  CPU {cpu_us:6.1f} µs/log")
+
+
+async def produce(rate: float, duration: float, on_log, on_tick=None):
+    """按固定速率产生日志，每 10ms 一个节拍"""
+    tick = 0.01
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    produced = 0
+    while True:
+        now = loop.time()
+        if now - start >= duration:
+            break
+        target = int((now - start) * rate)
+        while produced < target:
+            await on_log(produced, time.perf_counter())
+            produced += 1
+        if on_tick is not None:
+            await on_tick()
+        await asyncio.sleep(tick)
+    return produced
+
+
+async def bench_write(base_url: str, rate: float, duration: float) -> LoadResult:
+    """每条日志一个 POST /write 请求"""
+    result = LoadResult("/write")
+    url = f"{base_url}/api/v1/logs/write"
+    tasks = []
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100)) as session:
+        async def send_one(i: int, created: float):
+            try:
+                async with session.post(url, json=make_log(i)) as response:
+                    body = await response.json()
+                    if response.status == 200 and body.get("success"):
+                        result.latencies.append(time.perf_counter() - created)
+                    else:
+                        result.errors += 1
+            except Exception:
+                result.errors += 1
+
+        async def on_log(i: int, created: float):
+            tasks.append(asyncio.create_task(send_one(i, created)))
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        result.sent = await produce(rate, duration, on_log)
+        await asyncio.gather(*tasks)
+        result.elapsed = time.perf_counter() - wall_start
+        result.cpu = time.process_time() - cpu_start
+    return result
+
+
+async def bench_batch(base_url: str, rate: float, duration: float, batch_size: int) -> LoadResult:
+    """攒批后每批一个 POST /batch 请求"""
+    result = LoadResult("/batch")
+    url = f"{base_url}/api/v1/logs/batch"
+    tasks = []
+    buffer = []
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100)) as session:
+        async def send_batch(batch):
+            try:
+                async with session.post(url, json={"log_entries": [log for log, _ in batch]}) as response:
+                    body = await response.json()
+                    now = time.perf_counter()
+                    if response.status != 200:
+                        result.errors += len(batch)
+                        return
+                    result.errors += body.get("error_count", 0)
+                    for _, created in batch[:body.get("success_count", 0)]:
+                        result.latencies.append(now - created)
+            except Exception:
+                result.errors += len(batch)
+
+        async def flush():
+            if buffer:
+                tasks.append(asyncio.create_task(send_batch(list(buffer))))
+                buffer.clear()
+
+        async def on_log(i: int, created: float):
+            buffer.append((make_log(i), created))
+            if len(buffer) >= batch_size:
+                await flush()
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        result.sent = await produce(rate, duration, on_log, flush)
+        await flush()
+        await asyncio.gather(*tasks)
+        result.elapsed = time.perf_counter() - wall_start
+        result.cpu = time.process_time() - cpu_start
+    return result
+
+
+async def bench_stream(base_url: str, rate: float, duration: float, batch_size: int,
+                       binary: bool) -> LoadResult:
+    """一条 WebSocket 连接，攒批后按帧发送，遵守服务端窗口"""
+    result = LoadResult("ws-pb" if binary else "ws-json")
+    url = base_url.replace("http", "ws", 1) + "/api/v1/logs/stream"
+    buffer = []
+    pending: Dict[int, list] = {}
+    next_seq = [1]
+
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as ws:
+            hello = await ws.receive_json()
+            credits = asyncio.Semaphore(hello["window"])
+
+            async def read_acks():
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    reply = json.loads(message.data)
+                    batch = pending.pop(reply.get("seq"), None)
+                    if batch is None:
+                        continue
+                    credits.release()
+                    now = time.perf_counter()
+                    if reply["type"] == "ack":
+                        result.latencies.extend(now - created for _, created in batch)
+                    else:
+                        result.errors += len(batch)
+                    if not pending and done_producing.is_set():
+                        all_acked.set()
+
+            def encode(seq: int, batch) -> object:
+                if not binary:
+                    return json.dumps({"seq": seq, "logs": [log for log, _ in batch]})
+                entries = []
+                for log, _ in batch:
+                    entries.append(log_service_pb2.LogEntry(
+                        service_name=log["service_name"],
+                        level=log_service_pb2.LogLevel.Value(log["level"]),
+                        message=log["message"],
+                        trace_id=log["trace_id"],
+                        metadata=log["metadata"],
+                    ))
+                request = log_service_pb2.BatchWriteLogRequest(log_entries=entries)
+                return struct.pack(">Q", seq) + request.SerializeToString()
+
+            async def flush():
+                if not buffer:
+                    return
+                batch = list(buffer)
+                buffer.clear()
+                await credits.acquire()
+                seq = next_seq[0]
+                next_seq[0] += 1
+                pending[seq] = batch
+                frame = encode(seq, batch)
+                if binary:
+                    await ws.send_bytes(frame)
+                else:
+                    await ws.send_str(frame)
+
+            async def on_log(i: int, created: float):
+                buffer.append((make_log(i), created))
+                if len(buffer) >= batch_size:
+                    await flush()
+
+            done_producing = asyncio.Event()
+            all_acked = asyncio.Event()
+            reader = asyncio.create_task(read_acks())
+
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            result.sent = await produce(rate, duration, on_log, flush)
+            await flush()
+            done_producing.set()
+            if pending:
+                await asyncio.wait_for(all_acked.wait(), timeout=60)
+            result.elapsed = time.perf_counter() - wall_start
+            result.cpu = time.process_time() - cpu_start
+            reader.cancel()
+    return result
+
+
+async def run(args) -> int:
+    print("=" * 110)
+    print("📡 WebSocket 流式写入基准测试")
+    print(f"服务地址 {args.base_url}，速率 {args.rate} logs/s，持续 {args.duration}s，批大小 {args.batch_size}")
+    print("=" * 110)
+
+    results = [
+        await bench_write(args.base_url, args.rate, args.duration),
+        await bench_batch(args.base_url, args.rate, args.duration, args.batch_size),
+        await bench_stream(args.base_url, args.rate, args.duration, args.batch_size, binary=False),
+        await bench_stream(args.base_url, args.rate, args.duration, args.batch_size, binary=True),
+    ]
+    for result in results:
+        print(result.summary())
+    print("-" * 110)
+    return 0 if all(r.latencies for r in results) else 1
+
+
+def main():
+    """运行基准测试"""
+    parser = argparse.ArgumentParser(description="WebSocket 流式写入基准测试")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--rate", type=float, default=500, help="每秒日志条数")
+    parser.add_argument("--duration", type=float, default=5, help="每个模式的持续时间（秒）")
+    parser.add_argument("--batch-size", type=int, default=50, help="/batch 和 WebSocket 的批大小")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
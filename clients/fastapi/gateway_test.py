@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+网关组件单元测试（不依赖 gRPC 服务器）
+- 准入控制：排队中被取消的请求不占用许可
+- WebSocket 流式写入：二进制帧的 common_metadata 合并到每条日志
+- 就绪检查：准入等待队列、实时跟踪订阅者队列占满时未就绪
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# 添加当前目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from app.api.ingest import FRAME_HEADER, decode_frame
+from app.services.admission import AdmissionController
+from app.services.health import HealthMonitor
+from app.services.tail import TailHub
+
+
+async def test_cancelled_waiter():
+    """排队中的请求被取消（客户端断开、tail 轮询停止）后许可全部归还"""
+    controller = AdmissionController(initial_limit=1, mode="fixed", budgets={"write": 10.0})
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit("write"):
+            await release.wait()
+
+    async def waiter():
+        async with controller.admit("write"):
+            pass
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(waiter())
+    behind = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    assert controller._queued_weight == 2, controller._queued_weight
+
+    # 排队中取消：移出队列，不影响后面的请求
+    queued.cancel()
+    await asyncio.gather(queued, return_exceptions=True)
+    assert controller._queued_weight == 1, controller._queued_weight
+    assert len(controller._waiters) == 1
+
+    # 已被放行但还没恢复执行时取消：许可同样归还
+    release.set()
+    await holder
+    assert behind.cancel()
+    await asyncio.gather(behind, return_exceptions=True)
+
+    assert controller.in_flight == 0, controller.in_flight
+    assert controller._queued_weight == 0, controller._queued_weight
+    assert not controller._waiters
+    # 上限为 1，许可泄漏时这里会排队到超时后被拒绝
+    async with controller.admit("write"):
+        pass
+
+
+def test_frame_common_metadata():
+    """二进制帧的 common_metadata 合并到每条日志，日志自身的同名键优先"""
+    request = log_service_pb2.BatchWriteLogRequest(
+        log_entries=[
+            log_service_pb2.LogEntry(message="a", metadata={"user_id": "1"}),
+            log_service_pb2.LogEntry(message="b", metadata={"user_id": "2", "region": "上海"}),
+        ],
+        common_metadata={"region": "北京", "app_version": "7.1.0"},
+    )
+    seq, entries = decode_frame({"bytes": FRAME_HEADER.pack(42) + request.SerializeToString()})
+    assert seq == 42
+    assert [dict(entry.metadata) for entry in entries] == [
+        {"user_id": "1", "region": "北京", "app_version": "7.1.0"},
+        {"user_id": "2", "region": "上海", "app_version": "7.1.0"},
+    ], [dict(entry.metadata) for entry in entries]
+
+
+class _IdleClient:
+    """就绪检查读取的客户端状态：线程池空闲"""
+
+    max_workers = 4
+    in_flight = 0
+
+    def executor_queue_depth(self) -> int:
+        return 0
+
+
+async def test_readiness_buffers():
+    """准入等待队列、实时跟踪订阅者队列的占用超过阈值时未就绪，并在详情中给出占用情况"""
+    controller = AdmissionController(initial_limit=1, mode="fixed", budgets={"write": 10.0}, max_queue=4)
+    hub = TailHub(_IdleClient(), max_queue=10)
+    monitor = HealthMonitor(_IdleClient(), admission=controller, tail_hub=hub,
+                            max_admission_queue_fill=0.5, max_tail_queue_fill=0.5)
+    monitor.last_probe_ok = True
+    monitor.last_probe_at = time.monotonic()
+
+    ready, detail = monitor.readiness()
+    assert ready, detail["reasons"]
+    assert detail["buffers"]["admission_queue"]["fill"] == 0
+    assert detail["buffers"]["tail_queues"]["subscribers"] == 0
+
+    # 准入等待队列：上限 1，占用 1 个许可后再排队 3 个（3/4 > 0.5）
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit("write"):
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold()) for _ in range(4)]
+    await asyncio.sleep(0)
+    ready, detail = monitor.readiness()
+    assert not ready
+    assert detail["buffers"]["admission_queue"]["waiting"] == 3
+    assert any(reason.startswith("admission queue saturated") for reason in detail["reasons"]), detail["reasons"]
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # 订阅者队列：只有一个订阅者堆积时平均占用未超过阈值，全部堆积时未就绪
+    slow = hub.subscribe("svc-a")
+    idle = hub.subscribe("svc-b")
+    try:
+        for i in range(10):
+            slow.offer(("log", i))
+        ready, detail = monitor.readiness()
+        assert ready, detail["reasons"]
+        assert detail["buffers"]["tail_queues"]["max_fill"] == 1.0
+        for i in range(10):
+            idle.offer(("log", i))
+        ready, detail = monitor.readiness()
+        assert not ready
+        assert any(reason.startswith("tail subscriber queues saturated") for reason in detail["reasons"]), detail["reasons"]
+    finally:
+        hub.unsubscribe(slow)
+        hub.unsubscribe(idle)
+
+
+TESTS = [
+    test_cancelled_waiter,
+    test_frame_common_metadata,
+    test_readiness_buffers,
+]
+
+
+def main():
+    """运行全部测试"""
+    failed = 0
+    for test in TESTS:
+        try:
+            result = test()
+            if asyncio.iscoroutine(result):
+                asyncio.run(asyncio.wait_for(result, timeout=10))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {type(e).__name__}: {e}")
+    print(f"\n{len(TESTS) - failed}/{len(TESTS)} 通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,13 @@ FastAPI 主应用入口
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from app.core.config import settings
+from app.core.metrics import PrometheusMiddleware, registry
 from app.api.logs import router as logs_router
+from app.api.ingest import router as ingest_router
+from app.services.admission import AdmissionRejected
 
 # 创建 FastAPI 应用实例
 app = FastAPI(
@@ -30,12 +33,30 @@ app.add_middleware(
     allow_headers=settings.ALLOW_HEADERS,
 )
 
+# 添加 Prometheus 指标中间件
+app.add_middleware(PrometheusMiddleware)
+
 # 注册路由
 app.include_router(
     logs_router,
     prefix=f"{settings.API_V1_PREFIX}/logs",
     tags=["日志管理"]
 )
+app.include_router(
+    ingest_router,
+    prefix=f"{settings.API_V1_PREFIX}/logs",
+    tags=["日志管理"]
+)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    """准入控制拒绝时返回 429，并通过 Retry-After 提示客户端退避"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": exc.retry_after_header},
+    )
 
 
 @app.get("/", summary="根路径")
@@ -49,16 +70,32 @@ async def root():
         "grpc_server": settings.GRPC_SERVER_ADDRESS,
         "endpoints": {
             "health": f"{settings.API_V1_PREFIX}/logs/health",
+            "liveness": f"{settings.API_V1_PREFIX}/logs/health/live",
+            "readiness": f"{settings.API_V1_PREFIX}/logs/health/ready",
             "write_log": f"{settings.API_V1_PREFIX}/logs/write",
             "batch_write": f"{settings.API_V1_PREFIX}/logs/batch",
-            "concurrent_test": f"{settings.API_V1_PREFIX}/logs/concurrent-test"
+            "concurrent_test": f"{settings.API_V1_PREFIX}/logs/concurrent-test",
+            "stream_ingest": f"{settings.API_V1_PREFIX}/logs/stream",
+            "query": f"{settings.API_V1_PREFIX}/logs/query",
+            "tail": f"{settings.API_V1_PREFIX}/logs/tail",
+            "metrics": "/metrics"
         }
     })
 
 
+@app.get("/metrics", summary="Prometheus 指标", include_in_schema=False)
+async def metrics():
+    """Prometheus 文本格式的指标"""
+    return Response(registry.expose(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.on_event("startup")
 async def startup_event():
     """应用启动事件"""
+    from app.services.health import get_health_monitor
+    
+    await get_health_monitor().start()
+    
     print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} 启动完成")
     print(f"📡 gRPC 服务器: {settings.GRPC_SERVER_ADDRESS}")
     print(f"📚 API 文档: http://{settings.HOST}:{settings.PORT}{settings.DOCS_URL}")
@@ -68,6 +105,9 @@ async def startup_event():
 async def shutdown_event():
     """应用关闭事件"""
     from app.services.log_client import get_log_client
+    from app.services.health import get_health_monitor
+    
+    await get_health_monitor().stop()
     
     try:
         client = get_log_client()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+准入控制过载测试
+1. 用固定容量的模拟后端（不依赖 gRPC 服务器）分别施加 1x 和 2x 负载，
+   对比有无准入控制时被接受请求的 p99 延迟：启用准入控制后 2x 过载下 p99 应基本持平
+2. 端到端：通过 httpx ASGITransport 向实际的 FastAPI 应用发送 /write 请求，
+   后端为进程内固定容量的 gRPC 桩服务，同样要求 2x 过载下 p99 基本持平（需要 httpx）
+"""
+
+import sys
+import os
+import asyncio
+import random
+import time
+from concurrent import futures
+from typing import Awaitable, Callable, List, Optional
+
+import grpc
+
+# 添加当前目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+import log_service_pb2_grpc
+
+from app.services import admission
+from app.services.admission import AdmissionController, AdmissionRejected
+
+# 模拟后端：最多 BACKEND_CAPACITY 个并发调用，每次调用耗时 SERVICE_TIME 秒
+BACKEND_CAPACITY = 8
+SERVICE_TIME = 0.02
+# 1x 负载为后端吞吐能力的 80%
+BASE_RATE = BACKEND_CAPACITY / SERVICE_TIME * 0.8
+DURATION = 4.0
+# 2x 负载下 p99 相对 1x 的最大允许倍数
+MAX_P99_RATIO = 1.5
+
+# 端到端测试的 gRPC 桩服务：同样是固定容量，单次调用更慢，使网关本身的开销远小于后端耗时
+ASGI_SERVICE_TIME = 0.05
+ASGI_BASE_RATE = BACKEND_CAPACITY / ASGI_SERVICE_TIME * 0.8
+# 端到端请求经过事件循环和线程池，偶发的调度停顿会进入 p99，加长测试使 p99 基于更多样本
+ASGI_DURATION = 8.0
+
+
+def percentile(values: List[float], p: float) -> float:
+    """计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def simulated_request(controller: Optional[AdmissionController]) -> Callable[[], Awaitable[bool]]:
+    """模拟后端上的一次请求，返回是否被接受"""
+    backend = asyncio.Semaphore(BACKEND_CAPACITY)
+
+    async def call_backend():
+        async with backend:
+            await asyncio.sleep(SERVICE_TIME)
+
+    async def request() -> bool:
+        try:
+            if controller is None:
+                await call_backend()
+            else:
+                async with controller.admit("write"):
+                    await call_backend()
+        except AdmissionRejected:
+            return False
+        return True
+
+    return request
+
+
+async def run_load(rate: float, request: Callable[[], Awaitable[bool]], duration: float = DURATION) -> dict:
+    """按泊松到达施加负载，返回被接受请求的延迟分布和拒绝数"""
+    latencies = []
+    rejected = 0
+
+    async def handle():
+        nonlocal rejected
+        start = time.perf_counter()
+        if not await request():
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    rng = random.Random(42)
+    tasks = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    next_arrival = loop.time()
+    while next_arrival < deadline:
+        delay = next_arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handle()))
+        next_arrival += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+    return {
+        "sent": len(tasks),
+        "accepted": len(latencies),
+        "rejected": rejected,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def new_controller(mode: str, service_time: float = SERVICE_TIME) -> AdmissionController:
+    """创建测试用准入控制器（write 路由排队预算 = 一次调用耗时）"""
+    return AdmissionController(
+        initial_limit=BACKEND_CAPACITY,
+        mode=mode,
+        min_limit=2,
+        max_limit=BACKEND_CAPACITY * 4,
+        budgets={"write": service_time},
+    )
+
+
+class StubLogService(log_service_pb2_grpc.LogServiceServicer):
+    """固定耗时的 gRPC 桩服务，容量由服务端线程数决定，超出的调用在服务端排队"""
+
+    def WriteLog(self, request, context):
+        time.sleep(ASGI_SERVICE_TIME)
+        return log_service_pb2.WriteLogResponse(success=True, log_id=request.log_entry.id)
+
+
+def start_stub_server() -> "tuple[grpc.Server, int]":
+    """在本进程中启动 gRPC 桩服务，返回 (服务, 端口)"""
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=BACKEND_CAPACITY))
+    log_service_pb2_grpc.add_LogServiceServicer_to_server(StubLogService(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, port
+
+
+async def run_asgi(results: dict) -> bool:
+    """
+    端到端过载测试：请求经过中间件、路由、准入控制、线程池和真实的 gRPC 调用
+
+    Returns:
+        bool: 是否通过
+    """
+    try:
+        import httpx
+    except ImportError:
+        print("⚠️ 未安装 httpx，跳过端到端过载测试（pip install httpx）")
+        return True
+
+    from app.core.config import settings
+    from app.services.log_client import get_log_client
+
+    server, port = start_stub_server()
+    settings.GRPC_SERVER_HOST = "127.0.0.1"
+    settings.GRPC_SERVER_PORT = port
+    settings.GRPC_MAX_RETRIES = 0
+    # 日志客户端是单例，先以桩服务地址创建，路由中的调用随后都复用它
+    get_log_client(settings.GRPC_SERVER_ADDRESS)
+    from main import app
+
+    print(f"端到端: 桩服务容量 {BACKEND_CAPACITY} 并发 × {ASGI_SERVICE_TIME * 1000:.0f} ms，"
+          f"1x 负载 {ASGI_BASE_RATE:.0f} req/s")
+    ok = True
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+
+            async def request() -> bool:
+                response = await client.post("/api/v1/logs/write", json={"message": "overload", "service_name": "overload-test"})
+                if response.status_code == 429:
+                    return False
+                response.raise_for_status()
+                return True
+
+            for name, mode in (("固定上限", "fixed"), ("梯度自适应", "gradient")):
+                for factor in (1, 2):
+                    # 替换全局准入控制器，每轮从相同的初始状态开始
+                    admission._admission_controller = new_controller(mode, ASGI_SERVICE_TIME)
+                    result = await run_load(ASGI_BASE_RATE * factor, request, ASGI_DURATION)
+                    results[(f"ASGI {name}", factor)] = result
+                    print_result(f"ASGI {name} {factor}x", result)
+                ratio = results[(f"ASGI {name}", 2)]["p99"] / max(results[(f"ASGI {name}", 1)]["p99"], 1e-9)
+                passed = ratio <= MAX_P99_RATIO
+                ok = ok and passed
+                print(f"{'✅' if passed else '❌'} ASGI {name}: 2x/1x p99 = {ratio:.2f}（允许 ≤ {MAX_P99_RATIO}）")
+    finally:
+        admission._admission_controller = None
+        server.stop(None)
+    return ok
+
+
+def print_result(name: str, result: dict):
+    print(f"{name:<24} 发送 {result['sent']:5d}  接受 {result['accepted']:5d}  "
+          f"拒绝 {result['rejected']:5d}  p50 {result['p50'] * 1000:7.1f} ms  "
+          f"p99 {result['p99'] * 1000:8.1f} ms")
+
+
+async def run_all() -> int:
+    print("=" * 90)
+    print("🚦 准入控制过载测试")
+    print(f"后端容量 {BACKEND_CAPACITY} 并发 × {SERVICE_TIME * 1000:.0f} ms，1x 负载 {BASE_RATE:.0f} req/s")
+    print("=" * 90)
+
+    failed = False
+    results = {}
+    for name, mode in (("无准入控制", None), ("固定上限", "fixed"), ("梯度自适应", "gradient")):
+        for factor in (1, 2):
+            controller = new_controller(mode) if mode else None
+            result = await run_load(BASE_RATE * factor, simulated_request(controller))
+            results[(name, factor)] = result
+            print_result(f"{name} {factor}x", result)
+        print("-" * 90)
+
+    for name in ("无准入控制", "固定上限", "梯度自适应"):
+        ratio = results[(name, 2)]["p99"] / max(results[(name, 1)]["p99"], 1e-9)
+        if name == "无准入控制":
+            print(f"{name}: 2x/1x p99 = {ratio:.2f}（对照组）")
+            continue
+        ok = ratio <= MAX_P99_RATIO
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {name}: 2x/1x p99 = {ratio:.2f}（允许 ≤ {MAX_P99_RATIO}）")
+
+    print("=" * 90)
+    if not await run_asgi(results):
+        failed = True
+
+    return 1 if failed else 0
+
+
+def main():
+    """运行过载测试"""
+    return asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
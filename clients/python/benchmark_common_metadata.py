@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BatchWriteLog 共享 metadata（common_metadata）线上大小基准测试
+对比每条日志各带完整 metadata 与提取批次共享键值对后的请求编码大小，以及提取本身的耗时
+
+数据集：
+- 测试数据：与 scripts/insert_test_data.py 形态一致，region / platform 每条随机，各 ID 每条不同
+- 单生产者：同一批次来自同一个客户端实例，region / platform / app_version / host 在批次内相同
+"""
+
+import sys
+import argparse
+import random
+from typing import Callable, Dict, List
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from client import factor_common_metadata
+from benchmark_projection import best_of, make_entry
+
+
+def make_batch(start: int, batch_size: int) -> List[log_service_pb2.LogEntry]:
+    """测试数据形态的一批日志"""
+    return [make_entry(start + i) for i in range(batch_size)]
+
+
+def make_producer_batch(start: int, batch_size: int) -> List[log_service_pb2.LogEntry]:
+    """单个生产者上报的一批日志：实例相关的键在批次内相同"""
+    shared = {
+        "region": random.choice(["北京", "上海", "广州", "深圳", "杭州"]),
+        "platform": random.choice(["iOS", "Android", "Web", "Desktop"]),
+        "app_version": f"7.{random.randint(0, 20)}.{random.randint(0, 9)}",
+        "host": f"log-producer-{random.randint(1, 64):02d}.prod",
+    }
+    entries = make_batch(start, batch_size)
+    for entry in entries:
+        entry.metadata.update(shared)
+    return entries
+
+
+def measure(batches: List[List[log_service_pb2.LogEntry]], repeat: int) -> Dict[str, float]:
+    """测量整批请求的编码大小，以及构造请求、提取共享键、编码的耗时"""
+    def build(factor: bool) -> List[log_service_pb2.BatchWriteLogRequest]:
+        requests = []
+        for batch in batches:
+            request = log_service_pb2.BatchWriteLogRequest(log_entries=batch)
+            if factor:
+                factor_common_metadata(request)
+            requests.append(request)
+        return requests
+
+    plain, factored = build(False), build(True)
+    return {
+        "plain_bytes": sum(r.ByteSize() for r in plain),
+        "factored_bytes": sum(r.ByteSize() for r in factored),
+        "shared_keys": sum(len(r.common_metadata) for r in factored) / len(factored),
+        "plain_time": best_of(lambda: [r.SerializeToString() for r in build(False)], repeat),
+        "factored_time": best_of(lambda: [r.SerializeToString() for r in build(True)], repeat),
+    }
+
+
+def run(name: str, make: Callable, batches: int, batch_size: int, repeat: int) -> Dict[str, float]:
+    data = [make(i * batch_size, batch_size) for i in range(batches)]
+    result = measure(data, repeat)
+    rows = batches * batch_size
+    print(f"{name:<8} 共享键 {result['shared_keys']:4.1f} 个/批  "
+          f"原始 {result['plain_bytes'] / rows:7.1f} B/条  提取后 {result['factored_bytes'] / rows:7.1f} B/条 "
+          f"({result['factored_bytes'] / result['plain_bytes']:6.1%})  "
+          f"构造+编码 {result['plain_time'] * 1000:7.2f} ms → {result['factored_time'] * 1000:7.2f} ms")
+    return result
+
+
+def main():
+    """运行基准测试"""
+    parser = argparse.ArgumentParser(description="BatchWriteLog common_metadata 线上大小基准测试")
+    parser.add_argument("--batches", type=int, default=20, help="批次数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批日志条数")
+    parser.add_argument("--repeat", type=int, default=10, help="耗时测量的重复次数（取最短）")
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"📦 common_metadata 线上大小基准测试：{args.batches} 批 × {args.batch_size} 条")
+    print("=" * 100)
+    test_data = run("测试数据", make_batch, args.batches, args.batch_size, args.repeat)
+    producer = run("单生产者", make_producer_batch, args.batches, args.batch_size, args.repeat)
+    # 没有共享键时请求不应变大，有共享键时应变小
+    ok = (test_data["factored_bytes"] <= test_data["plain_bytes"]
+          and producer["factored_bytes"] < producer["plain_bytes"])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+QueryLog 字段掩码基准测试
+对比完整查询与只取列表页字段（timestamp, level, service_name, message）的响应大小和客户端解码耗时
+
+默认用本地构造的响应测量 protobuf 编码大小、解析和转换为字典的耗时；
+指定 --server 时对运行中的日志服务发起真实查询
+"""
+
+import sys
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from client import LOG_FIELD_GETTERS, LogServiceClient
+
+# 列表页需要的字段
+LIST_FIELDS = ["timestamp", "level", "service_name", "message"]
+
+
+def make_entry(i: int) -> log_service_pb2.LogEntry:
+    """构造一条与测试数据形态一致的日志"""
+    now = time.time_ns()
+    return log_service_pb2.LogEntry(
+        id=f"01J{i:023d}",
+        service_name="zhenhaotou",
+        level=random.choice([1, 2, 3]),
+        message=f"用户操作日志 - {random.randint(1, 10000)}",
+        timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now // 10**9)),
+        timestamp_unix_nano=now // 10**6 * 10**6,
+        metadata={
+            "adv_id": f"adv_{random.getrandbits(48):x}",
+            "aweme_id": f"aweme_{random.getrandbits(48):x}",
+            "plan_id": f"plan_{random.getrandbits(48):x}",
+            "user_id": str(random.randint(1, 100000)),
+            "region": random.choice(["北京", "上海", "广州", "深圳", "杭州"]),
+            "platform": random.choice(["iOS", "Android", "Web", "Desktop"]),
+        },
+        trace_id=f"trace_{random.getrandbits(64):x}",
+        span_id=f"span_{random.getrandbits(32):x}",
+    )
+
+
+def project(entry: log_service_pb2.LogEntry, fields: List[str]) -> log_service_pb2.LogEntry:
+    """模拟服务端投影：只保留掩码中的字段"""
+    projected = log_service_pb2.LogEntry()
+    for field in fields:
+        if field == "metadata":
+            projected.metadata.update(entry.metadata)
+        else:
+            setattr(projected, field, getattr(entry, field))
+    return projected
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(payload: bytes, fields: List[str], repeat: int) -> Dict[str, float]:
+    """测量解析和转换为字典的耗时"""
+    getters = [(f, LOG_FIELD_GETTERS[f]) for f in fields] or list(LOG_FIELD_GETTERS.items())
+
+    def parse():
+        response = log_service_pb2.QueryLogResponse()
+        response.ParseFromString(payload)
+        return response
+
+    response = parse()
+
+    def to_dicts():
+        return [{f: getter(e) for f, getter in getters} for e in response.logs]
+
+    return {
+        "bytes": len(payload),
+        "parse": best_of(parse, repeat),
+        "to_dict": best_of(to_dicts, repeat),
+    }
+
+
+def print_row(name: str, result: Dict[str, float], baseline: Dict[str, float]):
+    total = result["parse"] + result["to_dict"]
+    base_total = baseline["parse"] + baseline["to_dict"]
+    print(f"{name:<10} {result['bytes'] / 1024:10.1f} KiB ({result['bytes'] / baseline['bytes']:6.1%})  "
+          f"解析 {result['parse'] * 1000:8.2f} ms  转字典 {result['to_dict'] * 1000:8.2f} ms  "
+          f"合计 {total * 1000:8.2f} ms ({total / base_total:6.1%})")
+
+
+def run_local(rows: int, repeat: int) -> int:
+    entries = [make_entry(i) for i in range(rows)]
+    full = log_service_pb2.QueryLogResponse(success=True, total_count=rows, logs=entries)
+    projected = log_service_pb2.QueryLogResponse(
+        success=True, total_count=rows, logs=[project(e, LIST_FIELDS) for e in entries])
+
+    baseline = measure(full.SerializeToString(), [], repeat)
+    projection = measure(projected.SerializeToString(), LIST_FIELDS, repeat)
+    print_row("完整字段", baseline, baseline)
+    print_row("字段掩码", projection, baseline)
+    return 0 if projection["bytes"] < baseline["bytes"] else 1
+
+
+def run_server(server: str, service_name: str, rows: int, repeat: int) -> int:
+    client = LogServiceClient(server)
+    client.connect()
+    try:
+        results = {}
+        for name, fields in (("完整字段", []), ("字段掩码", LIST_FIELDS)):
+            request = log_service_pb2.QueryLogRequest(
+                service_name=service_name, level=log_service_pb2.LogLevel.INFO, limit=rows, fields=fields)
+            rpc_time = best_of(lambda: client._call("QueryLog", request), repeat)
+            response = client._call("QueryLog", request)
+            if not response.success:
+                print(f"❌ 查询失败: {response.error_message}")
+                return 1
+            results[name] = measure(response.SerializeToString(), fields, repeat)
+            results[name]["rpc"] = rpc_time
+            results[name]["rows"] = len(response.logs)
+        baseline = results["完整字段"]
+        for name, result in results.items():
+            print_row(name, result, baseline)
+            print(f"{'':<10} 端到端 QueryLog {result['rpc'] * 1000:8.2f} ms（{result['rows']} 行）")
+        return 0
+    finally:
+        client.disconnect()
+
+
+def main():
+    """运行基准测试"""
+    parser = argparse.ArgumentParser(description="QueryLog 字段掩码基准测试")
+    parser.add_argument("--rows", type=int, default=1000, help="每次查询返回的行数")
+    parser.add_argument("--repeat", type=int, default=20, help="每项测量的重复次数（取最短）")
+    parser.add_argument("--server", default="", help="日志服务地址，指定时对真实服务发起查询")
+    parser.add_argument("--service-name", default="zhenhaotou", help="真实查询的服务名称")
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"📦 QueryLog 字段掩码基准测试：{args.rows} 行，掩码 {LIST_FIELDS}")
+    print("=" * 100)
+    if args.server:
+        return run_server(args.server, args.service_name, args.rows, args.repeat)
+    return run_local(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
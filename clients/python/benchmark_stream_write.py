@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+StreamWriteLog 与 BatchWriteLog 写入基准测试
+相同批次大小下对比：逐个调用 BatchWriteLog、window 个线程并发调用 BatchWriteLog、
+一条 StreamWriteLog 流上最多 window 个未确认批次，测量写入吞吐
+
+需要运行中的日志服务（默认 localhost:50051），写入的日志服务名为 benchmark-stream-write
+"""
+
+import sys
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from client import LogServiceClient, new_ulid
+
+SERVICE_NAME = "benchmark-stream-write"
+
+
+def make_batches(total: int, batch_size: int) -> List[List[log_service_pb2.LogEntry]]:
+    """预先构造日志批次，每次运行使用新的 ID，避免服务端按 ID 去重影响结果"""
+    entries = [
+        log_service_pb2.LogEntry(
+            id=new_ulid(),
+            service_name=SERVICE_NAME,
+            level=random.choice([1, 2, 3]),
+            message=f"用户操作日志 - {random.randint(1, 10000)}",
+            timestamp_unix_nano=time.time_ns(),
+            metadata={
+                "user_id": str(random.randint(1, 100000)),
+                "region": random.choice(["北京", "上海", "广州", "深圳", "杭州"]),
+                "platform": random.choice(["iOS", "Android", "Web", "Desktop"]),
+            },
+            trace_id=f"trace_{random.getrandbits(64):x}",
+        )
+        for _ in range(total)
+    ]
+    return [entries[i:i + batch_size] for i in range(0, total, batch_size)]
+
+
+def run_unary(client: LogServiceClient, batches, window: int) -> int:
+    """BatchWriteLog：window 为 1 时逐个调用，否则 window 个线程并发调用"""
+    def send(batch):
+        response = client._call("BatchWriteLog", log_service_pb2.BatchWriteLogRequest(log_entries=batch))
+        return len(response.log_ids)
+
+    if window <= 1:
+        return sum(send(batch) for batch in batches)
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        return sum(executor.map(send, batches))
+
+
+def run_stream(client: LogServiceClient, batches, window: int) -> int:
+    """StreamWriteLog：一条流，最多 window 个未确认批次"""
+    with client.stream_writer(batch_size=len(batches[0]), window=window, flush_interval=1.0) as writer:
+        for batch in batches:
+            writer.write_many(batch)
+    stats = writer.stats()
+    if stats["reconnects"]:
+        print(f"   （重连 {stats['reconnects']} 次）")
+    return stats["acked_count"]
+
+
+def measure(name: str, func: Callable, client: LogServiceClient, total: int,
+            batch_size: int, window: int) -> float:
+    batches = make_batches(total, batch_size)
+    start = time.perf_counter()
+    written = func(client, batches, window)
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else 0
+    print(f"{name:<28} 窗口 {window:>3}  写入 {written:>8} 条  耗时 {elapsed:7.3f} 秒  {rate:>10.0f} 条/秒")
+    return rate
+
+
+def main():
+    """运行基准测试"""
+    parser = argparse.ArgumentParser(description="StreamWriteLog 与 BatchWriteLog 写入基准测试")
+    parser.add_argument("--server", default="localhost:50051", help="日志服务地址")
+    parser.add_argument("--total", type=int, default=100000, help="每项测试写入的日志条数")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000], help="批次大小")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 8], help="未确认批次数 / 并发调用数")
+    args = parser.parse_args()
+
+    client = LogServiceClient(args.server)
+    client.connect()
+    print("=" * 100)
+    print(f"🚀 StreamWriteLog vs BatchWriteLog：每项 {args.total} 条")
+    print("=" * 100)
+    try:
+        # 预热连接
+        run_unary(client, make_batches(10, 10), 1)
+        for batch_size in args.batch_sizes:
+            print(f"\n批次大小 {batch_size}")
+            for window in args.windows:
+                unary = measure("BatchWriteLog", run_unary, client, args.total, batch_size, window)
+                stream = measure("StreamWriteLog", run_stream, client, args.total, batch_size, window)
+                print(f"{'':<28} 流式 / 一元: {stream / unary:.2f}x" if unary else "")
+        return 0
+    except Exception as e:
+        print(f"❌ 基准测试失败: {e}")
+        return 1
+    finally:
+        client.disconnect()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,27 +6,245 @@
 Log Service gRPC客户端
 """
 import grpc
+import os
 import time
+import random
 import asyncio
-from datetime import datetime, timezone
-from typing import List, Dict, Any
+import queue
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Union
 
 # 导入生成的 protobuf 类
 import log_service_pb2
 import log_service_pb2_grpc
 
+from traffic_capture import CaptureInterceptor, CaptureWriter
+
+
+# 写入到可查询的延迟分桶（秒）
+VISIBILITY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 可重试的 gRPC 状态码：请求可能没有到达服务端，或服务端暂时过载
+RETRYABLE_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+)
+
+# LogEntry 字段到结果字典取值函数的映射；带字段掩码查询时只转换列出的字段
+LOG_FIELD_GETTERS = {
+    "id": lambda e: e.id,
+    "service_name": lambda e: e.service_name,
+    "level": lambda e: log_service_pb2.LogLevel.Name(e.level),
+    "message": lambda e: e.message,
+    "timestamp": lambda e: e.timestamp,
+    "timestamp_unix_nano": lambda e: e.timestamp_unix_nano,
+    "metadata": lambda e: dict(e.metadata),
+    "trace_id": lambda e: e.trace_id,
+    "span_id": lambda e: e.span_id,
+}
+
+# query_log 的 count 参数到 CountMode 的映射
+COUNT_MODES = {
+    "exact": log_service_pb2.CountMode.COUNT_EXACT,
+    "estimated": log_service_pb2.CountMode.COUNT_ESTIMATED,
+    "none": log_service_pb2.CountMode.COUNT_NONE,
+}
+
+# aggregate_logs 可用的分组维度
+AGGREGATE_GROUP_BY = ("service_name", "level")
+
+
+def aggregate_columns(response: log_service_pb2.AggregateLogsResponse, group_by: List[str],
+                      bucket_seconds: int, metadata_key: str) -> Dict[str, list]:
+    """把聚合分组转为列式结构，只包含参与分组的列和 count"""
+    buckets = response.buckets
+    columns = {}
+    if bucket_seconds > 0:
+        columns["bucket_start_unix_nano"] = [b.bucket_start_unix_nano for b in buckets]
+    if "service_name" in group_by:
+        columns["service_name"] = [b.service_name for b in buckets]
+    if "level" in group_by:
+        columns["level"] = [log_service_pb2.LogLevel.Name(b.level) for b in buckets]
+    if metadata_key:
+        columns["metadata_value"] = [b.metadata_value for b in buckets]
+    columns["count"] = [b.count for b in buckets]
+    return columns
+
+
+# ULID 使用的 Crockford base32 字母表
+_CROCKFORD32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last = [0, 0]  # [上次的毫秒时间戳, 上次的随机部分]
+
+
+def new_ulid() -> str:
+    """
+    生成单调递增的 ULID（48 位毫秒时间戳 + 80 位随机数，Crockford base32 编码，26 个字符）
+    
+    同一毫秒内（或时钟回拨时）沿用上次的时间戳并把随机部分加一，保证同一进程内生成的 ID 严格递增
+    """
+    with _ulid_lock:
+        now_ms = int(time.time() * 1000)
+        last_ms, last_random = _ulid_last
+        if now_ms <= last_ms:
+            now_ms = last_ms
+            random_part = last_random + 1
+            if random_part >> 80:
+                now_ms += 1
+                random_part = int.from_bytes(os.urandom(10), "big")
+        else:
+            random_part = int.from_bytes(os.urandom(10), "big")
+        _ulid_last[0], _ulid_last[1] = now_ms, random_part
+    
+    value = (now_ms << 80) | random_part
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD32[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def build_log_entry(entry_data: Dict[str, Any]) -> log_service_pb2.LogEntry:
+    """由字典构造 LogEntry，未给出 id 时生成 ULID"""
+    return log_service_pb2.LogEntry(
+        id=entry_data.get("id") or new_ulid(),
+        service_name=entry_data.get("service_name", ""),
+        level=entry_data.get("level", log_service_pb2.LogLevel.INFO),
+        message=entry_data.get("message", ""),
+        # 未显式给出 RFC3339 字符串时使用纳秒时间戳，免去格式化和服务端解析
+        timestamp=entry_data.get("timestamp", ""),
+        timestamp_unix_nano=0 if "timestamp" in entry_data else entry_data.get("timestamp_unix_nano") or time.time_ns(),
+        metadata=entry_data.get("metadata", {}),
+        trace_id=entry_data.get("trace_id", ""),
+        span_id=entry_data.get("span_id", "")
+    )
+
+
+def factor_common_metadata(request) -> Dict[str, str]:
+    """
+    把批次内所有日志都相同的 metadata 键值对提取到 request.common_metadata，并从各条日志中删除
+    
+    适用于 BatchWriteLogRequest / StreamWriteLogRequest；服务端入队时再合并回每条日志，
+    region、platform、版本号等每条都重复的键只在批次上传输一次。只修改请求中的日志副本
+    
+    Returns:
+        Dict[str, str]: 提取出的共享键值对
+    """
+    entries = request.log_entries
+    count = len(entries)
+    if count < 2:
+        return {}
+    # 候选键先与最后一条比较：多数键每条不同的批次在这里就返回，不逐条访问日志
+    last = entries[count - 1].metadata
+    items = [(key, value) for key, value in entries[0].metadata.items() if last.get(key) == value]
+    if not items:
+        return {}
+    for index in range(1, count - 1):
+        metadata = entries[index].metadata
+        # 常见情况是所有候选键都仍然相同，逐个比较到第一个不同为止
+        for key, value in items:
+            if metadata.get(key) != value:
+                break
+        else:
+            continue
+        items = [(key, value) for key, value in items if metadata.get(key) == value]
+        if not items:
+            return {}
+    common = dict(items)
+    for entry in entries:
+        metadata = entry.metadata
+        for key in common:
+            del metadata[key]
+    request.common_metadata.update(common)
+    return common
+
+
+class LatencyHistogram:
+    """简单的延迟直方图（线程安全）"""
+    
+    def __init__(self, buckets: Iterable[float] = VISIBILITY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf 桶
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        """记录一次观测值"""
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+    
+    def percentile(self, p: float) -> float:
+        """按分桶上界估算百分位数"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = p * self.count
+            cumulative = 0
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                if cumulative >= target:
+                    return bound
+            return self.max
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """导出直方图数据"""
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = self.count
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "max": self.max,
+                "buckets": buckets,
+            }
+
 
 class LogServiceClient:
     """日志服务客户端"""
     
-    def __init__(self, server_address: str = "localhost:50051"):
+    # 记录写入时间的 trace_id 数量上限
+    MAX_TRACKED_WRITES = 10000
+    
+    def __init__(self, server_address: str = "localhost:50051", timeout: float = 10.0,
+                 max_retries: int = 3, initial_backoff: float = 0.1, max_backoff: float = 2.0,
+                 factor_metadata: bool = True, capture_path: Optional[str] = None):
         self.server_address = server_address
         self.channel = None
         self.stub = None
+        # 指定时把 WriteLog / BatchWriteLog / QueryLog 请求录制到该文件，供 replay_traffic.py 回放
+        self.capture_path = capture_path
+        self.capture: Optional[CaptureWriter] = None
+        # 批量写入时提取共享 metadata（服务端不支持 common_metadata 时需关闭，否则共享键会丢失）
+        self.factor_metadata = factor_metadata
+        # 单次调用超时和重试策略
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        # 写入到可查询的延迟（即服务端落库延迟）
+        self.visibility_latency = LatencyHistogram()
+        # trace_id -> 写入时间，用于计算可见延迟
+        self._written_at: "OrderedDict[str, float]" = OrderedDict()
+        self._written_lock = threading.Lock()
     
     def connect(self):
         """连接到gRPC服务器"""
         self.channel = grpc.insecure_channel(self.server_address)
+        if self.capture_path:
+            self.capture = CaptureWriter(self.capture_path)
+            self.channel = grpc.intercept_channel(self.channel, CaptureInterceptor(self.capture))
         self.stub = log_service_pb2_grpc.LogServiceStub(self.channel)
         print(f"Connected to log service at {self.server_address}")
     
@@ -35,6 +253,34 @@ class LogServiceClient:
         if self.channel:
             self.channel.close()
             print("Disconnected from log service")
+        if self.capture:
+            self.capture.close()
+    
+    def _call(self, method: str, request):
+        """
+        调用 gRPC 方法，对可重试的错误按带抖动的指数退避重试
+        
+        重试复用同一个请求对象，日志 ID 保持不变，服务端以 ID 作为主键去重，重试不会产生重复日志
+        """
+        backoff = self.initial_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                return getattr(self.stub, method)(request, timeout=self.timeout)
+            except grpc.RpcError as e:
+                if attempt >= self.max_retries or e.code() not in RETRYABLE_CODES:
+                    raise
+            time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, self.max_backoff)
+    
+    def _track_writes(self, trace_ids: Iterable[str]):
+        """记录 trace_id 的首次写入时间"""
+        now = time.monotonic()
+        with self._written_lock:
+            for trace_id in trace_ids:
+                if trace_id and trace_id not in self._written_at:
+                    self._written_at[trace_id] = now
+            while len(self._written_at) > self.MAX_TRACKED_WRITES:
+                self._written_at.popitem(last=False)
     
     def write_log(self, service_name: str, level: log_service_pb2.LogLevel, 
                   message: str, metadata: Dict[str, str] = None, 
@@ -42,10 +288,11 @@ class LogServiceClient:
         """写入单条日志"""
         
         log_entry = log_service_pb2.LogEntry(
+            id=new_ulid(),
             service_name=service_name,
             level=level,
             message=message,
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp_unix_nano=time.time_ns(),
             metadata=metadata or {},
             trace_id=trace_id,
             span_id=span_id
@@ -54,7 +301,9 @@ class LogServiceClient:
         request = log_service_pb2.WriteLogRequest(log_entry=log_entry)
         
         try:
-            response = self.stub.WriteLog(request)
+            response = self._call("WriteLog", request)
+            if response.success:
+                self._track_writes([trace_id])
             return {
                 "success": response.success,
                 "log_id": response.log_id,
@@ -70,23 +319,15 @@ class LogServiceClient:
     def batch_write_log(self, log_entries: List[Dict[str, Any]]) -> Dict[str, Any]:
         """批量写入日志"""
         
-        entries = []
-        for entry_data in log_entries:
-            log_entry = log_service_pb2.LogEntry(
-                service_name=entry_data.get("service_name", ""),
-                level=entry_data.get("level", log_service_pb2.LogLevel.INFO),
-                message=entry_data.get("message", ""),
-                timestamp=entry_data.get("timestamp", datetime.now(timezone.utc).isoformat()),
-                metadata=entry_data.get("metadata", {}),
-                trace_id=entry_data.get("trace_id", ""),
-                span_id=entry_data.get("span_id", "")
-            )
-            entries.append(log_entry)
-        
+        entries = [build_log_entry(entry_data) for entry_data in log_entries]
         request = log_service_pb2.BatchWriteLogRequest(log_entries=entries)
+        if self.factor_metadata:
+            factor_common_metadata(request)
         
         try:
-            response = self.stub.BatchWriteLog(request)
+            response = self._call("BatchWriteLog", request)
+            if response.success:
+                self._track_writes(entry.trace_id for entry in entries)
             return {
                 "success": response.success,
                 "log_ids": list(response.log_ids),
@@ -99,20 +340,56 @@ class LogServiceClient:
                 "error_message": f"gRPC error: {e.details()}"
             }
     
+    def stream_writer(self, **kwargs) -> "StreamWriter":
+        """
+        创建基于 StreamWriteLog 的长连接写入器，参数见 StreamWriter
+        
+        用法:
+            with client.stream_writer(batch_size=1000) as writer:
+                for entry in entries:
+                    writer.write(entry)
+        """
+        return StreamWriter(self, **kwargs)
+    
     def query_log(self, service_name: str = "", level: log_service_pb2.LogLevel = None,
                   start_time: str = "", end_time: str = "", 
                   metadata_filters: Dict[str, str] = None, trace_id: str = "",
-                  limit: int = 100, offset: int = 0) -> Dict[str, Any]:
-        """查询日志"""
+                  limit: int = 100, offset: int = 0, start_time_unix_nano: int = 0,
+                  end_time_unix_nano: int = 0, fields: List[str] = None,
+                  count: str = "exact") -> Dict[str, Any]:
+        """
+        查询日志（纳秒时间范围非零时优先于 start_time / end_time 字符串）
+        
+        fields 为字段掩码（如 ["timestamp", "level", "service_name", "message"]），服务端只返回这些字段，
+        结果字典也只包含这些键，不请求 metadata 时不会构造 metadata 字典
+        
+        count 为总数统计方式："exact" 精确统计；"estimated" 估算，带过滤条件时最多统计到上限
+        （total_count_is_lower_bound 为 True 表示只是下界）；"none" 不统计，total_count 为 None
+        """
+        
+        fields = list(fields or [])
+        unknown = [field for field in fields if field not in LOG_FIELD_GETTERS]
+        if unknown or count not in COUNT_MODES:
+            return {
+                "success": False,
+                "logs": [],
+                "total_count": 0,
+                "error_message": f"unknown field: {', '.join(unknown)}" if unknown else f"unknown count mode: {count}"
+            }
+        getters = [(field, LOG_FIELD_GETTERS[field]) for field in fields] or list(LOG_FIELD_GETTERS.items())
         
         request = log_service_pb2.QueryLogRequest(
             service_name=service_name,
             start_time=start_time,
             end_time=end_time,
+            start_time_unix_nano=start_time_unix_nano,
+            end_time_unix_nano=end_time_unix_nano,
             metadata_filters=metadata_filters or {},
             trace_id=trace_id,
             limit=limit,
-            offset=offset
+            offset=offset,
+            fields=fields,
+            count_mode=COUNT_MODES[count]
         )
         
         # 如果指定了level，则设置
@@ -120,25 +397,15 @@ class LogServiceClient:
             request.level = level
         
         try:
-            response = self.stub.QueryLog(request)
+            response = self._call("QueryLog", request)
             
-            logs = []
-            for log_entry in response.logs:
-                logs.append({
-                    "id": log_entry.id,
-                    "service_name": log_entry.service_name,
-                    "level": log_service_pb2.LogLevel.Name(log_entry.level),
-                    "message": log_entry.message,
-                    "timestamp": log_entry.timestamp,
-                    "metadata": dict(log_entry.metadata),
-                    "trace_id": log_entry.trace_id,
-                    "span_id": log_entry.span_id
-                })
+            logs = [{field: getter(log_entry) for field, getter in getters} for log_entry in response.logs]
             
             return {
                 "success": response.success,
                 "logs": logs,
-                "total_count": response.total_count,
+                "total_count": None if count == "none" else response.total_count,
+                "total_count_is_lower_bound": response.total_count_is_lower_bound,
                 "error_message": response.error_message
             }
         except grpc.RpcError as e:
@@ -148,6 +415,407 @@ class LogServiceClient:
                 "total_count": 0,
                 "error_message": f"gRPC error: {e.details()}"
             }
+    
+    def stream_query_log(self, service_name: str = "", level: log_service_pb2.LogLevel = None,
+                         start_time_unix_nano: int = 0, end_time_unix_nano: int = 0,
+                         metadata_filters: Dict[str, str] = None, trace_id: str = "",
+                         limit: int = 0, fields: List[str] = None, chunk_size: int = 500,
+                         timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流式查询日志，以生成器逐条返回（按时间倒序）
+        
+        服务端只打开一个游标并分块推送，客户端按需拉取：消费慢时 gRPC 流控让服务端暂停，
+        导出上百万条日志时三端内存都只保留一个块。提前停止迭代（或关闭生成器）会取消服务端游标。
+        流式调用不自动重试（中途重试会重复输出），gRPC 错误以 grpc.RpcError 抛出
+        
+        Args:
+            limit: 最多返回的条数，0 表示不限
+            fields: 字段掩码，与 query_log 相同
+            chunk_size: 每个消息包含的日志条数
+            timeout: 整个流的超时时间（秒），默认不限
+        """
+        fields = list(fields or [])
+        unknown = [field for field in fields if field not in LOG_FIELD_GETTERS]
+        if unknown:
+            raise ValueError(f"unknown field: {', '.join(unknown)}")
+        getters = [(field, LOG_FIELD_GETTERS[field]) for field in fields] or list(LOG_FIELD_GETTERS.items())
+        
+        query = log_service_pb2.QueryLogRequest(
+            service_name=service_name,
+            start_time_unix_nano=start_time_unix_nano,
+            end_time_unix_nano=end_time_unix_nano,
+            metadata_filters=metadata_filters or {},
+            trace_id=trace_id,
+            limit=limit,
+            fields=fields,
+            count_mode=log_service_pb2.CountMode.COUNT_NONE
+        )
+        if level is not None:
+            query.level = level
+        request = log_service_pb2.StreamQueryLogRequest(query=query, chunk_size=chunk_size)
+        
+        call = self.stub.StreamQueryLog(request, timeout=timeout)
+        try:
+            for chunk in call:
+                for log_entry in chunk.logs:
+                    yield {field: getter(log_entry) for field, getter in getters}
+        finally:
+            # 生成器被提前关闭时取消流，服务端随之关闭游标
+            call.cancel()
+    
+    def aggregate_logs(self, group_by: Iterable[str] = ("level",), bucket_seconds: int = 0,
+                       metadata_key: str = "", service_name: str = "",
+                       levels: Iterable[log_service_pb2.LogLevel] = None,
+                       start_time_unix_nano: int = 0, end_time_unix_nano: int = 0,
+                       metadata_filters: Dict[str, str] = None, trace_id: str = "",
+                       max_groups: int = 0, as_numpy: bool = False) -> Dict[str, Any]:
+        """
+        服务端聚合统计：按服务名/级别/时间桶/metadata 键分组计数，只返回分组结果而不是原始日志
+        
+        Args:
+            group_by: 分组维度，可选 "service_name"、"level"
+            bucket_seconds: 时间桶宽度（秒），0 表示不按时间分组
+            metadata_key: 按该 metadata 键的取值分组
+            levels: 只统计这些级别，为空表示所有级别
+            max_groups: 最多返回的分组数，0 使用服务端默认值（10000）
+            as_numpy: 为 True 时各列以 NumPy 数组返回（时间桶为 datetime64[ns]），需要安装 numpy
+        
+        Returns:
+            Dict[str, Any]: success, truncated, columns（列名 -> 列表或数组）, error_message
+        """
+        group_by = list(group_by or [])
+        unknown = [g for g in group_by if g not in AGGREGATE_GROUP_BY]
+        if unknown:
+            return {
+                "success": False,
+                "truncated": False,
+                "columns": {},
+                "error_message": f"unknown group_by: {', '.join(unknown)}"
+            }
+        
+        request = log_service_pb2.AggregateLogsRequest(
+            service_name=service_name,
+            levels=list(levels or []),
+            start_time_unix_nano=start_time_unix_nano,
+            end_time_unix_nano=end_time_unix_nano,
+            metadata_filters=metadata_filters or {},
+            trace_id=trace_id,
+            group_by_service="service_name" in group_by,
+            group_by_level="level" in group_by,
+            bucket_seconds=bucket_seconds,
+            group_by_metadata_key=metadata_key,
+            max_groups=max_groups
+        )
+        
+        try:
+            response = self._call("AggregateLogs", request)
+        except grpc.RpcError as e:
+            return {
+                "success": False,
+                "truncated": False,
+                "columns": {},
+                "error_message": f"gRPC error: {e.details()}"
+            }
+        
+        columns = aggregate_columns(response, group_by, bucket_seconds, metadata_key)
+        if as_numpy:
+            # numpy 是可选依赖，只在需要数组时导入
+            import numpy as np
+            arrays = {}
+            for name, values in columns.items():
+                if name == "bucket_start_unix_nano":
+                    arrays[name] = np.asarray(values, dtype="int64").astype("datetime64[ns]")
+                elif name == "count":
+                    arrays[name] = np.asarray(values, dtype="int64")
+                else:
+                    arrays[name] = np.asarray(values, dtype=object)
+            columns = arrays
+        
+        return {
+            "success": response.success,
+            "truncated": response.truncated,
+            "columns": columns,
+            "error_message": response.error_message
+        }
+    
+    def wait_until_visible(self, trace_ids: Iterable[str], timeout: float = 30.0,
+                           initial_backoff: float = 0.05, max_backoff: float = 2.0,
+                           written_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        等待标记日志可被查询（替代写入后的固定 sleep）
+        
+        按 trace_id 轮询 QueryLog，退避时间指数增长并带随机抖动，所有标记可见或到达截止时间即返回；
+        每个标记从写入到可见的延迟记录到 visibility_latency 直方图
+        
+        Args:
+            trace_ids: 标记日志的 trace_id
+            timeout: 最长等待时间（秒）
+            initial_backoff: 首次退避时间（秒）
+            max_backoff: 最大退避时间（秒）
+            written_at: 写入时间（time.monotonic()），默认使用本客户端记录的写入时间，
+                没有记录时使用调用时间
+        
+        Returns:
+            Dict[str, Any]: visible（是否全部可见）、elapsed、latencies（trace_id -> 可见延迟）、pending（未可见的 trace_id）
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        pending = list(dict.fromkeys(t for t in trace_ids if t))
+        latencies = {}
+        attempt = 0
+        
+        while True:
+            still_pending = []
+            for trace_id in pending:
+                result = self.query_log(trace_id=trace_id, limit=1, fields=["id"], count="none")
+                if result["success"] and result["logs"]:
+                    now = time.monotonic()
+                    with self._written_lock:
+                        written = self._written_at.pop(trace_id, None)
+                    if written_at is not None:
+                        written = written_at
+                    latency = now - (written if written is not None else start)
+                    latencies[trace_id] = latency
+                    self.visibility_latency.observe(latency)
+                else:
+                    still_pending.append(trace_id)
+            pending = still_pending
+            
+            now = time.monotonic()
+            if not pending or now >= deadline:
+                break
+            
+            # 指数退避 + 抖动（在 [backoff/2, backoff] 之间随机），不超过剩余时间
+            backoff = min(max_backoff, initial_backoff * (2 ** attempt))
+            time.sleep(min(random.uniform(backoff / 2, backoff), deadline - now))
+            attempt += 1
+        
+        return {
+            "visible": not pending,
+            "elapsed": time.monotonic() - start,
+            "latencies": latencies,
+            "pending": pending,
+        }
+
+
+class StreamWriter:
+    """
+    基于 StreamWriteLog 的长连接写入器
+    
+    write() 把日志放入写缓冲，攒满 batch_size 条或缓冲超过 flush_interval 秒后作为一个批次发送到同一条流上，
+    省去 BatchWriteLog 每次调用的头部和调度开销；最多 window 个批次未确认，窗口满时 write() 阻塞（背压）。
+    流中断时按带抖动的指数退避重连，并按原序号重发所有未确认的批次：日志 ID 不变，服务端以 ID 作为主键去重，
+    重发不会产生重复日志。连续 max_reconnects 次重连都没有收到确认时放弃，之后的 write / flush 抛出该 gRPC 错误
+    """
+    
+    # 保留的失败信息条数
+    MAX_ERRORS = 100
+    
+    def __init__(self, client: LogServiceClient, batch_size: int = 500, flush_interval: float = 0.2,
+                 window: int = 8, max_reconnects: int = 5,
+                 on_ack: Optional[Callable[[log_service_pb2.StreamWriteLogAck], None]] = None):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.window = window
+        self.max_reconnects = max_reconnects
+        self.on_ack = on_ack
+        # 统计
+        self.sent_batches = 0
+        self.acked_count = 0
+        self.failed_count = 0
+        self.reconnects = 0
+        self.errors: List[str] = []
+        
+        self._buffer: List[log_service_pb2.LogEntry] = []
+        self._buffer_since = 0.0
+        # 序号 -> 已发送未确认的请求，重连后按序重发
+        self._pending: "OrderedDict[int, log_service_pb2.StreamWriteLogRequest]" = OrderedDict()
+        self._next_sequence = 1
+        # 当前流的请求队列，None 表示结束发送
+        self._outbox: queue.Queue = queue.Queue()
+        self._call = None
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._cond = threading.Condition()
+        
+        self._stream_thread = threading.Thread(target=self._run, name="stream-writer", daemon=True)
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="stream-writer-flush", daemon=True)
+        self._stream_thread.start()
+        self._flush_thread.start()
+    
+    def __enter__(self) -> "StreamWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+        if self._closed:
+            raise RuntimeError("stream writer is closed")
+    
+    def _send_buffer_locked(self):
+        """把写缓冲的前 batch_size 条作为一个批次发送（调用方持有锁），窗口满时等待确认"""
+        entries = self._buffer[:self.batch_size]
+        del self._buffer[:self.batch_size]
+        while len(self._pending) >= self.window and self._error is None:
+            self._cond.wait()
+        if self._error is not None:
+            raise self._error
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        request = log_service_pb2.StreamWriteLogRequest(sequence=sequence, log_entries=entries)
+        if self.client.factor_metadata:
+            factor_common_metadata(request)
+        self._pending[sequence] = request
+        self.sent_batches += 1
+        self._outbox.put(request)
+    
+    def write(self, entry: Union[Dict[str, Any], log_service_pb2.LogEntry]):
+        """写入一条日志（字典格式同 batch_write_log），未带 id 时生成 ULID，保证重发幂等"""
+        if isinstance(entry, dict):
+            entry = build_log_entry(entry)
+        elif not entry.id:
+            entry.id = new_ulid()
+        with self._cond:
+            self._raise_if_failed()
+            if not self._buffer:
+                self._buffer_since = time.monotonic()
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.batch_size:
+                self._send_buffer_locked()
+    
+    def write_many(self, entries: Iterable[Union[Dict[str, Any], log_service_pb2.LogEntry]]):
+        """写入多条日志，已经按批次组织好日志的生产者只需加一次锁"""
+        batch = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                entry = build_log_entry(entry)
+            elif not entry.id:
+                entry.id = new_ulid()
+            batch.append(entry)
+        with self._cond:
+            self._raise_if_failed()
+            if not self._buffer:
+                self._buffer_since = time.monotonic()
+            self._buffer.extend(batch)
+            while len(self._buffer) >= self.batch_size:
+                self._send_buffer_locked()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        发送写缓冲并等待所有批次确认
+        
+        Returns:
+            bool: 超时前全部确认返回 True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._error is None and self._buffer:
+                self._send_buffer_locked()
+            while self._pending and self._error is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            if self._error is not None:
+                raise self._error
+        return True
+    
+    def close(self, timeout: Optional[float] = None):
+        """发送剩余日志、等待确认后关闭流；超时仍未确认时取消流，流已失败时抛出该错误"""
+        try:
+            if not self._closed:
+                self.flush(timeout)
+        finally:
+            with self._cond:
+                self._closed = True
+                self._outbox.put(None)
+                self._cond.notify_all()
+            self._stream_thread.join(timeout)
+            if self._stream_thread.is_alive() and self._call is not None:
+                self._call.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        """写入统计"""
+        with self._cond:
+            return {
+                "sent_batches": self.sent_batches,
+                "acked_count": self.acked_count,
+                "failed_count": self.failed_count,
+                "pending_batches": len(self._pending),
+                "buffered": len(self._buffer),
+                "reconnects": self.reconnects,
+                "errors": list(self.errors),
+            }
+    
+    def _handle_ack(self, ack: log_service_pb2.StreamWriteLogAck):
+        with self._cond:
+            request = self._pending.pop(ack.sequence, None)
+            if request is None:
+                # 重连前已经确认过的批次
+                return
+            self.acked_count += ack.accepted_count
+            if not ack.success:
+                self.failed_count += len(request.log_entries) - ack.accepted_count
+                self.errors.append(ack.error_message)
+                del self.errors[:-self.MAX_ERRORS]
+            self._cond.notify_all()
+        self.client._track_writes(entry.trace_id for entry in request.log_entries)
+        if self.on_ack is not None:
+            self.on_ack(ack)
+    
+    def _run(self):
+        """维护流：读取确认，流中断时退避重连并重发未确认的批次"""
+        backoff = self.client.initial_backoff
+        attempts = 0
+        outbox = self._outbox
+        while True:
+            call = self.client.stub.StreamWriteLog(iter(outbox.get, None))
+            self._call = call
+            try:
+                for ack in call:
+                    attempts = 0
+                    backoff = self.client.initial_backoff
+                    self._handle_ack(ack)
+                error = None
+            except grpc.RpcError as e:
+                error = e
+            
+            with self._cond:
+                if self._closed and (error is None or not self._pending):
+                    return
+            # 结束旧流的请求迭代器
+            outbox.put(None)
+            attempts += 1
+            retryable = error is None or error.code() in RETRYABLE_CODES
+            if not retryable or attempts > self.max_reconnects:
+                with self._cond:
+                    self._error = error or ConnectionError("StreamWriteLog closed by server")
+                    self._cond.notify_all()
+                return
+            time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, self.client.max_backoff)
+            
+            with self._cond:
+                self.reconnects += 1
+                outbox = self._outbox = queue.Queue()
+                for request in self._pending.values():
+                    outbox.put(request)
+                if self._closed:
+                    outbox.put(None)
+    
+    def _flush_loop(self):
+        """定时发送未攒满的写缓冲"""
+        while True:
+            time.sleep(self.flush_interval)
+            with self._cond:
+                if self._closed or self._error is not None:
+                    return
+                if self._buffer and time.monotonic() - self._buffer_since >= self.flush_interval:
+                    self._send_buffer_locked()
 
 
 def main():
@@ -199,9 +867,15 @@ def main():
         print(f"批量写入结果: {batch_result}")
         print()
         
-        # 等待日志被持久化
+        # 等待日志被持久化（标记日志可查询即返回）
         print("等待日志被持久化...")
-        time.sleep(10)
+        visibility = client.wait_until_visible(
+            ["python-trace-001"] + [entry["trace_id"] for entry in batch_entries],
+            timeout=30
+        )
+        print(f"可见: {visibility['visible']}，等待 {visibility['elapsed']:.3f} 秒，"
+              f"未可见: {visibility['pending']}")
+        print()
         
         # 测试3: 查询日志 - 按服务名
         print("3. 测试查询日志 - 按服务名")
@@ -259,6 +933,14 @@ def main():
         print(f"  写入 {success_count}/{test_count} 条日志")
         print(f"  耗时: {duration:.3f} 秒")
         print(f"  平均速度: {success_count/duration:.2f} logs/second")
+        print()
+        
+        # 写入到可查询的延迟分布
+        histogram = client.visibility_latency.snapshot()
+        print("写入可见延迟:")
+        print(f"  样本数: {histogram['count']}，最大: {histogram['max']:.3f} 秒，"
+              f"p50≈{client.visibility_latency.percentile(0.5)} 秒，"
+              f"p99≈{client.visibility_latency.percentile(0.99)} 秒")
         
     except Exception as e:
         print(f"测试过程中发生错误: {e}")
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内存版 LogService：Go 服务端的 Python 参考实现
+不依赖 Go 服务端和 MongoDB，可在进程内启动（serve()），也可作为子进程运行（python memory_server.py），
+供测试脚本和基准测试在 CI 中使用
+
+与 Go 服务端保持一致的语义：
+- 写入先进入有界队列（buffer_size），攒满 batch_size 条或每 flush_period 秒落库，落库前查询不到；队列满时入队失败
+- 客户端提供 id 时作为主键，重复写入被忽略；否则落库时生成 ObjectID 形式的 id，写入响应返回 queued-<纳秒> 占位 ID
+- 时间戳优先取 timestamp_unix_nano，否则按 RFC3339 解析，解析失败时使用当前时间；与 BSON 日期一致只保留毫秒
+- 查询：带服务名或级别不为 DEBUG 时按级别精确匹配，时间范围为闭区间，按时间倒序，limit / offset，
+  metadata 精确匹配，字段掩码，三种总数统计方式
+- 流式查询、流式写入（合并 common_metadata）、聚合统计
+
+数据按时间戳排序索引，另有服务名、级别、trace_id 二级索引；可按方法注入延迟和失败
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from concurrent import futures
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import grpc
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+import log_service_pb2_grpc
+
+# 与 Go 服务端一致的限制
+MAX_CLIENT_ID_LENGTH = 128
+ESTIMATED_COUNT_CAP = 10000
+DEFAULT_STREAM_CHUNK_SIZE = 500
+MAX_STREAM_CHUNK_SIZE = 5000
+DEFAULT_AGGREGATE_GROUPS = 10000
+MAX_AGGREGATE_GROUPS = 100000
+
+# 字段掩码可用的字段
+LOG_FIELDS = frozenset(log_service_pb2.LogEntry.DESCRIPTOR.fields_by_name)
+
+_object_id_counter = itertools.count(random.getrandbits(24))
+_object_id_process = os.urandom(5)
+
+
+def new_object_id() -> str:
+    """生成 MongoDB ObjectID 形式的 id（4 字节秒级时间戳 + 5 字节随机数 + 3 字节计数器，十六进制）"""
+    counter = next(_object_id_counter) & 0xFFFFFF
+    return (int(time.time()).to_bytes(4, "big") + _object_id_process + counter.to_bytes(3, "big")).hex()
+
+
+def parse_rfc3339_ms(value: str) -> Optional[int]:
+    """
+    按 Go time.RFC3339 解析为纪元毫秒，无法解析时返回 None
+
+    与 Go 一致，必须带时区（Z 或 ±hh:mm），不带时区的时间视为无法解析
+    """
+    try:
+        if value.endswith(("Z", "z")):
+            value = value[:-1] + "+00:00"
+        parsed = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+    if parsed.tzinfo is None or "T" not in value.upper():
+        return None
+    return int(parsed.timestamp()) * 1000 + parsed.microsecond // 1000
+
+
+def format_rfc3339(ts_ms: int) -> str:
+    """纪元毫秒格式化为 RFC3339（秒精度，UTC），与 Go 的 time.RFC3339 输出一致"""
+    return datetime.fromtimestamp(ts_ms // 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FaultInjection:
+    """
+    延迟和失败注入
+
+    每次调用（流式写入为每个批次）先等待 latency ± jitter 秒，再以 failure_rate 的概率返回 failure_code；
+    methods 为空表示作用于所有方法
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 failure_code: grpc.StatusCode = grpc.StatusCode.UNAVAILABLE,
+                 methods: Optional[Iterable[str]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_code = failure_code
+        self.methods = frozenset(methods or ())
+        self.injected_failures = Counter()
+
+    def apply(self, method: str, context: grpc.ServicerContext):
+        if self.methods and method not in self.methods:
+            return
+        delay = self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate > 0 and random.random() < self.failure_rate:
+            self.injected_failures[method] += 1
+            context.abort(self.failure_code, f"injected failure in {method}")
+
+
+class _Doc:
+    """一条已落库的日志"""
+
+    __slots__ = ("seq", "id", "service_name", "level", "message", "ts_ms", "metadata", "trace_id", "span_id")
+
+    def __init__(self, doc_id: str, entry: log_service_pb2.LogEntry, ts_ms: int, metadata: Dict[str, str]):
+        self.seq = 0
+        self.id = doc_id
+        self.service_name = entry.service_name
+        self.level = entry.level
+        self.message = entry.message
+        self.ts_ms = ts_ms
+        self.metadata = metadata
+        self.trace_id = entry.trace_id
+        self.span_id = entry.span_id
+
+    def to_entry(self, fields: Optional[frozenset] = None) -> log_service_pb2.LogEntry:
+        """转换为 LogEntry，fields 为字段掩码（None 表示全部字段）"""
+        if fields is None:
+            return log_service_pb2.LogEntry(
+                id=self.id, service_name=self.service_name, level=self.level, message=self.message,
+                timestamp=format_rfc3339(self.ts_ms), timestamp_unix_nano=self.ts_ms * 1_000_000,
+                metadata=self.metadata, trace_id=self.trace_id, span_id=self.span_id,
+            )
+        entry = log_service_pb2.LogEntry()
+        for field in fields:
+            if field == "timestamp":
+                entry.timestamp = format_rfc3339(self.ts_ms)
+            elif field == "timestamp_unix_nano":
+                entry.timestamp_unix_nano = self.ts_ms * 1_000_000
+            elif field == "metadata":
+                entry.metadata.update(self.metadata)
+            else:
+                setattr(entry, field, getattr(self, field))
+        return entry
+
+
+class _SortedIndex:
+    """
+    按 (时间戳毫秒, 序号) 排序的索引
+
+    写入只追加并标记为无序，查询时才排序；时间戳基本递增的写入下 Timsort 接近线性
+    """
+
+    __slots__ = ("keys", "_dirty")
+
+    def __init__(self):
+        self.keys: List[Tuple[int, int]] = []
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, ts_ms: int, seq: int):
+        keys = self.keys
+        if keys and (ts_ms, seq) < keys[-1]:
+            self._dirty = True
+        keys.append((ts_ms, seq))
+
+    def range(self, start_ms: Optional[int], end_ms: Optional[int]) -> List[Tuple[int, int]]:
+        """时间范围 [start_ms, end_ms] 内的键（升序），调用方持有存储的锁"""
+        if self._dirty:
+            self.keys.sort()
+            self._dirty = False
+        keys = self.keys
+        lo = 0 if start_ms is None else bisect_left(keys, (start_ms, -1))
+        hi = len(keys) if end_ms is None else bisect_right(keys, (end_ms, sys.maxsize))
+        return keys[lo:hi]
+
+
+class _Query:
+    """与 Go buildQuery 对应的匹配条件"""
+
+    __slots__ = ("service_name", "level", "levels", "trace_id", "metadata", "start_ms", "end_ms")
+
+    def __init__(self, service_name: str = "", level: Optional[int] = None, levels: Iterable[int] = (),
+                 trace_id: str = "", metadata: Optional[Dict[str, str]] = None,
+                 start_ms: Optional[int] = None, end_ms: Optional[int] = None):
+        self.service_name = service_name
+        self.level = level
+        self.levels = frozenset(levels)
+        self.trace_id = trace_id
+        self.metadata = list((metadata or {}).items())
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+
+    @classmethod
+    def from_request(cls, request: log_service_pb2.QueryLogRequest) -> "_Query":
+        level = None
+        if request.level != log_service_pb2.LogLevel.DEBUG or request.service_name:
+            level = request.level
+        # 纳秒时间戳优先；RFC3339 字符串无法解析时与 Go 一样忽略该条件
+        start_ms = end_ms = None
+        if request.start_time_unix_nano:
+            start_ms = request.start_time_unix_nano // 1_000_000
+        elif request.start_time:
+            start_ms = parse_rfc3339_ms(request.start_time)
+        if request.end_time_unix_nano:
+            end_ms = request.end_time_unix_nano // 1_000_000
+        elif request.end_time:
+            end_ms = parse_rfc3339_ms(request.end_time)
+        return cls(request.service_name, level, (), request.trace_id, dict(request.metadata_filters),
+                   start_ms, end_ms)
+
+    def is_empty(self) -> bool:
+        return not (self.service_name or self.level is not None or self.levels or self.trace_id
+                    or self.metadata or self.start_ms is not None or self.end_ms is not None)
+
+    def matches(self, doc: _Doc) -> bool:
+        if self.service_name and doc.service_name != self.service_name:
+            return False
+        if self.level is not None and doc.level != self.level:
+            return False
+        if self.levels and doc.level not in self.levels:
+            return False
+        if self.trace_id and doc.trace_id != self.trace_id:
+            return False
+        for key, value in self.metadata:
+            if doc.metadata.get(key) != value:
+                return False
+        return True
+
+
+class MemoryStore:
+    """内存日志存储：按时间排序的主索引 + 服务名 / 级别 / trace_id 二级索引"""
+
+    def __init__(self):
+        self._docs: Dict[int, _Doc] = {}
+        self._ids = set()
+        self._all = _SortedIndex()
+        self._by_service: Dict[str, _SortedIndex] = {}
+        self._by_level: Dict[int, _SortedIndex] = {}
+        self._by_trace: Dict[str, _SortedIndex] = {}
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def insert_many(self, docs: Iterable[_Doc]) -> int:
+        """无序插入，忽略主键重复的文档（对应 Go 的 insertManyIgnoringDuplicates），返回插入条数"""
+        inserted = 0
+        with self._lock:
+            for doc in docs:
+                if doc.id in self._ids:
+                    continue
+                self._ids.add(doc.id)
+                doc.seq = next(self._seq)
+                self._docs[doc.seq] = doc
+                self._all.add(doc.ts_ms, doc.seq)
+                self._by_service.setdefault(doc.service_name, _SortedIndex()).add(doc.ts_ms, doc.seq)
+                self._by_level.setdefault(doc.level, _SortedIndex()).add(doc.ts_ms, doc.seq)
+                if doc.trace_id:
+                    self._by_trace.setdefault(doc.trace_id, _SortedIndex()).add(doc.ts_ms, doc.seq)
+                inserted += 1
+        return inserted
+
+    def _candidates(self, query: _Query) -> List[Tuple[int, int]]:
+        """用最具选择性的索引取候选键（调用方持有锁）"""
+        empty = _SortedIndex()
+        if query.trace_id:
+            index = self._by_trace.get(query.trace_id, empty)
+        else:
+            options = [self._all]
+            if query.service_name:
+                options.append(self._by_service.get(query.service_name, empty))
+            if query.level is not None:
+                options.append(self._by_level.get(query.level, empty))
+            elif len(query.levels) == 1:
+                options.append(self._by_level.get(next(iter(query.levels)), empty))
+            index = min(options, key=len)
+        return index.range(query.start_ms, query.end_ms)
+
+    def find(self, query: _Query) -> Iterator[_Doc]:
+        """按时间倒序遍历匹配的文档；候选键在锁内取快照，遍历时不持有锁"""
+        with self._lock:
+            keys = self._candidates(query)
+        docs = self._docs
+        for _, seq in reversed(keys):
+            doc = docs[seq]
+            if query.matches(doc):
+                yield doc
+
+    def count(self, query: _Query, cap: int = 0) -> int:
+        """统计匹配条数，cap 大于 0 时最多统计到 cap"""
+        if query.is_empty():
+            return len(self._docs) if cap <= 0 else min(len(self._docs), cap)
+        count = 0
+        for _ in self.find(query):
+            count += 1
+            if cap and count >= cap:
+                break
+        return count
+
+
+class InMemoryLogService(log_service_pb2_grpc.LogServiceServicer):
+    """
+    LogService 的内存实现
+
+    flush_period 小于等于 0 时写入同步落库，写入返回后立即可查（适合功能测试）；
+    否则与 Go 服务端一样由后台线程按 batch_size / flush_period 批量落库
+    """
+
+    def __init__(self, buffer_size: int = 1000, batch_size: int = 100, flush_period: float = 5.0,
+                 faults: Optional[FaultInjection] = None):
+        self.store = MemoryStore()
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_period = flush_period
+        self.faults = faults or FaultInjection()
+        self._queue: deque = deque()
+        self._queue_cond = threading.Condition()
+        self._stopped = False
+        self._flusher = None
+        if flush_period > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="memory-log-flusher", daemon=True)
+            self._flusher.start()
+
+    # ---- 写入队列 ----
+
+    def _enqueue(self, doc: _Doc) -> bool:
+        """非阻塞入队，队列已满时返回 False"""
+        if self._flusher is None:
+            self.store.insert_many([doc])
+            return True
+        with self._queue_cond:
+            if len(self._queue) >= self.buffer_size:
+                return False
+            self._queue.append(doc)
+            if len(self._queue) >= self.batch_size:
+                self._queue_cond.notify()
+        return True
+
+    def _take_batch(self) -> List[_Doc]:
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _flush_loop(self):
+        deadline = time.monotonic() + self.flush_period
+        while True:
+            with self._queue_cond:
+                while not self._stopped and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._queue_cond.wait(remaining)
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_period
+                stopped = self._stopped
+                batch = self._take_batch()
+            if batch:
+                self.store.insert_many(batch)
+            if stopped and not self._queue:
+                return
+
+    def flush(self):
+        """立即落库队列中的全部日志（测试用）"""
+        with self._queue_cond:
+            docs = list(self._queue)
+            self._queue.clear()
+        self.store.insert_many(docs)
+
+    def stop(self):
+        """停止后台落库线程，剩余日志全部落库"""
+        with self._queue_cond:
+            self._stopped = True
+            self._queue_cond.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    # ---- 转换 ----
+
+    @staticmethod
+    def _to_doc(entry: log_service_pb2.LogEntry, common: Optional[Dict[str, str]] = None) -> _Doc:
+        """对应 Go 的 convertToLogDocument，id 超长时抛出 ValueError"""
+        if len(entry.id.encode("utf-8")) > MAX_CLIENT_ID_LENGTH:
+            raise ValueError(f"log id exceeds {MAX_CLIENT_ID_LENGTH} bytes")
+        if entry.timestamp_unix_nano:
+            ts_ms = entry.timestamp_unix_nano // 1_000_000
+        else:
+            ts_ms = parse_rfc3339_ms(entry.timestamp)
+            if ts_ms is None:
+                ts_ms = time.time_ns() // 1_000_000
+        metadata = dict(entry.metadata)
+        if common:
+            metadata = {**common, **metadata}
+        return _Doc(entry.id or new_object_id(), entry, ts_ms, metadata)
+
+    def _enqueue_entries(self, entries: Iterable[log_service_pb2.LogEntry],
+                         common: Optional[Dict[str, str]] = None) -> Tuple[List[str], int]:
+        """对应 Go 的 enqueueEntries，返回已入队日志的 ID 和失败条数"""
+        log_ids = []
+        failed = 0
+        for entry in entries:
+            try:
+                doc = self._to_doc(entry, common)
+            except ValueError:
+                failed += 1
+                continue
+            if self._enqueue(doc):
+                log_ids.append(entry.id or f"queued-{time.time_ns()}")
+            else:
+                failed += 1
+        return log_ids, failed
+
+    @staticmethod
+    def _field_mask(fields: Iterable[str], context: grpc.ServicerContext) -> Optional[frozenset]:
+        fields = list(fields)
+        if not fields:
+            return None
+        for field in fields:
+            if field not in LOG_FIELDS:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"unknown field: {field}")
+        return frozenset(fields)
+
+    # ---- RPC ----
+
+    def WriteLog(self, request, context):
+        self.faults.apply("WriteLog", context)
+        if not request.HasField("log_entry"):
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "log entry is required")
+        try:
+            doc = self._to_doc(request.log_entry)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        if not self._enqueue(doc):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "log queue is full")
+        return log_service_pb2.WriteLogResponse(
+            success=True, log_id=request.log_entry.id or f"queued-{time.time_ns()}")
+
+    def BatchWriteLog(self, request, context):
+        self.faults.apply("BatchWriteLog", context)
+        if not request.log_entries:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "at least one log entry is required")
+        log_ids, failed = self._enqueue_entries(request.log_entries, dict(request.common_metadata))
+        if failed:
+            return log_service_pb2.BatchWriteLogResponse(
+                success=False, error_message=f"{failed} logs failed to enqueue", log_ids=log_ids)
+        return log_service_pb2.BatchWriteLogResponse(success=True, log_ids=log_ids)
+
+    def StreamWriteLog(self, request_iterator, context):
+        for request in request_iterator:
+            self.faults.apply("StreamWriteLog", context)
+            log_ids, failed = self._enqueue_entries(request.log_entries, dict(request.common_metadata))
+            yield log_service_pb2.StreamWriteLogAck(
+                sequence=request.sequence,
+                success=failed == 0,
+                error_message=f"{failed} logs failed to enqueue" if failed else "",
+                accepted_count=len(log_ids),
+                log_ids=log_ids,
+            )
+
+    def QueryLog(self, request, context):
+        self.faults.apply("QueryLog", context)
+        fields = self._field_mask(request.fields, context)
+        query = _Query.from_request(request)
+
+        logs = []
+        for i, doc in enumerate(self.store.find(query)):
+            if i < request.offset:
+                continue
+            logs.append(doc.to_entry(fields))
+            if request.limit > 0 and len(logs) >= request.limit:
+                break
+
+        # 对应 Go 的 countLogs：最后一页未取满时总数直接由 offset + 本页条数得出
+        lower_bound = False
+        fetched = len(logs)
+        if request.count_mode == log_service_pb2.CountMode.COUNT_NONE:
+            total = -1
+        elif (request.limit <= 0 or fetched < request.limit) and (fetched > 0 or request.offset == 0):
+            total = request.offset + fetched
+        elif request.count_mode == log_service_pb2.CountMode.COUNT_ESTIMATED and not query.is_empty():
+            total = self.store.count(query, ESTIMATED_COUNT_CAP)
+            lower_bound = total >= ESTIMATED_COUNT_CAP
+        else:
+            total = self.store.count(query)
+
+        return log_service_pb2.QueryLogResponse(
+            success=True, logs=logs, total_count=total, total_count_is_lower_bound=lower_bound)
+
+    def StreamQueryLog(self, request, context):
+        self.faults.apply("StreamQueryLog", context)
+        fields = self._field_mask(request.query.fields, context)
+        query = _Query.from_request(request.query)
+        chunk_size = request.chunk_size if request.chunk_size > 0 else DEFAULT_STREAM_CHUNK_SIZE
+        chunk_size = min(chunk_size, MAX_STREAM_CHUNK_SIZE)
+
+        offset, limit = request.query.offset, request.query.limit
+        chunk = []
+        sent = 0
+        for i, doc in enumerate(self.store.find(query)):
+            if i < offset:
+                continue
+            chunk.append(doc.to_entry(fields))
+            sent += 1
+            if len(chunk) >= chunk_size:
+                yield log_service_pb2.QueryLogChunk(logs=chunk)
+                chunk = []
+            if limit > 0 and sent >= limit:
+                break
+        if chunk:
+            yield log_service_pb2.QueryLogChunk(logs=chunk)
+
+    def AggregateLogs(self, request, context):
+        self.faults.apply("AggregateLogs", context)
+        if request.bucket_seconds < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "bucket_seconds must not be negative")
+        metadata_key = request.group_by_metadata_key
+        if "." in metadata_key or "$" in metadata_key:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"invalid metadata key: {metadata_key}")
+        max_groups = request.max_groups if request.max_groups > 0 else DEFAULT_AGGREGATE_GROUPS
+        max_groups = min(max_groups, MAX_AGGREGATE_GROUPS)
+
+        query = _Query(
+            service_name=request.service_name,
+            levels=request.levels,
+            trace_id=request.trace_id,
+            metadata=dict(request.metadata_filters),
+            start_ms=request.start_time_unix_nano // 1_000_000 if request.start_time_unix_nano else None,
+            end_ms=request.end_time_unix_nano // 1_000_000 if request.end_time_unix_nano else None,
+        )
+        width_ms = request.bucket_seconds * 1000
+        groups = Counter()
+        for doc in self.store.find(query):
+            groups[(
+                doc.ts_ms - doc.ts_ms % width_ms if width_ms else 0,
+                doc.service_name if request.group_by_service else "",
+                doc.level if request.group_by_level else 0,
+                doc.metadata.get(metadata_key, "") if metadata_key else "",
+            )] += 1
+
+        keys = sorted(groups)
+        buckets = [
+            log_service_pb2.AggregateBucket(
+                bucket_start_unix_nano=bucket * 1_000_000, service_name=service_name, level=level,
+                metadata_value=metadata_value, count=groups[(bucket, service_name, level, metadata_value)],
+            )
+            for bucket, service_name, level, metadata_value in keys[:max_groups]
+        ]
+        return log_service_pb2.AggregateLogsResponse(
+            success=True, buckets=buckets, truncated=len(keys) > max_groups)
+
+
+def serve(address: str = "127.0.0.1:0", service: Optional[InMemoryLogService] = None,
+          max_workers: int = 16) -> Tuple[grpc.Server, str, InMemoryLogService]:
+    """
+    在当前进程中启动内存服务
+
+    Args:
+        address: 监听地址，端口为 0 时自动分配
+        service: 服务实例，默认同步落库（写入后立即可查）
+
+    Returns:
+        Tuple[grpc.Server, str, InMemoryLogService]: (gRPC 服务器, 实际监听地址, 服务实例)
+    """
+    if service is None:
+        service = InMemoryLogService(flush_period=0)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    log_service_pb2_grpc.add_LogServiceServicer_to_server(service, server)
+    host = address.rsplit(":", 1)[0]
+    port = server.add_insecure_port(address)
+    server.start()
+    return server, f"{host}:{port}", service
+
+
+def main():
+    """作为独立进程运行"""
+    parser = argparse.ArgumentParser(description="内存版 LogService（不依赖 Go 服务端和 MongoDB）")
+    parser.add_argument("--address", default=f"0.0.0.0:{os.getenv('SERVER_PORT', '50051')}", help="监听地址")
+    parser.add_argument("--buffer-size", type=int, default=int(os.getenv("LOG_BUFFER_SIZE", 1000)), help="写入队列长度")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("LOG_BATCH_SIZE", 100)), help="每批落库条数")
+    parser.add_argument("--flush-period", type=float, default=float(os.getenv("LOG_FLUSH_PERIOD", 5)),
+                        help="落库周期（秒），0 表示同步落库")
+    parser.add_argument("--latency", type=float, default=0.0, help="注入的调用延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机抖动（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="注入失败的概率")
+    parser.add_argument("--failure-code", default="UNAVAILABLE", help="注入失败的 gRPC 状态码")
+    parser.add_argument("--fault-methods", nargs="*", default=[], help="只对这些方法注入延迟和失败，默认全部")
+    parser.add_argument("--workers", type=int, default=16, help="gRPC 工作线程数")
+    args = parser.parse_args()
+
+    faults = FaultInjection(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        failure_code=grpc.StatusCode[args.failure_code.upper()],
+        methods=args.fault_methods,
+    )
+    service = InMemoryLogService(args.buffer_size, args.batch_size, args.flush_period, faults)
+    server, address, _ = serve(args.address, service, args.workers)
+    print(f"In-memory log service listening on {address} "
+          f"(buffer={args.buffer_size}, batch={args.batch_size}, flush_period={args.flush_period}s)")
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.stop(grace=1).wait()
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+回放 traffic_capture.py 录制的流量，测量延迟和吞吐
+
+按录制时的相对时间发送（--speed 1 原速，N 为 N 倍速，0 为不等待、尽快发送），请求按轮转分配到 --connections 条
+连接上，最多 --concurrency 个调用同时在途。请求以录制的原始字节发送，回放端不做 protobuf 序列化。
+发送时刻落后计划时刻的时间（调度滞后）单独统计：滞后持续增大说明目标服务或回放端跟不上录制的流量。
+
+目标可以是真实服务（--server），也可以是本地启动的内存版服务（--memory-server，子进程运行 memory_server.py）。
+写入请求中的日志 ID 与录制时相同，服务端按 ID 去重；需要真正写入新文档时使用 --new-ids 重新生成 ID。
+
+用法:
+    python replay_traffic.py traffic.capture --server localhost:50051
+    python replay_traffic.py traffic.capture --speed 10 --connections 4 --concurrency 64
+    python replay_traffic.py traffic.capture --speed 0 --memory-server
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import itertools
+import threading
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import grpc
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+from client import new_ulid
+from traffic_capture import CAPTURED_METHODS, CapturedCall, read_capture
+
+RESPONSE_TYPES = {
+    "WriteLog": log_service_pb2.WriteLogResponse,
+    "BatchWriteLog": log_service_pb2.BatchWriteLogResponse,
+    "QueryLog": log_service_pb2.QueryLogResponse,
+}
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def with_new_ids(call: CapturedCall) -> CapturedCall:
+    """为写入请求中带 ID 的日志生成新的 ULID"""
+    if call.method == "WriteLog":
+        request = log_service_pb2.WriteLogRequest.FromString(call.request)
+        entries = [request.log_entry]
+    elif call.method == "BatchWriteLog":
+        request = log_service_pb2.BatchWriteLogRequest.FromString(call.request)
+        entries = request.log_entries
+    else:
+        return call
+    for entry in entries:
+        if entry.id:
+            entry.id = new_ulid()
+    return call._replace(request=request.SerializeToString())
+
+
+def start_memory_server() -> Tuple[subprocess.Popen, str]:
+    """在子进程中启动内存版服务（同步落库），返回 (进程, 地址)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        address = f"127.0.0.1:{s.getsockname()[1]}"
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory_server.py")
+    process = subprocess.Popen([sys.executable, script, "--address", address, "--flush-period", "0"],
+                               stdout=subprocess.DEVNULL)
+    with grpc.insecure_channel(address) as channel:
+        grpc.channel_ready_future(channel).result(timeout=10)
+    return process, address
+
+
+class TrafficReplayer:
+    """
+    流量回放器
+
+    Args:
+        server_address: 目标服务地址
+        connections: gRPC 连接数
+        concurrency: 同时在途的调用数上限
+        speed: 回放倍速，0 表示不等待
+        timeout: 单次调用超时（秒）
+        report_interval: 进度输出间隔（秒），0 不输出
+    """
+
+    def __init__(self, server_address: str, connections: int = 1, concurrency: int = 16, speed: float = 1.0,
+                 timeout: float = 10.0, report_interval: float = 5.0):
+        self.server_address = server_address
+        self.connections = max(1, connections)
+        self.concurrency = max(1, concurrency)
+        self.speed = speed
+        self.timeout = timeout
+        self.report_interval = report_interval
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._logs = 0
+        self._completed = 0
+        self._lags: List[float] = []
+
+    def _send(self, rpc, call: CapturedCall, slots: threading.Semaphore):
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = rpc(call.request, timeout=self.timeout).success
+        except Exception:
+            # grpc.RpcError 以及响应反序列化失败等其他异常都计为错误；异常不能留在 future 里，否则槽位泄漏
+            ok = False
+        finally:
+            slots.release()
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._latencies[call.method].append(latency)
+            self._completed += 1
+            if ok:
+                self._logs += call.log_count
+            else:
+                self._errors[call.method] += 1
+
+    def run(self, calls: Iterable[CapturedCall]) -> Dict[str, Any]:
+        """按录制节奏回放全部调用（可以是从录制文件流式读取的迭代器），等待在途调用完成后返回统计"""
+        channels = [
+            # 使用各自的子通道池，否则参数相同的 channel 共用同一个 TCP 连接
+            grpc.insecure_channel(self.server_address, options=[("grpc.use_local_subchannel_pool", 1)])
+            for _ in range(self.connections)
+        ]
+        rpcs = [
+            {method: channel.unary_unary(f"/logservice.LogService/{method}", request_serializer=None,
+                                         response_deserializer=response_type.FromString)
+             for method, response_type in RESPONSE_TYPES.items()}
+            for channel in channels
+        ]
+        slots = threading.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        last_report = start
+        sent = 0
+        captured_ns = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for call in calls:
+                    if call.method not in RESPONSE_TYPES:
+                        continue
+                    captured_ns = call.offset_ns
+                    due = start + call.offset_ns / 1e9 / self.speed if self.speed > 0 else None
+                    if due is not None:
+                        delay = due - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    slots.acquire()
+                    if due is not None:
+                        self._lags.append(max(0.0, time.perf_counter() - due))
+                    executor.submit(self._send, rpcs[sent % self.connections][call.method], call, slots)
+                    sent += 1
+                    now = time.perf_counter()
+                    if self.report_interval and now - last_report >= self.report_interval:
+                        last_report = now
+                        self._report(now - start, sent)
+        finally:
+            for channel in channels:
+                channel.close()
+        return self.summary(time.perf_counter() - start, captured_ns)
+
+    def _report(self, elapsed: float, sent: int):
+        with self._lock:
+            completed, logs = self._completed, self._logs
+            errors = sum(self._errors.values())
+        lag = f", 调度滞后 {self._lags[-1] * 1000:.0f} ms" if self._lags else ""
+        print(f"[进度] {sent} 已发送, {completed / elapsed:.0f} 次/秒, {logs / elapsed:.0f} 条日志/秒, "
+              f"错误 {errors}{lag}")
+
+    def summary(self, duration: float, captured_ns: int) -> Dict[str, Any]:
+        methods = {}
+        for method, latencies in sorted(self._latencies.items()):
+            latencies.sort()
+            methods[method] = {
+                "calls": len(latencies),
+                "errors": self._errors[method],
+                "latency_ms": {p: round(_percentile(latencies, q) * 1000, 2)
+                               for p, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+            }
+        lags = sorted(self._lags)
+        return {
+            "calls": self._completed,
+            "errors": sum(self._errors.values()),
+            "logs_written": self._logs,
+            "duration_seconds": round(duration, 3),
+            "captured_seconds": round(captured_ns / 1e9, 3),
+            "calls_per_second": round(self._completed / duration, 1) if duration > 0 else 0,
+            "logs_per_second": round(self._logs / duration, 1) if duration > 0 else 0,
+            "schedule_lag_ms": {p: round(_percentile(lags, q) * 1000, 2) for p, q in (("p99", 99), ("max", 100))},
+            "methods": methods,
+        }
+
+
+def print_summary(result: Dict[str, Any], speed: float):
+    print("\n" + "=" * 60)
+    pace = f"{speed:g}x" if speed > 0 else "不限速"
+    print(f"回放 {result['calls']} 次调用（{pace}），录制时长 {result['captured_seconds']:.1f} 秒，"
+          f"回放耗时 {result['duration_seconds']:.1f} 秒")
+    print(f"吞吐: {result['calls_per_second']:.0f} 次/秒, {result['logs_per_second']:.0f} 条日志/秒, "
+          f"错误 {result['errors']}")
+    if speed > 0:
+        lag = result["schedule_lag_ms"]
+        print(f"调度滞后: p99 {lag['p99']} ms, max {lag['max']} ms")
+    # 中文表头每个字符占两列宽度
+    print(f"{'方法':<12}{'调用':>6}{'错误':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for method, stats in result["methods"].items():
+        latency = stats["latency_ms"]
+        print(f"{method:<14}{stats['calls']:>8}{stats['errors']:>8}{latency['p50']:>10}{latency['p90']:>10}"
+              f"{latency['p99']:>10}{latency['max']:>10}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放录制的 gRPC 流量，测量延迟和吞吐")
+    parser.add_argument("capture", help="traffic_capture.py 录制的文件")
+    parser.add_argument("--server", default="localhost:50051", help="目标服务地址")
+    parser.add_argument("--memory-server", action="store_true", help="回放到本地启动的内存版服务")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示尽快发送")
+    parser.add_argument("--connections", type=int, default=1, help="gRPC 连接数")
+    parser.add_argument("--concurrency", type=int, default=16, help="同时在途的调用数上限")
+    parser.add_argument("--methods", nargs="*", default=list(CAPTURED_METHODS), help="只回放这些方法")
+    parser.add_argument("--new-ids", action="store_true", help="为写入的日志重新生成 ID（否则服务端按 ID 去重）")
+    parser.add_argument("--timeout", type=float, default=10.0, help="单次调用超时（秒）")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="进度输出间隔（秒）")
+    args = parser.parse_args()
+
+    # 边读边回放，内存占用与录制文件大小无关；--new-ids 的重写在发送前逐条进行
+    calls = (call for call in read_capture(args.capture) if call.method in args.methods)
+    if args.new_ids:
+        calls = (with_new_ids(call) for call in calls)
+    first = next(calls, None)
+    if first is None:
+        print("录制文件中没有可回放的调用")
+        return 1
+    calls = itertools.chain([first], calls)
+
+    process: Optional[subprocess.Popen] = None
+    address = args.server
+    if args.memory_server:
+        process, address = start_memory_server()
+    print(f"回放 {args.capture} 到 {address}（{args.connections} 条连接, 最多 {args.concurrency} 个在途调用）")
+    replayer = TrafficReplayer(address, args.connections, args.concurrency, args.speed, args.timeout,
+                               args.report_interval)
+    try:
+        result = replayer.run(calls)
+    except KeyboardInterrupt:
+        print("\n回放已中断")
+        return 130
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+    print_summary(result, args.speed)
+    return 0 if result["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,6 @@ import grpc
 import log_service_pb2
 import log_service_pb2_grpc
 from google.protobuf.timestamp_pb2 import Timestamp
-from datetime import datetime
 import time
 import random
 import string
@@ -44,7 +43,7 @@ class LogServiceClient:
             service_name=service_name,
             level=level,
             message=message,
-            timestamp=datetime.now().isoformat() + "Z",
+            timestamp_unix_nano=time.time_ns(),
             trace_id=trace_id or self._generate_trace_id()
         )
         
@@ -76,7 +75,8 @@ class LogServiceClient:
                 service_name=entry_data.get("service_name", "unknown"),
                 level=entry_data.get("level", log_service_pb2.LogLevel.INFO),
                 message=entry_data.get("message", ""),
-                timestamp=entry_data.get("timestamp", datetime.now().isoformat() + "Z"),
+                timestamp=entry_data.get("timestamp", ""),
+                timestamp_unix_nano=0 if "timestamp" in entry_data else time.time_ns(),
                 trace_id=entry_data.get("trace_id", self._generate_trace_id())
             )
             
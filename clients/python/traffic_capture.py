@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+gRPC 流量录制：客户端拦截器把 WriteLog / BatchWriteLog / QueryLog 请求连同相对时间写入录制文件，
+供 replay_traffic.py 按原始节奏（或加速）回放
+
+文件格式：文件头 MAGIC，之后每条记录为 varint 长度前缀 + 一条 protobuf 消息（与 writeDelimitedTo 相同），
+消息结构相当于：
+    message CapturedCall {
+        uint64 offset_nanos = 1;   // 相对于开始录制的时间
+        string method = 2;         // WriteLog / BatchWriteLog / QueryLog
+        bytes request = 3;         // 序列化后的请求
+        uint32 log_count = 4;      // 写入请求中的日志条数
+    }
+记录按调用发起顺序写入；客户端重试时每次调用都会被录制，与实际发出的请求一致
+
+用法:
+    client = LogServiceClient(capture_path="traffic.capture")   # 录制该客户端的请求
+    python traffic_capture.py traffic.capture                    # 查看录制文件概况
+"""
+
+import sys
+import time
+import threading
+from collections import Counter, namedtuple
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+import grpc
+
+# 导入生成的 protobuf 类
+import log_service_pb2
+
+MAGIC = b"LSCAP\x01"
+
+# 录制的方法及其请求类型
+CAPTURED_METHODS = {
+    "WriteLog": log_service_pb2.WriteLogRequest,
+    "BatchWriteLog": log_service_pb2.BatchWriteLogRequest,
+    "QueryLog": log_service_pb2.QueryLogRequest,
+}
+
+CapturedCall = namedtuple("CapturedCall", ["offset_ns", "method", "request", "log_count"])
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data: bytes, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_call(offset_ns: int, method: str, request: bytes, log_count: int = 0) -> bytes:
+    """编码一条记录（含长度前缀）"""
+    method_bytes = method.encode("utf-8")
+    body = b"".join([
+        b"\x08", _varint(offset_ns),
+        b"\x12", _varint(len(method_bytes)), method_bytes,
+        b"\x1a", _varint(len(request)), request,
+        b"\x20" + _varint(log_count) if log_count else b"",
+    ])
+    return _varint(len(body)) + body
+
+
+def decode_call(data: bytes, pos: int, end: int) -> CapturedCall:
+    """解码一条记录的消息部分，忽略未知字段"""
+    offset_ns, method, request, log_count = 0, "", b"", 0
+    while pos < end:
+        key, pos = _read_varint(data, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = _read_varint(data, pos)
+            if field == 1:
+                offset_ns = value
+            elif field == 4:
+                log_count = value
+        elif wire_type == 2:
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+            if field == 2:
+                method = value.decode("utf-8")
+            elif field == 3:
+                request = value
+        else:
+            raise ValueError(f"unsupported wire type {wire_type} in capture record")
+    return CapturedCall(offset_ns, method, request, log_count)
+
+
+def _read_length(f: BinaryIO) -> Optional[int]:
+    """从文件读取记录的 varint 长度前缀，文件结束或前缀不完整时返回 None"""
+    result = 0
+    shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        result |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return result
+        shift += 7
+
+
+def read_capture(path: str) -> Iterator[CapturedCall]:
+    """
+    按录制顺序逐条读取录制文件，内存中只保留当前记录；
+    文件末尾不完整的记录（录制进程被强制结束）被忽略
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a traffic capture file")
+        while True:
+            length = _read_length(f)
+            if length is None:
+                return
+            body = f.read(length)
+            if len(body) < length:
+                return
+            yield decode_call(body, 0, length)
+
+
+class CaptureWriter:
+    """
+    录制文件写入器，线程安全
+
+    Args:
+        path: 录制文件路径（覆盖已有文件）
+        methods: 录制的方法名，默认 CAPTURED_METHODS 全部
+    """
+
+    def __init__(self, path: str, methods: Optional[Iterable[str]] = None):
+        self.path = path
+        self.methods = frozenset(methods or CAPTURED_METHODS)
+        self.count = 0
+        self._start_ns = time.monotonic_ns()
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+    def record(self, method: str, request):
+        """记录一次调用，request 为请求消息或序列化后的字节串"""
+        if method not in self.methods:
+            return
+        if isinstance(request, bytes):
+            payload = request
+            request = CAPTURED_METHODS[method].FromString(payload) if method == "BatchWriteLog" else None
+        else:
+            payload = request.SerializeToString()
+        log_count = 1 if method == "WriteLog" else len(getattr(request, "log_entries", ()))
+        with self._lock:
+            if self._file.closed:
+                return
+            # 在锁内取时间，多线程录制时文件中的记录按时间排序
+            self._file.write(encode_call(time.monotonic_ns() - self._start_ns, method, payload, log_count))
+            self.count += 1
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CaptureInterceptor(grpc.UnaryUnaryClientInterceptor):
+    """客户端拦截器：在发出请求前录制，不改变请求和调用结果"""
+
+    def __init__(self, writer: CaptureWriter):
+        self.writer = writer
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        method = client_call_details.method
+        if isinstance(method, bytes):
+            method = method.decode("utf-8")
+        self.writer.record(method.rsplit("/", 1)[-1], request)
+        return continuation(client_call_details, request)
+
+
+def main():
+    """输出录制文件概况：各方法调用数、日志条数、时长"""
+    if len(sys.argv) != 2:
+        print("用法: python traffic_capture.py <录制文件>")
+        return 2
+    calls = Counter()
+    logs = Counter()
+    sizes = Counter()
+    last_ns = 0
+    for call in read_capture(sys.argv[1]):
+        calls[call.method] += 1
+        logs[call.method] += call.log_count
+        sizes[call.method] += len(call.request)
+        last_ns = call.offset_ns
+    print(f"录制时长: {last_ns / 1e9:.1f} 秒, 共 {sum(calls.values())} 次调用")
+    for method in sorted(calls):
+        print(f"  {method:<14} {calls[method]:>8} 次, {logs[method]:>9} 条日志, "
+              f"平均请求 {sizes[method] / calls[method]:.0f} 字节")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@ package service
 import (
 	"context"
 	"fmt"
+	"io"
+	"strings"
 	"time"
 
 	"log-service/internal/queue"
@@ -56,7 +58,7 @@ func (s *LogService) WriteLog(ctx context.Context, req *pb.WriteLogRequest) (*pb
 
 	return &pb.WriteLogResponse{
 		Success: true,
-		LogId:   fmt.Sprintf("queued-%d", time.Now().UnixNano()),
+		LogId:   logIDOf(logDoc),
 	}, nil
 }
 
@@ -69,40 +71,93 @@ func (s *LogService) BatchWriteLog(ctx context.Context, req *pb.BatchWriteLogReq
 		}, status.Error(codes.InvalidArgument, "at least one log entry is required")
 	}
 
-	logIds := make([]string, 0, len(req.LogEntries))
+	logIds, failedCount := s.enqueueEntries(req.LogEntries, req.CommonMetadata)
+	if failedCount > 0 {
+		return &pb.BatchWriteLogResponse{
+			Success:      false,
+			ErrorMessage: fmt.Sprintf("%d logs failed to enqueue", failedCount),
+			LogIds:       logIds,
+		}, nil
+	}
+
+	return &pb.BatchWriteLogResponse{
+		Success: true,
+		LogIds:  logIds,
+	}, nil
+}
+
+// enqueueEntries 转换并逐条入队，返回已入队日志的 ID 和失败条数
+// common 为批次共享的 metadata，合并到每条日志，日志自身的同名键优先
+func (s *LogService) enqueueEntries(entries []*pb.LogEntry, common map[string]string) ([]string, int) {
+	logIds := make([]string, 0, len(entries))
 	failedCount := 0
 
-	for _, entry := range req.LogEntries {
+	for _, entry := range entries {
 		logDoc, err := s.convertToLogDocument(entry)
 		if err != nil {
 			failedCount++
 			continue
 		}
+		if len(common) > 0 {
+			logDoc.Metadata = mergeMetadata(common, entry.Metadata)
+		}
 
 		if s.logQueue.EnqueueLog(logDoc) {
-			logIds = append(logIds, fmt.Sprintf("queued-%d", time.Now().UnixNano()))
+			logIds = append(logIds, logIDOf(logDoc))
 		} else {
 			failedCount++
 		}
 	}
+	return logIds, failedCount
+}
 
-	if failedCount > 0 {
-		return &pb.BatchWriteLogResponse{
-			Success:      false,
-			ErrorMessage: fmt.Sprintf("%d logs failed to enqueue", failedCount),
-			LogIds:       logIds,
-		}, nil
+// mergeMetadata 合并批次共享的 metadata 与日志自身的 metadata
+// 日志没有自身 metadata 时直接共用批次的 map：入队后的文档只会被序列化，不会被修改
+func mergeMetadata(common, own map[string]string) map[string]string {
+	if len(own) == 0 {
+		return common
+	}
+	merged := make(map[string]string, len(common)+len(own))
+	for k, v := range common {
+		merged[k] = v
 	}
+	for k, v := range own {
+		merged[k] = v
+	}
+	return merged
+}
 
-	return &pb.BatchWriteLogResponse{
-		Success: true,
-		LogIds:  logIds,
-	}, nil
+// StreamWriteLog 流式写入日志
+// 客户端在一个长连接上连续发送批次，省去每次调用的头部和调度开销；每个批次入队后按原序号返回确认，
+// 客户端据此释放发送窗口。断线重连后客户端重发未确认的批次，日志 ID 为主键，重复入队不会产生重复日志
+func (s *LogService) StreamWriteLog(stream pb.LogService_StreamWriteLogServer) error {
+	for {
+		req, err := stream.Recv()
+		if err == io.EOF {
+			return nil
+		}
+		if err != nil {
+			return err
+		}
+
+		logIds, failedCount := s.enqueueEntries(req.LogEntries, req.CommonMetadata)
+		ack := &pb.StreamWriteLogAck{
+			Sequence:      req.Sequence,
+			Success:       failedCount == 0,
+			AcceptedCount: int32(len(logIds)),
+			LogIds:        logIds,
+		}
+		if failedCount > 0 {
+			ack.ErrorMessage = fmt.Sprintf("%d logs failed to enqueue", failedCount)
+		}
+		if err := stream.Send(ack); err != nil {
+			return err
+		}
+	}
 }
 
-// QueryLog 查询日志
-func (s *LogService) QueryLog(ctx context.Context, req *pb.QueryLogRequest) (*pb.QueryLogResponse, error) {
-	// 构建查询过滤器
+// buildQueryFilter 将查询请求转换为存储层过滤器，返回字段掩码（nil 表示全部字段）
+func buildQueryFilter(req *pb.QueryLogRequest) (*storage.QueryLogFilter, map[string]bool, error) {
 	filter := &storage.QueryLogFilter{
 		ServiceName:     req.ServiceName,
 		MetadataFilters: req.MetadataFilters,
@@ -111,27 +166,73 @@ func (s *LogService) QueryLog(ctx context.Context, req *pb.QueryLogRequest) (*pb
 		Offset:          req.Offset,
 	}
 
+	// 处理总数统计方式
+	switch req.CountMode {
+	case pb.CountMode_COUNT_ESTIMATED:
+		filter.CountMode = storage.CountEstimated
+	case pb.CountMode_COUNT_NONE:
+		filter.CountMode = storage.CountNone
+	default:
+		filter.CountMode = storage.CountExact
+	}
+
+	// 处理字段掩码
+	var fieldSet map[string]bool
+	if len(req.Fields) > 0 {
+		fieldSet = make(map[string]bool, len(req.Fields))
+		for _, field := range req.Fields {
+			column, ok := storage.LogFieldColumns[field]
+			if !ok {
+				return nil, nil, fmt.Errorf("unknown field: %s", field)
+			}
+			if !fieldSet[field] {
+				fieldSet[field] = true
+				filter.Fields = append(filter.Fields, column)
+			}
+		}
+	}
+
 	// 处理日志级别
 	if req.Level != pb.LogLevel_DEBUG || req.ServiceName != "" {
 		level := int32(req.Level)
 		filter.Level = &level
 	}
 
-	// 处理时间范围
-	if req.StartTime != "" {
+	// 处理时间范围，纳秒时间戳优先于 RFC3339 字符串
+	if req.StartTimeUnixNano != 0 {
+		startTime := time.Unix(0, req.StartTimeUnixNano).UTC()
+		filter.StartTime = &startTime
+	} else if req.StartTime != "" {
 		if startTime, err := time.Parse(time.RFC3339, req.StartTime); err == nil {
 			filter.StartTime = &startTime
 		}
 	}
 
-	if req.EndTime != "" {
+	if req.EndTimeUnixNano != 0 {
+		endTime := time.Unix(0, req.EndTimeUnixNano).UTC()
+		filter.EndTime = &endTime
+	} else if req.EndTime != "" {
 		if endTime, err := time.Parse(time.RFC3339, req.EndTime); err == nil {
 			filter.EndTime = &endTime
 		}
 	}
 
+	return filter, fieldSet, nil
+}
+
+// QueryLog 查询日志
+func (s *LogService) QueryLog(ctx context.Context, req *pb.QueryLogRequest) (*pb.QueryLogResponse, error) {
+	// 构建查询过滤器
+	filter, fieldSet, err := buildQueryFilter(req)
+	if err != nil {
+		return &pb.QueryLogResponse{
+			Success:      false,
+			ErrorMessage: err.Error(),
+		}, status.Error(codes.InvalidArgument, err.Error())
+	}
+
 	// 执行查询
-	logs, totalCount, err := s.storage.QueryLogs(ctx, filter)
+	result, err := s.storage.QueryLogs(ctx, filter)
 	if err != nil {
 		return &pb.QueryLogResponse{
 			Success:      false,
@@ -140,26 +241,208 @@ func (s *LogService) QueryLog(ctx context.Context, req *pb.QueryLogRequest) (*pb
 	}
 
 	// 转换为protobuf格式
-	pbLogs := make([]*pb.LogEntry, len(logs))
-	for i, log := range logs {
+	pbLogs := make([]*pb.LogEntry, len(result.Logs))
+	for i, log := range result.Logs {
 		pbLogs[i] = s.convertToLogEntry(log)
+		if fieldSet != nil {
+			applyFieldMask(pbLogs[i], fieldSet)
+		}
 	}
 
 	return &pb.QueryLogResponse{
-		Logs:       pbLogs,
-		TotalCount: int32(totalCount),
-		Success:    true,
+		Logs:                   pbLogs,
+		TotalCount:             int32(result.TotalCount),
+		Success:                true,
+		TotalCountIsLowerBound: result.LowerBound,
+	}, nil
+}
+
+// 流式查询每块的日志条数
+const (
+	defaultStreamChunkSize = 500
+	maxStreamChunkSize     = 5000
+)
+
+// StreamQueryLog 流式查询日志
+// 只打开一个 MongoDB 游标，逐条解码并按块发送；stream.Send 受 gRPC 流控约束，
+// 客户端消费慢时会阻塞在这里，游标随之暂停拉取，服务端内存只保留一个块
+func (s *LogService) StreamQueryLog(req *pb.StreamQueryLogRequest, stream pb.LogService_StreamQueryLogServer) error {
+	query := req.Query
+	if query == nil {
+		query = &pb.QueryLogRequest{}
+	}
+	filter, fieldSet, err := buildQueryFilter(query)
+	if err != nil {
+		return status.Error(codes.InvalidArgument, err.Error())
+	}
+
+	chunkSize := int(req.ChunkSize)
+	if chunkSize <= 0 {
+		chunkSize = defaultStreamChunkSize
+	}
+	if chunkSize > maxStreamChunkSize {
+		chunkSize = maxStreamChunkSize
+	}
+
+	// Send 返回前已完成序列化，块切片可以复用
+	chunk := make([]*pb.LogEntry, 0, chunkSize)
+	err = s.storage.StreamLogs(stream.Context(), filter, int32(chunkSize), func(doc *storage.LogDocument) error {
+		entry := s.convertToLogEntry(doc)
+		if fieldSet != nil {
+			applyFieldMask(entry, fieldSet)
+		}
+		chunk = append(chunk, entry)
+		if len(chunk) < chunkSize {
+			return nil
+		}
+		if err := stream.Send(&pb.QueryLogChunk{Logs: chunk}); err != nil {
+			return err
+		}
+		chunk = chunk[:0]
+		return nil
+	})
+	if err != nil {
+		if _, ok := status.FromError(err); ok {
+			return err
+		}
+		return status.Error(codes.Internal, err.Error())
+	}
+
+	if len(chunk) > 0 {
+		return stream.Send(&pb.QueryLogChunk{Logs: chunk})
+	}
+	return nil
+}
+
+// 聚合统计的分组数限制
+const (
+	defaultAggregateGroups = 10000
+	maxAggregateGroups     = 100000
+)
+
+// AggregateLogs 按服务/级别/时间桶/metadata 键分组计数
+func (s *LogService) AggregateLogs(ctx context.Context, req *pb.AggregateLogsRequest) (*pb.AggregateLogsResponse, error) {
+	if req.BucketSeconds < 0 {
+		return &pb.AggregateLogsResponse{
+			Success:      false,
+			ErrorMessage: "bucket_seconds must not be negative",
+		}, status.Error(codes.InvalidArgument, "bucket_seconds must not be negative")
+	}
+	if strings.ContainsAny(req.GroupByMetadataKey, ".$") {
+		return &pb.AggregateLogsResponse{
+			Success:      false,
+			ErrorMessage: "invalid metadata key: " + req.GroupByMetadataKey,
+		}, status.Errorf(codes.InvalidArgument, "invalid metadata key: %s", req.GroupByMetadataKey)
+	}
+
+	maxGroups := int(req.MaxGroups)
+	if maxGroups <= 0 {
+		maxGroups = defaultAggregateGroups
+	}
+	if maxGroups > maxAggregateGroups {
+		maxGroups = maxAggregateGroups
+	}
+
+	filter := &storage.AggregateLogFilter{
+		Match: storage.QueryLogFilter{
+			ServiceName:     req.ServiceName,
+			MetadataFilters: req.MetadataFilters,
+			TraceID:         req.TraceId,
+		},
+		GroupByService: req.GroupByService,
+		GroupByLevel:   req.GroupByLevel,
+		BucketSeconds:  req.BucketSeconds,
+		MetadataKey:    req.GroupByMetadataKey,
+		MaxGroups:      maxGroups,
+	}
+	for _, level := range req.Levels {
+		filter.Levels = append(filter.Levels, int32(level))
+	}
+	if req.StartTimeUnixNano != 0 {
+		startTime := time.Unix(0, req.StartTimeUnixNano).UTC()
+		filter.Match.StartTime = &startTime
+	}
+	if req.EndTimeUnixNano != 0 {
+		endTime := time.Unix(0, req.EndTimeUnixNano).UTC()
+		filter.Match.EndTime = &endTime
+	}
+
+	buckets, truncated, err := s.storage.AggregateLogs(ctx, filter)
+	if err != nil {
+		return &pb.AggregateLogsResponse{
+			Success:      false,
+			ErrorMessage: err.Error(),
+		}, status.Error(codes.Internal, err.Error())
+	}
+
+	pbBuckets := make([]*pb.AggregateBucket, len(buckets))
+	for i, bucket := range buckets {
+		pbBuckets[i] = &pb.AggregateBucket{
+			ServiceName:         bucket.ServiceName,
+			Level:               pb.LogLevel(bucket.Level),
+			BucketStartUnixNano: bucket.BucketStartMs * int64(time.Millisecond),
+			MetadataValue:       bucket.MetadataValue,
+			Count:               bucket.Count,
+		}
+	}
+
+	return &pb.AggregateLogsResponse{
+		Success:   true,
+		Buckets:   pbBuckets,
+		Truncated: truncated,
 	}, nil
 }
 
+// applyFieldMask 清空未请求的字段，未投影的时间戳不会以零值时间返回
+func applyFieldMask(entry *pb.LogEntry, fields map[string]bool) {
+	if !fields["timestamp"] {
+		entry.Timestamp = ""
+	}
+	if !fields["timestamp_unix_nano"] {
+		entry.TimestampUnixNano = 0
+	}
+	if !fields["id"] {
+		entry.Id = ""
+	}
+}
+
+// maxClientIDLength 客户端生成ID的最大长度
+const maxClientIDLength = 128
+
+// logIDOf 返回写入响应中的日志ID：客户端提供了ID时原样返回，否则返回排队占位ID
+func logIDOf(doc *queue.LogDocument) string {
+	if id, ok := doc.ID.(string); ok && id != "" {
+		return id
+	}
+	return fmt.Sprintf("queued-%d", time.Now().UnixNano())
+}
+
 // convertToLogDocument 转换为队列文档格式
 func (s *LogService) convertToLogDocument(entry *pb.LogEntry) (*queue.LogDocument, error) {
-	timestamp, err := time.Parse(time.RFC3339, entry.Timestamp)
-	if err != nil {
-		timestamp = time.Now()
+	if len(entry.Id) > maxClientIDLength {
+		return nil, fmt.Errorf("log id exceeds %d bytes", maxClientIDLength)
+	}
+
+	// 纳秒时间戳优先，免去字符串解析；都没有或无法解析时使用当前时间
+	var timestamp time.Time
+	if entry.TimestampUnixNano != 0 {
+		timestamp = time.Unix(0, entry.TimestampUnixNano).UTC()
+	} else {
+		var err error
+		timestamp, err = time.Parse(time.RFC3339, entry.Timestamp)
+		if err != nil {
+			timestamp = time.Now()
+		}
+	}
+
+	// 客户端生成的ID直接作为 _id，重试写入时由唯一主键去重
+	var id interface{}
+	if entry.Id != "" {
+		id = entry.Id
 	}
 
 	return &queue.LogDocument{
+		ID:          id,
 		ServiceName: entry.ServiceName,
 		Level:       int32(entry.Level),
 		Message:     entry.Message,
@@ -173,7 +456,7 @@ func (s *LogService) convertToLogDocument(entry *pb.LogEntry) (*queue.LogDocumen
 // convertToLogEntry 转换为protobuf格式
 func (s *LogService) convertToLogEntry(doc *storage.LogDocument) *pb.LogEntry {
 	return &pb.LogEntry{
-		Id:          doc.ID.Hex(),                       // 系统自动生成的唯一标识符，写入时不需要设置
+		Id:          storage.IDString(doc.ID),           // 客户端生成的ULID，或未提供时由系统生成的ObjectID
 		ServiceName: doc.ServiceName,                    //产生日志的服务名称，用于服务间日志隔离
 		Level:       pb.LogLevel(doc.Level),             //日志级别，从DEBUG到FATAL，可用于过滤不同重要程度的日志
 		Message:     doc.Message,                        //实际的日志内容
@@ -181,5 +464,7 @@ func (s *LogService) convertToLogEntry(doc *storage.LogDocument) *pb.LogEntry {
 		Metadata:    doc.Metadata,                       //自定义键值对，可存储额外信息如用户ID、请求ID等
 		TraceId:     doc.TraceID,                        //分布式链路追踪ID，用于跟踪请求在多个服务间的流转
 		SpanId:      doc.SpanID,                         //Span标识符，配合trace_id使用
+		// 纳秒时间戳，精度受 BSON 日期类型限制为毫秒，比 RFC3339 字符串多保留亚秒部分
+		TimestampUnixNano: doc.Timestamp.UnixNano(),
 	}
 }
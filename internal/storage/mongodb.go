@@ -2,6 +2,7 @@ package storage
 
 import (
 	"context"
+	"errors"
 	"time"
 
 	"go.mongodb.org/mongo-driver/bson"
@@ -11,16 +12,68 @@ import (
 )
 
 // LogDocument MongoDB中的日志文档结构
+// ID 为客户端生成的字符串ID（ULID），未提供时由 MongoDB 生成 ObjectID
 type LogDocument struct {
-	ID          primitive.ObjectID `bson:"_id,omitempty"`
-	ServiceName string             `bson:"service_name"`
-	Level       int32              `bson:"level"`
-	Message     string             `bson:"message"`
-	Timestamp   time.Time          `bson:"timestamp"`
-	Metadata    map[string]string  `bson:"metadata,omitempty"`
-	TraceID     string             `bson:"trace_id,omitempty"`
-	SpanID      string             `bson:"span_id,omitempty"`
-	CreatedAt   time.Time          `bson:"created_at"`
+	ID          interface{}       `bson:"_id,omitempty"`
+	ServiceName string            `bson:"service_name"`
+	Level       int32             `bson:"level"`
+	Message     string            `bson:"message"`
+	Timestamp   time.Time         `bson:"timestamp"`
+	Metadata    map[string]string `bson:"metadata,omitempty"`
+	TraceID     string            `bson:"trace_id,omitempty"`
+	SpanID      string            `bson:"span_id,omitempty"`
+	CreatedAt   time.Time         `bson:"created_at"`
+}
+
+// duplicateKeyCode MongoDB 重复主键错误码
+const duplicateKeyCode = 11000
+
+// IDString 将文档ID转换为字符串
+func IDString(id interface{}) string {
+	switch v := id.(type) {
+	case primitive.ObjectID:
+		return v.Hex()
+	case string:
+		return v
+	default:
+		return ""
+	}
+}
+
+// isDuplicateKeyOnly 判断批量写入错误是否全部为重复主键
+// 客户端重试时携带相同的ID，已写入的日志会触发重复主键，可以安全忽略
+func isDuplicateKeyOnly(err error) bool {
+	var bulkErr mongo.BulkWriteException
+	if !errors.As(err, &bulkErr) {
+		return false
+	}
+	if bulkErr.WriteConcernError != nil || len(bulkErr.WriteErrors) == 0 {
+		return false
+	}
+	for _, writeErr := range bulkErr.WriteErrors {
+		if writeErr.Code != duplicateKeyCode {
+			return false
+		}
+	}
+	return true
+}
+
+// insertManyIgnoringDuplicates 无序批量插入，忽略重复主键，返回每个文档的ID
+func (m *MongoDB) insertManyIgnoringDuplicates(ctx context.Context, docs []interface{}) ([]string, error) {
+	result, err := m.collection.InsertMany(ctx, docs, options.InsertMany().SetOrdered(false))
+	if err != nil && !isDuplicateKeyOnly(err) {
+		return nil, err
+	}
+
+	ids := make([]string, len(docs))
+	if result != nil {
+		for i, id := range result.InsertedIDs {
+			if i < len(ids) {
+				ids[i] = IDString(id)
+			}
+		}
+	}
+	return ids, nil
 }
 
 // QueueLogDocument 队列中的日志文档结构（避免循环导入）
@@ -111,13 +164,13 @@ func (m *MongoDB) InsertLog(ctx context.Context, log *LogDocument) (string, erro
 	log.CreatedAt = time.Now()
 	result, err := m.collection.InsertOne(ctx, log)
 	if err != nil {
+		if mongo.IsDuplicateKeyError(err) {
+			return IDString(log.ID), nil
+		}
 		return "", err
 	}
 
-	if oid, ok := result.InsertedID.(primitive.ObjectID); ok {
-		return oid.Hex(), nil
-	}
-	return "", nil
+	return IDString(result.InsertedID), nil
 }
 
 // InsertLogs 批量插入日志（兼容队列接口）
@@ -130,6 +183,7 @@ func (m *MongoDB) InsertLogs(ctx context.Context, queueLogs []*QueueLogDocument)
 	docs := make([]interface{}, len(queueLogs))
 	for i, queueLog := range queueLogs {
 		log := &LogDocument{
+			ID:          queueLog.ID,
 			ServiceName: queueLog.ServiceName,
 			Level:       queueLog.Level,
 			Message:     queueLog.Message,
@@ -142,19 +196,7 @@ func (m *MongoDB) InsertLogs(ctx context.Context, queueLogs []*QueueLogDocument)
 		docs[i] = log
 	}
 
-	result, err := m.collection.InsertMany(ctx, docs)
-	if err != nil {
-		return nil, err
-	}
-
-	ids := make([]string, len(result.InsertedIDs))
-	for i, id := range result.InsertedIDs {
-		if oid, ok := id.(primitive.ObjectID); ok {
-			ids[i] = oid.Hex()
-		}
-	}
-
-	return ids, nil
+	return m.insertManyIgnoringDuplicates(ctx, docs)
 }
 
 // InsertLogDocuments 批量插入日志文档
@@ -169,19 +211,7 @@ func (m *MongoDB) InsertLogDocuments(ctx context.Context, logs []*LogDocument) (
 		docs[i] = log
 	}
 
-	result, err := m.collection.InsertMany(ctx, docs)
-	if err != nil {
-		return nil, err
-	}
-
-	ids := make([]string, len(result.InsertedIDs))
-	for i, id := range result.InsertedIDs {
-		if oid, ok := id.(primitive.ObjectID); ok {
-			ids[i] = oid.Hex()
-		}
-	}
-
-	return ids, nil
+	return m.insertManyIgnoringDuplicates(ctx, docs)
 }
 
 // QueryLogFilter 日志查询过滤器
@@ -194,11 +224,64 @@ type QueryLogFilter struct {
 	TraceID         string
 	Limit           int32
 	Offset          int32
+	// Fields 需要返回的文档字段（bson 字段名），为空返回全部字段
+	Fields []string
+	// CountMode 总数统计方式
+	CountMode CountMode
 }
 
-// QueryLogs 查询日志
-func (m *MongoDB) QueryLogs(ctx context.Context, filter *QueryLogFilter) ([]*LogDocument, int64, error) {
-	// 构建查询条件
+// CountMode 查询总数的统计方式
+type CountMode int
+
+const (
+	// CountExact 精确统计
+	CountExact CountMode = iota
+	// CountEstimated 估算：无过滤条件时读取集合元数据，否则最多统计到 EstimatedCountCap
+	CountEstimated
+	// CountNone 不统计
+	CountNone
+)
+
+// EstimatedCountCap 估算模式下带过滤条件时统计的上限
+const EstimatedCountCap = 10000
+
+// QueryResult 查询结果
+type QueryResult struct {
+	Logs []*LogDocument
+	// TotalCount 匹配的总数，CountNone 时为 -1
+	TotalCount int64
+	// LowerBound 估算模式达到统计上限，TotalCount 只是下界
+	LowerBound bool
+}
+
+// LogFieldColumns LogEntry 字段名到文档字段名的映射，用于查询投影
+var LogFieldColumns = map[string]string{
+	"id":                  "_id",
+	"service_name":        "service_name",
+	"level":               "level",
+	"message":             "message",
+	"timestamp":           "timestamp",
+	"timestamp_unix_nano": "timestamp",
+	"metadata":            "metadata",
+	"trace_id":            "trace_id",
+	"span_id":             "span_id",
+}
+
+// buildProjection 构建投影，未请求 _id 时显式排除
+func buildProjection(fields []string) bson.M {
+	projection := bson.M{"_id": 0}
+	for _, field := range fields {
+		if field == "_id" {
+			delete(projection, "_id")
+			continue
+		}
+		projection[field] = 1
+	}
+	return projection
+}
+
+// buildQuery 根据过滤条件构建查询条件
+func buildQuery(filter *QueryLogFilter) bson.M {
 	query := bson.M{}
 
 	if filter.ServiceName != "" {
@@ -229,11 +312,13 @@ func (m *MongoDB) QueryLogs(ctx context.Context, filter *QueryLogFilter) ([]*Log
 		query["metadata."+key] = value
 	}
 
-	// 计算总数
-	totalCount, err := m.collection.CountDocuments(ctx, query)
-	if err != nil {
-		return nil, 0, err
-	}
+	return query
+}
+
+// QueryLogs 查询日志
+func (m *MongoDB) QueryLogs(ctx context.Context, filter *QueryLogFilter) (*QueryResult, error) {
+	// 构建查询条件
+	query := buildQuery(filter)
 
 	// 构建查询选项
 	opts := options.Find().SetSort(bson.D{bson.E{Key: "timestamp", Value: -1}})
@@ -246,19 +331,180 @@ func (m *MongoDB) QueryLogs(ctx context.Context, filter *QueryLogFilter) ([]*Log
 		opts.SetSkip(int64(filter.Offset))
 	}
 
+	// 只取需要的字段，减少 MongoDB 传输和解码的数据量
+	if len(filter.Fields) > 0 {
+		opts.SetProjection(buildProjection(filter.Fields))
+	}
+
 	// 执行查询
 	cursor, err := m.collection.Find(ctx, query, opts)
 	if err != nil {
-		return nil, 0, err
+		return nil, err
 	}
 	defer cursor.Close(ctx)
 
 	var logs []*LogDocument
 	if err := cursor.All(ctx, &logs); err != nil {
-		return nil, 0, err
+		return nil, err
+	}
+
+	result := &QueryResult{Logs: logs}
+	result.TotalCount, result.LowerBound, err = m.countLogs(ctx, query, filter, len(logs))
+	if err != nil {
+		return nil, err
+	}
+	return result, nil
+}
+
+// countLogs 按统计方式计算匹配总数
+// 最后一页未取满时总数就是 offset + 本页条数，不需要再统计
+func (m *MongoDB) countLogs(ctx context.Context, query bson.M, filter *QueryLogFilter, fetched int) (int64, bool, error) {
+	if filter.CountMode == CountNone {
+		return -1, false, nil
+	}
+
+	if filter.Limit <= 0 || fetched < int(filter.Limit) {
+		if fetched > 0 || filter.Offset == 0 {
+			return int64(filter.Offset) + int64(fetched), false, nil
+		}
 	}
 
-	return logs, totalCount, nil
+	if filter.CountMode == CountEstimated {
+		if len(query) == 0 {
+			count, err := m.collection.EstimatedDocumentCount(ctx)
+			return count, false, err
+		}
+		count, err := m.collection.CountDocuments(ctx, query, options.Count().SetLimit(EstimatedCountCap))
+		return count, count >= EstimatedCountCap, err
+	}
+
+	count, err := m.collection.CountDocuments(ctx, query)
+	return count, false, err
+}
+
+// StreamLogs 用单个游标按查询条件遍历日志（按时间倒序），每条文档回调一次
+// 游标按 batchSize 从 MongoDB 拉取，回调阻塞时不会继续拉取，内存占用与结果总数无关
+func (m *MongoDB) StreamLogs(ctx context.Context, filter *QueryLogFilter, batchSize int32, fn func(*LogDocument) error) error {
+	opts := options.Find().
+		SetSort(bson.D{bson.E{Key: "timestamp", Value: -1}}).
+		SetBatchSize(batchSize)
+
+	if filter.Limit > 0 {
+		opts.SetLimit(int64(filter.Limit))
+	}
+
+	if filter.Offset > 0 {
+		opts.SetSkip(int64(filter.Offset))
+	}
+
+	if len(filter.Fields) > 0 {
+		opts.SetProjection(buildProjection(filter.Fields))
+	}
+
+	cursor, err := m.collection.Find(ctx, buildQuery(filter), opts)
+	if err != nil {
+		return err
+	}
+	defer cursor.Close(ctx)
+
+	for cursor.Next(ctx) {
+		var doc LogDocument
+		if err := cursor.Decode(&doc); err != nil {
+			return err
+		}
+		if err := fn(&doc); err != nil {
+			return err
+		}
+	}
+	return cursor.Err()
+}
+
+// AggregateLogFilter 聚合统计的匹配条件和分组维度
+type AggregateLogFilter struct {
+	Match QueryLogFilter
+	// Levels 匹配的级别集合，为空表示所有级别
+	Levels         []int32
+	GroupByService bool
+	GroupByLevel   bool
+	// BucketSeconds 时间桶宽度，0 表示不按时间分组
+	BucketSeconds int64
+	// MetadataKey 按该 metadata 键的取值分组，为空表示不分组
+	MetadataKey string
+	// MaxGroups 最多返回的分组数
+	MaxGroups int
+}
+
+// AggregateBucket 一个分组的计数，未参与分组的维度为零值
+type AggregateBucket struct {
+	ServiceName   string `bson:"service_name"`
+	Level         int32  `bson:"level"`
+	BucketStartMs int64  `bson:"bucket"`
+	MetadataValue string `bson:"metadata_value"`
+	Count         int64  `bson:"count"`
+}
+
+// AggregateLogs 在 MongoDB 中按所选维度分组计数，返回分组（按时间桶升序）和是否被截断
+func (m *MongoDB) AggregateLogs(ctx context.Context, filter *AggregateLogFilter) ([]*AggregateBucket, bool, error) {
+	match := buildQuery(&filter.Match)
+	if len(filter.Levels) > 0 {
+		match["level"] = bson.M{"$in": filter.Levels}
+	}
+
+	// 分组键：只包含请求的维度，都不选时统计匹配总数
+	groupID := bson.M{}
+	if filter.GroupByService {
+		groupID["service_name"] = "$service_name"
+	}
+	if filter.GroupByLevel {
+		groupID["level"] = "$level"
+	}
+	if filter.BucketSeconds > 0 {
+		// 日期转为毫秒后按桶宽取整
+		widthMs := filter.BucketSeconds * 1000
+		epochMs := bson.M{"$toLong": "$timestamp"}
+		groupID["bucket"] = bson.M{"$subtract": bson.A{epochMs, bson.M{"$mod": bson.A{epochMs, widthMs}}}}
+	}
+	if filter.MetadataKey != "" {
+		groupID["metadata_value"] = "$metadata." + filter.MetadataKey
+	}
+
+	pipeline := mongo.Pipeline{
+		{{Key: "$match", Value: match}},
+		{{Key: "$group", Value: bson.M{"_id": groupID, "count": bson.M{"$sum": 1}}}},
+		{{Key: "$project", Value: bson.M{
+			"_id":            0,
+			"service_name":   "$_id.service_name",
+			"level":          "$_id.level",
+			"bucket":         "$_id.bucket",
+			"metadata_value": "$_id.metadata_value",
+			"count":          1,
+		}}},
+		{{Key: "$sort", Value: bson.D{
+			{Key: "bucket", Value: 1},
+			{Key: "service_name", Value: 1},
+			{Key: "level", Value: 1},
+			{Key: "metadata_value", Value: 1},
+		}}},
+		// 多取一个分组用于判断是否被截断
+		{{Key: "$limit", Value: filter.MaxGroups + 1}},
+	}
+
+	cursor, err := m.collection.Aggregate(ctx, pipeline, options.Aggregate().SetAllowDiskUse(true))
+	if err != nil {
+		return nil, false, err
+	}
+	defer cursor.Close(ctx)
+
+	var buckets []*AggregateBucket
+	if err := cursor.All(ctx, &buckets); err != nil {
+		return nil, false, err
+	}
+
+	truncated := len(buckets) > filter.MaxGroups
+	if truncated {
+		buckets = buckets[:filter.MaxGroups]
+	}
+	return buckets, truncated, nil
 }
 
 // Close 关闭数据库连接
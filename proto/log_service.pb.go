@@ -77,19 +77,71 @@ func (LogLevel) EnumDescriptor() ([]byte, []int) {
 	return file_proto_log_service_proto_rawDescGZIP(), []int{0}
 }
 
+// CountMode 查询总数的统计方式
+type CountMode int32
+
+const (
+	CountMode_COUNT_EXACT     CountMode = 0 // 精确统计（CountDocuments）
+	CountMode_COUNT_ESTIMATED CountMode = 1 // 估算：无过滤条件时读取集合元数据，否则最多统计到上限
+	CountMode_COUNT_NONE      CountMode = 2 // 不统计，total_count 返回 -1
+)
+
+// Enum value maps for CountMode.
+var (
+	CountMode_name = map[int32]string{
+		0: "COUNT_EXACT",
+		1: "COUNT_ESTIMATED",
+		2: "COUNT_NONE",
+	}
+	CountMode_value = map[string]int32{
+		"COUNT_EXACT":     0,
+		"COUNT_ESTIMATED": 1,
+		"COUNT_NONE":      2,
+	}
+)
+
+func (x CountMode) Enum() *CountMode {
+	p := new(CountMode)
+	*p = x
+	return p
+}
+
+func (x CountMode) String() string {
+	return protoimpl.X.EnumStringOf(x.Descriptor(), protoreflect.EnumNumber(x))
+}
+
+func (CountMode) Descriptor() protoreflect.EnumDescriptor {
+	return file_proto_log_service_proto_enumTypes[1].Descriptor()
+}
+
+func (CountMode) Type() protoreflect.EnumType {
+	return &file_proto_log_service_proto_enumTypes[1]
+}
+
+func (x CountMode) Number() protoreflect.EnumNumber {
+	return protoreflect.EnumNumber(x)
+}
+
+// Deprecated: Use CountMode.Descriptor instead.
+func (CountMode) EnumDescriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{1}
+}
+
 // LogEntry 日志条目
 type LogEntry struct {
-	state         protoimpl.MessageState `protogen:"open.v1"`
-	Id            string                 `protobuf:"bytes,1,opt,name=id,proto3" json:"id,omitempty"`
-	ServiceName   string                 `protobuf:"bytes,2,opt,name=service_name,json=serviceName,proto3" json:"service_name,omitempty"`
-	Level         LogLevel               `protobuf:"varint,3,opt,name=level,proto3,enum=logservice.LogLevel" json:"level,omitempty"`
-	Message       string                 `protobuf:"bytes,4,opt,name=message,proto3" json:"message,omitempty"`
-	Timestamp     string                 `protobuf:"bytes,5,opt,name=timestamp,proto3" json:"timestamp,omitempty"`
-	Metadata      map[string]string      `protobuf:"bytes,6,rep,name=metadata,proto3" json:"metadata,omitempty" protobuf_key:"bytes,1,opt,name=key" protobuf_val:"bytes,2,opt,name=value"`
-	TraceId       string                 `protobuf:"bytes,7,opt,name=trace_id,json=traceId,proto3" json:"trace_id,omitempty"`
-	SpanId        string                 `protobuf:"bytes,8,opt,name=span_id,json=spanId,proto3" json:"span_id,omitempty"`
-	unknownFields protoimpl.UnknownFields
-	sizeCache     protoimpl.SizeCache
+	state       protoimpl.MessageState `protogen:"open.v1"`
+	Id          string                 `protobuf:"bytes,1,opt,name=id,proto3" json:"id,omitempty"`
+	ServiceName string                 `protobuf:"bytes,2,opt,name=service_name,json=serviceName,proto3" json:"service_name,omitempty"`
+	Level       LogLevel               `protobuf:"varint,3,opt,name=level,proto3,enum=logservice.LogLevel" json:"level,omitempty"`
+	Message     string                 `protobuf:"bytes,4,opt,name=message,proto3" json:"message,omitempty"`
+	Timestamp   string                 `protobuf:"bytes,5,opt,name=timestamp,proto3" json:"timestamp,omitempty"`
+	Metadata    map[string]string      `protobuf:"bytes,6,rep,name=metadata,proto3" json:"metadata,omitempty" protobuf_key:"bytes,1,opt,name=key" protobuf_val:"bytes,2,opt,name=value"`
+	TraceId     string                 `protobuf:"bytes,7,opt,name=trace_id,json=traceId,proto3" json:"trace_id,omitempty"`
+	SpanId      string                 `protobuf:"bytes,8,opt,name=span_id,json=spanId,proto3" json:"span_id,omitempty"`
+	// Unix 纪元纳秒时间戳，非零时优先于 timestamp 字符串（写入免去格式化/解析，查询返回保留毫秒精度）
+	TimestampUnixNano int64 `protobuf:"varint,9,opt,name=timestamp_unix_nano,json=timestampUnixNano,proto3" json:"timestamp_unix_nano,omitempty"`
+	unknownFields     protoimpl.UnknownFields
+	sizeCache         protoimpl.SizeCache
 }
 
 func (x *LogEntry) Reset() {
@@ -178,6 +230,13 @@ func (x *LogEntry) GetSpanId() string {
 	return ""
 }
 
+func (x *LogEntry) GetTimestampUnixNano() int64 {
+	if x != nil {
+		return x.TimestampUnixNano
+	}
+	return 0
+}
+
 // WriteLogRequest 写入日志请求
 type WriteLogRequest struct {
 	state         protoimpl.MessageState `protogen:"open.v1"`
@@ -295,8 +354,15 @@ type QueryLogRequest struct {
 	TraceId         string                 `protobuf:"bytes,6,opt,name=trace_id,json=traceId,proto3" json:"trace_id,omitempty"`
 	Limit           int32                  `protobuf:"varint,7,opt,name=limit,proto3" json:"limit,omitempty"`
 	Offset          int32                  `protobuf:"varint,8,opt,name=offset,proto3" json:"offset,omitempty"`
-	unknownFields   protoimpl.UnknownFields
-	sizeCache       protoimpl.SizeCache
+	// Unix 纪元纳秒时间范围，非零时优先于 start_time / end_time 字符串
+	StartTimeUnixNano int64 `protobuf:"varint,9,opt,name=start_time_unix_nano,json=startTimeUnixNano,proto3" json:"start_time_unix_nano,omitempty"`
+	EndTimeUnixNano   int64 `protobuf:"varint,10,opt,name=end_time_unix_nano,json=endTimeUnixNano,proto3" json:"end_time_unix_nano,omitempty"`
+	// 字段掩码：只返回列出的 LogEntry 字段（如 "timestamp", "level", "service_name", "message"），为空返回全部字段
+	Fields []string `protobuf:"bytes,11,rep,name=fields,proto3" json:"fields,omitempty"`
+	// 总数统计方式，默认精确统计
+	CountMode     CountMode `protobuf:"varint,12,opt,name=count_mode,json=countMode,proto3,enum=logservice.CountMode" json:"count_mode,omitempty"`
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
 }
 
 func (x *QueryLogRequest) Reset() {
@@ -385,15 +451,45 @@ func (x *QueryLogRequest) GetOffset() int32 {
 	return 0
 }
 
+func (x *QueryLogRequest) GetStartTimeUnixNano() int64 {
+	if x != nil {
+		return x.StartTimeUnixNano
+	}
+	return 0
+}
+
+func (x *QueryLogRequest) GetEndTimeUnixNano() int64 {
+	if x != nil {
+		return x.EndTimeUnixNano
+	}
+	return 0
+}
+
+func (x *QueryLogRequest) GetFields() []string {
+	if x != nil {
+		return x.Fields
+	}
+	return nil
+}
+
+func (x *QueryLogRequest) GetCountMode() CountMode {
+	if x != nil {
+		return x.CountMode
+	}
+	return CountMode_COUNT_EXACT
+}
+
 // QueryLogResponse 查询日志响应
 type QueryLogResponse struct {
-	state         protoimpl.MessageState `protogen:"open.v1"`
-	Logs          []*LogEntry            `protobuf:"bytes,1,rep,name=logs,proto3" json:"logs,omitempty"`
-	TotalCount    int32                  `protobuf:"varint,2,opt,name=total_count,json=totalCount,proto3" json:"total_count,omitempty"`
-	Success       bool                   `protobuf:"varint,3,opt,name=success,proto3" json:"success,omitempty"`
-	ErrorMessage  string                 `protobuf:"bytes,4,opt,name=error_message,json=errorMessage,proto3" json:"error_message,omitempty"`
-	unknownFields protoimpl.UnknownFields
-	sizeCache     protoimpl.SizeCache
+	state        protoimpl.MessageState `protogen:"open.v1"`
+	Logs         []*LogEntry            `protobuf:"bytes,1,rep,name=logs,proto3" json:"logs,omitempty"`
+	TotalCount   int32                  `protobuf:"varint,2,opt,name=total_count,json=totalCount,proto3" json:"total_count,omitempty"`
+	Success      bool                   `protobuf:"varint,3,opt,name=success,proto3" json:"success,omitempty"`
+	ErrorMessage string                 `protobuf:"bytes,4,opt,name=error_message,json=errorMessage,proto3" json:"error_message,omitempty"`
+	// 估算模式下达到统计上限时为 true，total_count 只是下界
+	TotalCountIsLowerBound bool `protobuf:"varint,5,opt,name=total_count_is_lower_bound,json=totalCountIsLowerBound,proto3" json:"total_count_is_lower_bound,omitempty"`
+	unknownFields          protoimpl.UnknownFields
+	sizeCache              protoimpl.SizeCache
 }
 
 func (x *QueryLogResponse) Reset() {
@@ -454,17 +550,123 @@ func (x *QueryLogResponse) GetErrorMessage() string {
 	return ""
 }
 
-// BatchWriteLogRequest 批量写入日志请求
-type BatchWriteLogRequest struct {
+func (x *QueryLogResponse) GetTotalCountIsLowerBound() bool {
+	if x != nil {
+		return x.TotalCountIsLowerBound
+	}
+	return false
+}
+
+// StreamQueryLogRequest 流式查询请求，查询条件与 QueryLog 相同（limit 为 0 表示不限条数，count_mode 被忽略）
+type StreamQueryLogRequest struct {
 	state         protoimpl.MessageState `protogen:"open.v1"`
-	LogEntries    []*LogEntry            `protobuf:"bytes,1,rep,name=log_entries,json=logEntries,proto3" json:"log_entries,omitempty"`
+	Query         *QueryLogRequest       `protobuf:"bytes,1,opt,name=query,proto3" json:"query,omitempty"`
+	ChunkSize     int32                  `protobuf:"varint,2,opt,name=chunk_size,json=chunkSize,proto3" json:"chunk_size,omitempty"` // 每个消息包含的日志条数，0 使用服务端默认值
 	unknownFields protoimpl.UnknownFields
 	sizeCache     protoimpl.SizeCache
 }
 
+func (x *StreamQueryLogRequest) Reset() {
+	*x = StreamQueryLogRequest{}
+	mi := &file_proto_log_service_proto_msgTypes[5]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *StreamQueryLogRequest) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*StreamQueryLogRequest) ProtoMessage() {}
+
+func (x *StreamQueryLogRequest) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[5]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use StreamQueryLogRequest.ProtoReflect.Descriptor instead.
+func (*StreamQueryLogRequest) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{5}
+}
+
+func (x *StreamQueryLogRequest) GetQuery() *QueryLogRequest {
+	if x != nil {
+		return x.Query
+	}
+	return nil
+}
+
+func (x *StreamQueryLogRequest) GetChunkSize() int32 {
+	if x != nil {
+		return x.ChunkSize
+	}
+	return 0
+}
+
+// QueryLogChunk 流式查询返回的一块日志（按时间倒序）
+type QueryLogChunk struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	Logs          []*LogEntry            `protobuf:"bytes,1,rep,name=logs,proto3" json:"logs,omitempty"`
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *QueryLogChunk) Reset() {
+	*x = QueryLogChunk{}
+	mi := &file_proto_log_service_proto_msgTypes[6]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *QueryLogChunk) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*QueryLogChunk) ProtoMessage() {}
+
+func (x *QueryLogChunk) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[6]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use QueryLogChunk.ProtoReflect.Descriptor instead.
+func (*QueryLogChunk) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{6}
+}
+
+func (x *QueryLogChunk) GetLogs() []*LogEntry {
+	if x != nil {
+		return x.Logs
+	}
+	return nil
+}
+
+// BatchWriteLogRequest 批量写入日志请求
+type BatchWriteLogRequest struct {
+	state          protoimpl.MessageState `protogen:"open.v1"`
+	LogEntries     []*LogEntry            `protobuf:"bytes,1,rep,name=log_entries,json=logEntries,proto3" json:"log_entries,omitempty"`
+	CommonMetadata map[string]string      `protobuf:"bytes,2,rep,name=common_metadata,json=commonMetadata,proto3" json:"common_metadata,omitempty" protobuf_key:"bytes,1,opt,name=key" protobuf_val:"bytes,2,opt,name=value"` // 批次内共享的 metadata，入队时合并到每条日志（日志自身的同名键优先）
+	unknownFields  protoimpl.UnknownFields
+	sizeCache      protoimpl.SizeCache
+}
+
 func (x *BatchWriteLogRequest) Reset() {
 	*x = BatchWriteLogRequest{}
-	mi := &file_proto_log_service_proto_msgTypes[5]
+	mi := &file_proto_log_service_proto_msgTypes[7]
 	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
 	ms.StoreMessageInfo(mi)
 }
@@ -476,7 +678,7 @@ func (x *BatchWriteLogRequest) String() string {
 func (*BatchWriteLogRequest) ProtoMessage() {}
 
 func (x *BatchWriteLogRequest) ProtoReflect() protoreflect.Message {
-	mi := &file_proto_log_service_proto_msgTypes[5]
+	mi := &file_proto_log_service_proto_msgTypes[7]
 	if x != nil {
 		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
 		if ms.LoadMessageInfo() == nil {
@@ -489,7 +691,7 @@ func (x *BatchWriteLogRequest) ProtoReflect() protoreflect.Message {
 
 // Deprecated: Use BatchWriteLogRequest.ProtoReflect.Descriptor instead.
 func (*BatchWriteLogRequest) Descriptor() ([]byte, []int) {
-	return file_proto_log_service_proto_rawDescGZIP(), []int{5}
+	return file_proto_log_service_proto_rawDescGZIP(), []int{7}
 }
 
 func (x *BatchWriteLogRequest) GetLogEntries() []*LogEntry {
@@ -499,6 +701,13 @@ func (x *BatchWriteLogRequest) GetLogEntries() []*LogEntry {
 	return nil
 }
 
+func (x *BatchWriteLogRequest) GetCommonMetadata() map[string]string {
+	if x != nil {
+		return x.CommonMetadata
+	}
+	return nil
+}
+
 // BatchWriteLogResponse 批量写入日志响应
 type BatchWriteLogResponse struct {
 	state         protoimpl.MessageState `protogen:"open.v1"`
@@ -511,7 +720,7 @@ type BatchWriteLogResponse struct {
 
 func (x *BatchWriteLogResponse) Reset() {
 	*x = BatchWriteLogResponse{}
-	mi := &file_proto_log_service_proto_msgTypes[6]
+	mi := &file_proto_log_service_proto_msgTypes[8]
 	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
 	ms.StoreMessageInfo(mi)
 }
@@ -523,7 +732,7 @@ func (x *BatchWriteLogResponse) String() string {
 func (*BatchWriteLogResponse) ProtoMessage() {}
 
 func (x *BatchWriteLogResponse) ProtoReflect() protoreflect.Message {
-	mi := &file_proto_log_service_proto_msgTypes[6]
+	mi := &file_proto_log_service_proto_msgTypes[8]
 	if x != nil {
 		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
 		if ms.LoadMessageInfo() == nil {
@@ -536,7 +745,7 @@ func (x *BatchWriteLogResponse) ProtoReflect() protoreflect.Message {
 
 // Deprecated: Use BatchWriteLogResponse.ProtoReflect.Descriptor instead.
 func (*BatchWriteLogResponse) Descriptor() ([]byte, []int) {
-	return file_proto_log_service_proto_rawDescGZIP(), []int{6}
+	return file_proto_log_service_proto_rawDescGZIP(), []int{8}
 }
 
 func (x *BatchWriteLogResponse) GetSuccess() bool {
@@ -560,12 +769,421 @@ func (x *BatchWriteLogResponse) GetLogIds() []string {
 	return nil
 }
 
+// StreamWriteLogRequest 流式写入的一个批次
+type StreamWriteLogRequest struct {
+	state          protoimpl.MessageState `protogen:"open.v1"`
+	Sequence       int64                  `protobuf:"varint,1,opt,name=sequence,proto3" json:"sequence,omitempty"` // 客户端分配的批次序号，确认消息中原样返回
+	LogEntries     []*LogEntry            `protobuf:"bytes,2,rep,name=log_entries,json=logEntries,proto3" json:"log_entries,omitempty"`
+	CommonMetadata map[string]string      `protobuf:"bytes,3,rep,name=common_metadata,json=commonMetadata,proto3" json:"common_metadata,omitempty" protobuf_key:"bytes,1,opt,name=key" protobuf_val:"bytes,2,opt,name=value"` // 同 BatchWriteLogRequest.common_metadata
+	unknownFields  protoimpl.UnknownFields
+	sizeCache      protoimpl.SizeCache
+}
+
+func (x *StreamWriteLogRequest) Reset() {
+	*x = StreamWriteLogRequest{}
+	mi := &file_proto_log_service_proto_msgTypes[9]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *StreamWriteLogRequest) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*StreamWriteLogRequest) ProtoMessage() {}
+
+func (x *StreamWriteLogRequest) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[9]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use StreamWriteLogRequest.ProtoReflect.Descriptor instead.
+func (*StreamWriteLogRequest) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{9}
+}
+
+func (x *StreamWriteLogRequest) GetSequence() int64 {
+	if x != nil {
+		return x.Sequence
+	}
+	return 0
+}
+
+func (x *StreamWriteLogRequest) GetLogEntries() []*LogEntry {
+	if x != nil {
+		return x.LogEntries
+	}
+	return nil
+}
+
+func (x *StreamWriteLogRequest) GetCommonMetadata() map[string]string {
+	if x != nil {
+		return x.CommonMetadata
+	}
+	return nil
+}
+
+// StreamWriteLogAck 流式写入的批次确认，在批次全部入队（或失败）后发送
+type StreamWriteLogAck struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	Sequence      int64                  `protobuf:"varint,1,opt,name=sequence,proto3" json:"sequence,omitempty"`
+	Success       bool                   `protobuf:"varint,2,opt,name=success,proto3" json:"success,omitempty"`
+	ErrorMessage  string                 `protobuf:"bytes,3,opt,name=error_message,json=errorMessage,proto3" json:"error_message,omitempty"`
+	AcceptedCount int32                  `protobuf:"varint,4,opt,name=accepted_count,json=acceptedCount,proto3" json:"accepted_count,omitempty"` // 已入队的条数
+	LogIds        []string               `protobuf:"bytes,5,rep,name=log_ids,json=logIds,proto3" json:"log_ids,omitempty"`                       // 已入队日志的 ID
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *StreamWriteLogAck) Reset() {
+	*x = StreamWriteLogAck{}
+	mi := &file_proto_log_service_proto_msgTypes[10]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *StreamWriteLogAck) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*StreamWriteLogAck) ProtoMessage() {}
+
+func (x *StreamWriteLogAck) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[10]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use StreamWriteLogAck.ProtoReflect.Descriptor instead.
+func (*StreamWriteLogAck) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{10}
+}
+
+func (x *StreamWriteLogAck) GetSequence() int64 {
+	if x != nil {
+		return x.Sequence
+	}
+	return 0
+}
+
+func (x *StreamWriteLogAck) GetSuccess() bool {
+	if x != nil {
+		return x.Success
+	}
+	return false
+}
+
+func (x *StreamWriteLogAck) GetErrorMessage() string {
+	if x != nil {
+		return x.ErrorMessage
+	}
+	return ""
+}
+
+func (x *StreamWriteLogAck) GetAcceptedCount() int32 {
+	if x != nil {
+		return x.AcceptedCount
+	}
+	return 0
+}
+
+func (x *StreamWriteLogAck) GetLogIds() []string {
+	if x != nil {
+		return x.LogIds
+	}
+	return nil
+}
+
+// AggregateLogsRequest 聚合统计请求：按过滤条件匹配日志，按所选维度分组计数
+type AggregateLogsRequest struct {
+	state              protoimpl.MessageState `protogen:"open.v1"`
+	ServiceName        string                 `protobuf:"bytes,1,opt,name=service_name,json=serviceName,proto3" json:"service_name,omitempty"`
+	Levels             []LogLevel             `protobuf:"varint,2,rep,packed,name=levels,proto3,enum=logservice.LogLevel" json:"levels,omitempty"` // 为空表示所有级别
+	StartTimeUnixNano  int64                  `protobuf:"varint,3,opt,name=start_time_unix_nano,json=startTimeUnixNano,proto3" json:"start_time_unix_nano,omitempty"`
+	EndTimeUnixNano    int64                  `protobuf:"varint,4,opt,name=end_time_unix_nano,json=endTimeUnixNano,proto3" json:"end_time_unix_nano,omitempty"`
+	MetadataFilters    map[string]string      `protobuf:"bytes,5,rep,name=metadata_filters,json=metadataFilters,proto3" json:"metadata_filters,omitempty" protobuf_key:"bytes,1,opt,name=key" protobuf_val:"bytes,2,opt,name=value"`
+	TraceId            string                 `protobuf:"bytes,6,opt,name=trace_id,json=traceId,proto3" json:"trace_id,omitempty"`
+	GroupByService     bool                   `protobuf:"varint,7,opt,name=group_by_service,json=groupByService,proto3" json:"group_by_service,omitempty"`               // 按服务名分组
+	GroupByLevel       bool                   `protobuf:"varint,8,opt,name=group_by_level,json=groupByLevel,proto3" json:"group_by_level,omitempty"`                     // 按级别分组
+	BucketSeconds      int64                  `protobuf:"varint,9,opt,name=bucket_seconds,json=bucketSeconds,proto3" json:"bucket_seconds,omitempty"`                    // 时间桶宽度（秒），0 表示不按时间分组
+	GroupByMetadataKey string                 `protobuf:"bytes,10,opt,name=group_by_metadata_key,json=groupByMetadataKey,proto3" json:"group_by_metadata_key,omitempty"` // 按某个 metadata 键的取值分组，为空表示不分组
+	MaxGroups          int32                  `protobuf:"varint,11,opt,name=max_groups,json=maxGroups,proto3" json:"max_groups,omitempty"`                               // 最多返回的分组数，0 使用服务端默认值
+	unknownFields      protoimpl.UnknownFields
+	sizeCache          protoimpl.SizeCache
+}
+
+func (x *AggregateLogsRequest) Reset() {
+	*x = AggregateLogsRequest{}
+	mi := &file_proto_log_service_proto_msgTypes[11]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *AggregateLogsRequest) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*AggregateLogsRequest) ProtoMessage() {}
+
+func (x *AggregateLogsRequest) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[11]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use AggregateLogsRequest.ProtoReflect.Descriptor instead.
+func (*AggregateLogsRequest) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{11}
+}
+
+func (x *AggregateLogsRequest) GetServiceName() string {
+	if x != nil {
+		return x.ServiceName
+	}
+	return ""
+}
+
+func (x *AggregateLogsRequest) GetLevels() []LogLevel {
+	if x != nil {
+		return x.Levels
+	}
+	return nil
+}
+
+func (x *AggregateLogsRequest) GetStartTimeUnixNano() int64 {
+	if x != nil {
+		return x.StartTimeUnixNano
+	}
+	return 0
+}
+
+func (x *AggregateLogsRequest) GetEndTimeUnixNano() int64 {
+	if x != nil {
+		return x.EndTimeUnixNano
+	}
+	return 0
+}
+
+func (x *AggregateLogsRequest) GetMetadataFilters() map[string]string {
+	if x != nil {
+		return x.MetadataFilters
+	}
+	return nil
+}
+
+func (x *AggregateLogsRequest) GetTraceId() string {
+	if x != nil {
+		return x.TraceId
+	}
+	return ""
+}
+
+func (x *AggregateLogsRequest) GetGroupByService() bool {
+	if x != nil {
+		return x.GroupByService
+	}
+	return false
+}
+
+func (x *AggregateLogsRequest) GetGroupByLevel() bool {
+	if x != nil {
+		return x.GroupByLevel
+	}
+	return false
+}
+
+func (x *AggregateLogsRequest) GetBucketSeconds() int64 {
+	if x != nil {
+		return x.BucketSeconds
+	}
+	return 0
+}
+
+func (x *AggregateLogsRequest) GetGroupByMetadataKey() string {
+	if x != nil {
+		return x.GroupByMetadataKey
+	}
+	return ""
+}
+
+func (x *AggregateLogsRequest) GetMaxGroups() int32 {
+	if x != nil {
+		return x.MaxGroups
+	}
+	return 0
+}
+
+// AggregateBucket 一个分组的计数，未参与分组的维度为零值
+type AggregateBucket struct {
+	state               protoimpl.MessageState `protogen:"open.v1"`
+	ServiceName         string                 `protobuf:"bytes,1,opt,name=service_name,json=serviceName,proto3" json:"service_name,omitempty"`
+	Level               LogLevel               `protobuf:"varint,2,opt,name=level,proto3,enum=logservice.LogLevel" json:"level,omitempty"`
+	BucketStartUnixNano int64                  `protobuf:"varint,3,opt,name=bucket_start_unix_nano,json=bucketStartUnixNano,proto3" json:"bucket_start_unix_nano,omitempty"`
+	MetadataValue       string                 `protobuf:"bytes,4,opt,name=metadata_value,json=metadataValue,proto3" json:"metadata_value,omitempty"`
+	Count               int64                  `protobuf:"varint,5,opt,name=count,proto3" json:"count,omitempty"`
+	unknownFields       protoimpl.UnknownFields
+	sizeCache           protoimpl.SizeCache
+}
+
+func (x *AggregateBucket) Reset() {
+	*x = AggregateBucket{}
+	mi := &file_proto_log_service_proto_msgTypes[12]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *AggregateBucket) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*AggregateBucket) ProtoMessage() {}
+
+func (x *AggregateBucket) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[12]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use AggregateBucket.ProtoReflect.Descriptor instead.
+func (*AggregateBucket) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{12}
+}
+
+func (x *AggregateBucket) GetServiceName() string {
+	if x != nil {
+		return x.ServiceName
+	}
+	return ""
+}
+
+func (x *AggregateBucket) GetLevel() LogLevel {
+	if x != nil {
+		return x.Level
+	}
+	return LogLevel_DEBUG
+}
+
+func (x *AggregateBucket) GetBucketStartUnixNano() int64 {
+	if x != nil {
+		return x.BucketStartUnixNano
+	}
+	return 0
+}
+
+func (x *AggregateBucket) GetMetadataValue() string {
+	if x != nil {
+		return x.MetadataValue
+	}
+	return ""
+}
+
+func (x *AggregateBucket) GetCount() int64 {
+	if x != nil {
+		return x.Count
+	}
+	return 0
+}
+
+// AggregateLogsResponse 聚合统计响应，分组按时间桶升序
+type AggregateLogsResponse struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	Success       bool                   `protobuf:"varint,1,opt,name=success,proto3" json:"success,omitempty"`
+	ErrorMessage  string                 `protobuf:"bytes,2,opt,name=error_message,json=errorMessage,proto3" json:"error_message,omitempty"`
+	Buckets       []*AggregateBucket     `protobuf:"bytes,3,rep,name=buckets,proto3" json:"buckets,omitempty"`
+	Truncated     bool                   `protobuf:"varint,4,opt,name=truncated,proto3" json:"truncated,omitempty"` // 分组数超过 max_groups 被截断
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *AggregateLogsResponse) Reset() {
+	*x = AggregateLogsResponse{}
+	mi := &file_proto_log_service_proto_msgTypes[13]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *AggregateLogsResponse) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*AggregateLogsResponse) ProtoMessage() {}
+
+func (x *AggregateLogsResponse) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_log_service_proto_msgTypes[13]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use AggregateLogsResponse.ProtoReflect.Descriptor instead.
+func (*AggregateLogsResponse) Descriptor() ([]byte, []int) {
+	return file_proto_log_service_proto_rawDescGZIP(), []int{13}
+}
+
+func (x *AggregateLogsResponse) GetSuccess() bool {
+	if x != nil {
+		return x.Success
+	}
+	return false
+}
+
+func (x *AggregateLogsResponse) GetErrorMessage() string {
+	if x != nil {
+		return x.ErrorMessage
+	}
+	return ""
+}
+
+func (x *AggregateLogsResponse) GetBuckets() []*AggregateBucket {
+	if x != nil {
+		return x.Buckets
+	}
+	return nil
+}
+
+func (x *AggregateLogsResponse) GetTruncated() bool {
+	if x != nil {
+		return x.Truncated
+	}
+	return false
+}
+
 var File_proto_log_service_proto protoreflect.FileDescriptor
 
 const file_proto_log_service_proto_rawDesc = "" +
 	"\n" +
 	"\x17proto/log_service.proto\x12\n" +
-	"logservice\"\xd2\x02\n" +
+	"logservice\"\x82\x03\n" +
 	"\bLogEntry\x12\x0e\n" +
 	"\x02id\x18\x01 \x01(\tR\x02id\x12!\n" +
 	"\fservice_name\x18\x02 \x01(\tR\vserviceName\x12*\n" +
@@ -574,7 +1192,8 @@ const file_proto_log_service_proto_rawDesc = "" +
 	"\ttimestamp\x18\x05 \x01(\tR\ttimestamp\x12>\n" +
 	"\bmetadata\x18\x06 \x03(\v2\".logservice.LogEntry.MetadataEntryR\bmetadata\x12\x19\n" +
 	"\btrace_id\x18\a \x01(\tR\atraceId\x12\x17\n" +
-	"\aspan_id\x18\b \x01(\tR\x06spanId\x1a;\n" +
+	"\aspan_id\x18\b \x01(\tR\x06spanId\x12.\n" +
+	"\x13timestamp_unix_nano\x18\t \x01(\x03R\x11timestampUnixNano\x1a;\n" +
 	"\rMetadataEntry\x12\x10\n" +
 	"\x03key\x18\x01 \x01(\tR\x03key\x12\x14\n" +
 	"\x05value\x18\x02 \x01(\tR\x05value:\x028\x01\"D\n" +
@@ -583,7 +1202,7 @@ const file_proto_log_service_proto_rawDesc = "" +
 	"\x10WriteLogResponse\x12\x18\n" +
 	"\asuccess\x18\x01 \x01(\bR\asuccess\x12#\n" +
 	"\rerror_message\x18\x02 \x01(\tR\ferrorMessage\x12\x15\n" +
-	"\x06log_id\x18\x03 \x01(\tR\x05logId\"\x84\x03\n" +
+	"\x06log_id\x18\x03 \x01(\tR\x05logId\"\xb0\x04\n" +
 	"\x0fQueryLogRequest\x12!\n" +
 	"\fservice_name\x18\x01 \x01(\tR\vserviceName\x12*\n" +
 	"\x05level\x18\x02 \x01(\x0e2\x14.logservice.LogLevelR\x05level\x12\x1d\n" +
@@ -593,34 +1212,101 @@ const file_proto_log_service_proto_rawDesc = "" +
 	"\x10metadata_filters\x18\x05 \x03(\v20.logservice.QueryLogRequest.MetadataFiltersEntryR\x0fmetadataFilters\x12\x19\n" +
 	"\btrace_id\x18\x06 \x01(\tR\atraceId\x12\x14\n" +
 	"\x05limit\x18\a \x01(\x05R\x05limit\x12\x16\n" +
-	"\x06offset\x18\b \x01(\x05R\x06offset\x1aB\n" +
+	"\x06offset\x18\b \x01(\x05R\x06offset\x12/\n" +
+	"\x14start_time_unix_nano\x18\t \x01(\x03R\x11startTimeUnixNano\x12+\n" +
+	"\x12end_time_unix_nano\x18\n" +
+	" \x01(\x03R\x0fendTimeUnixNano\x12\x16\n" +
+	"\x06fields\x18\v \x03(\tR\x06fields\x124\n" +
+	"\n" +
+	"count_mode\x18\f \x01(\x0e2\x15.logservice.CountModeR\tcountMode\x1aB\n" +
 	"\x14MetadataFiltersEntry\x12\x10\n" +
 	"\x03key\x18\x01 \x01(\tR\x03key\x12\x14\n" +
-	"\x05value\x18\x02 \x01(\tR\x05value:\x028\x01\"\x9c\x01\n" +
+	"\x05value\x18\x02 \x01(\tR\x05value:\x028\x01\"\xd8\x01\n" +
 	"\x10QueryLogResponse\x12(\n" +
 	"\x04logs\x18\x01 \x03(\v2\x14.logservice.LogEntryR\x04logs\x12\x1f\n" +
 	"\vtotal_count\x18\x02 \x01(\x05R\n" +
 	"totalCount\x12\x18\n" +
 	"\asuccess\x18\x03 \x01(\bR\asuccess\x12#\n" +
-	"\rerror_message\x18\x04 \x01(\tR\ferrorMessage\"M\n" +
+	"\rerror_message\x18\x04 \x01(\tR\ferrorMessage\x12:\n" +
+	"\x1atotal_count_is_lower_bound\x18\x05 \x01(\bR\x16totalCountIsLowerBound\"i\n" +
+	"\x15StreamQueryLogRequest\x121\n" +
+	"\x05query\x18\x01 \x01(\v2\x1b.logservice.QueryLogRequestR\x05query\x12\x1d\n" +
+	"\n" +
+	"chunk_size\x18\x02 \x01(\x05R\tchunkSize\"9\n" +
+	"\rQueryLogChunk\x12(\n" +
+	"\x04logs\x18\x01 \x03(\v2\x14.logservice.LogEntryR\x04logs\"\xef\x01\n" +
 	"\x14BatchWriteLogRequest\x125\n" +
 	"\vlog_entries\x18\x01 \x03(\v2\x14.logservice.LogEntryR\n" +
-	"logEntries\"o\n" +
+	"logEntries\x12]\n" +
+	"\x0fcommon_metadata\x18\x02 \x03(\v24.logservice.BatchWriteLogRequest.CommonMetadataEntryR\x0ecommonMetadata\x1aA\n" +
+	"\x13CommonMetadataEntry\x12\x10\n" +
+	"\x03key\x18\x01 \x01(\tR\x03key\x12\x14\n" +
+	"\x05value\x18\x02 \x01(\tR\x05value:\x028\x01\"o\n" +
 	"\x15BatchWriteLogResponse\x12\x18\n" +
 	"\asuccess\x18\x01 \x01(\bR\asuccess\x12#\n" +
 	"\rerror_message\x18\x02 \x01(\tR\ferrorMessage\x12\x17\n" +
-	"\alog_ids\x18\x03 \x03(\tR\x06logIds*?\n" +
+	"\alog_ids\x18\x03 \x03(\tR\x06logIds\"\x8d\x02\n" +
+	"\x15StreamWriteLogRequest\x12\x1a\n" +
+	"\bsequence\x18\x01 \x01(\x03R\bsequence\x125\n" +
+	"\vlog_entries\x18\x02 \x03(\v2\x14.logservice.LogEntryR\n" +
+	"logEntries\x12^\n" +
+	"\x0fcommon_metadata\x18\x03 \x03(\v25.logservice.StreamWriteLogRequest.CommonMetadataEntryR\x0ecommonMetadata\x1aA\n" +
+	"\x13CommonMetadataEntry\x12\x10\n" +
+	"\x03key\x18\x01 \x01(\tR\x03key\x12\x14\n" +
+	"\x05value\x18\x02 \x01(\tR\x05value:\x028\x01\"\xae\x01\n" +
+	"\x11StreamWriteLogAck\x12\x1a\n" +
+	"\bsequence\x18\x01 \x01(\x03R\bsequence\x12\x18\n" +
+	"\asuccess\x18\x02 \x01(\bR\asuccess\x12#\n" +
+	"\rerror_message\x18\x03 \x01(\tR\ferrorMessage\x12%\n" +
+	"\x0eaccepted_count\x18\x04 \x01(\x05R\racceptedCount\x12\x17\n" +
+	"\alog_ids\x18\x05 \x03(\tR\x06logIds\"\xcf\x04\n" +
+	"\x14AggregateLogsRequest\x12!\n" +
+	"\fservice_name\x18\x01 \x01(\tR\vserviceName\x12,\n" +
+	"\x06levels\x18\x02 \x03(\x0e2\x14.logservice.LogLevelR\x06levels\x12/\n" +
+	"\x14start_time_unix_nano\x18\x03 \x01(\x03R\x11startTimeUnixNano\x12+\n" +
+	"\x12end_time_unix_nano\x18\x04 \x01(\x03R\x0fendTimeUnixNano\x12`\n" +
+	"\x10metadata_filters\x18\x05 \x03(\v25.logservice.AggregateLogsRequest.MetadataFiltersEntryR\x0fmetadataFilters\x12\x19\n" +
+	"\btrace_id\x18\x06 \x01(\tR\atraceId\x12(\n" +
+	"\x10group_by_service\x18\a \x01(\bR\x0egroupByService\x12$\n" +
+	"\x0egroup_by_level\x18\b \x01(\bR\fgroupByLevel\x12%\n" +
+	"\x0ebucket_seconds\x18\t \x01(\x03R\rbucketSeconds\x121\n" +
+	"\x15group_by_metadata_key\x18\n" +
+	" \x01(\tR\x12groupByMetadataKey\x12\x1d\n" +
+	"\n" +
+	"max_groups\x18\v \x01(\x05R\tmaxGroups\x1aB\n" +
+	"\x14MetadataFiltersEntry\x12\x10\n" +
+	"\x03key\x18\x01 \x01(\tR\x03key\x12\x14\n" +
+	"\x05value\x18\x02 \x01(\tR\x05value:\x028\x01\"\xd2\x01\n" +
+	"\x0fAggregateBucket\x12!\n" +
+	"\fservice_name\x18\x01 \x01(\tR\vserviceName\x12*\n" +
+	"\x05level\x18\x02 \x01(\x0e2\x14.logservice.LogLevelR\x05level\x123\n" +
+	"\x16bucket_start_unix_nano\x18\x03 \x01(\x03R\x13bucketStartUnixNano\x12%\n" +
+	"\x0emetadata_value\x18\x04 \x01(\tR\rmetadataValue\x12\x14\n" +
+	"\x05count\x18\x05 \x01(\x03R\x05count\"\xab\x01\n" +
+	"\x15AggregateLogsResponse\x12\x18\n" +
+	"\asuccess\x18\x01 \x01(\bR\asuccess\x12#\n" +
+	"\rerror_message\x18\x02 \x01(\tR\ferrorMessage\x125\n" +
+	"\abuckets\x18\x03 \x03(\v2\x1b.logservice.AggregateBucketR\abuckets\x12\x1c\n" +
+	"\ttruncated\x18\x04 \x01(\bR\ttruncated*?\n" +
 	"\bLogLevel\x12\t\n" +
 	"\x05DEBUG\x10\x00\x12\b\n" +
 	"\x04INFO\x10\x01\x12\b\n" +
 	"\x04WARN\x10\x02\x12\t\n" +
 	"\x05ERROR\x10\x03\x12\t\n" +
-	"\x05FATAL\x10\x042\xf0\x01\n" +
+	"\x05FATAL\x10\x04*A\n" +
+	"\tCountMode\x12\x0f\n" +
+	"\vCOUNT_EXACT\x10\x00\x12\x13\n" +
+	"\x0fCOUNT_ESTIMATED\x10\x01\x12\x0e\n" +
+	"\n" +
+	"COUNT_NONE\x10\x022\xf0\x03\n" +
 	"\n" +
 	"LogService\x12E\n" +
 	"\bWriteLog\x12\x1b.logservice.WriteLogRequest\x1a\x1c.logservice.WriteLogResponse\x12T\n" +
 	"\rBatchWriteLog\x12 .logservice.BatchWriteLogRequest\x1a!.logservice.BatchWriteLogResponse\x12E\n" +
-	"\bQueryLog\x12\x1b.logservice.QueryLogRequest\x1a\x1c.logservice.QueryLogResponseB\tZ\a./protob\x06proto3"
+	"\bQueryLog\x12\x1b.logservice.QueryLogRequest\x1a\x1c.logservice.QueryLogResponse\x12P\n" +
+	"\x0eStreamQueryLog\x12!.logservice.StreamQueryLogRequest\x1a\x19.logservice.QueryLogChunk0\x01\x12V\n" +
+	"\x0eStreamWriteLog\x12!.logservice.StreamWriteLogRequest\x1a\x1d.logservice.StreamWriteLogAck(\x010\x01\x12T\n" +
+	"\rAggregateLogs\x12 .logservice.AggregateLogsRequest\x1a!.logservice.AggregateLogsResponseB\tZ\a./protob\x06proto3"
 
 var (
 	file_proto_log_service_proto_rawDescOnce sync.Once
@@ -634,39 +1320,66 @@ func file_proto_log_service_proto_rawDescGZIP() []byte {
 	return file_proto_log_service_proto_rawDescData
 }
 
-var file_proto_log_service_proto_enumTypes = make([]protoimpl.EnumInfo, 1)
-var file_proto_log_service_proto_msgTypes = make([]protoimpl.MessageInfo, 9)
+var file_proto_log_service_proto_enumTypes = make([]protoimpl.EnumInfo, 2)
+var file_proto_log_service_proto_msgTypes = make([]protoimpl.MessageInfo, 19)
 var file_proto_log_service_proto_goTypes = []any{
 	(LogLevel)(0),                 // 0: logservice.LogLevel
-	(*LogEntry)(nil),              // 1: logservice.LogEntry
-	(*WriteLogRequest)(nil),       // 2: logservice.WriteLogRequest
-	(*WriteLogResponse)(nil),      // 3: logservice.WriteLogResponse
-	(*QueryLogRequest)(nil),       // 4: logservice.QueryLogRequest
-	(*QueryLogResponse)(nil),      // 5: logservice.QueryLogResponse
-	(*BatchWriteLogRequest)(nil),  // 6: logservice.BatchWriteLogRequest
-	(*BatchWriteLogResponse)(nil), // 7: logservice.BatchWriteLogResponse
-	nil,                           // 8: logservice.LogEntry.MetadataEntry
-	nil,                           // 9: logservice.QueryLogRequest.MetadataFiltersEntry
+	(CountMode)(0),                // 1: logservice.CountMode
+	(*LogEntry)(nil),              // 2: logservice.LogEntry
+	(*WriteLogRequest)(nil),       // 3: logservice.WriteLogRequest
+	(*WriteLogResponse)(nil),      // 4: logservice.WriteLogResponse
+	(*QueryLogRequest)(nil),       // 5: logservice.QueryLogRequest
+	(*QueryLogResponse)(nil),      // 6: logservice.QueryLogResponse
+	(*StreamQueryLogRequest)(nil), // 7: logservice.StreamQueryLogRequest
+	(*QueryLogChunk)(nil),         // 8: logservice.QueryLogChunk
+	(*BatchWriteLogRequest)(nil),  // 9: logservice.BatchWriteLogRequest
+	(*BatchWriteLogResponse)(nil), // 10: logservice.BatchWriteLogResponse
+	(*StreamWriteLogRequest)(nil), // 11: logservice.StreamWriteLogRequest
+	(*StreamWriteLogAck)(nil),     // 12: logservice.StreamWriteLogAck
+	(*AggregateLogsRequest)(nil),  // 13: logservice.AggregateLogsRequest
+	(*AggregateBucket)(nil),       // 14: logservice.AggregateBucket
+	(*AggregateLogsResponse)(nil), // 15: logservice.AggregateLogsResponse
+	nil,                           // 16: logservice.LogEntry.MetadataEntry
+	nil,                           // 17: logservice.QueryLogRequest.MetadataFiltersEntry
+	nil,                           // 18: logservice.BatchWriteLogRequest.CommonMetadataEntry
+	nil,                           // 19: logservice.StreamWriteLogRequest.CommonMetadataEntry
+	nil,                           // 20: logservice.AggregateLogsRequest.MetadataFiltersEntry
 }
 var file_proto_log_service_proto_depIdxs = []int32{
 	0,  // 0: logservice.LogEntry.level:type_name -> logservice.LogLevel
-	8,  // 1: logservice.LogEntry.metadata:type_name -> logservice.LogEntry.MetadataEntry
-	1,  // 2: logservice.WriteLogRequest.log_entry:type_name -> logservice.LogEntry
+	16, // 1: logservice.LogEntry.metadata:type_name -> logservice.LogEntry.MetadataEntry
+	2,  // 2: logservice.WriteLogRequest.log_entry:type_name -> logservice.LogEntry
 	0,  // 3: logservice.QueryLogRequest.level:type_name -> logservice.LogLevel
-	9,  // 4: logservice.QueryLogRequest.metadata_filters:type_name -> logservice.QueryLogRequest.MetadataFiltersEntry
-	1,  // 5: logservice.QueryLogResponse.logs:type_name -> logservice.LogEntry
-	1,  // 6: logservice.BatchWriteLogRequest.log_entries:type_name -> logservice.LogEntry
-	2,  // 7: logservice.LogService.WriteLog:input_type -> logservice.WriteLogRequest
-	6,  // 8: logservice.LogService.BatchWriteLog:input_type -> logservice.BatchWriteLogRequest
-	4,  // 9: logservice.LogService.QueryLog:input_type -> logservice.QueryLogRequest
-	3,  // 10: logservice.LogService.WriteLog:output_type -> logservice.WriteLogResponse
-	7,  // 11: logservice.LogService.BatchWriteLog:output_type -> logservice.BatchWriteLogResponse
-	5,  // 12: logservice.LogService.QueryLog:output_type -> logservice.QueryLogResponse
-	10, // [10:13] is the sub-list for method output_type
-	7,  // [7:10] is the sub-list for method input_type
-	7,  // [7:7] is the sub-list for extension type_name
-	7,  // [7:7] is the sub-list for extension extendee
-	0,  // [0:7] is the sub-list for field type_name
+	17, // 4: logservice.QueryLogRequest.metadata_filters:type_name -> logservice.QueryLogRequest.MetadataFiltersEntry
+	1,  // 5: logservice.QueryLogRequest.count_mode:type_name -> logservice.CountMode
+	2,  // 6: logservice.QueryLogResponse.logs:type_name -> logservice.LogEntry
+	5,  // 7: logservice.StreamQueryLogRequest.query:type_name -> logservice.QueryLogRequest
+	2,  // 8: logservice.QueryLogChunk.logs:type_name -> logservice.LogEntry
+	2,  // 9: logservice.BatchWriteLogRequest.log_entries:type_name -> logservice.LogEntry
+	18, // 10: logservice.BatchWriteLogRequest.common_metadata:type_name -> logservice.BatchWriteLogRequest.CommonMetadataEntry
+	2,  // 11: logservice.StreamWriteLogRequest.log_entries:type_name -> logservice.LogEntry
+	19, // 12: logservice.StreamWriteLogRequest.common_metadata:type_name -> logservice.StreamWriteLogRequest.CommonMetadataEntry
+	0,  // 13: logservice.AggregateLogsRequest.levels:type_name -> logservice.LogLevel
+	20, // 14: logservice.AggregateLogsRequest.metadata_filters:type_name -> logservice.AggregateLogsRequest.MetadataFiltersEntry
+	0,  // 15: logservice.AggregateBucket.level:type_name -> logservice.LogLevel
+	14, // 16: logservice.AggregateLogsResponse.buckets:type_name -> logservice.AggregateBucket
+	3,  // 17: logservice.LogService.WriteLog:input_type -> logservice.WriteLogRequest
+	9,  // 18: logservice.LogService.BatchWriteLog:input_type -> logservice.BatchWriteLogRequest
+	5,  // 19: logservice.LogService.QueryLog:input_type -> logservice.QueryLogRequest
+	7,  // 20: logservice.LogService.StreamQueryLog:input_type -> logservice.StreamQueryLogRequest
+	11, // 21: logservice.LogService.StreamWriteLog:input_type -> logservice.StreamWriteLogRequest
+	13, // 22: logservice.LogService.AggregateLogs:input_type -> logservice.AggregateLogsRequest
+	4,  // 23: logservice.LogService.WriteLog:output_type -> logservice.WriteLogResponse
+	10, // 24: logservice.LogService.BatchWriteLog:output_type -> logservice.BatchWriteLogResponse
+	6,  // 25: logservice.LogService.QueryLog:output_type -> logservice.QueryLogResponse
+	8,  // 26: logservice.LogService.StreamQueryLog:output_type -> logservice.QueryLogChunk
+	12, // 27: logservice.LogService.StreamWriteLog:output_type -> logservice.StreamWriteLogAck
+	15, // 28: logservice.LogService.AggregateLogs:output_type -> logservice.AggregateLogsResponse
+	23, // [23:29] is the sub-list for method output_type
+	17, // [17:23] is the sub-list for method input_type
+	17, // [17:17] is the sub-list for extension type_name
+	17, // [17:17] is the sub-list for extension extendee
+	0,  // [0:17] is the sub-list for field type_name
 }
 
 func init() { file_proto_log_service_proto_init() }
@@ -679,8 +1392,8 @@ func file_proto_log_service_proto_init() {
 		File: protoimpl.DescBuilder{
 			GoPackagePath: reflect.TypeOf(x{}).PkgPath(),
 			RawDescriptor: unsafe.Slice(unsafe.StringData(file_proto_log_service_proto_rawDesc), len(file_proto_log_service_proto_rawDesc)),
-			NumEnums:      1,
-			NumMessages:   9,
+			NumEnums:      2,
+			NumMessages:   19,
 			NumExtensions: 0,
 			NumServices:   1,
 		},
@@ -19,9 +19,12 @@ import (
 const _ = grpc.SupportPackageIsVersion9
 
 const (
-	LogService_WriteLog_FullMethodName      = "/logservice.LogService/WriteLog"
-	LogService_BatchWriteLog_FullMethodName = "/logservice.LogService/BatchWriteLog"
-	LogService_QueryLog_FullMethodName      = "/logservice.LogService/QueryLog"
+	LogService_WriteLog_FullMethodName       = "/logservice.LogService/WriteLog"
+	LogService_BatchWriteLog_FullMethodName  = "/logservice.LogService/BatchWriteLog"
+	LogService_QueryLog_FullMethodName       = "/logservice.LogService/QueryLog"
+	LogService_StreamQueryLog_FullMethodName = "/logservice.LogService/StreamQueryLog"
+	LogService_StreamWriteLog_FullMethodName = "/logservice.LogService/StreamWriteLog"
+	LogService_AggregateLogs_FullMethodName  = "/logservice.LogService/AggregateLogs"
 )
 
 // LogServiceClient is the client API for LogService service.
@@ -36,6 +39,12 @@ type LogServiceClient interface {
 	BatchWriteLog(ctx context.Context, in *BatchWriteLogRequest, opts ...grpc.CallOption) (*BatchWriteLogResponse, error)
 	// QueryLog 查询日志
 	QueryLog(ctx context.Context, in *QueryLogRequest, opts ...grpc.CallOption) (*QueryLogResponse, error)
+	// StreamQueryLog 流式查询：单个游标遍历结果，分块推送
+	StreamQueryLog(ctx context.Context, in *StreamQueryLogRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[QueryLogChunk], error)
+	// StreamWriteLog 流式写入：长连接上连续发送批次，每个批次入队后返回一条确认
+	StreamWriteLog(ctx context.Context, opts ...grpc.CallOption) (grpc.BidiStreamingClient[StreamWriteLogRequest, StreamWriteLogAck], error)
+	// AggregateLogs 按服务/级别/时间桶/metadata 键分组计数
+	AggregateLogs(ctx context.Context, in *AggregateLogsRequest, opts ...grpc.CallOption) (*AggregateLogsResponse, error)
 }
 
 type logServiceClient struct {
@@ -76,6 +85,48 @@ func (c *logServiceClient) QueryLog(ctx context.Context, in *QueryLogRequest, op
 	return out, nil
 }
 
+func (c *logServiceClient) StreamQueryLog(ctx context.Context, in *StreamQueryLogRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[QueryLogChunk], error) {
+	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
+	stream, err := c.cc.NewStream(ctx, &LogService_ServiceDesc.Streams[0], LogService_StreamQueryLog_FullMethodName, cOpts...)
+	if err != nil {
+		return nil, err
+	}
+	x := &grpc.GenericClientStream[StreamQueryLogRequest, QueryLogChunk]{ClientStream: stream}
+	if err := x.ClientStream.SendMsg(in); err != nil {
+		return nil, err
+	}
+	if err := x.ClientStream.CloseSend(); err != nil {
+		return nil, err
+	}
+	return x, nil
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type LogService_StreamQueryLogClient = grpc.ServerStreamingClient[QueryLogChunk]
+
+func (c *logServiceClient) StreamWriteLog(ctx context.Context, opts ...grpc.CallOption) (grpc.BidiStreamingClient[StreamWriteLogRequest, StreamWriteLogAck], error) {
+	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
+	stream, err := c.cc.NewStream(ctx, &LogService_ServiceDesc.Streams[1], LogService_StreamWriteLog_FullMethodName, cOpts...)
+	if err != nil {
+		return nil, err
+	}
+	x := &grpc.GenericClientStream[StreamWriteLogRequest, StreamWriteLogAck]{ClientStream: stream}
+	return x, nil
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type LogService_StreamWriteLogClient = grpc.BidiStreamingClient[StreamWriteLogRequest, StreamWriteLogAck]
+
+func (c *logServiceClient) AggregateLogs(ctx context.Context, in *AggregateLogsRequest, opts ...grpc.CallOption) (*AggregateLogsResponse, error) {
+	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
+	out := new(AggregateLogsResponse)
+	err := c.cc.Invoke(ctx, LogService_AggregateLogs_FullMethodName, in, out, cOpts...)
+	if err != nil {
+		return nil, err
+	}
+	return out, nil
+}
+
 // LogServiceServer is the server API for LogService service.
 // All implementations must embed UnimplementedLogServiceServer
 // for forward compatibility.
@@ -88,6 +139,12 @@ type LogServiceServer interface {
 	BatchWriteLog(context.Context, *BatchWriteLogRequest) (*BatchWriteLogResponse, error)
 	// QueryLog 查询日志
 	QueryLog(context.Context, *QueryLogRequest) (*QueryLogResponse, error)
+	// StreamQueryLog 流式查询：单个游标遍历结果，分块推送
+	StreamQueryLog(*StreamQueryLogRequest, grpc.ServerStreamingServer[QueryLogChunk]) error
+	// StreamWriteLog 流式写入：长连接上连续发送批次，每个批次入队后返回一条确认
+	StreamWriteLog(grpc.BidiStreamingServer[StreamWriteLogRequest, StreamWriteLogAck]) error
+	// AggregateLogs 按服务/级别/时间桶/metadata 键分组计数
+	AggregateLogs(context.Context, *AggregateLogsRequest) (*AggregateLogsResponse, error)
 	mustEmbedUnimplementedLogServiceServer()
 }
 
@@ -107,6 +164,15 @@ func (UnimplementedLogServiceServer) BatchWriteLog(context.Context, *BatchWriteL
 func (UnimplementedLogServiceServer) QueryLog(context.Context, *QueryLogRequest) (*QueryLogResponse, error) {
 	return nil, status.Errorf(codes.Unimplemented, "method QueryLog not implemented")
 }
+func (UnimplementedLogServiceServer) StreamQueryLog(*StreamQueryLogRequest, grpc.ServerStreamingServer[QueryLogChunk]) error {
+	return status.Errorf(codes.Unimplemented, "method StreamQueryLog not implemented")
+}
+func (UnimplementedLogServiceServer) StreamWriteLog(grpc.BidiStreamingServer[StreamWriteLogRequest, StreamWriteLogAck]) error {
+	return status.Errorf(codes.Unimplemented, "method StreamWriteLog not implemented")
+}
+func (UnimplementedLogServiceServer) AggregateLogs(context.Context, *AggregateLogsRequest) (*AggregateLogsResponse, error) {
+	return nil, status.Errorf(codes.Unimplemented, "method AggregateLogs not implemented")
+}
 func (UnimplementedLogServiceServer) mustEmbedUnimplementedLogServiceServer() {}
 func (UnimplementedLogServiceServer) testEmbeddedByValue()                    {}
 
@@ -182,6 +248,42 @@ func _LogService_QueryLog_Handler(srv interface{}, ctx context.Context, dec func
 	return interceptor(ctx, in, info, handler)
 }
 
+func _LogService_StreamQueryLog_Handler(srv interface{}, stream grpc.ServerStream) error {
+	m := new(StreamQueryLogRequest)
+	if err := stream.RecvMsg(m); err != nil {
+		return err
+	}
+	return srv.(LogServiceServer).StreamQueryLog(m, &grpc.GenericServerStream[StreamQueryLogRequest, QueryLogChunk]{ServerStream: stream})
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type LogService_StreamQueryLogServer = grpc.ServerStreamingServer[QueryLogChunk]
+
+func _LogService_StreamWriteLog_Handler(srv interface{}, stream grpc.ServerStream) error {
+	return srv.(LogServiceServer).StreamWriteLog(&grpc.GenericServerStream[StreamWriteLogRequest, StreamWriteLogAck]{ServerStream: stream})
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type LogService_StreamWriteLogServer = grpc.BidiStreamingServer[StreamWriteLogRequest, StreamWriteLogAck]
+
+func _LogService_AggregateLogs_Handler(srv interface{}, ctx context.Context, dec func(interface{}) error, interceptor grpc.UnaryServerInterceptor) (interface{}, error) {
+	in := new(AggregateLogsRequest)
+	if err := dec(in); err != nil {
+		return nil, err
+	}
+	if interceptor == nil {
+		return srv.(LogServiceServer).AggregateLogs(ctx, in)
+	}
+	info := &grpc.UnaryServerInfo{
+		Server:     srv,
+		FullMethod: LogService_AggregateLogs_FullMethodName,
+	}
+	handler := func(ctx context.Context, req interface{}) (interface{}, error) {
+		return srv.(LogServiceServer).AggregateLogs(ctx, req.(*AggregateLogsRequest))
+	}
+	return interceptor(ctx, in, info, handler)
+}
+
 // LogService_ServiceDesc is the grpc.ServiceDesc for LogService service.
 // It's only intended for direct use with grpc.RegisterService,
 // and not to be introspected or modified (even as a copy)
@@ -201,7 +303,23 @@ var LogService_ServiceDesc = grpc.ServiceDesc{
 			MethodName: "QueryLog",
 			Handler:    _LogService_QueryLog_Handler,
 		},
+		{
+			MethodName: "AggregateLogs",
+			Handler:    _LogService_AggregateLogs_Handler,
+		},
+	},
+	Streams: []grpc.StreamDesc{
+		{
+			StreamName:    "StreamQueryLog",
+			Handler:       _LogService_StreamQueryLog_Handler,
+			ServerStreams: true,
+		},
+		{
+			StreamName:    "StreamWriteLog",
+			Handler:       _LogService_StreamWriteLog_Handler,
+			ServerStreams: true,
+			ClientStreams: true,
+		},
 	},
-	Streams:  []grpc.StreamDesc{},
 	Metadata: "proto/log_service.proto",
 }
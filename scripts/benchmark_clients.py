@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Python 客户端统一基准测试
+覆盖 clients/python、clients/fastapi（异步）、clients/django 三个客户端：单条写入、不同批次大小的批量写入、
+分页查询（Django 客户端没有查询接口，不测），以及不经过网络的序列化 / 反序列化微基准
+
+默认在进程内启动内存版服务（clients/python/memory_server.py，同步落库），不依赖 Go 服务端和 MongoDB；
+结果以 JSON 保存为基线，与基线对比吞吐下降超过阈值时返回非零退出码，可直接用于 CI
+
+用法:
+    python benchmark_clients.py --save-baseline            # 生成 / 更新基线
+    python benchmark_clients.py                            # 与基线对比，退化超过 25% 时失败
+    python benchmark_clients.py --filter fastapi --threshold 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CLIENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'clients')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# 三个客户端目录下的 protobuf 生成文件相同，共用 clients/python 中的一份
+for name in ('python', 'fastapi', 'django'):
+    sys.path.append(os.path.join(CLIENTS_DIR, name))
+
+# 设置 Django 环境
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'log_service_django.settings')
+
+import grpc
+import django
+django.setup()
+from django.conf import settings as django_settings
+
+import log_service_pb2
+
+from client import LogServiceClient, LOG_FIELD_GETTERS, build_log_entry, factor_common_metadata
+from memory_server import InMemoryLogService, serve
+from app.services.log_client import AsyncLogServiceClient, log_entry_to_dict
+from app.services.log_client import factor_common_metadata as fastapi_factor_common_metadata
+from log_client.client import get_log_client as get_django_client
+
+BATCH_SIZES = (10, 100, 1000)
+# 每轮写入的日志条数，批量写入按批次大小切分
+WRITE_ROWS = 1000
+SINGLE_WRITE_ROWS = 200
+QUERY_SERVICE = "benchmark-query"
+QUERY_ROWS = 5000
+PAGE_SIZE = 100
+QUERIES_PER_ROUND = 20
+DECODE_ROWS = 1000
+
+
+def make_fields(i: int) -> Dict[str, Any]:
+    """与测试数据形态一致的一条日志（字典格式，各客户端各自构造 LogEntry）"""
+    return {
+        "service_name": "benchmark-clients",
+        "level": random.choice([1, 2, 3]),
+        "message": f"用户操作日志 - {random.randint(1, 10000)}",
+        "trace_id": f"trace_{random.getrandbits(64):x}",
+        "span_id": f"span_{random.getrandbits(32):x}",
+        "metadata": {
+            "adv_id": f"adv_{random.getrandbits(48):x}",
+            "aweme_id": f"aweme_{random.getrandbits(48):x}",
+            "plan_id": f"plan_{random.getrandbits(48):x}",
+            "user_id": str(random.randint(1, 100000)),
+            "region": random.choice(["北京", "上海", "广州", "深圳", "杭州"]),
+            "platform": random.choice(["iOS", "Android", "Web", "Desktop"]),
+        },
+    }
+
+
+def make_kwargs(i: int) -> Tuple[str, Dict[str, Any]]:
+    """FastAPI / Django 客户端 write_log 的参数形式：metadata 展开为关键字参数"""
+    fields = make_fields(i)
+    metadata = fields.pop("metadata")
+    message = fields.pop("message")
+    return message, {**fields, **metadata}
+
+
+class Benchmark:
+    """一个基准测试项：run() 每次处理 rows 条日志，取多次运行的最短耗时换算为 条/秒"""
+
+    def __init__(self, name: str, rows: int, run: Callable[[], Any]):
+        self.name = name
+        self.rows = rows
+        self.run = run
+
+    def measure(self, repeat: int) -> Dict[str, float]:
+        self.run()  # 预热
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.run()
+            best = min(best, time.perf_counter() - start)
+        return {"logs_per_sec": round(self.rows / best, 1), "seconds": best}
+
+
+def query_payload() -> bytes:
+    """本地构造一页 QueryLogResponse 的编码，用于反序列化微基准"""
+    logs = []
+    for i in range(DECODE_ROWS):
+        entry = build_log_entry(make_fields(i))
+        entry.timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(entry.timestamp_unix_nano // 10**9))
+        logs.append(entry)
+    return log_service_pb2.QueryLogResponse(success=True, logs=logs, total_count=len(logs)).SerializeToString()
+
+
+def python_benchmarks(address: str) -> List[Benchmark]:
+    """clients/python 同步客户端"""
+    client = LogServiceClient(address)
+    client.connect()
+    payload = query_payload()
+
+    def single_write():
+        for i in range(SINGLE_WRITE_ROWS):
+            fields = make_fields(i)
+            client.write_log(fields["service_name"], fields["level"], fields["message"], fields["metadata"],
+                             fields["trace_id"], fields["span_id"])
+
+    def batch_write(size: int):
+        def run():
+            rows = [make_fields(i) for i in range(WRITE_ROWS)]
+            for start in range(0, WRITE_ROWS, size):
+                result = client.batch_write_log(rows[start:start + size])
+                if not result["success"]:
+                    raise RuntimeError(result["error_message"])
+        return run
+
+    def query_page():
+        for page in range(QUERIES_PER_ROUND):
+            result = client.query_log(service_name=QUERY_SERVICE, level=log_service_pb2.LogLevel.INFO,
+                                      limit=PAGE_SIZE, offset=page * PAGE_SIZE, count="none")
+            if not result["success"]:
+                raise RuntimeError(result["error_message"])
+
+    def serialize():
+        entries = [build_log_entry(make_fields(i)) for i in range(WRITE_ROWS)]
+        request = log_service_pb2.BatchWriteLogRequest(log_entries=entries)
+        factor_common_metadata(request)
+        request.SerializeToString()
+
+    def deserialize():
+        response = log_service_pb2.QueryLogResponse()
+        response.ParseFromString(payload)
+        getters = list(LOG_FIELD_GETTERS.items())
+        [{field: getter(entry) for field, getter in getters} for entry in response.logs]
+
+    benchmarks = [Benchmark("python.write_log", SINGLE_WRITE_ROWS, single_write)]
+    benchmarks += [Benchmark(f"python.batch_write_log[{size}]", WRITE_ROWS, batch_write(size)) for size in BATCH_SIZES]
+    benchmarks += [
+        Benchmark("python.query_log", PAGE_SIZE * QUERIES_PER_ROUND, query_page),
+        Benchmark("python.serialize_batch", WRITE_ROWS, serialize),
+        Benchmark("python.deserialize_page", DECODE_ROWS, deserialize),
+    ]
+    return benchmarks
+
+
+def fastapi_benchmarks(address: str, loop: asyncio.AbstractEventLoop) -> List[Benchmark]:
+    """clients/fastapi 异步客户端：所有调用在同一个事件循环中并发执行，与网关处理并发请求时一致"""
+    client = AsyncLogServiceClient(address)
+    payload = query_payload()
+
+    def single_write():
+        async def run():
+            tasks = []
+            for i in range(SINGLE_WRITE_ROWS):
+                message, kwargs = make_kwargs(i)
+                tasks.append(client.write_log(message, **kwargs))
+            await asyncio.gather(*tasks)
+        loop.run_until_complete(run())
+
+    def batch_write(size: int):
+        def run():
+            entries = []
+            for i in range(WRITE_ROWS):
+                message, kwargs = make_kwargs(i)
+                entries.append(client.build_log_entry(message, **kwargs))
+            batches = [entries[start:start + size] for start in range(0, WRITE_ROWS, size)]
+
+            async def send():
+                return await asyncio.gather(*[client.batch_write_entries(batch) for batch in batches])
+            results = loop.run_until_complete(send())
+            for result in results:
+                if not result["success"]:
+                    raise RuntimeError(result["error_message"])
+        return run
+
+    def query_page():
+        async def run():
+            requests = [
+                log_service_pb2.QueryLogRequest(
+                    service_name=QUERY_SERVICE, level=log_service_pb2.LogLevel.INFO, limit=PAGE_SIZE,
+                    offset=page * PAGE_SIZE, count_mode=log_service_pb2.CountMode.COUNT_NONE,
+                )
+                for page in range(QUERIES_PER_ROUND)
+            ]
+            responses = await asyncio.gather(*[client.query_log(request) for request in requests])
+            for response in responses:
+                [log_entry_to_dict(entry) for entry in response.logs]
+        loop.run_until_complete(run())
+
+    def serialize():
+        entries = []
+        for i in range(WRITE_ROWS):
+            message, kwargs = make_kwargs(i)
+            entries.append(client.build_log_entry(message, **kwargs))
+        request = log_service_pb2.BatchWriteLogRequest(log_entries=entries)
+        fastapi_factor_common_metadata(request)
+        request.SerializeToString()
+
+    def deserialize():
+        response = log_service_pb2.QueryLogResponse()
+        response.ParseFromString(payload)
+        [log_entry_to_dict(entry) for entry in response.logs]
+
+    benchmarks = [Benchmark("fastapi.write_log", SINGLE_WRITE_ROWS, single_write)]
+    benchmarks += [Benchmark(f"fastapi.batch_write_entries[{size}]", WRITE_ROWS, batch_write(size))
+                   for size in BATCH_SIZES]
+    benchmarks += [
+        Benchmark("fastapi.query_log", PAGE_SIZE * QUERIES_PER_ROUND, query_page),
+        Benchmark("fastapi.serialize_batch", WRITE_ROWS, serialize),
+        Benchmark("fastapi.deserialize_page", DECODE_ROWS, deserialize),
+    ]
+    return benchmarks
+
+
+def django_benchmarks(address: str) -> List[Benchmark]:
+    """clients/django 客户端：单条写入和批量写入（Django 客户端没有查询接口，不测分页查询）"""
+    django_settings.LOG_SERVICE_GRPC_SERVER = address
+    client = get_django_client()
+
+    def single_write():
+        for i in range(SINGLE_WRITE_ROWS):
+            message, kwargs = make_kwargs(i)
+            result = client.write_log(message, **kwargs)
+            if not result["success"]:
+                raise RuntimeError(result["error_message"])
+
+    def batch_write(size: int):
+        def run():
+            entries = []
+            for i in range(WRITE_ROWS):
+                message, kwargs = make_kwargs(i)
+                entries.append(client.build_log_entry(message, **kwargs))
+            for start in range(0, WRITE_ROWS, size):
+                result = client.batch_write_entries(entries[start:start + size])
+                if not result["success"]:
+                    raise RuntimeError(result["error_message"])
+        return run
+
+    def serialize():
+        for i in range(WRITE_ROWS):
+            message, kwargs = make_kwargs(i)
+            log_service_pb2.WriteLogRequest(log_entry=client.build_log_entry(message, **kwargs)).SerializeToString()
+
+    benchmarks = [Benchmark("django.write_log", SINGLE_WRITE_ROWS, single_write)]
+    benchmarks += [Benchmark(f"django.batch_write_entries[{size}]", WRITE_ROWS, batch_write(size))
+                   for size in BATCH_SIZES]
+    benchmarks.append(Benchmark("django.serialize_entry", WRITE_ROWS, serialize))
+    return benchmarks
+
+
+def seed_query_data(address: str):
+    """写入分页查询用的数据，等待全部可查"""
+    client = LogServiceClient(address)
+    client.connect()
+    try:
+        trace_ids = []
+        for start in range(0, QUERY_ROWS, 1000):
+            rows = []
+            for i in range(start, start + 1000):
+                fields = make_fields(i)
+                fields.update(service_name=QUERY_SERVICE, level=log_service_pb2.LogLevel.INFO)
+                rows.append(fields)
+            client.batch_write_log(rows)
+            trace_ids.append(rows[-1]["trace_id"])
+        result = client.wait_until_visible(trace_ids, timeout=30.0)
+        if result["pending"]:
+            raise RuntimeError(f"查询数据未全部落库: {len(result['pending'])} 个 trace_id 不可见")
+    finally:
+        client.disconnect()
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """与基线对比，返回退化超过阈值的测试项"""
+    regressions = []
+    base_results = baseline.get("results", {})
+    print(f"\n{'测试项':<36}{'基线 条/秒':>14}{'当前 条/秒':>14}{'变化':>10}")
+    for name, result in results.items():
+        base = base_results.get(name)
+        if base is None:
+            print(f"{name:<36}{'-':>14}{result['logs_per_sec']:>14.0f}{'新增':>10}")
+            continue
+        ratio = result["logs_per_sec"] / base["logs_per_sec"]
+        regressed = ratio < 1 - threshold
+        marker = " ❌" if regressed else ""
+        print(f"{name:<36}{base['logs_per_sec']:>14.0f}{result['logs_per_sec']:>14.0f}{ratio - 1:>+10.1%}{marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """读取基线文件，不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    """运行基准测试"""
+    parser = argparse.ArgumentParser(description="Python 客户端统一基准测试")
+    parser.add_argument("--server", default="", help="日志服务地址，默认在进程内启动内存版服务")
+    parser.add_argument("--filter", nargs="*", default=[], help="只运行名称包含这些子串的测试项")
+    parser.add_argument("--repeat", type=int, default=5, help="每项的重复次数（取最短耗时）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线 JSON 文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--output", default="", help="把本次结果另存为 JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="吞吐下降超过该比例视为退化")
+    args = parser.parse_args()
+
+    server = None
+    address = args.server
+    if not address:
+        server, address, _ = serve(service=InMemoryLogService(flush_period=0))
+
+    loop = asyncio.new_event_loop()
+    print("=" * 100)
+    print(f"📊 Python 客户端基准测试：{'进程内内存版服务' if server else address}，每项重复 {args.repeat} 次取最短")
+    print("=" * 100)
+    try:
+        seed_query_data(address)
+        benchmarks = python_benchmarks(address) + fastapi_benchmarks(address, loop) + django_benchmarks(address)
+        if args.filter:
+            benchmarks = [b for b in benchmarks if any(f in b.name for f in args.filter)]
+
+        results = {}
+        for benchmark in benchmarks:
+            results[benchmark.name] = benchmark.measure(args.repeat)
+            print(f"{benchmark.name:<36}{results[benchmark.name]['logs_per_sec']:>14.0f} 条/秒")
+    except (grpc.RpcError, RuntimeError) as e:
+        print(f"❌ 基准测试失败: {e}")
+        return 1
+    finally:
+        loop.close()
+        if server is not None:
+            server.stop(0)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "server": "in-process" if server else address,
+        "python": platform.python_version(),
+        "grpc": grpc.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        # 按测试项合并，使用 --filter 时不会清掉其他测试项的基线
+        baseline = load_baseline(args.baseline) or {"results": {}}
+        baseline.update({k: v for k, v in report.items() if k != "results"})
+        baseline["results"].update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 基线已保存: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\n⚠️ 基线文件不存在: {args.baseline}（使用 --save-baseline 生成）")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项吞吐下降超过 {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ 没有超过 {args.threshold:.0%} 的退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程、可断点续传的测试数据批量写入工具（需要 numpy）
+
+生成进程用向量化生成器（synthetic_logs.py）产出编码好的 BatchWriteLogRequest，经有界队列交给主进程的
+发送线程，发送线程只做 gRPC 调用；protobuf 构造不再受 GIL 限制，内存占用与总条数无关。
+
+批次内容由 (seed, end_time, 批次序号, 批次大小) 决定，检查点文件记录已确认的批次，中断后重新运行同一命令
+从检查点继续，重发的批次日志 ID 不变，服务端按 ID 去重。
+
+用法:
+    python bulk_load.py --total 3000000                       # 写入 300 万条（默认参数同 insert_test_data.py）
+    python bulk_load.py --total 3000000 --rate 20000          # 限速 2 万条/秒
+    python bulk_load.py --processes 4 --senders 16 --server localhost:50051
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+
+import grpc
+
+# 添加proto文件路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'clients', 'python'))
+
+import log_service_pb2
+from synthetic_logs import SyntheticLogGenerator
+
+DEFAULT_CHECKPOINT = "bulk_load.checkpoint.json"
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩百分位数（sorted_values 已升序）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def generate_batches(worker_index: int, indexes: List[int], params: Dict[str, Any], batch_queue):
+    """生成进程：生成 indexes 中的批次放入队列，队列满时阻塞；结束时放入 None"""
+    try:
+        generator = SyntheticLogGenerator(seed=params["seed"], services=params["services"],
+                                          end_time_ns=params["end_time_ns"])
+        for index in indexes:
+            count = min(params["batch_size"], params["total"] - index * params["batch_size"])
+            batch_queue.put((index, count, generator.serialized_batch(index, count)))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        batch_queue.put(("error", f"生成进程 {worker_index} 异常: {e}", None))
+    finally:
+        batch_queue.put(None)
+
+
+class RateLimiter:
+    """按条数限速，rate <= 0 时不限速；空闲时间不累积额度，不会在空闲后突发"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, count: int):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.next_time = max(self.next_time, now)
+            wait = self.next_time - now
+            self.next_time += count / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """
+    检查点：数据集参数 + 已确认的批次（completed_before 之前全部完成，completed 为其后零散完成的批次）
+
+    通过临时文件 + rename 原子写入
+    """
+
+    PARAM_KEYS = ("seed", "end_time_ns", "batch_size", "total", "services")
+
+    def __init__(self, path: str, params: Dict[str, Any]):
+        self.path = path
+        self.params = params
+        self.completed_before = 0
+        self.completed = set()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def restore(self, state: Dict[str, Any]):
+        self.completed_before = state["completed_before"]
+        self.completed = set(state["completed"])
+
+    def ack(self, index: int):
+        with self.lock:
+            self.completed.add(index)
+            while self.completed_before in self.completed:
+                self.completed.remove(self.completed_before)
+                self.completed_before += 1
+
+    def pending(self, total_batches: int) -> List[int]:
+        return [i for i in range(self.completed_before, total_batches) if i not in self.completed]
+
+    def save(self):
+        with self.lock:
+            state = dict(self.params, completed_before=self.completed_before, completed=sorted(self.completed))
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class BulkLoader:
+    """
+    批量写入：processes 个生成进程 -> 有界队列 -> senders 个发送线程
+
+    Args:
+        server: gRPC 服务地址
+        params: 数据集参数 seed / end_time_ns / batch_size / total / services
+        processes: 生成进程数
+        senders: 发送线程数（同时在途的批次数）
+        rate: 目标写入速度（条/秒），0 表示不限速
+        checkpoint_path: 检查点文件
+        max_retries: 单个批次失败（gRPC 错误或服务端队列已满）后的重试次数
+        report_interval: 进度输出和保存检查点的间隔（秒）
+    """
+
+    def __init__(self, server: str, params: Dict[str, Any], processes: int, senders: int, rate: float,
+                 checkpoint_path: str, max_retries: int = 5, report_interval: float = 5.0):
+        self.server = server
+        self.params = params
+        self.processes = processes
+        self.senders = senders
+        self.rate_limiter = RateLimiter(rate)
+        self.checkpoint = Checkpoint(checkpoint_path, params)
+        self.max_retries = max_retries
+        self.report_interval = report_interval
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.inserted = 0
+        self.retries = 0
+        self.failed = []
+        self.latencies = []  # 全部成功批次的延迟（秒）
+        self.window_latencies = []  # 本次输出间隔内的延迟
+
+    def send(self, batch_write, index: int, count: int, payload: bytes):
+        """发送一个批次，失败时按带抖动的指数退避重发整批"""
+        backoff = 0.1
+        for attempt in range(self.max_retries + 1):
+            if self.stop_event.is_set():
+                return
+            if attempt == 0:
+                self.rate_limiter.acquire(count)
+            started = time.perf_counter()
+            try:
+                response = batch_write(payload, timeout=30)
+                error = None if response.success else response.error_message
+            except grpc.RpcError as e:
+                error = f"{e.code().name}: {e.details()}"
+            latency = time.perf_counter() - started
+            if error is None:
+                with self.lock:
+                    self.inserted += count
+                    self.latencies.append(latency)
+                    self.window_latencies.append(latency)
+                self.checkpoint.ack(index)
+                return
+            if attempt < self.max_retries:
+                with self.lock:
+                    self.retries += 1
+                time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 5.0)
+        with self.lock:
+            self.failed.append(f"批次 {index}: {error}")
+
+    def sender(self, channel, send_queue: "queue.Queue"):
+        batch_write = channel.unary_unary(
+            '/logservice.LogService/BatchWriteLog',
+            request_serializer=None,
+            response_deserializer=log_service_pb2.BatchWriteLogResponse.FromString,
+        )
+        while True:
+            item = send_queue.get()
+            if item is None:
+                return
+            self.send(batch_write, *item)
+
+    def report(self, start_time: float, last: Tuple[float, int]) -> Tuple[float, int]:
+        now = time.monotonic()
+        with self.lock:
+            inserted = self.inserted
+            window = sorted(self.window_latencies)
+            self.window_latencies = []
+        current = (inserted - last[1]) / max(now - last[0], 1e-9)
+        average = inserted / max(now - start_time, 1e-9)
+        print(f"已插入 {inserted:,} 条 | 当前 {current:.0f} 条/秒 | 平均 {average:.0f} 条/秒 | "
+              f"批次延迟 p50/p90/p99 {_percentile(window, 50) * 1000:.1f}/{_percentile(window, 90) * 1000:.1f}/"
+              f"{_percentile(window, 99) * 1000:.1f} ms | 重试 {self.retries}")
+        self.checkpoint.save()
+        return now, inserted
+
+    def run(self, restart: bool = False) -> Dict[str, Any]:
+        total_batches = (self.params["total"] + self.params["batch_size"] - 1) // self.params["batch_size"]
+        state = None if restart else Checkpoint.load(self.checkpoint.path)
+        if state is not None:
+            changed = [key for key in Checkpoint.PARAM_KEYS if state.get(key) != self.params[key]]
+            if changed:
+                raise ValueError(f"检查点 {self.checkpoint.path} 的数据集参数不同（{', '.join(changed)}），"
+                                 f"使用 --restart 重新开始")
+            self.checkpoint.restore(state)
+        pending = self.checkpoint.pending(total_batches)
+        done_batches = total_batches - len(pending)
+        print(f"数据集: {self.params['total']:,} 条, {total_batches} 个批次, seed={self.params['seed']}, "
+              f"end_time={self.params['end_time_ns'] // 1_000_000_000}")
+        if done_batches:
+            print(f"从检查点继续: 已完成 {done_batches} 个批次，剩余 {len(pending)} 个")
+        if not pending:
+            self.checkpoint.save()
+            return self.summary(0.0, done_batches, total_batches)
+
+        # 生成进程先于 gRPC 连接启动，fork 出的进程不继承 gRPC 的线程和连接
+        batch_queue = multiprocessing.Queue(maxsize=max(self.senders, self.processes) * 2)
+        workers = [
+            multiprocessing.Process(target=generate_batches, args=(k, pending[k::self.processes], self.params, batch_queue),
+                                    daemon=True)
+            for k in range(min(self.processes, len(pending)))
+        ]
+        for worker in workers:
+            worker.start()
+
+        channel = grpc.insecure_channel(self.server)
+        send_queue = queue.Queue(maxsize=self.senders)
+        threads = [threading.Thread(target=self.sender, args=(channel, send_queue), daemon=True)
+                   for _ in range(self.senders)]
+        for thread in threads:
+            thread.start()
+
+        start_time = time.monotonic()
+        last = (start_time, 0)
+        finished = 0
+        try:
+            while finished < len(workers):
+                try:
+                    item = batch_queue.get(timeout=0.5)
+                except queue.Empty:
+                    item = False
+                    if not any(worker.is_alive() for worker in workers) and batch_queue.empty():
+                        break
+                if item is None:
+                    finished += 1
+                elif item and item[0] == "error":
+                    self.failed.append(item[1])
+                elif item:
+                    while True:
+                        try:
+                            send_queue.put(item, timeout=0.5)
+                            break
+                        except queue.Full:
+                            if time.monotonic() - last[0] >= self.report_interval:
+                                last = self.report(start_time, last)
+                if time.monotonic() - last[0] >= self.report_interval:
+                    last = self.report(start_time, last)
+            for _ in threads:
+                send_queue.put(None)
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            # 中断时丢弃未发送的批次，等待在途批次完成后保存检查点
+            self.stop_event.set()
+            print("\n中断写入，保存检查点...")
+            while True:
+                try:
+                    send_queue.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in threads:
+                send_queue.put(None)
+            for thread in threads:
+                thread.join()
+            raise
+        finally:
+            for worker in workers:
+                worker.terminate()
+            self.checkpoint.save()
+            channel.close()
+        return self.summary(time.monotonic() - start_time, done_batches, total_batches)
+
+    def summary(self, duration: float, done_before: int, total_batches: int) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "inserted": self.inserted,
+            "duration_seconds": round(duration, 3),
+            "logs_per_second": round(self.inserted / duration, 1) if duration > 0 else 0,
+            "batches_done": total_batches - len(self.checkpoint.pending(total_batches)),
+            "batches_total": total_batches,
+            "resumed_batches": done_before,
+            "retries": self.retries,
+            "batch_latency_ms": {p: round(_percentile(latencies, q) * 1000, 2)
+                                 for p, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+            "errors": self.failed,
+        }
+
+
+def dataset_params(seed: int, end_time: int, batch_size: int, total: int, services: List[str],
+                   checkpoint_path: str, restart: bool = False) -> Dict[str, Any]:
+    """
+    数据集参数；end_time（Unix 秒）为 0 时沿用检查点中的结束时间（跨天续传生成的数据不变），
+    没有检查点时为当天 UTC 零点
+    """
+    end_time_ns = end_time * 1_000_000_000
+    if not end_time_ns:
+        state = None if restart else Checkpoint.load(checkpoint_path)
+        end_time_ns = state["end_time_ns"] if state else int(time.time()) // 86400 * 86400 * 1_000_000_000
+    return {
+        "seed": seed,
+        "end_time_ns": end_time_ns,
+        "batch_size": batch_size,
+        "total": total,
+        "services": list(services),
+    }
+
+
+def print_summary(result: Dict[str, Any]):
+    latency = result["batch_latency_ms"]
+    print("\n" + "=" * 50)
+    print("数据插入完成！" if not result["errors"] and result["batches_done"] == result["batches_total"]
+          else "数据插入未完成，重新运行同一命令从检查点继续")
+    print(f"完成批次: {result['batches_done']}/{result['batches_total']}（本次之前已完成 {result['resumed_batches']}）")
+    print(f"本次插入: {result['inserted']:,} 条，重试 {result['retries']} 次")
+    print(f"总耗时: {result['duration_seconds']:.2f} 秒")
+    print(f"插入速度: {result['logs_per_second']:.0f} 条/秒")
+    print(f"批次延迟: p50 {latency['p50']} ms, p90 {latency['p90']} ms, p99 {latency['p99']} ms, max {latency['max']} ms")
+    for error in result["errors"][:5]:
+        print(f"  {error}")
+    print("=" * 50)
+
+
+def main():
+    cpu_count = os.cpu_count() or 2
+    parser = argparse.ArgumentParser(description="多进程、可断点续传的测试数据批量写入")
+    parser.add_argument("--server", default="localhost:50051", help="gRPC 服务地址")
+    parser.add_argument("--total", type=int, default=3000000, help="总条数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每个 BatchWriteLog 请求的条数")
+    parser.add_argument("--processes", type=int, default=max(1, cpu_count - 1), help="生成进程数")
+    parser.add_argument("--senders", type=int, default=8, help="发送线程数（同时在途的批次数）")
+    parser.add_argument("--rate", type=float, default=0, help="目标写入速度（条/秒），0 表示不限速")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--end-time", type=int, default=0,
+                        help="时间范围结束时间（Unix 秒），默认沿用检查点中的值，没有检查点时为当天 UTC 零点")
+    parser.add_argument("--services", default="zhenhaotou", help="服务名，逗号分隔，按 Zipf 分布")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="检查点文件")
+    parser.add_argument("--restart", action="store_true", help="忽略检查点，从头写入")
+    parser.add_argument("--max-retries", type=int, default=5, help="批次失败后的重试次数")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="进度输出间隔（秒）")
+    args = parser.parse_args()
+
+    params = dataset_params(args.seed, args.end_time, args.batch_size, args.total, args.services.split(","),
+                            args.checkpoint, args.restart)
+    loader = BulkLoader(args.server, params, args.processes, args.senders, args.rate, args.checkpoint,
+                        max_retries=args.max_retries, report_interval=args.report_interval)
+    try:
+        result = loader.run(restart=args.restart)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 2
+    except KeyboardInterrupt:
+        print(f"已保存检查点 {args.checkpoint}，重新运行同一命令继续")
+        return 130
+    print_summary(result)
+    return 0 if not result["errors"] and result["batches_done"] == result["batches_total"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,7 +11,6 @@ import string
 import time
 import threading
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime, timedelta
 import sys
 import os
 
@@ -21,18 +20,40 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'clients', 'python
 try:
     import log_service_pb2
     import log_service_pb2_grpc
+    from client import LogServiceClient, factor_common_metadata, new_ulid
 except ImportError:
     print("错误: 无法导入protobuf文件")
     print("请确保已经生成了Python的protobuf文件")
     print("运行: cd clients/python && ./setup_and_run.sh")
     sys.exit(1)
 
+try:
+    # 向量化生成器和多进程写入需要 numpy，未安装时逐条生成、线程池写入
+    from synthetic_logs import SyntheticLogGenerator
+    from bulk_load import BulkLoader, dataset_params, print_summary
+except ImportError:
+    SyntheticLogGenerator = None
+
 # 配置常量
 TOTAL_RECORDS = 3000000  # 300万条记录
 BATCH_SIZE = 1000        # 每批1000条
 MAX_WORKERS = 10         # 最大并发数
 SERVICE_NAME = "zhenhaotou"
 GRPC_ADDRESS = "localhost:50051"
+# 设置 USE_STREAM_WRITE=1 时改用一条 StreamWriteLog 长连接写入，MAX_WORKERS 作为未确认批次窗口
+USE_STREAM_WRITE = os.getenv("USE_STREAM_WRITE", "") == "1"
+# 向量化生成器（需要 numpy）：整批生成并直接编码为 BatchWriteLogRequest，设置 USE_VECTORIZED_GENERATOR=0 时逐条生成
+USE_VECTORIZED_GENERATOR = os.getenv("USE_VECTORIZED_GENERATOR", "1") == "1"
+# 向量化生成器的随机种子、时间范围结束时间（Unix 秒，默认当天 UTC 零点）和服务名（逗号分隔，按 Zipf 分布），
+# 三者相同时每次运行生成完全相同的数据
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "0"))
+SYNTHETIC_END_TIME = os.getenv("SYNTHETIC_END_TIME", "")
+SYNTHETIC_SERVICES = os.getenv("SYNTHETIC_SERVICES", SERVICE_NAME).split(",")
+# 使用向量化生成器时由多个生成进程产出批次（默认 CPU 数 - 1），按 INSERT_RATE（条/秒，0 不限速）限速，
+# 进度保存在 INSERT_CHECKPOINT 中，中断后重新运行从检查点继续；GENERATOR_PROCESSES=0 时在线程池中生成和写入
+GENERATOR_PROCESSES = int(os.getenv("GENERATOR_PROCESSES", str(max(1, (os.cpu_count() or 2) - 1))))
+INSERT_RATE = float(os.getenv("INSERT_RATE", "0"))
+INSERT_CHECKPOINT = os.getenv("INSERT_CHECKPOINT", "insert_test_data.checkpoint.json")
 
 # 日志级别
 LOG_LEVELS = [
@@ -64,12 +85,23 @@ class DataInserter:
         self.total_inserted = 0
         self.start_time = None
         self.lock = threading.Lock()
+        self.generator = None
+        if USE_VECTORIZED_GENERATOR and SyntheticLogGenerator is not None:
+            end_time_ns = int(SYNTHETIC_END_TIME) * 1_000_000_000 if SYNTHETIC_END_TIME else None
+            self.generator = SyntheticLogGenerator(seed=SYNTHETIC_SEED, services=SYNTHETIC_SERVICES,
+                                                   end_time_ns=end_time_ns)
         
     def connect(self):
         """连接到gRPC服务"""
         print(f"连接到gRPC服务器: {GRPC_ADDRESS}")
         self.channel = grpc.insecure_channel(GRPC_ADDRESS)
         self.stub = log_service_pb2_grpc.LogServiceStub(self.channel)
+        # 发送已编码的 BatchWriteLogRequest（向量化生成器的输出）
+        self.batch_write_serialized = self.channel.unary_unary(
+            '/logservice.LogService/BatchWriteLog',
+            request_serializer=None,
+            response_deserializer=log_service_pb2.BatchWriteLogResponse.FromString,
+        )
         
         # 测试连接
         try:
@@ -92,25 +124,16 @@ class DataInserter:
     
     def generate_log_entry(self):
         """生成随机日志条目"""
-        # 生成随机时间戳（最近30天内）
-        now = datetime.now()
-        random_days = random.randint(0, 29)
-        random_hours = random.randint(0, 23)
-        random_minutes = random.randint(0, 59)
-        random_seconds = random.randint(0, 59)
-        
-        timestamp = now - timedelta(
-            days=random_days,
-            hours=random_hours, 
-            minutes=random_minutes,
-            seconds=random_seconds
-        )
+        # 生成随机时间戳（最近30天内），直接使用纳秒时间戳，避免无时区的 isoformat 被服务端解析失败
+        offset_seconds = random.randint(0, 30 * 24 * 3600 - 1)
+        timestamp_unix_nano = time.time_ns() - offset_seconds * 1_000_000_000
         
         return log_service_pb2.LogEntry(
+            id=new_ulid(),
             service_name=SERVICE_NAME,
             level=random.choice(LOG_LEVELS),
             message=f"{random.choice(LOG_MESSAGES)} - {random.randint(1, 10000)}",
-            timestamp=timestamp.isoformat(),
+            timestamp_unix_nano=timestamp_unix_nano,
             metadata={
                 "adv_id": self.generate_random_id("adv"),
                 "aweme_id": self.generate_random_id("aweme"), 
@@ -126,19 +149,24 @@ class DataInserter:
     def insert_batch(self, batch_num, batch_size):
         """插入一批数据"""
         try:
-            # 生成批次数据
-            log_entries = []
-            for _ in range(batch_size):
-                log_entries.append(self.generate_log_entry())
-            
-            # 执行批量插入
-            response = self.stub.BatchWriteLog(log_service_pb2.BatchWriteLogRequest(
-                log_entries=log_entries
-            ))
+            if self.generator is not None:
+                # 批次内容由种子和批次序号决定，重复运行写入相同的日志 ID
+                payload = self.generator.serialized_batch(batch_num - 1, batch_size)
+                response = self.batch_write_serialized(payload)
+            else:
+                # 生成批次数据
+                log_entries = []
+                for _ in range(batch_size):
+                    log_entries.append(self.generate_log_entry())
+                
+                # 执行批量插入（批次内相同的 metadata 只传输一次）
+                request = log_service_pb2.BatchWriteLogRequest(log_entries=log_entries)
+                factor_common_metadata(request)
+                response = self.stub.BatchWriteLog(request)
             
             if response.success:
                 with self.lock:
-                    self.total_inserted += len(log_entries)
+                    self.total_inserted += batch_size
                     if batch_num % 100 == 0:
                         elapsed = time.time() - self.start_time
                         rate = self.total_inserted / elapsed
@@ -153,10 +181,79 @@ class DataInserter:
             print(f"批次 {batch_num} 异常: {e}")
             return False
     
+    def run_stream_insertion(self):
+        """通过一条 StreamWriteLog 长连接插入数据，断线时自动重连并重发未确认的批次"""
+        print(f"开始插入测试数据（StreamWriteLog）...")
+        print(f"配置: 总记录数={TOTAL_RECORDS:,}, 批次大小={BATCH_SIZE}, 未确认批次窗口={MAX_WORKERS}")
+        
+        self.start_time = time.time()
+        acked_batches = [0]
+        
+        def on_ack(ack):
+            acked_batches[0] += 1
+            if not ack.success:
+                print(f"批次 {ack.sequence} 失败: {ack.error_message}")
+            with self.lock:
+                self.total_inserted += ack.accepted_count
+                if acked_batches[0] % 100 == 0:
+                    elapsed = time.time() - self.start_time
+                    print(f"批次 {acked_batches[0]}: 已插入 {self.total_inserted:,} 条记录, "
+                          f"速度: {self.total_inserted / elapsed:.0f} 条/秒")
+        
+        client = LogServiceClient(GRPC_ADDRESS)
+        client.connect()
+        try:
+            with client.stream_writer(batch_size=BATCH_SIZE, window=MAX_WORKERS, on_ack=on_ack) as writer:
+                for start in range(0, TOTAL_RECORDS, BATCH_SIZE):
+                    count = min(BATCH_SIZE, TOTAL_RECORDS - start)
+                    if self.generator is not None:
+                        writer.write_many(self.generator.entries(start // BATCH_SIZE, count))
+                    else:
+                        writer.write_many(self.generate_log_entry() for _ in range(count))
+            stats = writer.stats()
+        finally:
+            client.disconnect()
+        
+        duration = time.time() - self.start_time
+        print("\n" + "="*50)
+        print("数据插入完成！")
+        print(f"发送批次: {stats['sent_batches']}，重连次数: {stats['reconnects']}")
+        print(f"插入记录: {self.total_inserted:,}/{TOTAL_RECORDS:,}")
+        print(f"总耗时: {duration:.2f} 秒")
+        print(f"插入速度: {self.total_inserted/duration:.0f} 条/秒")
+        print("="*50)
+    
+    def run_bulk_insertion(self):
+        """多进程生成 + 发送线程写入（bulk_load.py），支持限速和断点续传"""
+        params = dataset_params(SYNTHETIC_SEED, int(SYNTHETIC_END_TIME or 0), BATCH_SIZE, TOTAL_RECORDS,
+                                SYNTHETIC_SERVICES, INSERT_CHECKPOINT)
+        print(f"开始插入测试数据（{GENERATOR_PROCESSES} 个生成进程, {MAX_WORKERS} 个发送线程）...")
+        loader = BulkLoader(GRPC_ADDRESS, params, GENERATOR_PROCESSES, MAX_WORKERS, INSERT_RATE, INSERT_CHECKPOINT)
+        try:
+            result = loader.run()
+        except KeyboardInterrupt:
+            print(f"已保存检查点 {INSERT_CHECKPOINT}，重新运行继续插入")
+            raise
+        self.total_inserted = result["inserted"]
+        print_summary(result)
+        if result["errors"] or result["batches_done"] < result["batches_total"]:
+            raise Exception("部分批次失败，重新运行从检查点继续")
+    
     def run_insertion(self):
         """运行数据插入"""
+        if USE_STREAM_WRITE:
+            self.run_stream_insertion()
+            return
+        if self.generator is not None and GENERATOR_PROCESSES > 0:
+            self.run_bulk_insertion()
+            return
+        
         print(f"开始插入测试数据...")
         print(f"配置: 总记录数={TOTAL_RECORDS:,}, 批次大小={BATCH_SIZE}, 并发数={MAX_WORKERS}")
+        if self.generator is not None:
+            print(f"数据生成: 向量化生成器 (seed={SYNTHETIC_SEED}, end_time={self.generator.end_time_ns // 1_000_000_000})")
+        else:
+            print("数据生成: 逐条生成")
         
         self.start_time = time.time()
         
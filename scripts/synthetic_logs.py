@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+向量化的合成日志生成器（需要 numpy）
+
+一次生成整个批次的各列（时间戳、级别、消息、ID、metadata），直接按 protobuf 线格式拼出
+BatchWriteLogRequest 字节串，不逐条构造 LogEntry。分布：
+- 服务、用户、广告计划、视频、消息模板按 Zipf 分布（少数热点占大部分日志）
+- 时间戳按日内曲线（UTC+8 白天和晚间高峰）和周末折减分布在最近 days 天内
+- 每条 trace 有多条日志（平均 2.5 条），共享 trace_id、用户、计划等字段，时间相近
+- 随机分布的错误突发时段内 ERROR / FATAL 比例显著升高
+
+批次内容只由 (seed, end_time_ns, 批次序号, 批次大小) 决定，与生成顺序和进程无关，
+多进程生成、断点续传和重复运行得到完全相同的数据（日志 ID 也相同，服务端按 ID 去重）
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 添加proto文件路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'clients', 'python'))
+
+import log_service_pb2
+
+# 变长字节列：data 为 (n, 宽度) 的 uint8 矩阵，每行前 lengths[i] 个字节有效
+ByteColumn = namedtuple("ByteColumn", ["data", "lengths"])
+
+_CROCKFORD32 = np.frombuffer(b"0123456789ABCDEFGHJKMNPQRSTVWXYZ", dtype=np.uint8)
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+SERVICE_NAMES = [
+    "zhenhaotou", "api-gateway", "order-service", "payment-service",
+    "user-service", "search-service", "notification-service", "data-sync",
+]
+
+INFO_MESSAGES = [
+    "用户访问页面", "API请求处理", "数据库查询执行", "缓存更新操作", "文件上传完成",
+    "用户登录成功", "订单创建完成", "支付处理成功", "数据同步完成", "任务执行结束",
+]
+
+ERROR_MESSAGES = [
+    "数据库查询超时", "下游服务调用失败", "缓存连接断开", "支付回调验签失败",
+    "消息队列投递失败", "请求参数校验失败", "文件上传中断", "任务执行异常",
+]
+
+REGIONS = ["北京", "上海", "广州", "深圳", "杭州"]
+REGION_WEIGHTS = [0.26, 0.24, 0.18, 0.18, 0.14]
+PLATFORMS = ["iOS", "Android", "Web", "Desktop"]
+PLATFORM_WEIGHTS = [0.38, 0.45, 0.12, 0.05]
+
+# 各级别（DEBUG, INFO, WARN, ERROR, FATAL）的比例：平时 / 错误突发时段
+LEVEL_WEIGHTS = [0.10, 0.70, 0.13, 0.06, 0.01]
+BURST_LEVEL_WEIGHTS = [0.02, 0.28, 0.20, 0.45, 0.05]
+
+# 当地时间（UTC+8）每小时的相对流量
+HOURLY_WEIGHTS = [
+    0.9, 0.5, 0.3, 0.2, 0.2, 0.3, 0.6, 1.2, 2.0, 2.6, 2.9, 3.0,
+    2.8, 2.6, 2.7, 2.8, 2.7, 2.6, 2.8, 3.2, 3.6, 3.7, 3.0, 1.8,
+]
+WEEKEND_FACTOR = 0.8
+
+# 实体 ID 的数字部分：基数 + 排名 * 步长（16 位数字）
+_ENTITY_BASE = 1_700_000_000_000_000
+_ENTITY_STRIDE = 7919
+
+
+def _zipf(rng: np.random.Generator, n: int, s: float, size: int) -> np.ndarray:
+    """
+    有界 Zipf 分布抽样，返回 [0, n) 的排名（0 为最热门）
+
+    按连续幂律分布 x^-s（1 <= x < n + 1）的逆 CDF 取整，不需要 n 个元素的累积分布表
+    """
+    u = rng.random(size)
+    if abs(s - 1.0) < 1e-9:
+        x = (n + 1.0) ** u
+    else:
+        a = 1.0 - s
+        x = (1.0 + u * ((n + 1.0) ** a - 1.0)) ** (1.0 / a)
+    return np.minimum(x.astype(np.int64) - 1, n - 1)
+
+
+def _sample(rng: np.random.Generator, cdf: np.ndarray, size: int) -> np.ndarray:
+    """按累积分布表抽样（用于少量类别）"""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+
+def _const(value: bytes, n: int) -> ByteColumn:
+    data = np.frombuffer(value, dtype=np.uint8)
+    return ByteColumn(np.broadcast_to(data, (n, len(data))), np.full(n, len(data), dtype=np.int64))
+
+
+def _table(strings: Sequence[str]) -> ByteColumn:
+    """字符串表编码为 UTF-8 字节矩阵，按下标取行：table.data[idx]"""
+    encoded = [s.encode("utf-8") for s in strings]
+    width = max(len(b) for b in encoded)
+    data = np.zeros((len(encoded), width), dtype=np.uint8)
+    for row, b in enumerate(encoded):
+        data[row, :len(b)] = np.frombuffer(b, dtype=np.uint8)
+    return ByteColumn(data, np.array([len(b) for b in encoded], dtype=np.int64))
+
+
+def _take(table: ByteColumn, idx: np.ndarray) -> ByteColumn:
+    return ByteColumn(table.data[idx], table.lengths[idx])
+
+
+def _digits(values: np.ndarray) -> ByteColumn:
+    """非负整数的十进制 ASCII"""
+    values = values.astype(np.int64)
+    width = len(str(int(values.max()))) if len(values) else 1
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, width):
+        lengths += values >= 10 ** k
+    exponent = lengths[:, None] - 1 - np.arange(width)
+    digits = (values[:, None] // 10 ** np.maximum(exponent, 0)) % 10 + 48
+    return ByteColumn(np.where(exponent >= 0, digits, 0).astype(np.uint8), lengths)
+
+
+def _encode_bits(values: np.ndarray, chars: int, bits: int, alphabet: np.ndarray) -> np.ndarray:
+    """把 uint64 的低 chars * bits 位按 alphabet 编码为 (n, chars) 字节矩阵（高位在前）"""
+    shifts = np.arange(chars - 1, -1, -1, dtype=np.uint64) * np.uint64(bits)
+    return alphabet[(values[:, None] >> shifts) & np.uint64((1 << bits) - 1)]
+
+
+def _random_bytes(rng: np.random.Generator, n: int, width: int) -> np.ndarray:
+    return np.frombuffer(rng.bytes(n * width), dtype=np.uint8).reshape(n, width)
+
+
+def _ulid(timestamp_ms: np.ndarray, rng: np.random.Generator) -> ByteColumn:
+    """ULID：48 位毫秒时间戳 + 80 位随机数，Crockford base32 编码为 26 个字符"""
+    n = len(timestamp_ms)
+    data = np.concatenate([
+        _encode_bits(timestamp_ms.astype(np.uint64), 10, 5, _CROCKFORD32),
+        _CROCKFORD32[_random_bytes(rng, n, 16) & 31],
+    ], axis=1)
+    return ByteColumn(data, np.full(n, 26, dtype=np.int64))
+
+
+def _hex_id(rng: np.random.Generator, n: int, chars: int) -> ByteColumn:
+    """随机十六进制 ID"""
+    raw = _random_bytes(rng, n, chars // 2)
+    data = np.empty((n, chars), dtype=np.uint8)
+    data[:, 0::2] = _HEX[raw >> 4]
+    data[:, 1::2] = _HEX[raw & 15]
+    return ByteColumn(data, np.full(n, chars, dtype=np.int64))
+
+
+def _varint(values: np.ndarray) -> ByteColumn:
+    """protobuf varint 编码"""
+    remaining = values.astype(np.uint64)
+    data = np.zeros((len(remaining), 10), dtype=np.uint8)
+    lengths = np.ones(len(remaining), dtype=np.int64)
+    for i in range(10):
+        low = (remaining & np.uint64(0x7F)).astype(np.uint8)
+        remaining = remaining >> np.uint64(7)
+        more = remaining > 0
+        data[:, i] = low | (more.astype(np.uint8) << 7)
+        lengths += more
+        if not more.any():
+            return ByteColumn(data[:, :i + 1], lengths)
+    return ByteColumn(data, lengths)
+
+
+def total_length(segments: List[ByteColumn]) -> np.ndarray:
+    return sum(segment.lengths for segment in segments)
+
+
+def pack(segments: List[ByteColumn]) -> np.ndarray:
+    """按行依次拼接各字节列（第 0 行的所有列、第 1 行的所有列……），返回一维 uint8 数组"""
+    data = []
+    mask = []
+    for segment in segments:
+        n, width = segment.data.shape
+        if not width:
+            continue
+        data.append(segment.data)
+        # 定长列（常量、ID）整列有效，不需要逐个比较
+        if segment.lengths.min() == width:
+            mask.append(np.broadcast_to(True, (n, width)))
+        else:
+            mask.append(np.arange(width) < segment.lengths[:, None])
+    # 横向拼成一个矩阵后按有效字节的掩码取出，按行优先顺序即为逐行拼接的结果
+    return np.concatenate(data, axis=1)[np.concatenate(mask, axis=1)]
+
+
+def to_strings(segments: List[ByteColumn]) -> List[str]:
+    """把按行拼接的字节列解码为字符串列表"""
+    ends = np.cumsum(total_length(segments)).tolist()
+    raw = pack(segments).tobytes()
+    starts = [0] + ends[:-1]
+    return [raw[start:end].decode("utf-8") for start, end in zip(starts, ends)]
+
+
+def _field(tag: int, segments: List[ByteColumn]) -> List[ByteColumn]:
+    """长度前缀字段：tag + varint(长度) + 内容"""
+    n = len(segments[0].lengths)
+    return [_const(bytes([tag]), n), _varint(total_length(segments))] + segments
+
+
+class SyntheticLogGenerator:
+    """
+    向量化的合成日志生成器
+
+    Args:
+        seed: 随机种子，与 end_time_ns 一起决定全部数据
+        services: 服务名，按 Zipf 分布（第一个最多）
+        end_time_ns: 时间范围的结束时间（纳秒），默认为当天 UTC 零点，同一天内重复运行得到相同数据
+        days: 时间范围天数
+        utc_offset_hours: 日内流量曲线所在时区
+        users / plans / advertisers / awemes: 各实体的数量
+        bursts_per_day: 平均每天的错误突发次数，每次持续 2-15 分钟
+    """
+
+    def __init__(self, seed: int = 0, services: Sequence[str] = tuple(SERVICE_NAMES), end_time_ns: Optional[int] = None,
+                 days: int = 30, utc_offset_hours: int = 8, users: int = 100000, plans: int = 20000,
+                 advertisers: int = 2000, awemes: int = 200000, bursts_per_day: float = 1.0):
+        self.seed = seed
+        if end_time_ns is None:
+            end_time_ns = int(time.time()) // 86400 * 86400 * 1_000_000_000
+        self.end_time_ns = end_time_ns
+        self.days = days
+        self.utc_offset_s = utc_offset_hours * 3600
+
+        self._services = _table(services)
+        self._messages = _table(INFO_MESSAGES + ERROR_MESSAGES)
+        # 实体 ID、消息编号预先编码为字节表，生成时只按排名取行
+        self._adv_ids = self._entity_table("adv_", advertisers)
+        self._plan_ids = self._entity_table("plan_", plans)
+        self._aweme_ids = self._entity_table("aweme_", awemes)
+        self._user_ids = _digits(np.arange(1, users + 1))
+        self._message_numbers = _digits(np.arange(1, 10001))
+        self._regions = _table(REGIONS)
+        self._platforms = _table(PLATFORMS)
+        self._region_cdf = np.cumsum(REGION_WEIGHTS) / np.sum(REGION_WEIGHTS)
+        self._platform_cdf = np.cumsum(PLATFORM_WEIGHTS) / np.sum(PLATFORM_WEIGHTS)
+        self._level_cdf = np.cumsum(LEVEL_WEIGHTS) / np.sum(LEVEL_WEIGHTS)
+        self._burst_level_cdf = np.cumsum(BURST_LEVEL_WEIGHTS) / np.sum(BURST_LEVEL_WEIGHTS)
+        self._hour_cdf = np.cumsum(HOURLY_WEIGHTS) / np.sum(HOURLY_WEIGHTS)
+
+        # 时间范围内每一天（当地时间）的零点（UTC 秒）和权重
+        end_s = end_time_ns // 1_000_000_000
+        last_local_day = (end_s + self.utc_offset_s) // 86400
+        local_days = np.arange(last_local_day - days + 1, last_local_day + 1)
+        self._day_start_s = local_days * 86400 - self.utc_offset_s
+        weekday = (local_days + 3) % 7  # 1970-01-01 为周四，0 为周一
+        day_weights = np.where(weekday >= 5, WEEKEND_FACTOR, 1.0)
+        self._day_cdf = np.cumsum(day_weights) / day_weights.sum()
+
+        # 错误突发时段只由 seed 决定，所有批次共用
+        rng = np.random.default_rng([seed, 0xB5])
+        count = rng.poisson(bursts_per_day * days)
+        starts = np.sort(rng.uniform(end_s - days * 86400, end_s, count))
+        self._burst_start_ns = (starts * 1e9).astype(np.int64)
+        self._burst_end_ns = self._burst_start_ns + (rng.uniform(120, 900, count) * 1e9).astype(np.int64)
+
+    def columns(self, batch_index: int, count: int) -> Dict[str, Any]:
+        """
+        生成一个批次的各列
+
+        Returns:
+            Dict[str, Any]: timestamp_unix_nano / level 为 NumPy 数组；id、service_name、message、trace_id、span_id
+                为字节列片段列表（List[ByteColumn]）；metadata 为 {键: 字节列片段列表}
+        """
+        rng = np.random.default_rng([self.seed, batch_index, count])
+
+        # 每条 trace 的日志条数服从几何分布，trace 级字段按所属 trace 展开到每条日志
+        sizes = rng.geometric(0.4, size=count)
+        trace = np.repeat(np.arange(count), sizes)[:count]
+        day = _sample(rng, self._day_cdf, count)
+        hour = _sample(rng, self._hour_cdf, count)
+        start_ns = (self._day_start_s[day] + hour * 3600) * 1_000_000_000 + rng.integers(0, 3600 * 10 ** 9, count)
+        start_ns = np.where(start_ns > self.end_time_ns, start_ns - 86400 * 10 ** 9, start_ns)
+        timestamp = start_ns[trace] + (rng.exponential(0.2, count) * 1e9).astype(np.int64)
+
+        burst = np.searchsorted(self._burst_start_ns, timestamp, side="right") - 1
+        in_burst = (burst >= 0) & (timestamp < self._burst_end_ns[np.maximum(burst, 0)])
+        level_u = rng.random(count)
+        level = np.where(in_burst, np.searchsorted(self._burst_level_cdf, level_u, side="right"),
+                         np.searchsorted(self._level_cdf, level_u, side="right"))
+        level = np.minimum(level, log_service_pb2.FATAL).astype(np.int64)
+
+        error = level >= log_service_pb2.ERROR
+        # 消息模板表中 ERROR_MESSAGES 排在 INFO_MESSAGES 之后
+        template = np.where(error, len(INFO_MESSAGES) + _zipf(rng, len(ERROR_MESSAGES), 1.0, count),
+                            _zipf(rng, len(INFO_MESSAGES), 1.0, count))
+        service = _zipf(rng, len(self._services.lengths), 1.2, count)[trace]
+        user = _zipf(rng, len(self._user_ids.lengths), 1.0, count)[trace]
+        plan = _zipf(rng, len(self._plan_ids.lengths), 1.1, count)[trace]
+        aweme = _zipf(rng, len(self._aweme_ids.lengths), 0.9, count)[trace]
+        region = _sample(rng, self._region_cdf, count)[trace]
+        platform = _sample(rng, self._platform_cdf, count)[trace]
+        trace_id = _hex_id(rng, count, 32)
+        trace_id = ByteColumn(trace_id.data[trace], trace_id.lengths)
+
+        return {
+            "id": [_ulid(timestamp // 1_000_000, rng)],
+            "service_name": [_take(self._services, service)],
+            "level": level,
+            "message": [_take(self._messages, template), _const(" - ".encode("utf-8"), count),
+                        _take(self._message_numbers, rng.integers(0, 10000, count))],
+            "timestamp_unix_nano": timestamp,
+            "trace_id": [trace_id],
+            "span_id": [_hex_id(rng, count, 16)],
+            "metadata": {
+                "adv_id": [_take(self._adv_ids, plan % len(self._adv_ids.lengths))],
+                "aweme_id": [_take(self._aweme_ids, aweme)],
+                "plan_id": [_take(self._plan_ids, plan)],
+                "user_id": [_take(self._user_ids, user)],
+                "region": [_take(self._regions, region)],
+                "platform": [_take(self._platforms, platform)],
+            },
+        }
+
+    @staticmethod
+    def _entity_table(prefix: str, count: int) -> ByteColumn:
+        """实体 ID 表：前缀 + 16 位数字，第 i 行为排名 i 的实体"""
+        digits = _digits(_ENTITY_BASE + np.arange(count) * _ENTITY_STRIDE)
+        data = np.concatenate([np.broadcast_to(np.frombuffer(prefix.encode("ascii"), dtype=np.uint8),
+                                               (count, len(prefix))), digits.data], axis=1)
+        return ByteColumn(data, digits.lengths + len(prefix))
+
+    def serialized_batch(self, batch_index: int, count: int) -> bytes:
+        """生成一个批次，直接编码为 BatchWriteLogRequest 字节串"""
+        if count <= 0:
+            return b""
+        columns = self.columns(batch_index, count)
+        n = count
+        level = columns["level"]
+        segments = _field(0x0A, columns["id"]) + _field(0x12, columns["service_name"])
+        # 枚举默认值 DEBUG(0) 按 proto3 规则不编码
+        present = (level != 0).astype(np.int64)
+        segments += [ByteColumn(np.full((n, 1), 0x18, dtype=np.uint8), present),
+                     ByteColumn(level.astype(np.uint8)[:, None], present)]
+        segments += _field(0x22, columns["message"])
+        for key, value in columns["metadata"].items():
+            # map 条目：key 部分（tag + 长度 + 键）和 value 的 tag 是常量，合并为一列
+            key_bytes = key.encode("utf-8")
+            entry = [_const(b"\x0A" + bytes([len(key_bytes)]) + key_bytes + b"\x12", n),
+                     _varint(total_length(value))] + value
+            segments += _field(0x32, entry)
+        segments += _field(0x3A, columns["trace_id"]) + _field(0x42, columns["span_id"])
+        segments += [_const(b"\x48", n), _varint(columns["timestamp_unix_nano"])]
+        return pack(_field(0x0A, segments)).tobytes()
+
+    def batch_request(self, batch_index: int, count: int) -> log_service_pb2.BatchWriteLogRequest:
+        return log_service_pb2.BatchWriteLogRequest.FromString(self.serialized_batch(batch_index, count))
+
+    def entries(self, batch_index: int, count: int) -> List[log_service_pb2.LogEntry]:
+        return list(self.batch_request(batch_index, count).log_entries)
+